@@ -13,11 +13,15 @@ All operations use admin client to bypass RLS while keeping RLS enabled in Supab
 """
 
 import os
+import time
 from datetime import datetime, timedelta, UTC, timezone
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, session
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, session, g
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
 
+# How long importing this module takes (reported by create_app)
+_IMPORT_STARTED = time.perf_counter()
+
 # Define CAT timezone (Central Africa Time - UTC+2)
 CAT = timezone(timedelta(hours=2))
 from flask_wtf import FlaskForm
@@ -26,9 +30,10 @@ from wtforms.validators import DataRequired, Email, Length, ValidationError, Equ
 import json
 from decimal import Decimal
 from flask_wtf.csrf import CSRFProtect
-from supabase import create_client, Client
+from utils.identity_map import close_identity_map
+from utils.query_budget import start_query_trace, finish_query_trace
+from utils.query_shapes import select_shape
 from dotenv import load_dotenv
-import requests
 import functools
 import traceback
 import threading
@@ -92,21 +97,14 @@ try:
     print(f"   Anon key: {'YES' if SUPABASE_ANON_KEY else 'NO'}")
     print(f"   Service key: {'YES' if SUPABASE_SERVICE_KEY else 'NO'}")
     
-    # Initialize regular client
-    supabase: Client = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
+    # Share core's clients: per-thread, counted per request and de-duplicated by the request identity map
+    from core import supabase, supabase_admin
     print("OK: Regular Supabase client initialized")
-    
-    # Initialize admin client with service key
     if SUPABASE_SERVICE_KEY:
-        supabase_admin: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
         print("OK: Admin Supabase client initialized with service key")
     else:
-        supabase_admin = supabase
         print("OK: Using regular client as admin client (no service key)")
-    
-    # Test connections
-    test_response = supabase_admin.table('rooms').select('count').execute()
-    print(f"OK: Database connection test successful")
+    # Connectivity is checked by /health (and create_app when STARTUP_DB_CHECK is set), not at import
     
 except Exception as e:
     print(f"OK: Supabase initialization failed: {e}")
@@ -124,7 +122,13 @@ try:
         get_client_bookings_from_db, create_client_in_db, 
         update_client_in_db, delete_client_from_db,
         ActivityTypes, User as CoreUser,
-        LoginForm, RegistrationForm, ClientForm
+        LoginForm, RegistrationForm, ClientForm, invalidate_reference_data,
+        is_room_available_supabase, booking_changed, get_cached_rooms,
+        get_calendar_feed, calendar_feed_response, queue_activity_log,
+        calculate_booking_total, find_or_create_event_type, iter_rows, iter_table, client_changed,
+        search_clients_indexed, search_company_names, get_daily_rollup, get_room_utilization,
+        load_booking_detail, get_complete_booking_details, get_booking_with_details,
+        check_database_connection, PER_PROCESS_STATE, start_email_outbox
     )
     print("OK: Core functions imported successfully")
     
@@ -161,6 +165,72 @@ except ImportError as core_import_error:
     def create_user_supabase(*args, **kwargs):
         print("ERROR: Core functions not available - user creation disabled")
         return False
+    
+    def invalidate_reference_data(*table_names):
+        pass
+    
+    def booking_changed(old_booking, new_booking):
+        pass
+    
+    def get_cached_rooms(status=None):
+        return []
+    
+    def get_clients_with_booking_counts(exclude_cancelled=False):
+        return []
+    
+    def start_email_outbox():
+        return False
+    
+    def get_calendar_feed(start=None, end=None, room_id=None, since=None, load_events=None):
+        raise ValueError('Calendar feed unavailable without core functions')
+    
+    def calendar_feed_response(feed, payload):
+        return jsonify(payload)
+    
+    def queue_activity_log(log_data):
+        if supabase_admin:
+            supabase_admin.table('user_activity_log').insert(log_data).execute()
+    
+    def calculate_booking_total(room_id, start_time, end_time, addon_ids=None):
+        return 0
+    
+    def find_or_create_event_type(event_type, custom_event_type=None):
+        return None
+    
+    def iter_rows(build_query, key='id', unique=True, stats=None):
+        return build_query().execute().data or []
+    
+    def iter_table(table_name, columns='*', key='id'):
+        return supabase_admin.table(table_name).select(columns).execute().data or []
+    
+    def client_changed(client_id, client=None):
+        pass
+    
+    def search_clients_indexed(query, limit=10, fields=None):
+        return []
+    
+    def search_company_names(query, limit=10):
+        return []
+    
+    def get_daily_rollup(start_date, end_date):
+        return []
+    
+    def get_room_utilization(start_date, end_date):
+        return None
+    
+    def load_booking_detail(booking_id):
+        return None
+    
+    def get_complete_booking_details(booking_id):
+        return None
+    
+    def get_booking_with_details(booking_id):
+        return None
+    
+    def check_database_connection(max_age=None):
+        return {'connected': False, 'error': 'Core functions not available', 'latency_ms': None, 'checked_at': None}
+    
+    PER_PROCESS_STATE = []
 
 # Initialize extensions
 try:
@@ -377,6 +447,19 @@ def load_user(user_id):
 # Request Handlers
 # ===============================
 
+@app.before_request
+def begin_request_query_trace():
+    """Start counting this request's Supabase calls"""
+    start_query_trace()
+
+@app.after_request
+def add_query_summary(response):
+    """Server-Timing header and one summary line with the request's query count, time and N+1 shapes"""
+    identity_map = g.get('_identity_map')
+    finish_query_trace(response, method=request.method, path=request.path, endpoint=request.endpoint,
+                       status=response.status_code, identity_map_served=identity_map.served if identity_map else 0)
+    return response
+
 @app.before_request
 def production_session_validation():
     """Simplified session validation for production"""
@@ -399,6 +482,11 @@ def production_session_validation():
             print(f"=== Redirecting unauthenticated user from {request.endpoint} to login")
             return redirect(url_for('auth.login'))
 
+@app.teardown_request
+def close_request_identity_map(error=None):
+    """Drop the request's identity map and report the round trips it saved"""
+    close_identity_map(f"{request.method} {request.path}")
+
 @app.template_filter('parse_datetime')
 def parse_datetime_filter(date_string):
     """Jinja2 filter to parse datetime strings"""
@@ -489,10 +577,12 @@ def authenticate_user(email, password):
     try:
         print(f"DEBUG: Attempting to authenticate user: {email}")
         
-        response = supabase.auth.sign_in_with_password({
-            "email": email,
-            "password": password
-        })
+        # Sign in on a private client: a sign-in switches the client it runs on to the user's token
+        with supabase.auth_client() as auth_client:
+            response = auth_client.auth.sign_in_with_password({
+                "email": email,
+                "password": password
+            })
         
         if response.user and response.session:
             print(f"DEBUG: Supabase authentication successful")
@@ -847,14 +937,8 @@ def log_user_activity(
             'created_at': get_cat_time().isoformat()
         }
         
-        # Insert into database using admin client (non-blocking)
-        try:
-            result = supabase_admin.table('user_activity_log').insert(log_data).execute()
-            if not result.data:
-                print(f"OK: WARNING: Activity log insert returned no data for {activity_type}")
-        except Exception as db_error:
-            # Log the error but don't raise it to avoid breaking the main functionality
-            print(f"OK: ERROR: Failed to log activity '{activity_type}': {db_error}")
+        # Queue for the batched writer so the request does not wait on the insert
+        queue_activity_log(log_data)
             
     except Exception as e:
         # Catch-all error handler - never let logging break the main app
@@ -1095,6 +1179,7 @@ def create_client_in_db(client_data):
         
         if response.data:
             print(f"OK: DEBUG: Successfully created client with ID: {response.data[0]['id']}")
+            client_changed(response.data[0]['id'], response.data[0])
             return response.data[0]
         else:
             print("OK: DEBUG: Failed to create client - no data returned")
@@ -1110,6 +1195,7 @@ def update_client_in_db(client_id, client_data):
         print(f"=== DEBUG: Updating client ID {client_id} with data: {client_data}")
         
         response = supabase_admin.table('clients').update(client_data).eq('id', client_id).execute()
+        client_changed(client_id, response.data[0] if response.data else client_data)
         
         if response.data:
             print(f"OK: DEBUG: Successfully updated client ID {client_id}")
@@ -1136,6 +1222,7 @@ def delete_client_from_db(client_id):
         
         # If no bookings, proceed with deletion
         response = supabase_admin.table('clients').delete().eq('id', client_id).execute()
+        client_changed(client_id, None)
         
         print(f"OK: DEBUG: Successfully deleted client ID {client_id}")
         return True, "Client deleted successfully"
@@ -1296,108 +1383,6 @@ class AccommodationForm(FlaskForm):
 # Helper Functions
 # ===============================
 
-def get_clients_with_booking_counts():
-    """Get all clients with their booking counts efficiently - ENHANCED WITH DEBUGGING"""
-    try:
-        print("=== DEBUG: Starting enhanced client fetch with booking counts...")
-        
-        # Test basic connectivity first
-        try:
-            test_response = supabase_admin.table('clients').select('id').limit(1).execute()
-            print(f"OK: DEBUG: Database connectivity test passed")
-        except Exception as conn_error:
-            print(f"OK: DEBUG: Database connectivity test failed: {conn_error}")
-            raise Exception(f"Database connection failed: {conn_error}")
-        
-        # Step 1: Get all clients
-        try:
-            print("=== DEBUG: Fetching all clients from database...")
-            clients_response = supabase_admin.table('clients').select('*').execute()
-            clients = clients_response.data if clients_response.data else []
-            print(f"OK: DEBUG: Successfully fetched {len(clients)} clients from database")
-            
-            if len(clients) == 0:
-                print("OK: DEBUG: No clients found in database")
-                return []
-                
-        except Exception as e:
-            print(f"OK: ERROR: Failed to fetch clients from database: {e}")
-            raise Exception(f"Failed to fetch clients: {e}")
-        
-        # Step 2: Get all bookings to count efficiently
-        try:
-            print("=== DEBUG: Fetching all bookings for count calculation...")
-            bookings_response = supabase_admin.table('bookings').select('client_id, status').execute()
-            bookings = bookings_response.data if bookings_response.data else []
-            print(f"OK: DEBUG: Successfully fetched {len(bookings)} bookings")
-            
-            # Count bookings per client (excluding cancelled ones)
-            booking_counts = {}
-            cancelled_count = 0
-            
-            for booking in bookings:
-                client_id = booking.get('client_id')
-                status = booking.get('status', '')
-                
-                if client_id:
-                    if status != 'cancelled':
-                        booking_counts[client_id] = booking_counts.get(client_id, 0) + 1
-                    else:
-                        cancelled_count += 1
-            
-            print(f"=== DEBUG: Booking count calculation complete:")
-            print(f"  - Active bookings counted: {sum(booking_counts.values())}")
-            print(f"  - Cancelled bookings skipped: {cancelled_count}")
-            print(f"  - Clients with bookings: {len(booking_counts)}")
-            
-        except Exception as e:
-            print(f"OK: WARNING: Failed to fetch bookings for counting: {e}")
-            print("=== DEBUG: Setting all booking counts to 0")
-            booking_counts = {}
-        
-        # Step 3: Add booking counts to clients
-        try:
-            for client in clients:
-                client_id = client.get('id')
-                client['booking_count'] = booking_counts.get(client_id, 0)
-                
-                # Ensure all required fields exist with defaults
-                client['company_name'] = client.get('company_name') or None
-                client['contact_person'] = client.get('contact_person') or 'Unknown'
-                client['email'] = client.get('email') or 'unknown@example.com'
-                client['phone'] = client.get('phone') or None
-                client['address'] = client.get('address') or None
-                client['notes'] = client.get('notes') or None
-                
-                # Add computed fields for template compatibility
-                client['display_name'] = client.get('company_name') or client.get('contact_person', 'Unknown Client')
-            
-            print(f"OK: DEBUG: Enhanced {len(clients)} clients with booking counts and default fields")
-            
-            # Debug sample data
-            if clients:
-                sample_client = clients[0]
-                print(f"=== DEBUG: Sample client data structure:")
-                print(f"  - ID: {sample_client.get('id')}")
-                print(f"  - Company: {sample_client.get('company_name')}")
-                print(f"  - Contact: {sample_client.get('contact_person')}")
-                print(f"  - Email: {sample_client.get('email')}")
-                print(f"  - Booking Count: {sample_client.get('booking_count')}")
-            
-            return clients
-            
-        except Exception as e:
-            print(f"OK: ERROR: Failed to process client data: {e}")
-            import traceback
-            traceback.print_exc()
-            raise Exception(f"Failed to process client data: {e}")
-        
-    except Exception as e:
-        print(f"OK: ERROR: get_clients_with_booking_counts failed: {e}")
-        import traceback
-        traceback.print_exc()
-        return []
-
 # Also add this simpler fallback function for troubleshooting:
 
 def get_all_clients_simple():
@@ -1419,32 +1404,24 @@ def get_all_clients_simple():
         print(f"OK: ERROR: Even simple client fetch failed: {e}")
         return []
 
-def is_room_available_supabase(room_id, start_time, end_time, exclude_booking_id=None):
-    """Check if a room is available using Supabase admin client"""
-    try:
-        # Build query to find overlapping bookings using admin client
-        query = supabase_admin.table('bookings').select('id')
-        query = query.eq('room_id', room_id)
-        query = query.neq('status', 'cancelled')
-        query = query.lt('start_time', end_time.isoformat())
-        query = query.gt('end_time', start_time.isoformat())
-        
-        if exclude_booking_id:
-            query = query.neq('id', exclude_booking_id)
-        
-        response = query.execute()
-        return len(response.data) == 0
-    except Exception as e:
-        print(f"Availability check error: {e}")
-        return False
-
-def get_booking_calendar_events_supabase():
-    """Get all bookings formatted for FullCalendar using Supabase admin client with enhanced data accuracy"""
+def get_booking_calendar_events_supabase(start=None, end=None, room_id=None, updated_since=None, raise_errors=False):
+    """Get bookings overlapping [start, end) (or changed since updated_since, cancelled included) formatted for FullCalendar"""
     try:
         print("=== DEBUG: Fetching calendar events from Supabase with enhanced accuracy...")
         
-        # Step 1: Get all bookings with complete data using simple query first for reliability
-        bookings_response = supabase_admin.table('bookings').select('*').neq('status', 'cancelled').execute()
+        # Step 1: Get the window's bookings with complete data using simple query first for reliability
+        bookings_query = select_shape(supabase_admin, 'booking_calendar_row')
+        if updated_since is not None:
+            bookings_query = bookings_query.gte('updated_at', updated_since.isoformat())
+        else:
+            bookings_query = bookings_query.neq('status', 'cancelled')
+            if start is not None:
+                bookings_query = bookings_query.gt('end_time', start.isoformat())
+            if end is not None:
+                bookings_query = bookings_query.lt('start_time', end.isoformat())
+            if room_id:
+                bookings_query = bookings_query.eq('room_id', room_id)
+        bookings_response = bookings_query.execute()
         
         if not bookings_response.data:
             print("OK: DEBUG: No bookings found")
@@ -1453,24 +1430,23 @@ def get_booking_calendar_events_supabase():
         bookings_raw = bookings_response.data
         print(f"OK: DEBUG: Found {len(bookings_raw)} bookings for calendar")
         
-        # Step 2: Get all rooms for lookup
-        rooms_response = supabase_admin.table('rooms').select('*').execute()
-        rooms_lookup = {}
-        if rooms_response.data:
-            for room in rooms_response.data:
-                rooms_lookup[room['id']] = room
+        booking_ids = [booking['id'] for booking in bookings_raw if booking.get('id')]
+        client_ids = list({booking['client_id'] for booking in bookings_raw if booking.get('client_id')})
+        
+        # Step 2: Get rooms for lookup from the reference cache
+        rooms_lookup = {room['id']: room for room in get_cached_rooms()}
         print(f"OK: DEBUG: Created lookup for {len(rooms_lookup)} rooms")
         
-        # Step 3: Get all clients for lookup
-        clients_response = supabase_admin.table('clients').select('*').execute()
+        # Step 3: Get the window's clients for lookup
+        clients_response = select_shape(supabase_admin, 'client_name_row').in_('id', client_ids).execute() if client_ids else None
         clients_lookup = {}
-        if clients_response.data:
+        if clients_response and clients_response.data:
             for client in clients_response.data:
                 clients_lookup[client['id']] = client
         print(f"OK: DEBUG: Created lookup for {len(clients_lookup)} clients")
         
         # Step 4: Get custom addons for total calculation (from new schema)
-        custom_addons_response = supabase_admin.table('booking_custom_addons').select('*').execute()
+        custom_addons_response = select_shape(supabase_admin, 'booking_addon_total').in_('booking_id', booking_ids).execute()
         custom_addons_by_booking = {}
         if custom_addons_response.data:
             for addon in custom_addons_response.data:
@@ -1650,48 +1626,12 @@ def get_booking_calendar_events_supabase():
         print(f"OK: Calendar events error: {e}")
         import traceback
         traceback.print_exc()
+        if raise_errors:
+            raise
         
         # Return empty array instead of error to prevent calendar from breaking
         return []
 
-def calculate_booking_total(room_id, start_time, end_time, addon_ids=None):
-    """Calculate total price for a booking - SIMPLIFIED (NO DISCOUNT)"""
-    try:
-        # Get room data using admin client
-        room_data = supabase_select('rooms', filters=[('id', 'eq', room_id)])
-        if not room_data:
-            return 0
-        
-        room = room_data[0]
-        
-        # Calculate duration in hours
-        duration_hours = (end_time - start_time).total_seconds() / 3600
-        
-        # Calculate room rate based on duration
-        if duration_hours <= 4:
-            room_rate = float(room['hourly_rate']) * duration_hours
-        elif duration_hours <= 6:
-            room_rate = float(room['half_day_rate'])
-        else:
-            room_rate = float(room['full_day_rate'])
-        
-        # Calculate add-ons total
-        addons_total = 0
-        if addon_ids:
-            for addon_id in addon_ids:
-                addon_data = supabase_select('addons', filters=[('id', 'eq', addon_id)])
-                if addon_data:
-                    addons_total += float(addon_data[0]['price'])
-        
-        # Calculate final total (NO DISCOUNT APPLIED)
-        total = room_rate + addons_total
-        return max(total, 0)  # Ensure non-negative
-        
-    except Exception as e:
-        print(f"Price calculation error: {e}")
-        return 0
-    
-    
 def find_or_create_client(client_name, company_name=None, email=None, phone=None):
     """Find existing client or create new one based on name/company"""
     try:
@@ -2055,48 +1995,6 @@ def calculate_room_and_addons_totals(pricing_items):
         print(f"OK: ERROR: Failed to calculate room and addons totals: {e}")
         return 0.0, 0.0
     
-def find_or_create_event_type(event_type, custom_event_type=None):
-    """Find or create event type in the event_types table"""
-    try:
-        # Determine the event type name
-        if event_type == 'other' and custom_event_type:
-            event_name = custom_event_type.strip()
-        else:
-            event_name = event_type.replace('_', ' ').title()
-        
-        print(f"=== DEBUG: Finding/creating event type: {event_name}")
-        
-        # Search for existing event type
-        existing_event = supabase_admin.table('event_types').select('*').eq('name', event_name).execute()
-        
-        if existing_event.data:
-            event_type_id = existing_event.data[0]['id']
-            # Increment usage count
-            supabase_admin.table('event_types').update({
-                'usage_count': existing_event.data[0]['usage_count'] + 1
-            }).eq('id', event_type_id).execute()
-            print(f"OK: DEBUG: Found existing event type: {event_type_id}")
-            return event_type_id
-        
-        # Create new event type
-        event_data = {
-            'name': event_name,
-            'usage_count': 1,
-            'created_at': get_cat_time().isoformat()
-        }
-        
-        result = supabase_insert('event_types', event_data)
-        if result:
-            print(f"OK: DEBUG: Created new event type with ID: {result['id']}")
-            return result['id']
-        else:
-            print(f"OK: DEBUG: Failed to create event type")
-            return None
-            
-    except Exception as e:
-        print(f"OK: ERROR: Failed to find/create event type: {e}")
-        return None
-
 def find_or_create_client_enhanced(client_name, company_name=None, email=None):
     """Enhanced client finding/creation with better error handling"""
     try:
@@ -2142,6 +2040,7 @@ def find_or_create_client_enhanced(client_name, company_name=None, email=None):
         result = supabase_insert('clients', client_data)
         if result:
             print(f"OK: DEBUG: Created new client with ID: {result['id']}")
+            client_changed(result['id'], result)
             return result['id']
         else:
             print(f"OK: DEBUG: Failed to create new client")
@@ -2196,6 +2095,7 @@ def create_complete_booking(booking_data, client_id, event_type_id):
             return None
         
         booking_id = booking_result['id']
+        booking_changed(None, booking_result)
         print(f"OK: DEBUG: Created booking with ID: {booking_id}, Room Rate: ${room_rate:.2f}, Addons: ${addons_total:.2f}")
         
         # Create custom addon records
@@ -2223,59 +2123,6 @@ def create_complete_booking(booking_data, client_id, event_type_id):
         traceback.print_exc()
         return None
 
-def get_complete_booking_details(booking_id):
-    """Get complete booking details including all related data"""
-    try:
-        print(f"=== DEBUG: Fetching complete booking details for ID {booking_id}")
-        
-        # Get main booking data with related tables
-        booking_response = supabase_admin.table('bookings').select("""
-            *,
-            room:rooms(*),
-            client:clients(*),
-            event_type:event_types(*)
-        """).eq('id', booking_id).execute()
-        
-        if not booking_response.data:
-            return None
-        
-        booking = booking_response.data[0]
-        
-        # Get creator's username if created_by exists
-        if booking.get('created_by'):
-            try:
-                creator_response = supabase_admin.table('users').select('first_name, last_name, username, email').eq('id', booking['created_by']).execute()
-                if creator_response.data:
-                    creator = creator_response.data[0]
-                    # Build full name or use username
-                    if creator.get('first_name') and creator.get('last_name'):
-                        booking['created_by_name'] = f"{creator['first_name']} {creator['last_name']}"
-                    elif creator.get('username'):
-                        booking['created_by_name'] = creator['username']
-                    else:
-                        booking['created_by_name'] = creator.get('email', 'Unknown User')
-                else:
-                    booking['created_by_name'] = 'Unknown User'
-            except Exception as user_error:
-                print(f"OK: WARNING: Could not fetch creator details: {user_error}")
-                booking['created_by_name'] = 'Unknown User'
-        else:
-            booking['created_by_name'] = 'System'
-        
-        # Get custom addons
-        addons_response = supabase_admin.table('booking_custom_addons').select('*').eq('booking_id', booking_id).execute()
-        booking['custom_addons'] = addons_response.data if addons_response.data else []
-        
-        # Convert datetime strings
-        booking = convert_datetime_strings(booking)
-        
-        print(f"OK: DEBUG: Successfully fetched complete booking details")
-        return booking
-        
-    except Exception as e:
-        print(f"OK: ERROR: Failed to fetch complete booking details: {e}")
-        return None
-
 def update_complete_booking(booking_id, booking_data, existing_booking):
     """Update booking with all related data (user-entered rates)"""
     try:
@@ -2334,6 +2181,7 @@ def update_complete_booking(booking_id, booking_data, existing_booking):
         if not booking_result:
             print("OK: ERROR: Failed to update booking record")
             return False
+        booking_changed(existing_booking, dict(booking_update, id=booking_id))
         
         # Delete existing custom addons
         supabase_admin.table('booking_custom_addons').delete().eq('booking_id', booking_id).execute()
@@ -2557,7 +2405,10 @@ def logout():
             print(f"Failed to log logout: {log_error}")
     
     try:
-        supabase.auth.sign_out()
+        # Revoke the user's own token; the shared clients never hold a user session
+        access_token = (session.get('supabase_session') or {}).get('access_token')
+        if access_token:
+            supabase_admin.auth.admin.sign_out(access_token)
         session.pop('supabase_session', None)
         logout_user()
         flash('You have been logged out', 'info')
@@ -2764,14 +2615,13 @@ def dashboard_legacy():
         try:
             print("=== DEBUG: Fetching today's bookings...")
             
-            today_bookings = supabase_admin.table('bookings').select("""
+            today_bookings_raw = list(iter_rows(lambda: supabase_admin.table('bookings').select("""
                 *,
                 room:rooms(name),
                 client:clients(company_name, contact_person)
-            """).gte('start_time', today).lt('start_time', tomorrow).neq('status', 'cancelled').execute()
+            """).gte('start_time', today).lt('start_time', tomorrow).neq('status', 'cancelled')))
             
-            if today_bookings.data:
-                today_bookings_raw = today_bookings.data
+            if today_bookings_raw:
                 print(f"OK: DEBUG: Found {len(today_bookings_raw)} today's bookings")
                 
                 # Process each booking to ensure room and client data
@@ -2810,11 +2660,12 @@ def dashboard_legacy():
             # Similar fallback for today's bookings
             try:
                 print("=== DEBUG: Trying fallback approach for today's bookings")
-                today_simple = supabase_admin.table('bookings').select('*').gte('start_time', today).lt('start_time', tomorrow).neq('status', 'cancelled').execute()
+                today_simple = list(iter_rows(lambda: supabase_admin.table('bookings').select('*').gte(
+                    'start_time', today).lt('start_time', tomorrow).neq('status', 'cancelled')))
                 
-                if today_simple.data:
+                if today_simple:
                     today_bookings_data = []
-                    for booking in today_simple.data:
+                    for booking in today_simple:
                         # Manually fetch room and client data
                         room_data = supabase_admin.table('rooms').select('name').eq('id', booking.get('room_id')).execute()
                         client_data = supabase_admin.table('clients').select('company_name, contact_person').eq('id', booking.get('client_id')).execute()
@@ -2832,24 +2683,22 @@ def dashboard_legacy():
         # Get total counts with individual error handling
         try:
             print("=== DEBUG: Fetching total rooms...")
-            rooms_response = supabase_admin.table('rooms').select('id').execute()
-            total_rooms = len(rooms_response.data) if rooms_response.data else 0
+            total_rooms = sum(1 for _ in iter_rows(lambda: supabase_admin.table('rooms').select('id')))
             print(f"OK: DEBUG: Found {total_rooms} total rooms")
         except Exception as e:
             print(f"OK: DEBUG: Error fetching room count: {e}")
         
         try:
             print("=== DEBUG: Fetching total clients...")
-            clients_response = supabase_admin.table('clients').select('id').execute()
-            total_clients = len(clients_response.data) if clients_response.data else 0
+            total_clients = sum(1 for _ in iter_rows(lambda: supabase_admin.table('clients').select('id')))
             print(f"OK: DEBUG: Found {total_clients} total clients")
         except Exception as e:
             print(f"OK: DEBUG: Error fetching client count: {e}")
         
         try:
             print("=== DEBUG: Fetching active bookings...")
-            active_bookings_response = supabase_admin.table('bookings').select('id').gte('end_time', now).neq('status', 'cancelled').execute()
-            total_active_bookings = len(active_bookings_response.data) if active_bookings_response.data else 0
+            total_active_bookings = sum(1 for _ in iter_rows(lambda: supabase_admin.table('bookings').select('id').gte(
+                'end_time', now).neq('status', 'cancelled')))
             print(f"OK: DEBUG: Found {total_active_bookings} active bookings")
         except Exception as e:
             print(f"OK: DEBUG: Error fetching active bookings count: {e}")
@@ -2934,8 +2783,14 @@ def get_events():
     try:
         print("=== DEBUG: API events endpoint called with enhanced data processing")
         
-        # Get events using the improved function
-        events = get_booking_calendar_events_supabase()
+        # Get the requested window (FullCalendar sends start/end) or the changes since a cursor
+        since = request.args.get('since')
+        feed = get_calendar_feed(
+            start=request.args.get('start'), end=request.args.get('end'),
+            room_id=request.args.get('room_id', type=int), since=since,
+            load_events=lambda start, end, room_id, updated_since: get_booking_calendar_events_supabase(
+                start, end, room_id, updated_since, raise_errors=True))
+        events = feed['events']
         
         # Validate events data before returning
         valid_events = []
@@ -3017,7 +2872,11 @@ def get_events():
         print(f"  - Invalid events: {validation_stats['invalid_events']}")
         
         # Add validation stats to response headers for debugging (optional)
-        response = jsonify(valid_events)
+        if since:
+            response = calendar_feed_response(feed, {'incremental': feed['incremental'], 'reset': feed['reset'],
+                                                     'events': valid_events, 'removed': feed['removed']})
+        else:
+            response = calendar_feed_response(feed, valid_events)
         response.headers['X-Events-Total'] = str(validation_stats['total_processed'])
         response.headers['X-Events-Valid'] = str(validation_stats['valid_events'])
         response.headers['X-Events-With-Attendees'] = str(validation_stats['events_with_attendees'])
@@ -3039,6 +2898,8 @@ def get_events():
         
         return response
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         print(f"OK: Calendar events API error: {e}")
         import traceback
@@ -3055,6 +2916,10 @@ def get_events():
         except Exception as log_error:
             print(f"Failed to log calendar events error: {log_error}")
         
+        # Incremental clients must keep their cursor, so report the failure instead of an empty delta
+        if request.args.get('since'):
+            return jsonify({'error': 'Failed to load calendar changes'}), 500
+        
         # Return empty array with error information in headers
         response = jsonify([])
         response.headers['X-Error'] = str(e)[:200]  # Limit error message length
@@ -3072,20 +2937,16 @@ def api_search_clients():
         if len(query) < 2:
             return jsonify([])
         
-        # Search in both company_name and contact_person fields
-        clients_response = supabase_admin.table('clients').select('id, company_name, contact_person, email, phone').or_(
-            f'company_name.ilike.%{query}%,contact_person.ilike.%{query}%'
-        ).limit(10).execute()
-        
+        # Ranked matches from the in-process client search index
         suggestions = []
-        for client in clients_response.data if clients_response.data else []:
+        for client in search_clients_indexed(query, limit=10):
             suggestions.append({
                 'id': client['id'],
-                'name': client.get('contact_person', ''),
-                'company': client.get('company_name', ''),
-                'email': client.get('email', ''),
-                'phone': client.get('phone', ''),
-                'display_name': f"{client.get('contact_person', '')} ({client.get('company_name', 'No Company')})" if client.get('company_name') else client.get('contact_person', '')
+                'name': client.get('contact_person') or '',
+                'company': client.get('company_name') or '',
+                'email': client.get('email') or '',
+                'phone': client.get('phone') or '',
+                'display_name': f"{client.get('contact_person') or ''} ({client.get('company_name')})" if client.get('company_name') else client.get('contact_person') or ''
             })
         
         return jsonify(suggestions)
@@ -3103,17 +2964,8 @@ def api_search_companies():
         if len(query) < 2:
             return jsonify([])
         
-        # Get unique company names
-        companies_response = supabase_admin.table('clients').select('company_name').ilike('company_name', f'%{query}%').execute()
-        
-        companies = []
-        seen_companies = set()
-        
-        for client in companies_response.data if companies_response.data else []:
-            company_name = client.get('company_name')
-            if company_name and company_name not in seen_companies:
-                companies.append({'name': company_name})
-                seen_companies.add(company_name)
+        # Distinct company names from the in-process client search index
+        companies = [{'name': client['company_name']} for client in search_company_names(query, limit=10)]
         
         return jsonify(companies[:10])  # Limit to 10 results
         
@@ -3206,6 +3058,7 @@ def new_room():
             print(f"DEBUG: Insert result: {result}")
             
             if result:
+                invalidate_reference_data('rooms')
                 flash('Conference room added successfully', 'success')
                 return redirect(url_for('rooms'))
             else:
@@ -3312,6 +3165,7 @@ def edit_room(id):
             print(f"DEBUG: Update result: {result}")
             
             if result:
+                invalidate_reference_data('rooms')
                 flash('Conference room updated successfully', 'success')
                 return redirect(url_for('rooms'))
             else:
@@ -3379,6 +3233,7 @@ def delete_room(id):
         flash('Cannot delete room with existing bookings', 'danger')
     else:
         if supabase_delete('rooms', [('id', 'eq', id)]):
+            invalidate_reference_data('rooms')
             flash('Conference room deleted successfully', 'success')
         else:
             flash('Error deleting room', 'danger')
@@ -3407,7 +3262,7 @@ def clients():
         # Try the enhanced function first
         try:
             print("=== DEBUG: Attempting to get clients with booking counts...")
-            clients_data = get_clients_with_booking_counts()
+            clients_data = get_clients_with_booking_counts(exclude_cancelled=True)
             print(f"OK: DEBUG: Enhanced function returned {len(clients_data)} clients")
         except Exception as enhanced_error:
             print(f"OK: DEBUG: Enhanced function failed: {enhanced_error}")
@@ -3415,17 +3270,17 @@ def clients():
             # Fallback: Get clients directly without booking counts
             print("=== DEBUG: Trying fallback approach...")
             try:
-                clients_response = supabase_admin.table('clients').select('*').order('company_name').execute()
-                clients_data = clients_response.data if clients_response.data else []
+                clients_data = list(iter_rows(lambda: supabase_admin.table('clients').select('*')))
                 
-                # Add booking count manually for each client
+                # Count every client's non-cancelled bookings in one paged pass
+                booking_counts = {}
+                try:
+                    for booking in iter_rows(lambda: supabase_admin.table('bookings').select('id, client_id').neq('status', 'cancelled')):
+                        booking_counts[booking.get('client_id')] = booking_counts.get(booking.get('client_id'), 0) + 1
+                except Exception as booking_error:
+                    print(f"OK: DEBUG: Error getting booking counts: {booking_error}")
                 for client in clients_data:
-                    try:
-                        bookings_response = supabase_admin.table('bookings').select('id').eq('client_id', client['id']).neq('status', 'cancelled').execute()
-                        client['booking_count'] = len(bookings_response.data) if bookings_response.data else 0
-                    except Exception as booking_error:
-                        print(f"OK: DEBUG: Error getting booking count for client {client.get('id')}: {booking_error}")
-                        client['booking_count'] = 0
+                    client['booking_count'] = booking_counts.get(client['id'], 0)
                 
                 print(f"OK: DEBUG: Fallback successful - {len(clients_data)} clients loaded")
                 
@@ -3433,8 +3288,7 @@ def clients():
                 print(f"OK: DEBUG: Fallback also failed: {fallback_error}")
                 # Last resort: get basic client data
                 try:
-                    basic_response = supabase_admin.table('clients').select('*').execute()
-                    clients_data = basic_response.data if basic_response.data else []
+                    clients_data = list(iter_rows(lambda: supabase_admin.table('clients').select('*')))
                     for client in clients_data:
                         client['booking_count'] = 0  # Set default
                     print(f"OK: DEBUG: Basic fallback: {len(clients_data)} clients (no booking counts)")
@@ -4003,6 +3857,7 @@ def new_addon():
         
         result = supabase_insert('addons', addon_data)
         if result:
+            invalidate_reference_data('addons')
             flash('Add-on service created successfully', 'success')
             return redirect(url_for('addons'))
         else:
@@ -4036,6 +3891,7 @@ def edit_addon(id):
         
         result = supabase_update('addons', update_data, [('id', 'eq', id)])
         if result:
+            invalidate_reference_data('addons')
             flash('Add-on updated successfully', 'success')
             return redirect(url_for('addons'))
         else:
@@ -4071,6 +3927,7 @@ def new_addon_category():
             result = supabase_insert('addon_categories', category_data)
             
             if result:
+                invalidate_reference_data('addon_categories')
                 flash('Category added successfully', 'success')
                 return redirect(url_for('addons'))
             else:
@@ -4104,6 +3961,7 @@ def new_addon_category_simple():
             result = supabase_insert('addon_categories', category_data)
             
             if result:
+                invalidate_reference_data('addon_categories')
                 flash('Category added successfully', 'success')
                 return redirect(url_for('addons'))
             else:
@@ -4151,6 +4009,7 @@ def api_create_addon_category():
         result = supabase_insert('addon_categories', category_data)
         
         if result:
+            invalidate_reference_data('addon_categories')
             return jsonify({
                 'success': True, 
                 'message': 'Category added successfully',
@@ -4186,6 +4045,7 @@ def edit_addon_category(id):
             result = supabase_update('addon_categories', update_data, [('id', 'eq', id)])
             
             if result:
+                invalidate_reference_data('addon_categories')
                 flash('Category updated successfully', 'success')
             else:
                 flash('Error updating category', 'danger')
@@ -4217,6 +4077,7 @@ def delete_addon_category(id):
         flash('Cannot delete category with existing add-ons', 'danger')
     else:
         if supabase_delete('addon_categories', [('id', 'eq', id)]):
+            invalidate_reference_data('addon_categories', 'addons')
             flash('Category deleted successfully', 'success')
         else:
             flash('Error deleting category', 'danger')
@@ -4234,6 +4095,7 @@ def delete_addon(id):
         flash('Cannot delete add-on that is used in bookings', 'danger')
     else:
         if supabase_delete('addons', [('id', 'eq', id)]):
+            invalidate_reference_data('addons')
             flash('Add-on deleted successfully', 'success')
         else:
             flash('Error deleting add-on', 'danger')
@@ -4461,12 +4323,14 @@ def delete_booking(id):
     """Cancel a booking (soft delete) - NOW WITH ACTIVITY LOGGING"""
     try:
         # Get booking details before deletion for logging
-        booking_data = supabase_admin.table('bookings').select('title, room_id, client_id').eq('id', id).execute()
+        booking_data = supabase_admin.table('bookings').select('id, title, room_id, client_id, status, total_price, start_time, end_time').eq('id', id).execute()
         booking_title = booking_data.data[0]['title'] if booking_data.data else f'Booking #{id}'
         
         result = supabase_update('bookings', {'status': 'cancelled'}, [('id', 'eq', id)])
         
         if result:
+            old_booking = booking_data.data[0] if booking_data.data else {'id': id}
+            booking_changed(old_booking, dict(old_booking, status='cancelled'))
             try:
                 log_user_activity(
                     ActivityTypes.CANCEL_BOOKING,
@@ -4523,6 +4387,7 @@ def change_booking_status(id, status):
         result = supabase_update('bookings', {'status': status}, [('id', 'eq', id)])
         
         if result:
+            booking_changed({'id': id}, {'id': id, 'status': status})
             status_messages = {
                 'tentative': 'Booking marked as tentative',
                 'confirmed': 'Booking confirmed successfully', 
@@ -4926,16 +4791,17 @@ def reports():
             print(f"=== DEBUG: Fetching bookings from {current_month_start_iso}...")
             
             # Use admin client with explicit error handling
-            bookings_response = supabase_admin.table('bookings').select('id, total_price, start_time, end_time, status').gte('start_time', current_month_start_iso).execute()
+            month_bookings = list(iter_rows(lambda: supabase_admin.table('bookings').select(
+                'id, total_price, start_time, end_time, status').gte('start_time', current_month_start_iso)))
             
-            print(f"=== DEBUG: Raw bookings response: {len(bookings_response.data) if bookings_response.data else 0} total records")
+            print(f"=== DEBUG: Raw bookings response: {len(month_bookings)} total records")
             
-            if bookings_response.data:
+            if month_bookings:
                 # Filter out cancelled bookings and calculate revenue
                 valid_bookings = []
                 total_revenue = 0.0
                 
-                for booking in bookings_response.data:
+                for booking in month_bookings:
                     if booking.get('status') != 'cancelled':
                         valid_bookings.append(booking)
                         # Safely convert total_price to float
@@ -4958,12 +4824,13 @@ def reports():
             # Try fallback approach
             try:
                 print("=== DEBUG: Trying fallback bookings query...")
-                fallback_bookings = supabase_admin.table('bookings').select('*').execute()
-                if fallback_bookings.data:
+                fallback_bookings = iter_rows(lambda: supabase_admin.table('bookings').select(
+                    'id, status, start_time, total_price'))
+                if fallback_bookings:
                     # Filter manually
                     month_bookings = 0
                     month_revenue = 0.0
-                    for booking in fallback_bookings.data:
+                    for booking in fallback_bookings:
                         try:
                             if booking.get('status') != 'cancelled':
                                 booking_date = datetime.fromisoformat(booking['start_time'].replace('Z', '+00:00')).date()
@@ -5025,12 +4892,12 @@ def reports():
             print("=== DEBUG: Fetching popular addons...")
             
             # Get booking addons for current month
-            booking_addons_response = supabase_admin.table('booking_addons').select('addon_id').execute()
+            booking_addons = list(iter_rows(lambda: supabase_admin.table('booking_addons').select('id, addon_id')))
             
-            if booking_addons_response.data:
+            if booking_addons:
                 # Count addon usage
                 addon_counts = {}
-                for ba in booking_addons_response.data:
+                for ba in booking_addons:
                     addon_id = ba.get('addon_id')
                     if addon_id:
                         addon_counts[addon_id] = addon_counts.get(addon_id, 0) + 1
@@ -5130,8 +4997,8 @@ def client_analysis_report():
         
         # Step 1: Get all clients using admin client (reliable approach)
         try:
-            all_clients_response = supabase_admin.table('clients').select('*').execute()
-            all_clients = all_clients_response.data if all_clients_response.data else []
+            all_clients = list(iter_rows(lambda: supabase_admin.table('clients').select(
+                'id, company_name, contact_person, email, phone')))
             print(f"OK: DEBUG: Found {len(all_clients)} total clients")
         except Exception as e:
             print(f"OK: ERROR: Failed to fetch clients: {e}")
@@ -5143,9 +5010,9 @@ def client_analysis_report():
             end_date_iso = end_date.isoformat()
             
             # Simple booking query first
-            bookings_response = supabase_admin.table('bookings').select('*').gte('start_time', start_date_iso).lte('end_time', end_date_iso).neq('status', 'cancelled').execute()
-            
-            bookings_raw = bookings_response.data if bookings_response.data else []
+            bookings_raw = list(iter_rows(lambda: supabase_admin.table('bookings').select(
+                'id, client_id, total_price, start_time'
+            ).gte('start_time', start_date_iso).lte('end_time', end_date_iso).neq('status', 'cancelled')))
             print(f"OK: DEBUG: Found {len(bookings_raw)} bookings for date range")
         except Exception as e:
             print(f"OK: ERROR: Failed to fetch bookings: {e}")
@@ -5160,13 +5027,8 @@ def client_analysis_report():
             print(f"OK: ERROR: Failed to fetch rooms: {e}")
             rooms_lookup = {}
         
-        try:
-            clients_response = supabase_admin.table('clients').select('id, company_name, contact_person, email, phone').execute()
-            clients_lookup = {client['id']: client for client in clients_response.data} if clients_response.data else {}
-            print(f"OK: DEBUG: Created lookup for {len(clients_lookup)} clients")
-        except Exception as e:
-            print(f"OK: ERROR: Failed to fetch clients for lookup: {e}")
-            clients_lookup = {}
+        clients_lookup = {client['id']: client for client in all_clients}
+        print(f"OK: DEBUG: Created lookup for {len(clients_lookup)} clients")
         
         # Step 4: Process bookings and build client statistics
         client_stats = {}
@@ -5449,13 +5311,11 @@ def revenue_report():
             end_date_iso = end_date.isoformat()
             
             # Get bookings with room and client details
-            bookings_response = supabase_admin.table('bookings').select("""
+            bookings_raw = list(iter_rows(lambda: supabase_admin.table('bookings').select("""
                 *,
                 room:rooms(id, name, hourly_rate, half_day_rate, full_day_rate),
                 client:clients(id, company_name, contact_person)
-            """).eq('status', 'confirmed').gte('start_time', start_date_iso).lte('end_time', end_date_iso).execute()
-            
-            bookings_raw = bookings_response.data if bookings_response.data else []
+            """).eq('status', 'confirmed').gte('start_time', start_date_iso).lte('end_time', end_date_iso)))
             print(f"OK: DEBUG: Found {len(bookings_raw)} confirmed bookings")
             
         except Exception as e:
@@ -5463,8 +5323,8 @@ def revenue_report():
             # Fallback approach
             try:
                 print("=== DEBUG: Trying fallback approach for bookings")
-                bookings_simple = supabase_admin.table('bookings').select('*').eq('status', 'confirmed').gte('start_time', start_date_iso).lte('end_time', end_date_iso).execute()
-                bookings_raw = bookings_simple.data if bookings_simple.data else []
+                bookings_raw = list(iter_rows(lambda: supabase_admin.table('bookings').select('*').eq(
+                    'status', 'confirmed').gte('start_time', start_date_iso).lte('end_time', end_date_iso)))
                 
                 # Manually fetch room and client data for each booking
                 for booking in bookings_raw:
@@ -5482,25 +5342,23 @@ def revenue_report():
                 print(f"OK: DEBUG: Fallback also failed: {fallback_error}")
                 bookings_raw = []
         
-        # Step 2: Get booking addons for revenue calculation
+        # Step 2: Get booking addons for revenue calculation, keeping only the window's bookings
+        window_booking_ids = {booking.get('id') for booking in bookings_raw}
         try:
-            booking_addons_response = supabase_admin.table('booking_addons').select("""
-                booking_id, quantity,
+            booking_addons_raw = [ba for ba in iter_rows(lambda: supabase_admin.table('booking_addons').select("""
+                id, booking_id, quantity,
                 addon:addons(id, name, price, category:addon_categories(name))
-            """).execute()
-            
-            booking_addons_raw = booking_addons_response.data if booking_addons_response.data else []
+            """)) if ba.get('booking_id') in window_booking_ids]
             print(f"OK: DEBUG: Found {len(booking_addons_raw)} booking addon records")
             
         except Exception as e:
             print(f"OK: ERROR: Failed to fetch booking addons: {e}")
             # Fallback
             try:
-                booking_addons_simple = supabase_admin.table('booking_addons').select('*').execute()
                 booking_addons_raw = []
                 
-                for ba in booking_addons_simple.data if booking_addons_simple.data else []:
-                    if ba.get('addon_id'):
+                for ba in iter_rows(lambda: supabase_admin.table('booking_addons').select('*')):
+                    if ba.get('addon_id') and ba.get('booking_id') in window_booking_ids:
                         addon_data = supabase_admin.table('addons').select('id, name, price').eq('id', ba['addon_id']).execute()
                         if addon_data.data:
                             addon = addon_data.data[0]
@@ -5705,9 +5563,9 @@ def popular_addons_report():
             start_date_iso = start_date.isoformat()
             end_date_iso = end_date.isoformat()
             
-            bookings_response = supabase_admin.table('bookings').select('id, start_time, total_price, status').gte('start_time', start_date_iso).lte('end_time', end_date_iso).neq('status', 'cancelled').execute()
-            
-            bookings_raw = bookings_response.data if bookings_response.data else []
+            bookings_raw = list(iter_rows(lambda: supabase_admin.table('bookings').select(
+                'id, start_time, total_price, status'
+            ).gte('start_time', start_date_iso).lte('end_time', end_date_iso).neq('status', 'cancelled')))
             print(f"OK: DEBUG: Found {len(bookings_raw)} bookings for date range")
         except Exception as e:
             print(f"OK: ERROR: Failed to fetch bookings: {e}")
@@ -5720,20 +5578,17 @@ def popular_addons_report():
         
         print(f"=== DEBUG: Valid booking IDs count: {len(valid_booking_ids)}")
         
-        # Step 2: Get all booking_addons (simple query)
+        # Step 2: Page through booking_addons, keeping only those in our date range
+        filtered_booking_addons = []
         try:
-            booking_addons_response = supabase_admin.table('booking_addons').select('*').execute()
-            booking_addons_raw = booking_addons_response.data if booking_addons_response.data else []
-            print(f"OK: DEBUG: Found {len(booking_addons_raw)} total booking_addons records")
+            scanned = 0
+            for ba in iter_rows(lambda: supabase_admin.table('booking_addons').select('*')):
+                scanned += 1
+                if ba.get('booking_id') in valid_booking_ids:
+                    filtered_booking_addons.append(ba)
+            print(f"OK: DEBUG: Found {scanned} total booking_addons records")
         except Exception as e:
             print(f"OK: ERROR: Failed to fetch booking_addons: {e}")
-            booking_addons_raw = []
-        
-        # Filter booking_addons to only those in our date range
-        filtered_booking_addons = []
-        for ba in booking_addons_raw:
-            if ba.get('booking_id') in valid_booking_ids:
-                filtered_booking_addons.append(ba)
         
         print(f"=== DEBUG: Filtered to {len(filtered_booking_addons)} booking_addons in date range")
         
@@ -5975,10 +5830,9 @@ def room_utilization_report():
         
         print(f"=== DEBUG: Date range: {start_date} to {end_date}")
         
-        # Step 1: Get all rooms using admin client
+        # Step 1: Get all rooms from the reference cache
         try:
-            rooms_response = supabase_admin.table('rooms').select('*').execute()
-            rooms = rooms_response.data if rooms_response.data else []
+            rooms = get_cached_rooms()
             print(f"OK: DEBUG: Found {len(rooms)} rooms")
         except Exception as e:
             print(f"OK: ERROR: Failed to fetch rooms: {e}")
@@ -5994,21 +5848,29 @@ def room_utilization_report():
                                   start_date=start_date,
                                   end_date=end_date)
         
-        # Step 2: Get bookings for the date range using admin client
+        # Step 2: Booked business hours per room, clipped to the range, from the utilization engine
         try:
-            start_date_iso = start_date.isoformat()
-            end_date_iso = end_date.isoformat()
-            
-            # Get bookings that overlap with our date range
-            bookings_response = supabase_admin.table('bookings').select("""
-                id, room_id, start_time, end_time, total_price, status
-            """).gte('start_time', start_date_iso).lte('end_time', end_date_iso).neq('status', 'cancelled').execute()
-            
-            bookings = bookings_response.data if bookings_response.data else []
-            print(f"OK: DEBUG: Found {len(bookings)} bookings for date range")
+            utilization = get_room_utilization(start_date, end_date)
         except Exception as e:
-            print(f"OK: ERROR: Failed to fetch bookings: {e}")
-            bookings = []
+            print(f"OK: ERROR: Failed to compute room utilization: {e}")
+            utilization = None
+        
+        # Revenue and booking counts per room from the daily rollup
+        try:
+            rollup_rows = get_daily_rollup(start_date, end_date)
+            print(f"OK: DEBUG: Found {len(rollup_rows)} rollup rows for date range")
+        except Exception as e:
+            print(f"OK: ERROR: Failed to fetch daily rollup: {e}")
+            rollup_rows = []
+        
+        room_totals = {}
+        for row in rollup_rows:
+            if row.get('status') == 'cancelled':
+                continue
+            totals = room_totals.setdefault(row.get('room_id'), {'revenue': 0, 'bookings': 0})
+            totals['revenue'] += float(row.get('revenue') or 0)
+            totals['bookings'] += int(row.get('event_count') or 0)
+        total_bookings = sum(totals['bookings'] for totals in room_totals.values())
         
         # Step 3: Calculate utilization for each room
         utilization_data = []
@@ -6019,46 +5881,15 @@ def room_utilization_report():
         
         # Calculate total days in the period
         total_days = (end_date - start_date).days + 1
-        business_hours_per_day = 10  # Assume 10 business hours per day
+        business_hours_per_day = utilization.hours_per_day if utilization else 10
         
         for room in rooms:
             room_id = room.get('id')
             room_name = room.get('name', 'Unknown Room')
             
-            print(f"=== DEBUG: Processing room '{room_name}' (ID: {room_id})")
-            
-            # Get bookings for this specific room
-            room_bookings = [b for b in bookings if b.get('room_id') == room_id]
-            
-            room_hours = 0
-            room_revenue = 0
-            
-            # Calculate booked hours and revenue for this room
-            for booking in room_bookings:
-                try:
-                    # Parse booking times
-                    if isinstance(booking['start_time'], str):
-                        start_time = datetime.fromisoformat(booking['start_time'].replace('Z', '+00:00'))
-                        end_time = datetime.fromisoformat(booking['end_time'].replace('Z', '+00:00'))
-                    else:
-                        start_time = booking['start_time']
-                        end_time = booking['end_time']
-                    
-                    # Calculate duration in hours
-                    duration = (end_time - start_time).total_seconds() / 3600
-                    room_hours += duration
-                    
-                    # Add revenue
-                    revenue = float(booking.get('total_price', 0))
-                    room_revenue += revenue
-                    
-                    print(f"  === Booking: {duration:.1f} hours, ${revenue:.2f}")
-                    
-                except (ValueError, TypeError, KeyError) as e:
-                    print(f"  OK: Error parsing booking {booking.get('id', 'unknown')}: {e}")
-                    # Use fallback values
-                    room_hours += 4  # Assume 4 hours average
-                    room_revenue += float(booking.get('total_price', 0))
+            totals = room_totals.get(room_id, {'revenue': 0, 'bookings': 0})
+            room_hours = utilization.room_hours(room_id) if utilization else 0
+            room_revenue = totals['revenue']
             
             # Calculate available hours for this room
             available_hours = total_days * business_hours_per_day
@@ -6073,7 +5904,7 @@ def room_utilization_report():
                 'total_available_hours': available_hours,
                 'utilization_pct': round(utilization_pct, 1),
                 'revenue': round(room_revenue, 2),
-                'bookings_count': len(room_bookings)
+                'bookings_count': totals['bookings']
             }
             
             utilization_data.append(room_data)
@@ -6098,12 +5929,12 @@ def room_utilization_report():
         # Summary statistics for the template
         summary_stats = {
             'total_rooms': len(rooms),
-            'total_bookings': len(bookings),
+            'total_bookings': total_bookings,
             'total_revenue': round(total_revenue, 2),
             'total_hours_booked': round(total_hours_booked, 1),
             'total_hours_available': total_hours_available,
             'overall_utilization': round(overall_utilization, 1),
-            'avg_booking_value': round(total_revenue / len(bookings), 2) if bookings else 0,
+            'avg_booking_value': round(total_revenue / total_bookings, 2) if total_bookings else 0,
             'most_utilized_room': most_utilized_room['name'],
             'highest_utilization_rate': round(most_utilized_room['utilization'], 1)
         }
@@ -6209,13 +6040,12 @@ def daily_summary_report():
             print("=== DEBUG: Fetching bookings with comprehensive details...")
             
             # Get bookings with complete related data
-            bookings_response = supabase_admin.table('bookings').select("""
+            bookings_raw = list(iter_rows(lambda: supabase_admin.table('bookings').select("""
                 *,
                 room:rooms(id, name, capacity),
                 client:clients(id, company_name, contact_person, email, phone)
-            """).gte('start_time', start_iso).lte('start_time', end_iso).neq('status', 'cancelled').order('start_time').execute()
-            
-            bookings_raw = bookings_response.data if bookings_response.data else []
+            """).gte('start_time', start_iso).lte('start_time', end_iso).neq('status', 'cancelled'),
+                key='start_time', unique=False))
             print(f"OK: DEBUG: Found {len(bookings_raw)} bookings with relationships")
             
         except Exception as e:
@@ -6223,8 +6053,9 @@ def daily_summary_report():
             # Fallback: Get bookings without relationships
             try:
                 print("=== DEBUG: Using fallback approach for bookings")
-                bookings_simple = supabase_admin.table('bookings').select('*').gte('start_time', start_iso).lte('start_time', end_iso).neq('status', 'cancelled').order('start_time').execute()
-                bookings_raw = bookings_simple.data if bookings_simple.data else []
+                bookings_raw = list(iter_rows(lambda: supabase_admin.table('bookings').select('*').gte(
+                    'start_time', start_iso).lte('start_time', end_iso).neq('status', 'cancelled'),
+                    key='start_time', unique=False))
                 
                 # Manually fetch related data
                 for booking in bookings_raw:
@@ -6253,10 +6084,11 @@ def daily_summary_report():
                 booking_ids = [booking['id'] for booking in bookings_raw]
                 
                 # Get custom addons for all bookings
-                addons_response = supabase_admin.table('booking_custom_addons').select('*').in_('booking_id', booking_ids).execute()
+                custom_addons = list(iter_rows(lambda: supabase_admin.table('booking_custom_addons').select('*').in_(
+                    'booking_id', booking_ids)))
                 
-                if addons_response.data:
-                    for addon in addons_response.data:
+                if custom_addons:
+                    for addon in custom_addons:
                         booking_id = addon.get('booking_id')
                         if booking_id not in booking_addons_map:
                             booking_addons_map[booking_id] = []
@@ -6483,19 +6315,19 @@ def download_daily_summary():
         
         # Fetch bookings with complete data (same logic as report view)
         try:
-            bookings_response = supabase_admin.table('bookings').select("""
+            bookings_raw = list(iter_rows(lambda: supabase_admin.table('bookings').select("""
                 *,
                 room:rooms(id, name, capacity),
                 client:clients(id, company_name, contact_person, email, phone)
-            """).gte('start_time', start_iso).lte('start_time', end_iso).neq('status', 'cancelled').order('start_time').execute()
-            
-            bookings_raw = bookings_response.data if bookings_response.data else []
+            """).gte('start_time', start_iso).lte('start_time', end_iso).neq('status', 'cancelled'),
+                key='start_time', unique=False))
             
         except Exception as e:
             print(f"OK: ERROR: Download data fetch failed: {e}")
             # Use fallback approach
-            bookings_simple = supabase_admin.table('bookings').select('*').gte('start_time', start_iso).lte('start_time', end_iso).neq('status', 'cancelled').order('start_time').execute()
-            bookings_raw = bookings_simple.data if bookings_simple.data else []
+            bookings_raw = list(iter_rows(lambda: supabase_admin.table('bookings').select('*').gte(
+                'start_time', start_iso).lte('start_time', end_iso).neq('status', 'cancelled'),
+                key='start_time', unique=False))
             
             # Manually fetch related data
             for booking in bookings_raw:
@@ -6511,10 +6343,11 @@ def download_daily_summary():
         booking_addons_map = {}
         if bookings_raw:
             booking_ids = [booking['id'] for booking in bookings_raw]
-            addons_response = supabase_admin.table('booking_custom_addons').select('*').in_('booking_id', booking_ids).execute()
+            custom_addons = iter_rows(lambda: supabase_admin.table('booking_custom_addons').select('*').in_(
+                'booking_id', booking_ids))
             
-            if addons_response.data:
-                for addon in addons_response.data:
+            if custom_addons:
+                for addon in custom_addons:
                     booking_id = addon.get('booking_id')
                     if booking_id not in booking_addons_map:
                         booking_addons_map[booking_id] = []
@@ -7229,6 +7062,8 @@ def debug_test_update(room_id):
         }
         
         result = supabase_update('rooms', test_data, [('id', 'eq', room_id)])
+        if result:
+            invalidate_reference_data('rooms')
         
         return jsonify({
             'success': bool(result),
@@ -7760,7 +7595,7 @@ def debug_test_queries():
 def api_client_booking_counts():
     """API endpoint to get booking counts for all clients"""
     try:
-        clients = get_clients_with_booking_counts()
+        clients = get_clients_with_booking_counts(exclude_cancelled=True)
         
         booking_counts = {}
         for client in clients:
@@ -8197,11 +8032,14 @@ def validate_production_environment():
 
 @app.route('/health')
 def health_check():
-    """Simple health check for monitoring"""
+    """Health check for monitoring, including a (cached) database probe"""
+    database = check_database_connection()
+    # Stays 200 when only the database is down: restarting the web worker would not fix it
     return jsonify({
-        'status': 'healthy',
+        'status': 'healthy' if database['connected'] else 'degraded',
         'timestamp': get_cat_time().isoformat(),
-        'database_connected': bool(SUPABASE_URL and SUPABASE_ANON_KEY)
+        'database_connected': database['connected'],
+        'database': database
     })
 # ===============================
 # Error Handlers
@@ -8317,27 +8155,30 @@ def backup_data():
         
         print('=== Creating backup...')
         
-        # Export key data using admin client
-        backup_data = {
-            'timestamp': get_cat_time().isoformat(),
-            'rooms': supabase_admin.table('rooms').select('*').execute().data,
-            'clients': supabase_admin.table('clients').select('*').execute().data,
-            'addon_categories': supabase_admin.table('addon_categories').select('*').execute().data,
-            'addons': supabase_admin.table('addons').select('*').execute().data,
-            'bookings': supabase_admin.table('bookings').select('*').execute().data
-        }
-        
+        # Stream each table page by page straight into the file so large tables are complete
+        # and never held in memory
+        tables = ['rooms', 'clients', 'addon_categories', 'addons', 'bookings']
+        row_counts = {}
         filename = f"backup_{get_cat_time().strftime('%Y%m%d_%H%M%S')}.json"
         with open(filename, 'w') as f:
-            json.dump(backup_data, f, indent=2, default=str)
+            f.write('{\n  "timestamp": %s' % json.dumps(get_cat_time().isoformat()))
+            for table_name in tables:
+                f.write(',\n  %s: [' % json.dumps(table_name))
+                row_counts[table_name] = 0
+                for row in iter_table(table_name):
+                    f.write(',\n    ' if row_counts[table_name] else '\n    ')
+                    f.write(json.dumps(row, default=str))
+                    row_counts[table_name] += 1
+                f.write('\n  ]' if row_counts[table_name] else ']')
+            f.write('\n}\n')
         
         print(f'OK: Backup created: {filename}')
         print(f'=== Data summary:')
-        print(f'   - Rooms: {len(backup_data["rooms"])}')
-        print(f'   - Clients: {len(backup_data["clients"])}')
-        print(f'   - Add-on Categories: {len(backup_data["addon_categories"])}')
-        print(f'   - Add-ons: {len(backup_data["addons"])}')
-        print(f'   - Bookings: {len(backup_data["bookings"])}')
+        print(f'   - Rooms: {row_counts["rooms"]}')
+        print(f'   - Clients: {row_counts["clients"]}')
+        print(f'   - Add-on Categories: {row_counts["addon_categories"]}')
+        print(f'   - Add-ons: {row_counts["addons"]}')
+        print(f'   - Bookings: {row_counts["bookings"]}')
         
     except Exception as e:
         print(f'OK: Backup failed: {e}')
@@ -8785,56 +8626,6 @@ def safe_int_conversion(value, default=0):
     except (ValueError, TypeError):
         return default
 
-def get_booking_with_details(booking_id):
-    """Get booking with all related details in a robust way"""
-    try:
-        print(f"=== DEBUG: Fetching complete booking details for ID {booking_id}")
-        
-        # Get basic booking data
-        booking_response = supabase_admin.table('bookings').select('*').eq('id', booking_id).execute()
-        
-        if not booking_response.data:
-            return None
-        
-        booking = booking_response.data[0]
-        
-        # Get room data
-        if booking.get('room_id'):
-            room_response = supabase_admin.table('rooms').select('*').eq('id', booking['room_id']).execute()
-            booking['room'] = room_response.data[0] if room_response.data else None
-        
-        # Get client data
-        if booking.get('client_id'):
-            client_response = supabase_admin.table('clients').select('*').eq('id', booking['client_id']).execute()
-            booking['client'] = client_response.data[0] if client_response.data else None
-        
-        # Get booking addons
-        booking_addons = []
-        try:
-            ba_response = supabase_admin.table('booking_addons').select('*').eq('booking_id', booking_id).execute()
-            
-            for ba in ba_response.data if ba_response.data else []:
-                if ba.get('addon_id'):
-                    addon_response = supabase_admin.table('addons').select('*').eq('id', ba['addon_id']).execute()
-                    if addon_response.data:
-                        addon = addon_response.data[0]
-                        ba['addon'] = addon
-                        booking_addons.append(ba)
-        except Exception as addon_error:
-            print(f"Warning: Error fetching addons: {addon_error}")
-        
-        booking['booking_addons'] = booking_addons
-        
-        # Convert datetime strings
-        booking = convert_datetime_strings(booking)
-        
-        print(f"OK: DEBUG: Successfully fetched complete booking details")
-        return booking
-        
-    except Exception as e:
-        print(f"OK: ERROR: Failed to fetch booking details: {e}")
-        return None
-
 def calculate_booking_totals(booking, room_rates=None):
     """Calculate booking totals - SIMPLIFIED (NO TAX/DISCOUNT)"""
     try:
@@ -9252,31 +9043,7 @@ def default_if_none_filter(value, default='N/A'):
 def recover_booking_data(booking_id):
     """Attempt to recover missing booking data"""
     try:
-        print(f"=== DEBUG: Attempting to recover data for booking {booking_id}")
-        
-        # Get basic booking
-        booking_response = supabase_admin.table('bookings').select('*').eq('id', booking_id).execute()
-        
-        if not booking_response.data:
-            return None
-        
-        booking = booking_response.data[0]
-        
-        # Check and recover room data
-        if booking.get('room_id') and not booking.get('room'):
-            room_response = supabase_admin.table('rooms').select('*').eq('id', booking['room_id']).execute()
-            if room_response.data:
-                booking['room'] = room_response.data[0]
-                print(f"OK: DEBUG: Recovered room data for booking {booking_id}")
-        
-        # Check and recover client data
-        if booking.get('client_id') and not booking.get('client'):
-            client_response = supabase_admin.table('clients').select('*').eq('id', booking['client_id']).execute()
-            if client_response.data:
-                booking['client'] = client_response.data[0]
-                print(f"OK: DEBUG: Recovered client data for booking {booking_id}")
-        
-        return booking
+        return load_booking_detail(booking_id)
         
     except Exception as e:
         print(f"OK: ERROR: Failed to recover booking data: {e}")
@@ -9351,11 +9118,42 @@ def validate_booking_capacity(room_id, attendees):
     except Exception as e:
         return [f"Error validating room capacity: {str(e)}"]
 
+# ===============================
+# Application Factory
+# ===============================
+
+APP_IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED
+
+def create_app():
+    """WSGI entry point (gunicorn 'app:create_app()').
+
+    Importing this module builds the app without any network calls; startup
+    checks run here instead, once per process (once in the gunicorn master
+    with --preload, before the workers are forked). Background threads are
+    started per worker by the post_fork hook in gunicorn.conf.py, since a
+    thread started in the master does not survive the fork.
+    """
+    route_count = len(list(app.url_map.iter_rules()))
+    print(f"OK: App loaded in {APP_IMPORT_SECONDS * 1000:.0f} ms with {route_count} routes")
+    if int(os.environ.get('WEB_CONCURRENCY', '1')) > 1:
+        print("⚠️ WARNING: WEB_CONCURRENCY > 1: these are kept per worker and will diverge between workers:")
+        for state in PER_PROCESS_STATE:
+            print(f"   - {state}")
+    if os.environ.get('STARTUP_DB_CHECK', 'False').lower() == 'true':
+        database = check_database_connection(max_age=0)
+        if database['connected']:
+            print(f"OK: Database connection test successful ({database['latency_ms']} ms)")
+        else:
+            print(f"OK: Database connection test failed: {database['error']}")
+    return app
+
 # ===============================
 # Main Entry Point
 # ===============================
 
 if __name__ == '__main__':
+    create_app()
+    start_email_outbox()
     port = int(os.environ.get('PORT', 5000))
     if os.environ.get('FLASK_ENV') == 'production':
         app.config['SESSION_COOKIE_SECURE'] = True
@@ -0,0 +1,29 @@
+-- =====================================================
+-- BOOKING DAILY ROLLUP TABLE
+-- Copy and paste these commands into your Supabase SQL Editor
+-- =====================================================
+
+-- Pre-aggregated bookings per (day, room, status), keyed by the UTC day the
+-- booking starts. core.booking_changed recomputes the affected cells on every
+-- booking write and `python rebuild_daily_rollup.py` rebuilds a date range
+-- (or everything). The monthly summary and room utilization reports read
+-- this table; without it they aggregate the bookings in their range locally.
+CREATE TABLE IF NOT EXISTS booking_daily_rollup (
+    id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    day DATE NOT NULL,
+    room_id INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    event_count INTEGER NOT NULL DEFAULT 0,
+    attendees INTEGER NOT NULL DEFAULT 0,
+    revenue NUMERIC(12, 2) NOT NULL DEFAULT 0,
+    booked_hours NUMERIC(10, 2) NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    UNIQUE (day, room_id, status)
+);
+
+CREATE INDEX IF NOT EXISTS idx_booking_daily_rollup_day ON booking_daily_rollup(day);
+
+-- Recomputing one cell reads the bookings of one room on one day
+CREATE INDEX IF NOT EXISTS idx_bookings_room_id_start_time ON bookings(room_id, start_time);
+
+COMMENT ON TABLE booking_daily_rollup IS 'Event count, attendees, revenue and booked hours per day, room and status';
@@ -0,0 +1,25 @@
+-- =====================================================
+-- CALENDAR FEED SUPPORT
+-- Copy and paste these commands into your Supabase SQL Editor
+-- =====================================================
+
+-- The calendar feed's "since" cursor compares against bookings.updated_at.
+-- Not every write path sets it, so keep it current for every update here.
+CREATE OR REPLACE FUNCTION touch_bookings_updated_at()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at = NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS bookings_touch_updated_at ON bookings;
+CREATE TRIGGER bookings_touch_updated_at
+    BEFORE INSERT OR UPDATE ON bookings
+    FOR EACH ROW EXECUTE FUNCTION touch_bookings_updated_at();
+
+-- Incremental polls: bookings changed since a cursor
+CREATE INDEX IF NOT EXISTS idx_bookings_updated_at ON bookings(updated_at);
+
+-- Window loads: bookings overlapping [start, end)
+CREATE INDEX IF NOT EXISTS idx_bookings_start_end ON bookings(start_time, end_time);
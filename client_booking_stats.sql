@@ -0,0 +1,24 @@
+-- =====================================================
+-- CLIENT BOOKING STATS VIEW
+-- Copy and paste these commands into your Supabase SQL Editor
+-- =====================================================
+
+-- Per-client booking aggregates used by the /clients directory.
+-- core.get_client_booking_aggregates reads this view and falls back to
+-- grouping a single bookings fetch locally when it does not exist.
+CREATE OR REPLACE VIEW client_booking_stats AS
+SELECT
+    client_id,
+    COUNT(*) AS booking_count,
+    MAX(start_time) AS last_booking_at,
+    COALESCE(SUM(total_price) FILTER (WHERE status = 'confirmed'), 0) AS total_revenue,
+    -- Appended last so CREATE OR REPLACE works on an already deployed view
+    COUNT(*) FILTER (WHERE status IS DISTINCT FROM 'cancelled') AS active_booking_count
+FROM bookings
+WHERE client_id IS NOT NULL
+GROUP BY client_id;
+
+-- Index to keep the grouping cheap as the bookings table grows
+CREATE INDEX IF NOT EXISTS idx_bookings_client_id_start_time ON bookings(client_id, start_time DESC);
+
+COMMENT ON VIEW client_booking_stats IS 'Booking count, last booking and confirmed revenue per client';
@@ -1,25 +1,47 @@
 import os
-from flask import session, flash, render_template, redirect, url_for
+from flask import session, flash, render_template, redirect, url_for, jsonify, request
 from datetime import datetime, UTC, timedelta, timezone
-from supabase import create_client, Client
+from utils.supabase_clients import ClientProvider
 from settings.config import SUPABASE_URL, SUPABASE_ANON_KEY, SUPABASE_SERVICE_KEY
 from flask_login import UserMixin, current_user
 from utils.validation import convert_datetime_strings, safe_float_conversion, safe_int_conversion
+from utils.reference_cache import ReferenceDataCache
+from utils.booking_index import BookingIntervalIndex, to_timestamp
+from utils.dashboard_stats import DashboardStatsAggregate
+from utils.query_shapes import select_shape
+from utils.calendar_feed import DeletedBookingLog, build_calendar_feed
+from utils.email_outbox import EmailOutbox, build_message
+from utils.log_buffer import BufferedLogWriter, insert_rows_with
+from utils.logging import activity_log_writer, use_log_client
+from utils.pricing import RateTable
+from utils.pager import iter_keyset
+from utils.search_index import ClientSearchIndex, SEARCH_FIELDS
+from utils.daily_rollup import build_rollup_rows, empty_rollup_row, rollup_cell, day_bounds
+from utils.utilization import compute_utilization
+from utils.document_service import DocumentCache, DocumentService
+from utils.document_batch import DocumentBatchJob, DocumentBatchRegistry
+from utils.identity_map import IdentityMapClient
+from utils.query_budget import InstrumentedClient
+from utils.request_scope import register_request_value, request_value
+from utils.fanout import FanOutExecutor
 from decimal import Decimal
+import copy
 import smtplib
+import threading
+import time
+import atexit
 import ssl
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from email.mime.base import MIMEBase
-from email import encoders
 import os
 
-# Initialize Supabase clients
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
-if SUPABASE_SERVICE_KEY:
-    supabase_admin: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
-else:
-    supabase_admin = supabase
+# Initialize Supabase clients: each thread gets its own client per key, and auth
+# flows use private clients, so no request can change another's auth state
+supabase = ClientProvider(SUPABASE_URL, SUPABASE_ANON_KEY, name='anon')
+admin_clients = ClientProvider(SUPABASE_URL, SUPABASE_SERVICE_KEY, name='admin') if SUPABASE_SERVICE_KEY else supabase
+
+# Admin client calls are counted per request (utils/query_budget.py) and reads that
+# repeat within a request are de-duplicated (utils/identity_map.py)
+IDENTITY_MAP_ENABLED = os.getenv('IDENTITY_MAP_ENABLED', 'True').lower() == 'true'
+supabase_admin = IdentityMapClient(InstrumentedClient(admin_clients), enabled=IDENTITY_MAP_ENABLED)
 
 # ===============================
 # EMAIL CONFIGURATION
@@ -42,42 +64,67 @@ CAT = timezone(timedelta(hours=2))
 # EMAIL FUNCTIONS
 # ===============================
 
-def send_email(to_email, subject, body_html, body_text=None):
+# Outbox: messages are spooled to SQLite and sent by a background worker. Point
+# EMAIL_OUTBOX_PATH at persistent storage: on hosts where the app directory is
+# rebuilt on deploy, messages still queued there are lost with it.
+EMAIL_OUTBOX_ENABLED = os.getenv('EMAIL_OUTBOX_ENABLED', 'True').lower() == 'true'
+EMAIL_OUTBOX_PATH = os.getenv('EMAIL_OUTBOX_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'email_outbox.sqlite3'))
+
+def open_smtp_session():
+    """Open one authenticated SMTP session; the outbox reuses it for a whole batch"""
+    server = smtplib.SMTP(EMAIL_HOST, EMAIL_PORT, timeout=30)
+    if EMAIL_USE_TLS:
+        server.starttls(context=ssl.create_default_context())  # Enable encryption
+    if EMAIL_USER and EMAIL_PASSWORD:
+        server.login(EMAIL_USER, EMAIL_PASSWORD)
+    return server
+
+email_outbox = EmailOutbox(
+    EMAIL_OUTBOX_PATH,
+    connect=open_smtp_session,
+    sender=EMAIL_USER,
+    batch_size=int(os.getenv('EMAIL_OUTBOX_BATCH_SIZE', '20')),
+    max_attempts=int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', '6')),
+    base_delay=int(os.getenv('EMAIL_OUTBOX_RETRY_SECONDS', '30'))
+)
+
+def send_email(to_email, subject, body_html, body_text=None, attachments=None):
     """
-    Send an email using SMTP with HTML and optional text content.
+    Queue an email for the background sender (or send inline if the outbox is disabled).
     
     Args:
         to_email (str): Recipient email address
         subject (str): Email subject
         body_html (str): HTML body content
         body_text (str, optional): Plain text body content
+        attachments (list, optional): (filename, bytes, mimetype) tuples
+    
+    Returns:
+        bool: True if the email was queued or sent, False otherwise
+    """
+    if EMAIL_OUTBOX_ENABLED:
+        try:
+            message_id = email_outbox.enqueue(to_email, subject, body_html, body_text, attachments)
+            email_outbox.start()
+            print(f"📨 Email #{message_id} to {to_email} queued")
+            return True
+        except Exception as e:
+            print(f"⚠️ WARNING: Could not queue email to {to_email}, sending inline: {e}")
+    return send_email_now(to_email, subject, body_html, body_text, attachments)
+
+def send_email_now(to_email, subject, body_html, body_text=None, attachments=None):
+    """
+    Send an email immediately over a new SMTP session, bypassing the outbox.
     
     Returns:
         bool: True if email sent successfully, False otherwise
     """
     try:
-        # Create message
-        msg = MIMEMultipart('alternative')
-        msg['Subject'] = subject
-        msg['From'] = EMAIL_USER
-        msg['To'] = to_email
-
-        # Create text and HTML parts
-        if body_text:
-            part1 = MIMEText(body_text, 'plain')
-            msg.attach(part1)
-        
-        part2 = MIMEText(body_html, 'html')
-        msg.attach(part2)
-
-        # Create SMTP session
-        server = smtplib.SMTP(EMAIL_HOST, EMAIL_PORT)
-        server.starttls()  # Enable encryption
-        server.login(EMAIL_USER, EMAIL_PASSWORD)
-        
-        # Send email
-        server.send_message(msg)
-        server.quit()
+        server = open_smtp_session()
+        try:
+            server.send_message(build_message(EMAIL_USER, to_email, subject, body_html, body_text, attachments))
+        finally:
+            server.quit()
         
         print(f"Email sent successfully to {to_email}")
         return True
@@ -86,6 +133,39 @@ def send_email(to_email, subject, body_html, body_text=None):
         print(f"Failed to send email to {to_email}: {str(e)}")
         return False
 
+def start_email_outbox():
+    """Start this process's sender so messages left queued by a restart go out without waiting for a new one"""
+    if not EMAIL_OUTBOX_ENABLED:
+        return False
+    try:
+        email_outbox.start()
+        queued = email_outbox.stats()['queued']
+        if queued:
+            print(f"📨 Email outbox started with {queued} queued message(s) from {EMAIL_OUTBOX_PATH}")
+        return True
+    except Exception as e:
+        print(f"❌ ERROR: Failed to start email outbox: {e}")
+        return False
+
+def flush_email_outbox():
+    """Send everything due now in this process (for cron scripts that exit right away)"""
+    try:
+        sent = email_outbox.drain()
+        stats = email_outbox.stats()
+        print(f"📨 Email outbox flushed: {sent} sent, {stats['queued']} still queued")
+        return stats
+    except Exception as e:
+        print(f"❌ ERROR: Failed to flush email outbox: {e}")
+        return None
+
+def get_email_outbox_stats():
+    """Outbox queue depth, retry/failure counters and worker state"""
+    try:
+        return email_outbox.stats()
+    except Exception as e:
+        print(f"❌ ERROR: Failed to read email outbox stats: {e}")
+        return {'error': str(e)}
+
 def get_booking_confirmation_html(booking_data):
     """
     Generate HTML content for booking confirmation email.
@@ -330,6 +410,19 @@ def get_bookings_table_html(bookings):
     
     return table_html
 
+def _daily_report_row(booking):
+    """One booking of the daily report email, from a booking_daily_email row"""
+    client = booking.get('clients') or {}
+    return {
+        'id': booking.get('id'),
+        'client_name': client.get('company_name') or client.get('contact_person') or booking.get('client_name') or 'Unknown',
+        'room_name': (booking.get('rooms') or {}).get('name') or 'Unknown',
+        'start_time': booking.get('start_time'),
+        'end_time': booking.get('end_time'),
+        'purpose': booking.get('title'),
+        'status': booking.get('status', 'tentative')
+    }
+
 def generate_daily_report_data():
     """
     Generate data for the daily report.
@@ -342,15 +435,11 @@ def generate_daily_report_data():
         tomorrow = today + timedelta(days=1)
         
         # Get today's bookings
-        today_response = supabase.table("bookings").select(
-            "*, clients(name), rooms(name)"
-        ).gte("start_time", today.isoformat()).lt("start_time", tomorrow.isoformat()).execute()
+        today_response = select_shape(supabase, 'booking_daily_email').gte("start_time", today.isoformat()).lt("start_time", tomorrow.isoformat()).execute()
         
         # Get tomorrow's bookings
         day_after_tomorrow = tomorrow + timedelta(days=1)
-        tomorrow_response = supabase.table("bookings").select(
-            "*, clients(name), rooms(name)"
-        ).gte("start_time", tomorrow.isoformat()).lt("start_time", day_after_tomorrow.isoformat()).execute()
+        tomorrow_response = select_shape(supabase, 'booking_daily_email').gte("start_time", tomorrow.isoformat()).lt("start_time", day_after_tomorrow.isoformat()).execute()
         
         # Process today's bookings
         today_bookings = []
@@ -359,15 +448,7 @@ def generate_daily_report_data():
         cancelled_count = 0
         
         for booking in today_response.data:
-            booking_data = {
-                'id': booking.get('id'),
-                'client_name': booking.get('clients', {}).get('name') if booking.get('clients') else 'Unknown',
-                'room_name': booking.get('rooms', {}).get('name') if booking.get('rooms') else 'Unknown',
-                'start_time': booking.get('start_time'),
-                'end_time': booking.get('end_time'),
-                'purpose': booking.get('purpose'),
-                'status': booking.get('status', 'tentative')
-            }
+            booking_data = _daily_report_row(booking)
             today_bookings.append(booking_data)
             
             # Count by status
@@ -382,15 +463,7 @@ def generate_daily_report_data():
         # Process tomorrow's bookings
         tomorrow_bookings = []
         for booking in tomorrow_response.data:
-            booking_data = {
-                'id': booking.get('id'),
-                'client_name': booking.get('clients', {}).get('name') if booking.get('clients') else 'Unknown',
-                'room_name': booking.get('rooms', {}).get('name') if booking.get('rooms') else 'Unknown',
-                'start_time': booking.get('start_time'),
-                'end_time': booking.get('end_time'),
-                'purpose': booking.get('purpose'),
-                'status': booking.get('status', 'tentative')
-            }
+            booking_data = _daily_report_row(booking)
             tomorrow_bookings.append(booking_data)
         
         return {
@@ -473,9 +546,9 @@ def get_booking_details_for_email(booking_id, booking_data):
         # Get room name
         room_name = "Unknown Room"
         if booking_data.get('room_id'):
-            room_response = supabase.table('rooms').select('name').eq('id', booking_data['room_id']).execute()
-            if room_response.data:
-                room_name = room_response.data[0]['name']
+            room = get_cached_room(booking_data['room_id'])
+            if room:
+                room_name = room.get('name') or room_name
         
         # Format datetime strings for email
         start_time_formatted = booking_data['start_time'].strftime('%Y-%m-%d %H:%M') if hasattr(booking_data['start_time'], 'strftime') else str(booking_data['start_time'])
@@ -511,6 +584,43 @@ def get_booking_details_for_email(booking_id, booking_data):
 # BOOKING AUDIT TRAIL FUNCTIONS
 # ===============================
 
+# Looked up on every batch, so both writers follow supabase_admin if it is swapped
+insert_log_rows = insert_rows_with(lambda: supabase_admin)
+use_log_client(lambda: supabase_admin)
+
+# Audit and activity rows are queued and written in batches off the request path
+audit_log_writer = BufferedLogWriter(
+    insert_log_rows,
+    batch_size=int(os.getenv('ACTIVITY_LOG_BATCH_SIZE', '100')),
+    max_queue=int(os.getenv('ACTIVITY_LOG_MAX_QUEUE', '10000')),
+    flush_interval=float(os.getenv('ACTIVITY_LOG_FLUSH_SECONDS', '2')),
+    enabled=os.getenv('ACTIVITY_LOG_BUFFERED', 'True').lower() == 'true',
+    name='audit-log-writer'
+)
+
+def queue_activity_log(log_data):
+    """Queue a prepared user_activity_log row for the batched writer"""
+    audit_log_writer.enqueue('user_activity_log', log_data)
+
+def flush_activity_logs():
+    """Write every queued audit/activity row now (for scripts that exit right away)"""
+    try:
+        return audit_log_writer.flush() + activity_log_writer.flush()
+    except Exception as e:
+        print(f"❌ ERROR: Failed to flush activity logs: {e}")
+        return 0
+
+def get_log_buffer_stats():
+    """Queue depth, overflow and batch counters for the buffered log writers"""
+    try:
+        return {
+            'audit': audit_log_writer.stats(),
+            'activity': activity_log_writer.stats()
+        }
+    except Exception as e:
+        print(f"❌ ERROR: Failed to read log buffer stats: {e}")
+        return {'error': str(e)}
+
 def log_booking_change(booking_id, action_type, field_changed=None, old_value=None, new_value=None, change_summary=None):
     """
     Log a change to a booking for audit trail purposes.
@@ -556,13 +666,9 @@ def log_booking_change(booking_id, action_type, field_changed=None, old_value=No
             'created_at': datetime.now(CAT).isoformat()
         }
         
-        # Insert audit record
-        result = supabase_admin.table('booking_audit_trail').insert(audit_record).execute()
-        
-        if result.data:
-            print(f"✅ Audit trail logged: {action_type} for booking {booking_id}")
-        else:
-            print(f"⚠️ Failed to log audit trail for booking {booking_id}")
+        # Queue audit record; an edit's per-field rows go out in one insert
+        audit_log_writer.enqueue('booking_audit_trail', audit_record)
+        print(f"✅ Audit trail queued: {action_type} for booking {booking_id}")
             
     except Exception as e:
         print(f"❌ ERROR: Failed to log booking audit trail: {e}")
@@ -643,9 +749,9 @@ def get_room_name_by_id(room_id):
     try:
         if not room_id:
             return None
-        result = supabase_admin.table('rooms').select('name').eq('id', room_id).execute()
-        if result.data:
-            return result.data[0]['name']
+        room = get_cached_room(room_id)
+        if room:
+            return room['name']
         return f"Room ID: {room_id}"
     except:
         return f"Room ID: {room_id}"
@@ -662,6 +768,9 @@ def get_booking_audit_trail(booking_id, limit=50):
         list: List of audit trail records
     """
     try:
+        # Rows of an edit are still queued when its redirect lands on the detail page
+        if audit_log_writer.has_queued('booking_audit_trail'):
+            audit_log_writer.flush()
         result = supabase_admin.table('booking_audit_trail')\
             .select('*')\
             .eq('booking_id', booking_id)\
@@ -834,6 +943,37 @@ def supabase_select(table_name, columns="*", filters=None, order_by=None, limit=
         print(f"❌ ERROR: Failed to query table '{table_name}': {e}")
         return []
 
+# Must not exceed the PostgREST max-rows setting, or a capped page would look like the last one
+SUPABASE_PAGE_SIZE = int(os.getenv('SUPABASE_PAGE_SIZE', '1000'))
+
+def iter_rows(build_query, key='id', unique=True, stats=None):
+    """
+    Stream every row of a query by keyset pagination instead of one capped .execute().
+    
+    Args:
+        build_query (callable): Returns a fresh filtered builder, without order() or limit()
+        key (str): Column to page on; must be selected (with 'id' too when not unique)
+        unique (bool): False for keys like start_time, which are then tie-broken by id
+        stats (dict, optional): Updated with 'pages' and 'rows'
+    
+    Query errors propagate to the caller.
+    """
+    return iter_keyset(build_query, key=key, page_size=SUPABASE_PAGE_SIZE, unique=unique, stats=stats)
+
+def iter_table(table_name, columns='*', key='id'):
+    """Stream a whole table in key order"""
+    return iter_rows(lambda: supabase_admin.table(table_name).select(columns), key=key)
+
+def sort_rows_by(rows, column):
+    """Sort rows by a column the way Postgres orders ascending: nulls last"""
+    return sorted(rows, key=lambda row: (row.get(column) is None, row.get(column) if row.get(column) is not None else ''))
+
+def is_missing_relation_error(error):
+    """True only when a table, view or function is not deployed; timeouts and other failures are transient"""
+    message = str(error)
+    return (getattr(error, 'code', None) in ('42P01', '42883', 'PGRST202', 'PGRST205')
+            or 'does not exist' in message or 'Could not find the' in message)
+
 def supabase_insert(table_name, data):
     """Insert data into Supabase table"""
     try:
@@ -878,6 +1018,132 @@ def supabase_delete(table_name, filters):
         print(f"Delete error: {e}")
         return False
 
+# ===============================
+# CONCURRENT READS
+# ===============================
+
+# Independent reads of one page run side by side; a read that fails or overruns gets its fallback
+page_fanout = FanOutExecutor(
+    workers=int(os.getenv('FANOUT_WORKERS', '8')),
+    timeout=float(os.getenv('FANOUT_TIMEOUT_SECONDS', '8')),
+    name='page-fanout'
+)
+
+def fan_out(calls, fallbacks=None, timeout=None, label='fan-out'):
+    """Run {name: zero-argument callable} concurrently; see utils/fanout.py"""
+    return page_fanout.run(calls, fallbacks=fallbacks, timeout=timeout, label=label)
+
+def get_fanout_stats():
+    return page_fanout.stats()
+
+# Caches and logs kept in each worker process. Writes made through another worker only reach
+# these at their next refresh (or never, for the in-process logs), so the app is deployed with
+# one worker (WEB_CONCURRENCY=1) and scales with threads until they share state across processes
+PER_PROCESS_STATE = [
+    'reference data cache (invalidate_reference_data only clears this process)',
+    'booking interval index (BOOKING_INDEX_VERIFY confirms conflicts against the database)',
+    'dashboard stats aggregate (its snapshot is saved by whichever worker wrote last)',
+    'deleted bookings log (calendar clients miss deletes made on other workers)',
+    'client search index (refreshed every CLIENT_SEARCH_REFRESH_SECONDS)',
+    'document batch registry (progress polling only sees jobs started on the same worker)',
+    'daily rollup cells awaiting a retry (other workers read them unrefreshed until it lands)',
+]
+
+def get_supabase_client_stats():
+    """Clients created per key (one per thread) and private auth clients used"""
+    providers = [supabase] if admin_clients is supabase else [supabase, admin_clients]
+    return [provider.stats() for provider in providers]
+
+# The database is probed by /health, not at import, so starting a worker or a
+# cron script never waits on the network; results are reused for a short while
+DATABASE_PROBE_TTL = float(os.getenv('DATABASE_PROBE_TTL_SECONDS', '30'))
+_database_probe = {}
+_database_probe_lock = threading.Lock()
+
+def check_database_connection(max_age=None):
+    """Result of a one-row rooms query: connected, latency_ms, error and checked_at (cached for max_age seconds)"""
+    max_age = DATABASE_PROBE_TTL if max_age is None else max_age
+    with _database_probe_lock:
+        if _database_probe and time.monotonic() - _database_probe['_monotonic'] < max_age:
+            return {key: value for key, value in _database_probe.items() if not key.startswith('_')}
+
+    # The query runs outside the lock so a slow database never queues every /health call behind it
+    started = time.monotonic()
+    try:
+        supabase_admin.table('rooms').select('id').limit(1).execute()
+        result = {'connected': True, 'error': None}
+    except Exception as e:
+        print(f"⚠️ WARNING: Database connection check failed: {e}")
+        result = {'connected': False, 'error': str(e)}
+    result['latency_ms'] = round((time.monotonic() - started) * 1000, 1)
+    result['checked_at'] = datetime.now(UTC).isoformat()
+
+    with _database_probe_lock:
+        _database_probe.clear()
+        _database_probe.update(result, _monotonic=time.monotonic())
+    return result
+
+# ===============================
+# REFERENCE DATA CACHE
+# ===============================
+
+# Small lookup tables read on nearly every request; mutations call invalidate_reference_data()
+REFERENCE_TABLES = {
+    'rooms': 'name',
+    'addons': 'name',
+    'addon_categories': 'name',
+    'event_types': 'name',
+}
+
+reference_cache = ReferenceDataCache(ttl_seconds=int(os.getenv('REFERENCE_CACHE_TTL', '300')))
+
+def _reference_table_loader(table_name, order_by):
+    """Build a loader that fetches a whole reference table in one query"""
+    def load():
+        rows = iter_rows(lambda: select_shape(supabase_admin, 'reference_rows', table_name=table_name))
+        return sort_rows_by(rows, order_by)
+    return load
+
+for _table_name, _order_by in REFERENCE_TABLES.items():
+    reference_cache.register(_table_name, _reference_table_loader(_table_name, _order_by))
+
+def get_cached_rooms(status=None):
+    """Get all rooms ordered by name, optionally filtered by status"""
+    rooms = reference_cache.get('rooms')
+    if status:
+        rooms = [room for room in rooms if room.get('status') == status]
+    return rooms
+
+def get_cached_room(room_id):
+    """Get a single room by ID from the reference cache"""
+    return reference_cache.get_by_id('rooms', room_id)
+
+def get_cached_addons(addon_ids=None, active_only=False):
+    """Get add-ons ordered by name, optionally restricted to the given IDs"""
+    addons = reference_cache.get('addons')
+    if addon_ids is not None:
+        wanted = {str(addon_id) for addon_id in addon_ids}
+        addons = [addon for addon in addons if str(addon.get('id')) in wanted]
+    if active_only:
+        addons = [addon for addon in addons if addon.get('is_active', True)]
+    return addons
+
+def get_cached_addon_categories():
+    """Get add-on categories ordered by name"""
+    return reference_cache.get('addon_categories')
+
+def get_cached_event_types():
+    """Get event types ordered by name"""
+    return reference_cache.get('event_types')
+
+def invalidate_reference_data(*table_names):
+    """Drop cached reference rows after a create/edit/delete (all tables when none given)"""
+    reference_cache.invalidate(*table_names)
+
+def get_reference_cache_stats():
+    """Hit/miss counters for the reference data cache"""
+    return reference_cache.stats()
+
 # ===============================
 # AUTHENTICATION
 # ===============================
@@ -885,11 +1151,12 @@ def supabase_delete(table_name, filters):
 def authenticate_user(email, password):
     """Authenticate user with Supabase (optimized for version 2.16.0)"""
     try:
-        # Use the modern sign_in_with_password method (available in 2.16.0)
-        response = supabase.auth.sign_in_with_password({
-            "email": email,
-            "password": password
-        })
+        # Sign in on a private client: a sign-in switches the client it runs on to the user's token
+        with supabase.auth_client() as auth_client:
+            response = auth_client.auth.sign_in_with_password({
+                "email": email,
+                "password": password
+            })
         
         # Handle the response structure for newer Supabase versions
         if response.user and response.session:
@@ -1002,12 +1269,8 @@ def safe_log_user_activity(activity_type, description, resource_type=None, resou
         if metadata and isinstance(metadata, dict):
             activity_data['metadata'] = metadata
         
-        # Try to insert into activity log table if it exists
-        try:
-            supabase_admin.table('user_activity_log').insert(activity_data).execute()
-        except:
-            # If table doesn't exist, just log to console
-            print(f"📝 ACTIVITY: {activity_type} - {description}")
+        # Queued for the batched writer; failed writes are reported there
+        queue_activity_log(activity_data)
         
         return True
         
@@ -1022,8 +1285,7 @@ def safe_log_user_activity(activity_type, description, resource_type=None, resou
 def get_all_clients_from_db():
     """Get all clients from database"""
     try:
-        response = supabase_admin.table('clients').select('*').order('company_name').execute()
-        return response.data if response.data else []
+        return sort_rows_by(iter_table('clients'), 'company_name')
     except Exception as e:
         print(f"❌ ERROR: Failed to fetch clients: {e}")
         return []
@@ -1040,10 +1302,7 @@ def get_client_by_id_from_db(client_id):
 def get_client_bookings_from_db(client_id):
     """Get all bookings for a specific client"""
     try:
-        response = supabase_admin.table('bookings').select("""
-            *,
-            room:rooms(id, name, capacity)
-        """).eq('client_id', client_id).order('start_time', desc=True).execute()
+        response = select_shape(supabase_admin, 'client_booking_history').eq('client_id', client_id).order('start_time', desc=True).execute()
         
         if response.data:
             return convert_datetime_strings(response.data)
@@ -1063,6 +1322,8 @@ def create_client_in_db(client_data):
                 raise ValueError(f"Missing required field: {field}")
         
         response = supabase_admin.table('clients').insert(client_data).execute()
+        if response.data:
+            client_changed(response.data[0]['id'], response.data[0])
         return response.data[0] if response.data else None
             
     except Exception as e:
@@ -1073,6 +1334,7 @@ def update_client_in_db(client_id, client_data):
     """Update an existing client"""
     try:
         response = supabase_admin.table('clients').update(client_data).eq('id', client_id).execute()
+        client_changed(client_id, response.data[0] if response.data else client_data)
         return response.data[0] if response.data else {'success': True}
     except Exception as e:
         print(f"❌ ERROR: Failed to update client: {e}")
@@ -1089,35 +1351,216 @@ def delete_client_from_db(client_id):
         
         # Delete client
         supabase_admin.table('clients').delete().eq('id', client_id).execute()
+        client_changed(client_id, None)
         return True, "Client deleted successfully"
         
     except Exception as e:
         print(f"❌ ERROR: Failed to delete client: {e}")
         return False, f"Error deleting client: {str(e)}"
 
-def get_clients_with_booking_counts():
-    """Get all clients with their booking counts"""
+# ===============================
+# CLIENT SEARCH INDEX
+# ===============================
+
+# Autocomplete is served from memory; writes in this process update it directly and a
+# background reload every CLIENT_SEARCH_REFRESH_SECONDS picks up other workers' writes
+CLIENT_SEARCH_REFRESH_SECONDS = int(os.getenv('CLIENT_SEARCH_REFRESH_SECONDS', '300'))
+client_search_index = ClientSearchIndex()
+_client_search_load_lock = threading.Lock()
+
+def _load_client_search_index():
     try:
-        # Fetch all clients
-        clients = get_all_clients_from_db()
-        
-        # Fetch booking counts
-        bookings_response = supabase_admin.table('bookings').select('id, client_id').execute()
-        bookings = bookings_response.data if bookings_response.data else []
-        
-        # Count bookings per client
-        booking_counts = {}
-        for booking in bookings:
-            client_id = booking.get('client_id')
-            if client_id:
-                booking_counts[client_id] = booking_counts.get(client_id, 0) + 1
-        
-        # Add counts to clients
-        for client in clients:
-            client['booking_count'] = booking_counts.get(client['id'], 0)
-            client['display_name'] = client.get('company_name') or client.get('contact_person', 'Unknown')
+        client_search_index.rebuild(iter_rows(lambda: select_shape(supabase_admin, 'client_search_row')))
+        print(f"✅ Client search index built with {len(client_search_index)} clients")
+    except Exception as e:
+        print(f"❌ ERROR: Failed to build client search index: {e}")
+    finally:
+        _client_search_load_lock.release()
+
+def ensure_client_search_index():
+    """Build the index on first use; refresh it in the background once it is older than the refresh interval"""
+    if client_search_index.built_at is None:
+        # First use: build synchronously; concurrent callers wait for the same load
+        _client_search_load_lock.acquire()
+        if client_search_index.built_at is None:
+            _load_client_search_index()
+        else:
+            _client_search_load_lock.release()
+        return
+    if time.time() - client_search_index.built_at > CLIENT_SEARCH_REFRESH_SECONDS:
+        if _client_search_load_lock.acquire(blocking=False):
+            threading.Thread(target=_load_client_search_index, name='client-search-refresh', daemon=True).start()
+
+def search_clients_indexed(query, limit=10, fields=SEARCH_FIELDS):
+    """Top ranked client matches for autocomplete, each row carrying a 'score'"""
+    try:
+        ensure_client_search_index()
+        results = []
+        for score, client in client_search_index.search(query, limit=limit, fields=fields):
+            client['score'] = score
+            results.append(client)
+        return results
+    except Exception as e:
+        print(f"❌ ERROR: Client search failed: {e}")
+        return []
+
+def search_company_names(query, limit=10):
+    """Distinct company names matching query, best match first"""
+    names = []
+    seen = set()
+    # Several clients can share a company, so over-fetch before de-duplicating
+    for client in search_clients_indexed(query, limit=limit * 5, fields=('company_name',)):
+        name = client.get('company_name')
+        if name and name.lower() not in seen:
+            seen.add(name.lower())
+            names.append(client)
+        if len(names) >= limit:
+            break
+    return names
+
+def client_changed(client_id, client=None):
+    """Single hook for client writes: client=None removes it, otherwise its (changed) columns are indexed"""
+    try:
+        if client is None:
+            client_search_index.remove(client_id)
+        else:
+            client_search_index.upsert(client_id, client)
+    except Exception as e:
+        print(f"⚠️ WARNING: Failed to update client search index for client {client_id}: {e}")
+
+def get_client_search_stats():
+    return client_search_index.stats()
+
+# Flipped to False once the client_booking_stats view turns out to be missing, so the
+# directory stops probing for it on every request; other read errors only fall back once
+CLIENT_STATS_VIEW_AVAILABLE = True
+
+def _empty_client_aggregate():
+    """Default aggregate for a client without bookings"""
+    return {
+        'booking_count': 0,
+        'active_booking_count': 0,
+        'last_booking_date': None,
+        'days_since_last_booking': None,
+        'total_revenue': 0.0
+    }
+
+def _fetch_client_stats_from_view(client_ids=None):
+    """Read pre-grouped client stats from the client_booking_stats view"""
+    def build_query():
+        query = select_shape(supabase_admin, 'client_stats_view')
+        if client_ids is not None:
+            query = query.in_('client_id', list(client_ids))
+        return query
+    return list(iter_rows(build_query, key='client_id'))
+
+def _group_client_stats_locally(client_ids=None):
+    """Local stand-in for the client_booking_stats view: one fetch, grouped in memory"""
+    def build_query():
+        query = select_shape(supabase_admin, 'booking_client_totals')
+        if client_ids is not None:
+            query = query.in_('client_id', list(client_ids))
+        return query
+    
+    grouped = {}
+    for booking in iter_rows(build_query):
+        client_id = booking.get('client_id')
+        if not client_id:
+            continue
+        row = grouped.setdefault(client_id, {
+            'client_id': client_id,
+            'booking_count': 0,
+            'active_booking_count': 0,
+            'last_booking_at': None,
+            'total_revenue': 0.0
+        })
+        row['booking_count'] += 1
+        if booking.get('status') != 'cancelled':
+            row['active_booking_count'] += 1
+        start_time = booking.get('start_time')
+        if start_time and (row['last_booking_at'] is None or start_time > row['last_booking_at']):
+            row['last_booking_at'] = start_time
+        if booking.get('status') == 'confirmed':
+            row['total_revenue'] += safe_float_conversion(booking.get('total_price', 0))
+    
+    return list(grouped.values())
+
+def get_client_booking_aggregates(client_ids=None):
+    """
+    Compute booking aggregates for clients in a single grouped fetch.
+    
+    Uses the client_booking_stats view (see client_booking_stats.sql) when it
+    exists and falls back to grouping one bookings fetch locally otherwise.
+    
+    Args:
+        client_ids (iterable, optional): Restrict to these clients; all clients if None
+    
+    Returns:
+        dict: client_id -> {booking_count, active_booking_count, last_booking_date,
+                            days_since_last_booking, total_revenue}
+    """
+    global CLIENT_STATS_VIEW_AVAILABLE
+    
+    rows = None
+    if CLIENT_STATS_VIEW_AVAILABLE:
+        try:
+            rows = _fetch_client_stats_from_view(client_ids)
+        except Exception as e:
+            if is_missing_relation_error(e):
+                print(f"⚠️ WARNING: client_booking_stats view unavailable, grouping locally: {e}")
+                CLIENT_STATS_VIEW_AVAILABLE = False
+            else:
+                print(f"⚠️ WARNING: client_booking_stats view read failed, grouping locally this time: {e}")
+    
+    if rows is None:
+        try:
+            rows = _group_client_stats_locally(client_ids)
+        except Exception as e:
+            print(f"❌ ERROR: Failed to aggregate client bookings: {e}")
+            rows = []
+    
+    today = datetime.now(UTC).date()
+    aggregates = {}
+    for row in rows:
+        aggregate = _empty_client_aggregate()
+        aggregate['booking_count'] = safe_int_conversion(row.get('booking_count', 0))
+        aggregate['active_booking_count'] = safe_int_conversion(row.get('active_booking_count', 0))
+        aggregate['total_revenue'] = round(safe_float_conversion(row.get('total_revenue', 0)), 2)
+        
+        last_booking_at = row.get('last_booking_at')
+        if last_booking_at:
+            try:
+                last_booking_date = datetime.fromisoformat(str(last_booking_at).replace('Z', '+00:00')).date()
+                aggregate['last_booking_date'] = last_booking_date
+                aggregate['days_since_last_booking'] = (today - last_booking_date).days
+            except ValueError:
+                pass
         
-        return clients
+        aggregates[row.get('client_id')] = aggregate
+    
+    return aggregates
+
+def iter_clients_with_booking_counts(exclude_cancelled=False):
+    """
+    Stream every client, in id order, with booking count, last booking and revenue aggregates.
+    
+    Args:
+        exclude_cancelled (bool): Report booking_count without cancelled bookings
+    """
+    # One grouped fetch for every client's booking aggregates
+    aggregates = get_client_booking_aggregates()
+    
+    for client in iter_table('clients'):
+        client.update(aggregates.get(client['id']) or _empty_client_aggregate())
+        if exclude_cancelled:
+            client['booking_count'] = client['active_booking_count']
+        client['display_name'] = client.get('company_name') or client.get('contact_person', 'Unknown')
+        yield client
+
+def get_clients_with_booking_counts(exclude_cancelled=False):
+    """Get all clients with booking count, last booking and revenue aggregates"""
+    try:
+        return sort_rows_by(iter_clients_with_booking_counts(exclude_cancelled), 'company_name')
         
     except Exception as e:
         print(f"❌ ERROR: Failed to get clients with booking counts: {e}")
@@ -1187,20 +1630,52 @@ def find_or_create_client_enhanced(client_name, company_name=None, email=None, p
 # ROOM MANAGEMENT
 # ===============================
 
+# With several worker processes, another worker's writes only reach this index at its next
+# reload, so conflicts are confirmed against the database unless configured otherwise
+WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', '1'))
+BOOKING_INDEX_VERIFY = os.getenv('BOOKING_INDEX_VERIFY', 'True' if WEB_CONCURRENCY > 1 else 'False').lower() == 'true'
+
+def _load_booking_index_rows(since_iso):
+    """Load non-cancelled bookings that end after the index horizon (paged: a capped load would show booked rooms as free)"""
+    return list(iter_rows(
+        lambda: select_shape(supabase_admin, 'booking_interval').neq('status', 'cancelled').gt('end_time', since_iso)
+    ))
+
+booking_index = BookingIntervalIndex(
+    _load_booking_index_rows,
+    ttl_seconds=int(os.getenv('BOOKING_INDEX_TTL', '300')),
+    horizon_days=int(os.getenv('BOOKING_INDEX_HORIZON_DAYS', '30'))
+)
+
+def _query_room_conflicts(room_id, start_time, end_time, exclude_booking_id=None):
+    """Run the overlap query against the database"""
+    query = select_shape(supabase_admin, 'booking_conflict')
+    query = query.eq('room_id', room_id)
+    query = query.neq('status', 'cancelled')
+    query = query.lt('start_time', end_time.isoformat())
+    query = query.gt('end_time', start_time.isoformat())
+    
+    if exclude_booking_id:
+        query = query.neq('id', exclude_booking_id)
+    
+    response = query.execute()
+    return response.data if response.data else []
+
+def find_room_conflicts(room_id, start_time, end_time, exclude_booking_id=None):
+    """Overlapping bookings from the interval index, falling back to (or verified against) the database"""
+    conflicts = booking_index.conflicts(room_id, start_time, end_time, exclude_booking_id)
+    if conflicts is not None and not BOOKING_INDEX_VERIFY:
+        return conflicts
+    
+    database_conflicts = _query_room_conflicts(room_id, start_time, end_time, exclude_booking_id)
+    if conflicts is not None:
+        booking_index.record_verification(room_id, conflicts, database_conflicts)
+    return database_conflicts
+
 def is_room_available_supabase(room_id, start_time, end_time, exclude_booking_id=None):
     """Check if a room is available for given time period"""
     try:
-        query = supabase_admin.table('bookings').select('id')
-        query = query.eq('room_id', room_id)
-        query = query.neq('status', 'cancelled')
-        query = query.lt('start_time', end_time.isoformat())
-        query = query.gt('end_time', start_time.isoformat())
-        
-        if exclude_booking_id:
-            query = query.neq('id', exclude_booking_id)
-        
-        response = query.execute()
-        return len(response.data) == 0
+        return len(find_room_conflicts(room_id, start_time, end_time, exclude_booking_id)) == 0
     except Exception as e:
         print(f"Availability check error: {e}")
         return False
@@ -1208,21 +1683,80 @@ def is_room_available_supabase(room_id, start_time, end_time, exclude_booking_id
 def check_room_conflicts(room_id, start_time, end_time, exclude_booking_id=None):
     """Get all conflicting bookings for a room and time period"""
     try:
-        query = supabase_admin.table('bookings').select('id, title, status, start_time, end_time')
-        query = query.eq('room_id', room_id)
-        query = query.neq('status', 'cancelled')
-        query = query.lt('start_time', end_time.isoformat())
-        query = query.gt('end_time', start_time.isoformat())
-        
-        if exclude_booking_id:
-            query = query.neq('id', exclude_booking_id)
-        
-        response = query.execute()
-        return response.data if response.data else []
+        return find_room_conflicts(room_id, start_time, end_time, exclude_booking_id)
     except Exception as e:
         print(f"Conflict check error: {e}")
         return []
 
+def classify_room_conflicts(conflicting_bookings):
+    """Split conflicts into confirmed (blocking) and tentative (warning) bookings"""
+    return {
+        'confirmed': [b for b in conflicting_bookings if b.get('status') == 'confirmed'],
+        'tentative': [b for b in conflicting_bookings if b.get('status') == 'tentative']
+    }
+
+def update_booking_index(booking):
+    """Apply a created/updated booking row (as returned by Supabase) to the conflict index"""
+    try:
+        booking_index.upsert(booking)
+    except Exception as e:
+        print(f"⚠️ WARNING: Failed to update booking index, forcing reload: {e}")
+        booking_index.invalidate()
+
+def remove_from_booking_index(booking_id):
+    """Drop a deleted booking from the conflict index"""
+    booking_index.remove(booking_id)
+
+def booking_changed(old_booking, new_booking):
+    """Propagate a booking write to in-process indexes and aggregates.
+
+    old_booking is None for a create and new_booking is None for a delete; pass
+    whatever row the caller has (a partial row makes the aggregates recompute).
+    """
+    forget_booking_detail((new_booking or old_booking or {}).get('id'))
+    if new_booking is None:
+        remove_from_booking_index((old_booking or {}).get('id'))
+        deleted_bookings_log.record((old_booking or {}).get('id'))
+    else:
+        update_booking_index(new_booking)
+    apply_booking_to_dashboard_stats(old_booking, new_booking)
+    refresh_daily_rollup(old_booking, new_booking)
+    invalidate_booking_documents((new_booking or old_booking or {}).get('id'))
+
+def verify_booking_index():
+    """Cross-check the whole conflict index against the database"""
+    try:
+        snapshot = booking_index.snapshot()
+        if snapshot is None:
+            return {'verified': False, 'error': 'Index could not be loaded'}
+        
+        coverage_start = datetime.fromtimestamp(booking_index.coverage_start, UTC).isoformat()
+        database = {
+            row['id']: (row['room_id'], to_timestamp(row['start_time']), to_timestamp(row['end_time']), row['status'])
+            for row in _load_booking_index_rows(coverage_start)
+        }
+        
+        missing = sorted(set(database) - set(snapshot))
+        unexpected = sorted(set(snapshot) - set(database))
+        changed = sorted(booking_id for booking_id in set(database) & set(snapshot)
+                         if database[booking_id] != snapshot[booking_id])
+        verified = not (missing or unexpected or changed)
+        if not verified:
+            print(f"⚠️ WARNING: Booking index out of sync - missing={missing} unexpected={unexpected} changed={changed}")
+            booking_index.invalidate()
+        
+        return {
+            'verified': verified,
+            'indexed_bookings': len(snapshot),
+            'database_bookings': len(database),
+            'missing': missing,
+            'unexpected': unexpected,
+            'changed': changed
+        }
+    except Exception as e:
+        print(f"❌ ERROR: Booking index verification failed: {e}")
+        return {'verified': False, 'error': str(e)}
+
 # ===============================
 # BOOKING MANAGEMENT
 # ===============================
@@ -1287,11 +1821,11 @@ def extract_booking_form_data(form_data, is_update=False):
         # If no pricing items, calculate basic room rate
         if not pricing_items or total_price <= 0:
             room_id = int(form_data.get('room_id'))
-            total_price = calculate_booking_total(room_id, start_time, end_time)
+            breakdown = get_price_breakdown(room_id, start_time, end_time)
+            total_price = breakdown['total'] if breakdown else 0
             
             # Create basic pricing item
-            room_data = supabase_select('rooms', filters=[('id', 'eq', room_id)])
-            room_name = room_data[0].get('name', 'Conference Room') if room_data else 'Conference Room'
+            room_name = (breakdown or {}).get('room_name') or 'Conference Room'
             
             duration_hours = (end_time - start_time).total_seconds() / 3600
             pricing_items = [{
@@ -1367,41 +1901,30 @@ def extract_pricing_items_from_form(form_data):
         print(f"❌ ERROR: Failed to extract pricing items: {e}")
         return [], 0
 
-def calculate_booking_total(room_id, start_time, end_time, addon_ids=None):
-    """Calculate total price for a booking"""
+def get_rate_table():
+    """Room and add-on rates, rebuilt only when the cached rooms or addons tables reload"""
+    return reference_cache.derive('rate_table', ('rooms', 'addons'), RateTable)
+
+def get_price_breakdown(room_id, start_time, end_time, addon_ids=None):
+    """Full price breakdown for one booking from the cached rate table (None if the room is unknown)"""
     try:
-        # Get room data
-        room_data = supabase_select('rooms', filters=[('id', 'eq', room_id)])
-        if not room_data:
-            return 0
-        
-        room = room_data[0]
-        
-        # Calculate duration in hours
-        duration_hours = (end_time - start_time).total_seconds() / 3600
-        
-        # Calculate room rate based on duration
-        if duration_hours <= 4:
-            room_rate = float(room['hourly_rate']) * duration_hours
-        elif duration_hours <= 6:
-            room_rate = float(room['half_day_rate'])
-        else:
-            room_rate = float(room['full_day_rate'])
-        
-        # Calculate add-ons total
-        addons_total = 0
-        if addon_ids:
-            for addon_id in addon_ids:
-                addon_data = supabase_select('addons', filters=[('id', 'eq', addon_id)])
-                if addon_data:
-                    addons_total += float(addon_data[0]['price'])
-        
-        total = room_rate + addons_total
-        return max(total, 0)
-        
+        return get_rate_table().price(room_id, start_time, end_time, addon_ids)
     except Exception as e:
         print(f"Price calculation error: {e}")
-        return 0
+        return None
+
+def price_bookings(candidates):
+    """Price many candidate bookings against one rate table; unknown rooms price as None"""
+    try:
+        return get_rate_table().price_many(candidates)
+    except Exception as e:
+        print(f"Price calculation error: {e}")
+        return [None] * len(candidates)
+
+def calculate_booking_total(room_id, start_time, end_time, addon_ids=None):
+    """Calculate total price for a booking"""
+    breakdown = get_price_breakdown(room_id, start_time, end_time, addon_ids)
+    return breakdown['total'] if breakdown else 0
 
 def validate_booking_business_rules(booking_data, exclude_booking_id=None):
     """Validate booking against business rules"""
@@ -1417,8 +1940,10 @@ def validate_booking_business_rules(booking_data, exclude_booking_id=None):
             exclude_booking_id=exclude_booking_id
         )
         
+        conflicts_by_status = classify_room_conflicts(conflicting_bookings)
+        
         # Only error if there are confirmed conflicts
-        confirmed_conflicts = [b for b in conflicting_bookings if b.get('status') == 'confirmed']
+        confirmed_conflicts = conflicts_by_status['confirmed']
         if confirmed_conflicts:
             conflict_details = []
             for conflict in confirmed_conflicts:
@@ -1441,7 +1966,7 @@ def validate_booking_business_rules(booking_data, exclude_booking_id=None):
             errors.append(error_msg)
         
         # Warn about tentative conflicts
-        tentative_conflicts = [b for b in conflicting_bookings if b.get('status') == 'tentative']
+        tentative_conflicts = conflicts_by_status['tentative']
         if tentative_conflicts:
             conflict_details = []
             for conflict in tentative_conflicts:
@@ -1473,9 +1998,9 @@ def validate_booking_business_rules(booking_data, exclude_booking_id=None):
                 pass
         
         # Check room capacity - Allow over capacity but give warning
-        room_data = supabase_select('rooms', filters=[('id', 'eq', booking_data['room_id'])])
-        if room_data:
-            room_capacity = room_data[0].get('capacity', 0)
+        room = get_cached_room(booking_data['room_id'])
+        if room:
+            room_capacity = room.get('capacity', 0)
             if booking_data['attendees'] > room_capacity:
                 # Changed from error to warning - allow the booking to proceed
                 warnings.append(f'⚠️ Warning: Attendees ({booking_data["attendees"]}) exceed room capacity ({room_capacity})')
@@ -1529,14 +2054,16 @@ def find_or_create_event_type(event_type, custom_event_type=None):
             event_name = event_type.replace('_', ' ').title()
         
         # Search for existing
-        existing_event = supabase_admin.table('event_types').select('*').eq('name', event_name).execute()
+        existing_event = next((et for et in get_cached_event_types() if et.get('name') == event_name), None)
         
-        if existing_event.data:
-            event_type_id = existing_event.data[0]['id']
+        if existing_event:
+            event_type_id = existing_event['id']
+            usage_count = (existing_event.get('usage_count') or 0) + 1
             # Increment usage count
             supabase_admin.table('event_types').update({
-                'usage_count': existing_event.data[0]['usage_count'] + 1
+                'usage_count': usage_count
             }).eq('id', event_type_id).execute()
+            reference_cache.update_row('event_types', event_type_id, {'usage_count': usage_count})
             return event_type_id
         
         # Create new
@@ -1547,6 +2074,8 @@ def find_or_create_event_type(event_type, custom_event_type=None):
         }
         
         result = supabase_insert('event_types', event_data)
+        if result:
+            invalidate_reference_data('event_types')
         return result['id'] if result else None
             
     except Exception as e:
@@ -1592,6 +2121,7 @@ def create_complete_booking(booking_data, client_id, event_type_id):
             return None
         
         booking_id = booking_result['id']
+        booking_changed(None, booking_result)
         
         # Create custom addon records
         for item in booking_data['pricing_items']:
@@ -1635,31 +2165,44 @@ def create_complete_booking(booking_data, client_id, event_type_id):
         print(f"❌ ERROR: Failed to create booking: {e}")
         return None
 
+register_request_value('_booking_detail_memo', dict)
+
+def _booking_detail_memo():
+    """Per-request {booking_id: row} memo, or None outside a request"""
+    return request_value('_booking_detail_memo')
+
+def load_booking_detail(booking_id):
+    """
+    The canonical booking loader: booking, room, client, event type and custom add-ons in one embedded query.
+    
+    Within a request the row is fetched once and every caller gets its own copy, so
+    view/edit/quotation/print helpers never refetch it. Returns None if the booking
+    does not exist; query errors propagate.
+    """
+    memo = _booking_detail_memo()
+    if memo is not None and booking_id in memo:
+        row = memo[booking_id]
+    else:
+        response = select_shape(supabase_admin, 'booking_detail').eq('id', booking_id).execute()
+        row = response.data[0] if response.data else None
+        if row is not None:
+            row['custom_addons'] = row.get('custom_addons') or []
+        if memo is not None:
+            memo[booking_id] = row
+    if row is None:
+        return None
+    return convert_datetime_strings(copy.deepcopy(row))
+
+def forget_booking_detail(booking_id):
+    """Drop a booking from this request's memo after writing it"""
+    memo = _booking_detail_memo()
+    if memo is not None:
+        memo.pop(booking_id, None)
+
 def get_complete_booking_details(booking_id):
     """Get complete booking details including all related data"""
     try:
-        # Get booking with relations
-        booking_response = supabase_admin.table('bookings').select("""
-            *,
-            room:rooms(*),
-            client:clients(*),
-            event_type:event_types(*)
-        """).eq('id', booking_id).execute()
-        
-        if not booking_response.data:
-            return None
-        
-        booking = booking_response.data[0]
-        
-        # Get custom addons
-        addons_response = supabase_admin.table('booking_custom_addons').select('*').eq('booking_id', booking_id).execute()
-        booking['custom_addons'] = addons_response.data if addons_response.data else []
-        
-        # Convert datetime strings
-        booking = convert_datetime_strings(booking)
-        
-        return booking
-        
+        return load_booking_detail(booking_id)
     except Exception as e:
         print(f"❌ ERROR: Failed to fetch booking details: {e}")
         return None
@@ -1722,6 +2265,7 @@ def update_complete_booking(booking_id, booking_data, existing_booking):
         booking_result = supabase_update('bookings', booking_update, [('id', 'eq', booking_id)])
         if not booking_result:
             return False
+        booking_changed(existing_booking, booking_result[0])
         
         # Delete existing custom addons
         supabase_admin.table('booking_custom_addons').delete().eq('booking_id', booking_id).execute()
@@ -1901,147 +2445,177 @@ def calculate_booking_totals(booking, room_rates=None):
             'total': round(total_price, 2)
         }
 
-def get_booking_calendar_events_supabase():
-    """Get all bookings formatted for calendar display with enhanced error handling"""
+CALENDAR_SINCE_OVERLAP_SECONDS = int(os.getenv('CALENDAR_SINCE_OVERLAP_SECONDS', '5'))
+
+# Hard deletes leave no updated_at to find, so incremental feeds read them from here
+deleted_bookings_log = DeletedBookingLog(max_entries=int(os.getenv('CALENDAR_DELETED_LOG_SIZE', '2000')))
+
+def get_calendar_feed(start=None, end=None, room_id=None, since=None, load_events=None):
+    """Calendar events for a window, or the changes to it since a cursor (raises ValueError on bad parameters)"""
+    return build_calendar_feed(load_events or _load_calendar_events, deleted_bookings_log,
+                               start=start, end=end, room_id=room_id, since=since,
+                               overlap_seconds=CALENDAR_SINCE_OVERLAP_SECONDS)
+
+def calendar_feed_response(feed, payload):
+    """JSON response with the feed cursor in headers and an ETag so unchanged windows get a 304"""
+    response = jsonify(payload)
+    response.headers['X-Calendar-Cursor'] = feed['cursor']
+    response.headers['X-Calendar-Window'] = f"{feed['window_start']}/{feed['window_end']}"
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.add_etag()
+    return response.make_conditional(request)
+
+def get_booking_calendar_events_supabase(start=None, end=None, room_id=None, updated_since=None):
+    """Get bookings formatted for calendar display with enhanced error handling"""
     try:
-        # Get all bookings with related data
-        bookings_response = supabase_admin.table('bookings').select("""
-            *,
-            room:rooms(id, name, capacity),
-            client:clients(id, contact_person, company_name, email, phone)
-        """).neq('status', 'cancelled').execute()
-        
-        if not bookings_response.data:
-            return []
-        
-        events = []
-        for booking in bookings_response.data:
-            try:
-                # Get room name with fallbacks
-                room_name = 'Room Details Loading...'
-                room_id = booking.get('room_id')
-                
-                if booking.get('room') and isinstance(booking['room'], dict):
-                    room_name = (booking['room'].get('name') or '').strip()
-                    if not room_name:
-                        room_name = f"Room {room_id}" if room_id else 'Room Details Loading...'
-                elif booking.get('room_name'):
-                    room_name = (booking.get('room_name') or '').strip()
-                    if not room_name:
-                        room_name = f"Room {room_id}" if room_id else 'Room Details Loading...'
-                
-                # Get client name with fallbacks
-                client_name = 'Client Details Loading...'
-                client_id = booking.get('client_id')
-                
-                if booking.get('client') and isinstance(booking['client'], dict):
-                    client = booking['client']
-                    company_name = (client.get('company_name') or '').strip()
-                    contact_person = (client.get('contact_person') or '').strip()
-                    
-                    if company_name:
-                        client_name = company_name
-                    elif contact_person:
-                        client_name = contact_person
-                    else:
-                        client_name = f"Client {client_id}" if client_id else 'Client Details Loading...'
-                elif booking.get('client_name'):
-                    client_name = (booking.get('client_name') or '').strip()
-                    if not client_name:
-                        client_name = f"Client {client_id}" if client_id else 'Client Details Loading...'
-                
-                # Determine event color based on status
-                status = booking.get('status', 'tentative')
-                color_map = {
-                    'tentative': '#FFA500',    # Orange
-                    'confirmed': '#28a745',    # Green
-                    'cancelled': '#dc3545',    # Red
-                    'completed': '#17a2b8'     # Teal
-                }
-                color = color_map.get(status, '#6c757d')  # Default: Gray
-                
-                # Create meaningful title
-                event_title = booking.get('title', '').strip()
-                if not event_title:
-                    event_type = booking.get('event_type', 'Conference').replace('_', ' ').title()
-                    if event_type == 'Other' and booking.get('custom_event_type'):
-                        event_type = booking.get('custom_event_type').strip()
-                    event_title = f"{event_type} - {client_name}"
-                
-                # Calculate duration for display
-                duration_display = 'Duration TBD'
-                try:
-                    if booking.get('start_time') and booking.get('end_time'):
-                        start_time = datetime.fromisoformat(booking['start_time'].replace('Z', '+00:00'))
-                        end_time = datetime.fromisoformat(booking['end_time'].replace('Z', '+00:00'))
-                        duration = end_time - start_time
-                        
-                        if duration.days > 0:
-                            duration_display = f"{duration.days}d {duration.seconds//3600}h"
-                        else:
-                            hours = duration.seconds // 3600
-                            minutes = (duration.seconds % 3600) // 60
-                            if hours > 0:
-                                duration_display = f"{hours}h {minutes}m" if minutes > 0 else f"{hours}h"
-                            else:
-                                duration_display = f"{minutes}m"
-                except Exception:
-                    pass
-                
-                # Create event with comprehensive data
-                event_data = {
-                    'id': booking['id'],
-                    'title': event_title,
-                    'start': booking.get('start_time'),
-                    'end': booking.get('end_time'),
-                    'color': color,
-                    'borderColor': color,
-                    'textColor': '#ffffff',
-                    'extendedProps': {
-                        'room': room_name,
-                        'roomId': room_id,
-                        'client': client_name,
-                        'clientId': client_id,
-                        'attendees': booking.get('attendees', 0),
-                        'total': safe_float_conversion(booking.get('total_price', 0)),
-                        'status': status.replace('_', ' ').title(),
-                        'statusRaw': status,
-                        'notes': booking.get('notes', ''),
-                        'duration': duration_display,
-                        'event_type': booking.get('event_type', 'conference'),
-                        'description': f"{room_name} • {client_name} • {booking.get('attendees', 0)} attendees"
-                    }
-                }
-                
-                events.append(event_data)
-                
-            except Exception as e:
-                print(f"⚠️ Error processing booking {booking.get('id')} for calendar: {e}")
-                # Create minimal event for problematic bookings
-                events.append({
-                    'id': booking.get('id', 'unknown'),
-                    'title': f"Booking {booking.get('id', 'Unknown')} - Data Loading...",
-                    'start': booking.get('start_time'),
-                    'end': booking.get('end_time'),
-                    'color': '#6c757d',
-                    'extendedProps': {
-                        'room': 'Room Details Loading...',
-                        'client': 'Client Details Loading...',
-                        'status': 'Loading...',
-                        'attendees': 0,
-                        'total': 0
-                    }
-                })
-        
-        print(f"✅ Generated {len(events)} calendar events")
-        return events
-        
+        return _load_calendar_events(start, end, room_id, updated_since)
     except Exception as e:
         print(f"❌ Calendar events error: {e}")
         import traceback
         traceback.print_exc()
         return []
 
+def _load_calendar_events(start=None, end=None, room_id=None, updated_since=None):
+    """Load calendar events overlapping [start, end), or every booking changed since updated_since (cancelled included)"""
+    query = select_shape(supabase_admin, 'booking_calendar_event')
+    if updated_since is not None:
+        query = query.gte('updated_at', updated_since.isoformat())
+    else:
+        query = query.neq('status', 'cancelled')
+        if start is not None:
+            query = query.gt('end_time', start.isoformat())
+        if end is not None:
+            query = query.lt('start_time', end.isoformat())
+        if room_id:
+            query = query.eq('room_id', room_id)
+    bookings_response = query.order('start_time').execute()
+    
+    if not bookings_response.data:
+        return []
+    
+    events = []
+    for booking in bookings_response.data:
+        try:
+            # Get room name with fallbacks
+            room_name = 'Room Details Loading...'
+            room_id = booking.get('room_id')
+            
+            if booking.get('room') and isinstance(booking['room'], dict):
+                room_name = (booking['room'].get('name') or '').strip()
+                if not room_name:
+                    room_name = f"Room {room_id}" if room_id else 'Room Details Loading...'
+            elif booking.get('room_name'):
+                room_name = (booking.get('room_name') or '').strip()
+                if not room_name:
+                    room_name = f"Room {room_id}" if room_id else 'Room Details Loading...'
+            
+            # Get client name with fallbacks
+            client_name = 'Client Details Loading...'
+            client_id = booking.get('client_id')
+            
+            if booking.get('client') and isinstance(booking['client'], dict):
+                client = booking['client']
+                company_name = (client.get('company_name') or '').strip()
+                contact_person = (client.get('contact_person') or '').strip()
+                
+                if company_name:
+                    client_name = company_name
+                elif contact_person:
+                    client_name = contact_person
+                else:
+                    client_name = f"Client {client_id}" if client_id else 'Client Details Loading...'
+            elif booking.get('client_name'):
+                client_name = (booking.get('client_name') or '').strip()
+                if not client_name:
+                    client_name = f"Client {client_id}" if client_id else 'Client Details Loading...'
+            
+            # Determine event color based on status
+            status = booking.get('status', 'tentative')
+            color_map = {
+                'tentative': '#FFA500',    # Orange
+                'confirmed': '#28a745',    # Green
+                'cancelled': '#dc3545',    # Red
+                'completed': '#17a2b8'     # Teal
+            }
+            color = color_map.get(status, '#6c757d')  # Default: Gray
+            
+            # Create meaningful title
+            event_title = booking.get('title', '').strip()
+            if not event_title:
+                event_type = booking.get('event_type', 'Conference').replace('_', ' ').title()
+                if event_type == 'Other' and booking.get('custom_event_type'):
+                    event_type = booking.get('custom_event_type').strip()
+                event_title = f"{event_type} - {client_name}"
+            
+            # Calculate duration for display
+            duration_display = 'Duration TBD'
+            try:
+                if booking.get('start_time') and booking.get('end_time'):
+                    start_time = datetime.fromisoformat(booking['start_time'].replace('Z', '+00:00'))
+                    end_time = datetime.fromisoformat(booking['end_time'].replace('Z', '+00:00'))
+                    duration = end_time - start_time
+                    
+                    if duration.days > 0:
+                        duration_display = f"{duration.days}d {duration.seconds//3600}h"
+                    else:
+                        hours = duration.seconds // 3600
+                        minutes = (duration.seconds % 3600) // 60
+                        if hours > 0:
+                            duration_display = f"{hours}h {minutes}m" if minutes > 0 else f"{hours}h"
+                        else:
+                            duration_display = f"{minutes}m"
+            except Exception:
+                pass
+            
+            # Create event with comprehensive data
+            event_data = {
+                'id': booking['id'],
+                'title': event_title,
+                'start': booking.get('start_time'),
+                'end': booking.get('end_time'),
+                'color': color,
+                'borderColor': color,
+                'textColor': '#ffffff',
+                'extendedProps': {
+                    'room': room_name,
+                    'roomId': room_id,
+                    'client': client_name,
+                    'clientId': client_id,
+                    'attendees': booking.get('attendees', 0),
+                    'total': safe_float_conversion(booking.get('total_price', 0)),
+                    'status': status.replace('_', ' ').title(),
+                    'statusRaw': status,
+                    'notes': booking.get('notes', ''),
+                    'duration': duration_display,
+                    'event_type': booking.get('event_type', 'conference'),
+                    'description': f"{room_name} • {client_name} • {booking.get('attendees', 0)} attendees"
+                }
+            }
+            
+            events.append(event_data)
+            
+        except Exception as e:
+            print(f"⚠️ Error processing booking {booking.get('id')} for calendar: {e}")
+            # Create minimal event for problematic bookings
+            events.append({
+                'id': booking.get('id', 'unknown'),
+                'title': f"Booking {booking.get('id', 'Unknown')} - Data Loading...",
+                'start': booking.get('start_time'),
+                'end': booking.get('end_time'),
+                'color': '#6c757d',
+                'extendedProps': {
+                    'room': 'Room Details Loading...',
+                    'client': 'Client Details Loading...',
+                    'status': 'Loading...',
+                    'statusRaw': booking.get('status'),
+                    'attendees': 0,
+                    'total': 0
+                }
+            })
+
+    print(f"✅ Generated {len(events)} calendar events")
+    return events
+
 def format_booking_success_message(booking_data):
     """Format a success message for booking creation"""
     event_title = booking_data.get('custom_event_type') if booking_data.get('event_type') == 'other' else booking_data.get('event_type', 'Event').replace('_', ' ').title()
@@ -2326,11 +2900,10 @@ class BookingForm(FlaskForm):
         if not field.data or not self.room_id.data:
             return
         
-        room_data = supabase_select('rooms', filters=[('id', 'eq', self.room_id.data)])
-        if not room_data:
+        room = get_cached_room(self.room_id.data)
+        if not room:
             return
         
-        room = room_data[0]
         if field.data > room['capacity']:
             flash(f'Warning: Room capacity ({room["capacity"]}) exceeded', 'warning')
 
@@ -2382,60 +2955,57 @@ class RegistrationForm(FlaskForm):
         except Exception as e:
             print(f"Warning: Could not check email uniqueness: {e}")
 
+def get_booking_creator_name(user_id):
+    """Display name of the user who created a booking (memoized per request)"""
+    if not user_id:
+        return 'Unknown User'
+    memo = _booking_detail_memo()
+    key = ('creator', user_id)
+    if memo is not None and key in memo:
+        return memo[key]
+    try:
+        user_response = supabase_admin.table('users').select('id, first_name, last_name, username, email').eq('id', user_id).execute()
+        if user_response.data:
+            user = user_response.data[0]
+            # Build full name from first_name and last_name
+            first_name = (user.get('first_name') or '').strip()
+            last_name = (user.get('last_name') or '').strip()
+            username = (user.get('username') or '').strip()
+            email = (user.get('email') or '').strip()
+            
+            # Prefer full name, then username, then email
+            if first_name and last_name:
+                name = f"{first_name} {last_name}"
+            elif first_name:
+                name = first_name
+            elif username:
+                name = username
+            elif email:
+                name = email
+            else:
+                name = f"User {user_id}"
+        else:
+            name = f"User {user_id}"
+    except Exception as e:
+        print(f"⚠️ WARNING: Could not fetch user details: {e}")
+        return f"User {user_id}"
+    if memo is not None:
+        memo[key] = name
+    return name
+
 def get_booking_with_details(booking_id):
     """Get booking with all related details"""
     try:
-        # Get booking with relations
-        booking_response = supabase_admin.table('bookings').select("""
-            *,
-            room:rooms(*),
-            client:clients(*),
-            event_type:event_types(*)
-        """).eq('id', booking_id).execute()
+        booking = load_booking_detail(booking_id)
 
-        if not booking_response.data:
+        if not booking:
             return None
 
-        booking = booking_response.data[0]
-
-        # Get user details if created_by is available
         if booking.get('created_by'):
-            try:
-                user_response = supabase_admin.table('users').select('id, first_name, last_name, username, email').eq('id', booking['created_by']).execute()
-                if user_response.data:
-                    user = user_response.data[0]
-                    # Build full name from first_name and last_name
-                    first_name = user.get('first_name', '').strip()
-                    last_name = user.get('last_name', '').strip()
-                    username = user.get('username', '').strip()
-                    email = user.get('email', '').strip()
-                    
-                    # Prefer full name, then username, then email
-                    if first_name and last_name:
-                        booking['created_by_name'] = f"{first_name} {last_name}"
-                    elif first_name:
-                        booking['created_by_name'] = first_name
-                    elif username:
-                        booking['created_by_name'] = username
-                    elif email:
-                        booking['created_by_name'] = email
-                    else:
-                        booking['created_by_name'] = f"User {booking['created_by']}"
-                else:
-                    booking['created_by_name'] = f"User {booking['created_by']}"
-            except Exception as e:
-                print(f"⚠️ WARNING: Could not fetch user details: {e}")
-                booking['created_by_name'] = f"User {booking['created_by']}"
+            booking['created_by_name'] = get_booking_creator_name(booking['created_by'])
         else:
             booking['created_by_name'] = 'Unknown User'
 
-        # Get custom addons
-        addons_response = supabase_admin.table('booking_custom_addons').select('*').eq('booking_id', booking_id).execute()
-        booking['custom_addons'] = addons_response.data if addons_response.data else []
-
-        # Convert datetime strings
-        booking = convert_datetime_strings(booking)
-
         # Calculate totals
         totals = calculate_booking_totals(booking)
         booking.update(totals)
@@ -2446,209 +3016,209 @@ def get_booking_with_details(booking_id):
         print(f"❌ ERROR: Failed to fetch booking details: {e}")
         return None
 
+def get_bookings_with_details(start_date=None, end_date=None, statuses=None, client_id=None, booking_ids=None,
+                              max_bookings=None):
+    """
+    Booking detail rows (room, client, event type, add-ons, totals) for many bookings, one query per page.
+    
+    Filters: CAT start dates (inclusive), statuses, client_id and explicit booking_ids.
+    Raises ValueError if more than max_bookings match. Query errors propagate.
+    """
+    def build_query():
+        query = select_shape(supabase_admin, 'booking_detail')
+        if start_date:
+            query = query.gte('start_time', datetime.combine(start_date, datetime.min.time()).replace(tzinfo=CAT).isoformat())
+        if end_date:
+            query = query.lt('start_time', datetime.combine(end_date + timedelta(days=1), datetime.min.time()).replace(tzinfo=CAT).isoformat())
+        if statuses:
+            query = query.in_('status', list(statuses))
+        if client_id:
+            query = query.eq('client_id', client_id)
+        if booking_ids:
+            query = query.in_('id', list(booking_ids))
+        return query
+    
+    bookings = []
+    for booking in iter_rows(build_query):
+        bookings.append(booking)
+        if max_bookings is not None and len(bookings) > max_bookings:
+            raise ValueError(f'More than {max_bookings} bookings match; narrow the selection')
+    
+    detailed = []
+    for booking in bookings:
+        booking['custom_addons'] = booking.get('custom_addons') or []
+        booking = convert_datetime_strings(booking)
+        booking.update(calculate_booking_totals(booking))
+        detailed.append(booking)
+    return detailed
+
 # ===============================
 # DASHBOARD FUNCTIONS
 # ===============================
 
+DASHBOARD_SNAPSHOT_TABLE_AVAILABLE = True
+DASHBOARD_STATS_RECOMPUTE_HOURS = float(os.getenv('DASHBOARD_STATS_RECOMPUTE_HOURS', '24'))
+
+dashboard_stats = DashboardStatsAggregate()
+# A dashboard fan-out that times out keeps running on its pool thread, possibly mid-rebuild with
+# this lock held, so later loads only wait this long before serving the aggregate as it stands
+DASHBOARD_STATS_LOCK_WAIT_SECONDS = float(os.getenv('DASHBOARD_STATS_LOCK_WAIT_SECONDS', '2'))
+_dashboard_stats_lock = threading.Lock()
+_dashboard_snapshot_checked = False
+
+def _fetch_dashboard_booking_rows(stats=None):
+    """Stream the few booking columns the dashboard aggregate needs, page by page"""
+    return iter_rows(lambda: select_shape(supabase_admin, 'booking_stats_row'), stats=stats)
+
+DASHBOARD_SNAPSHOT_DELAY_SECONDS = float(os.getenv('DASHBOARD_SNAPSHOT_DELAY_SECONDS', '5'))
+_dashboard_snapshot_dirty = threading.Event()
+_dashboard_snapshot_thread = None
+_dashboard_snapshot_thread_lock = threading.Lock()
+
+def _persist_dashboard_snapshot():
+    """Save the dashboard aggregate so restarts start warm; returns True once written"""
+    global DASHBOARD_SNAPSHOT_TABLE_AVAILABLE
+    if not DASHBOARD_SNAPSHOT_TABLE_AVAILABLE:
+        return False
+    try:
+        supabase_admin.table('dashboard_stats_snapshot').upsert({
+            'id': 1,
+            'data': dashboard_stats.to_snapshot(),
+            'updated_at': datetime.now(UTC).isoformat()
+        }).execute()
+        return True
+    except Exception as e:
+        if is_missing_relation_error(e):
+            print(f"⚠️ WARNING: dashboard_stats_snapshot table unavailable, keeping stats in memory only: {e}")
+            DASHBOARD_SNAPSHOT_TABLE_AVAILABLE = False
+        else:
+            print(f"⚠️ WARNING: Could not save dashboard stats snapshot, will retry on the next write: {e}")
+        return False
+
+def _dashboard_snapshot_worker():
+    while True:
+        _dashboard_snapshot_dirty.wait()
+        time.sleep(DASHBOARD_SNAPSHOT_DELAY_SECONDS)  # one upsert for a burst of booking writes
+        flush_dashboard_snapshot()
+
+def schedule_dashboard_snapshot():
+    """Mark the snapshot dirty; a background thread saves it DASHBOARD_SNAPSHOT_DELAY_SECONDS later"""
+    global _dashboard_snapshot_thread
+    _dashboard_snapshot_dirty.set()
+    with _dashboard_snapshot_thread_lock:
+        # Checked on every call: the thread does not survive a fork
+        if _dashboard_snapshot_thread is None or not _dashboard_snapshot_thread.is_alive():
+            if _dashboard_snapshot_thread is None:
+                atexit.register(flush_dashboard_snapshot)
+            _dashboard_snapshot_thread = threading.Thread(target=_dashboard_snapshot_worker,
+                                                          name='dashboard-snapshot-writer', daemon=True)
+            _dashboard_snapshot_thread.start()
+
+def flush_dashboard_snapshot():
+    """Save a pending snapshot now (at exit, and from scripts and tests)"""
+    if not _dashboard_snapshot_dirty.is_set():
+        return False
+    _dashboard_snapshot_dirty.clear()
+    return _persist_dashboard_snapshot()
+
+def _load_dashboard_snapshot():
+    """Restore the persisted dashboard aggregate, if any"""
+    global DASHBOARD_SNAPSHOT_TABLE_AVAILABLE
+    try:
+        response = supabase_admin.table('dashboard_stats_snapshot').select('data').eq('id', 1).execute()
+        if response.data and dashboard_stats.load_snapshot(response.data[0].get('data')):
+            print("✅ Dashboard stats restored from snapshot")
+            return True
+    except Exception as e:
+        print(f"⚠️ WARNING: Could not load dashboard stats snapshot: {e}")
+        if is_missing_relation_error(e):
+            DASHBOARD_SNAPSHOT_TABLE_AVAILABLE = False
+    return False
+
+def recompute_dashboard_stats():
+    """Rebuild the dashboard aggregate from the bookings table and schedule saving it"""
+    try:
+        fetched = {}
+        dashboard_stats.rebuild(_fetch_dashboard_booking_rows(stats=fetched))
+        schedule_dashboard_snapshot()
+        print(f"✅ Dashboard stats recomputed from {fetched.get('rows', 0)} bookings")
+        return True
+    except Exception as e:
+        print(f"❌ ERROR: Failed to recompute dashboard stats: {e}")
+        return False
+
+def apply_booking_to_dashboard_stats(old_booking, new_booking):
+    """Apply one booking write to the dashboard aggregate; incomplete rows defer to a recompute.
+
+    The snapshot is saved in the background, so the request only pays for the
+    in-memory delta. Each worker saves its own aggregate (last write wins), which
+    is why the snapshot is only a warm start: see PER_PROCESS_STATE.
+    """
+    try:
+        if dashboard_stats.apply(old_booking, new_booking):
+            schedule_dashboard_snapshot()
+    except Exception as e:
+        print(f"⚠️ WARNING: Failed to update dashboard stats, will recompute: {e}")
+        dashboard_stats.stale = True
+
+def _empty_dashboard_stats():
+    return {
+        'total_bookings': 0,
+        'total_clients': 0,
+        'total_rooms': 0,
+        'available_rooms': 0,
+        'confirmed_bookings': 0,
+        'tentative_bookings': 0,
+        'cancelled_bookings': 0,
+        'total_revenue': 0,
+        'confirmed_revenue': 0,
+        'tentative_revenue': 0,
+        'revenue_this_month': 0,
+        'confirmed_revenue_this_month': 0,
+        'tentative_revenue_this_month': 0,
+        'average_booking_value': 0,
+        'upcoming_bookings': 0,
+        'todays_bookings': 0,
+        'occupancy_rate': 0,
+        'revenue_growth': 0
+    }
+
 def get_dashboard_stats():
-    """Get comprehensive dashboard statistics"""
+    """Get comprehensive dashboard statistics from the maintained aggregate"""
+    global _dashboard_snapshot_checked
     try:
-        from datetime import datetime, UTC, timedelta
-        
-        stats = {
-            'total_bookings': 0,
-            'total_clients': 0,
-            'total_rooms': 0,
-            'available_rooms': 0,
-            'confirmed_bookings': 0,
-            'tentative_bookings': 0,
-            'cancelled_bookings': 0,
-            'total_revenue': 0,
-            'confirmed_revenue': 0,
-            'tentative_revenue': 0,
-            'revenue_this_month': 0,
-            'confirmed_revenue_this_month': 0,
-            'tentative_revenue_this_month': 0,
-            'average_booking_value': 0,
-            'upcoming_bookings': 0,
-            'todays_bookings': 0,
-            'occupancy_rate': 0,
-            'revenue_growth': 0
-        }
-        
-        # Get all bookings
-        bookings_response = supabase_admin.table('bookings').select('*').execute()
-        all_bookings = bookings_response.data if bookings_response.data else []
-        
-        # Get total rooms
-        rooms_response = supabase_admin.table('rooms').select('*').execute()
-        all_rooms = rooms_response.data if rooms_response.data else []
-        stats['total_rooms'] = len(all_rooms)
-        stats['available_rooms'] = len([r for r in all_rooms if r.get('is_available', True)])
-        
-        # Get total clients
-        clients_response = supabase_admin.table('clients').select('id').execute()
-        stats['total_clients'] = len(clients_response.data) if clients_response.data else 0
-        
-        # Process bookings by status
-        non_cancelled_bookings = [b for b in all_bookings if b.get('status') != 'cancelled']
-        stats['total_bookings'] = len(non_cancelled_bookings)
-        stats['confirmed_bookings'] = len([b for b in all_bookings if b.get('status') == 'confirmed'])
-        stats['tentative_bookings'] = len([b for b in all_bookings if b.get('status') == 'tentative'])
-        stats['cancelled_bookings'] = len([b for b in all_bookings if b.get('status') == 'cancelled'])
-        
-        # Calculate revenue metrics
-        total_revenue = 0
-        confirmed_revenue = 0
-        tentative_revenue = 0
-        revenue_this_month = 0
-        confirmed_revenue_this_month = 0
-        tentative_revenue_this_month = 0
-        now = datetime.now(UTC)
-        current_month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        
-        for booking in non_cancelled_bookings:
-            booking_revenue = safe_float_conversion(booking.get('total_price', 0))
-            booking_status = booking.get('status', 'tentative')
-            
-            # Add to total revenue
-            total_revenue += booking_revenue
-            
-            # Separate by status
-            if booking_status == 'confirmed':
-                confirmed_revenue += booking_revenue
-            else:  # tentative or any other status
-                tentative_revenue += booking_revenue
-            
-            # Check if booking is this month
-            if booking.get('start_time'):
-                try:
-                    booking_date = datetime.fromisoformat(booking['start_time'].replace('Z', '+00:00'))
-                    # Ensure both dates are timezone-aware for comparison
-                    if booking_date >= current_month_start:
-                        revenue_this_month += booking_revenue
-                        if booking_status == 'confirmed':
-                            confirmed_revenue_this_month += booking_revenue
-                        else:
-                            tentative_revenue_this_month += booking_revenue
-                except Exception:
-                    pass
-        
-        stats['total_revenue'] = total_revenue
-        stats['confirmed_revenue'] = confirmed_revenue
-        stats['tentative_revenue'] = tentative_revenue
-        stats['revenue_this_month'] = revenue_this_month
-        stats['confirmed_revenue_this_month'] = confirmed_revenue_this_month
-        stats['tentative_revenue_this_month'] = tentative_revenue_this_month
-        stats['average_booking_value'] = total_revenue / len(non_cancelled_bookings) if non_cancelled_bookings else 0
-        
-        # Calculate upcoming bookings (next 30 days)
-        next_month = now + timedelta(days=30)
-        upcoming_count = 0
-        todays_count = 0
-        today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-        today_end = today_start + timedelta(days=1)
-        
-        for booking in non_cancelled_bookings:
-            if booking.get('start_time'):
-                try:
-                    booking_date = datetime.fromisoformat(booking['start_time'].replace('Z', '+00:00'))
-                    
-                    # Count upcoming bookings
-                    if now <= booking_date <= next_month:
-                        upcoming_count += 1
-                    
-                    # Count today's bookings
-                    if today_start <= booking_date < today_end:
-                        todays_count += 1
-                        
-                except Exception:
-                    pass
-        
-        stats['upcoming_bookings'] = upcoming_count
-        stats['todays_bookings'] = todays_count
-        
-        # Calculate occupancy rate (percentage of rooms with bookings in the last 30 days)
-        if stats['total_rooms'] > 0:
-            # Look at the last 30 days for a more meaningful occupancy rate
-            period_start = now - timedelta(days=30)
-            period_end = now
-            
-            occupied_rooms = set()
-            total_bookings_in_period = 0
-            
-            for booking in non_cancelled_bookings:
-                if booking.get('start_time') and booking.get('room_id'):
-                    try:
-                        booking_date = datetime.fromisoformat(booking['start_time'].replace('Z', '+00:00'))
-                        # Include bookings from the last 30 days
-                        if period_start <= booking_date <= period_end:
-                            occupied_rooms.add(booking['room_id'])
-                            total_bookings_in_period += 1
-                    except Exception as e:
-                        print(f"⚠️ Error parsing booking date: {e}")
-                        pass
-            
-            # Calculate as percentage of rooms that had at least one booking in the period
-            stats['occupancy_rate'] = (len(occupied_rooms) / stats['total_rooms']) * 100
-            print(f"🏨 Occupancy calculation: {len(occupied_rooms)} rooms used out of {stats['total_rooms']} total rooms in last 30 days ({total_bookings_in_period} bookings) = {stats['occupancy_rate']:.1f}%")
+        if _dashboard_stats_lock.acquire(timeout=DASHBOARD_STATS_LOCK_WAIT_SECONDS):
+            try:
+                if not _dashboard_snapshot_checked:
+                    _dashboard_snapshot_checked = True
+                    _load_dashboard_snapshot()
+                if dashboard_stats.needs_rebuild(DASHBOARD_STATS_RECOMPUTE_HOURS):
+                    recompute_dashboard_stats()
+            finally:
+                _dashboard_stats_lock.release()
         else:
-            print("⚠️ No rooms found for occupancy calculation")
-            stats['occupancy_rate'] = 0
-        
-        # Calculate revenue growth (this month vs last month) - using confirmed revenue for accuracy
-        last_month_start = (current_month_start - timedelta(days=1)).replace(day=1)
-        last_month_confirmed_revenue = 0
+            print("⚠️ WARNING: Dashboard stats are still being rebuilt, serving the current figures")
         
-        for booking in non_cancelled_bookings:
-            if booking.get('start_time') and booking.get('status') == 'confirmed':
-                try:
-                    booking_date = datetime.fromisoformat(booking['start_time'].replace('Z', '+00:00'))
-                    if last_month_start <= booking_date < current_month_start:
-                        last_month_confirmed_revenue += safe_float_conversion(booking.get('total_price', 0))
-                except Exception:
-                    pass
+        all_rooms = get_cached_rooms()
+        clients_response = supabase_admin.table('clients').select('id', count='exact').limit(1).execute()
         
-        if last_month_confirmed_revenue > 0:
-            stats['revenue_growth'] = ((confirmed_revenue_this_month - last_month_confirmed_revenue) / last_month_confirmed_revenue) * 100
-        else:
-            stats['revenue_growth'] = 100 if confirmed_revenue_this_month > 0 else 0
+        stats = dashboard_stats.compute_stats(
+            total_rooms=len(all_rooms),
+            available_rooms=len([r for r in all_rooms if r.get('is_available', True)]),
+            total_clients=clients_response.count or 0
+        )
         
         print(f"✅ Dashboard stats calculated: {stats['total_bookings']} bookings, ${stats['total_revenue']:.2f} total revenue (${stats['confirmed_revenue']:.2f} confirmed, ${stats['tentative_revenue']:.2f} tentative), {stats['occupancy_rate']:.1f}% occupancy")
         return stats
         
     except Exception as e:
         print(f"❌ ERROR: Failed to get dashboard stats: {e}")
-        error_stats = {
-            'total_bookings': 0,
-            'total_clients': 0,
-            'total_rooms': 0,
-            'available_rooms': 0,
-            'confirmed_bookings': 0,
-            'tentative_bookings': 0,
-            'cancelled_bookings': 0,
-            'total_revenue': 0,
-            'confirmed_revenue': 0,
-            'tentative_revenue': 0,
-            'revenue_this_month': 0,
-            'confirmed_revenue_this_month': 0,
-            'tentative_revenue_this_month': 0,
-            'average_booking_value': 0,
-            'upcoming_bookings': 0,
-            'todays_bookings': 0,
-            'occupancy_rate': 0,
-            'revenue_growth': 0
-        }
-        return error_stats
+        return _empty_dashboard_stats()
 
 def get_recent_bookings(limit=10):
     """Get recent bookings for dashboard with enhanced formatting and error handling"""
     try:
-        response = supabase_admin.table('bookings').select("""
-            *,
-            room:rooms(id, name, capacity),
-            client:clients(id, contact_person, company_name, email, phone)
-        """).order('created_at', desc=True).limit(limit).execute()
+        response = select_shape(supabase_admin, 'booking_dashboard_card').order('created_at', desc=True).limit(limit).execute()
         
         if response.data:
             # Convert datetime strings for template compatibility
@@ -2786,11 +3356,7 @@ def get_upcoming_bookings(limit=10):
         now = get_cat_now()
         now_utc = now.astimezone(UTC)
         
-        response = supabase_admin.table('bookings').select("""
-            *,
-            room:rooms(id, name, capacity),
-            client:clients(id, contact_person, company_name, email, phone)
-        """).gte('start_time', now_utc.isoformat()).neq('status', 'cancelled').order('start_time', desc=False).limit(limit).execute()
+        response = select_shape(supabase_admin, 'booking_dashboard_card').gte('start_time', now_utc.isoformat()).neq('status', 'cancelled').order('start_time', desc=False).limit(limit).execute()
         
         if response.data:
             # Convert datetime strings for template compatibility
@@ -2921,11 +3487,7 @@ def get_todays_bookings():
         today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
         today_end = today_start + timedelta(days=1)
         
-        response = supabase_admin.table('bookings').select("""
-            *,
-            room:rooms(id, name, capacity),
-            client:clients(id, contact_person, company_name)
-        """).gte('start_time', today_start.isoformat()).lt('start_time', today_end.isoformat()).neq('status', 'cancelled').order('start_time').execute()
+        response = select_shape(supabase_admin, 'booking_dashboard_card').gte('start_time', today_start.isoformat()).lt('start_time', today_end.isoformat()).neq('status', 'cancelled').order('start_time').execute()
         
         if response.data:
             # Convert datetime strings for template compatibility
@@ -3025,7 +3587,7 @@ def get_revenue_trends():
         end_date = datetime.now(UTC)
         start_date = end_date - timedelta(days=180)  # Approximately 6 months
         
-        response = supabase_admin.table('bookings').select('*').gte('start_time', start_date.isoformat()).neq('status', 'cancelled').execute()
+        response = select_shape(supabase_admin, 'booking_revenue_point').gte('start_time', start_date.isoformat()).neq('status', 'cancelled').execute()
         
         if not response.data:
             return {
@@ -3091,6 +3653,236 @@ def get_revenue_trends():
             'revenue_growth': 0
         }
 
+
+# ===============================
+# DAILY BOOKING ROLLUP
+# ===============================
+
+# Flipped to False when booking_daily_rollup is missing; reports then aggregate their
+# bookings directly until the table is rebuilt
+DAILY_ROLLUP_TABLE_AVAILABLE = True
+# Every cell write covers these statuses so a booking moving out of one leaves a zero row
+DAILY_ROLLUP_STATUSES = ('confirmed', 'tentative', 'cancelled')
+DAILY_ROLLUP_DELETE_BATCH = 200
+
+# Cells (day, room_id) whose refresh failed, and bookings whose cell could not be looked up.
+# Retried on the next booking write or rollup read; readers of a range they touch aggregate
+# bookings directly meanwhile.
+_pending_rollup_cells = set()
+_pending_rollup_bookings = set()
+_pending_rollup_lock = threading.Lock()
+
+def _disable_daily_rollup(e):
+    """Fall back for good only when the table is missing; returns True if it was"""
+    global DAILY_ROLLUP_TABLE_AVAILABLE
+    if not is_missing_relation_error(e):
+        return False
+    print(f"⚠️ WARNING: booking_daily_rollup unavailable, reports will aggregate bookings directly "
+          f"(run rebuild_daily_rollup.py once it is back): {e}")
+    DAILY_ROLLUP_TABLE_AVAILABLE = False
+    return True
+
+def _rollup_booking_rows(start_date=None, end_date=None, room_id=None, stats=None):
+    """Stream the booking columns the rollup needs for bookings starting on UTC days in [start_date, end_date]"""
+    def build_query():
+        query = select_shape(supabase_admin, 'booking_rollup_row')
+        if start_date is not None:
+            query = query.gte('start_time', day_bounds(start_date.isoformat())[0])
+        if end_date is not None:
+            query = query.lt('start_time', day_bounds(end_date.isoformat())[1])
+        if room_id is not None:
+            query = query.eq('room_id', room_id)
+        return query
+    return iter_rows(build_query, stats=stats)
+
+def _write_rollup_rows(rows):
+    updated_at = datetime.now(UTC).isoformat()
+    payload = [dict(row, updated_at=updated_at) for row in rows]
+    for offset in range(0, len(payload), SUPABASE_PAGE_SIZE):
+        supabase_admin.table('booking_daily_rollup').upsert(
+            payload[offset:offset + SUPABASE_PAGE_SIZE], on_conflict='day,room_id,status'
+        ).execute()
+
+def _refresh_rollup_cells(cells, booking_ids=()):
+    """Recompute the given cells (plus those of booking_ids); failures are queued for a retry"""
+    cells, booking_ids = set(cells), set(booking_ids)
+    with _pending_rollup_lock:
+        cells |= _pending_rollup_cells
+        booking_ids |= _pending_rollup_bookings
+        _pending_rollup_cells.clear()
+        _pending_rollup_bookings.clear()
+    
+    failed_cells, failed_bookings = set(), set()
+    if booking_ids:
+        try:
+            # Partial rows (a status-only update): the booking still lives where the database says
+            response = select_shape(supabase_admin, 'booking_rollup_row').in_('id', list(booking_ids)).execute()
+            cells.update(cell for cell in map(rollup_cell, response.data or []) if cell is not None)
+        except Exception as e:
+            if _disable_daily_rollup(e):
+                return
+            print(f"⚠️ WARNING: Could not look up rollup cells of bookings {sorted(booking_ids)}, will retry: {e}")
+            failed_bookings = booking_ids
+    
+    for day, room_id in cells:
+        try:
+            first, after = day_bounds(day)
+            bookings = select_shape(supabase_admin, 'booking_rollup_row').eq('room_id', room_id).gte(
+                'start_time', first).lt('start_time', after).execute().data or []
+            rows = build_rollup_rows(bookings)
+            for status in DAILY_ROLLUP_STATUSES:
+                rows.setdefault((day, room_id, status), empty_rollup_row(day, room_id, status))
+            _write_rollup_rows(rows.values())
+        except Exception as e:
+            if _disable_daily_rollup(e):
+                return
+            print(f"⚠️ WARNING: Could not refresh rollup cell {day} room {room_id}, will retry: {e}")
+            failed_cells.add((day, room_id))
+    
+    if failed_cells or failed_bookings:
+        with _pending_rollup_lock:
+            _pending_rollup_cells.update(failed_cells)
+            _pending_rollup_bookings.update(failed_bookings)
+
+def refresh_daily_rollup(old_booking, new_booking):
+    """Recompute the rollup cells (day, room) a booking write moved a booking out of or into"""
+    if not DAILY_ROLLUP_TABLE_AVAILABLE:
+        return
+    cells, booking_ids = set(), set()
+    for booking in (old_booking, new_booking):
+        if booking is None:
+            continue
+        cell = rollup_cell(booking)
+        if cell is not None:
+            cells.add(cell)
+        elif booking.get('id') is not None:
+            booking_ids.add(booking['id'])
+    _refresh_rollup_cells(cells, booking_ids)
+
+def _rollup_pending_between(start_date, end_date):
+    """True while a failed refresh may have left a cell in [start_date, end_date] out of date"""
+    first, last = start_date.isoformat(), end_date.isoformat()
+    with _pending_rollup_lock:
+        return bool(_pending_rollup_bookings) or any(first <= day <= last for day, _ in _pending_rollup_cells)
+
+def get_daily_rollup(start_date, end_date):
+    """Rollup rows for UTC days in [start_date, end_date], aggregated from bookings if the table is unavailable"""
+    if DAILY_ROLLUP_TABLE_AVAILABLE:
+        if _rollup_pending_between(start_date, end_date):
+            _refresh_rollup_cells(())
+        if DAILY_ROLLUP_TABLE_AVAILABLE and not _rollup_pending_between(start_date, end_date):
+            try:
+                return list(iter_rows(lambda: select_shape(supabase_admin, 'daily_rollup_row').gte(
+                    'day', start_date.isoformat()).lte('day', end_date.isoformat())))
+            except Exception as e:
+                if not _disable_daily_rollup(e):
+                    print(f"⚠️ WARNING: Could not read booking_daily_rollup, aggregating bookings directly: {e}")
+    return list(build_rollup_rows(_rollup_booking_rows(start_date, end_date)).values())
+
+def rebuild_daily_rollup(start_date=None, end_date=None):
+    """Recompute the rollup from bookings for [start_date, end_date] (all days if omitted) and drop stale rows"""
+    global DAILY_ROLLUP_TABLE_AVAILABLE
+    try:
+        fetched = {}
+        rows = build_rollup_rows(_rollup_booking_rows(start_date, end_date, stats=fetched))
+        
+        def existing_rows():
+            query = select_shape(supabase_admin, 'daily_rollup_row')
+            if start_date is not None:
+                query = query.gte('day', start_date.isoformat())
+            if end_date is not None:
+                query = query.lte('day', end_date.isoformat())
+            return query
+        stale_ids = [row['id'] for row in iter_rows(existing_rows)
+                     if (str(row['day']), row['room_id'], row['status']) not in rows]
+        
+        _write_rollup_rows(rows.values())
+        for offset in range(0, len(stale_ids), DAILY_ROLLUP_DELETE_BATCH):
+            supabase_admin.table('booking_daily_rollup').delete().in_(
+                'id', stale_ids[offset:offset + DAILY_ROLLUP_DELETE_BATCH]).execute()
+        
+        DAILY_ROLLUP_TABLE_AVAILABLE = True
+        with _pending_rollup_lock:
+            _pending_rollup_cells.difference_update(
+                cell for cell in list(_pending_rollup_cells)
+                if (start_date is None or cell[0] >= start_date.isoformat())
+                and (end_date is None or cell[0] <= end_date.isoformat()))
+        print(f"✅ Daily rollup rebuilt: {len(rows)} rows from {fetched.get('rows', 0)} bookings, "
+              f"{len(stale_ids)} stale rows removed")
+        return True
+    except Exception as e:
+        print(f"❌ ERROR: Failed to rebuild daily rollup: {e}")
+        return False
+
+# ===============================
+# PDF DOCUMENTS
+# ===============================
+
+# Rendered quotations and report PDFs, cached on disk by content hash
+DOCUMENT_CACHE_DIR = os.getenv('DOCUMENT_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'document_cache'))
+
+document_service = DocumentService(
+    DocumentCache(DOCUMENT_CACHE_DIR, max_files=int(os.getenv('DOCUMENT_CACHE_MAX_FILES', '500'))),
+    workers=int(os.getenv('PDF_RENDER_WORKERS', '2')),
+    timeout=int(os.getenv('PDF_RENDER_TIMEOUT_SECONDS', '60'))
+)
+
+def render_document_pdf(kind, payload, booking_id=None):
+    """PDF bytes for a document payload; quotations pass their booking so edits invalidate them"""
+    scope = f"booking-{booking_id}" if booking_id is not None else 'report'
+    return document_service.render(kind, payload, scope=scope)
+
+def invalidate_booking_documents(booking_id):
+    """Drop cached PDFs of a booking (its next download renders from the new row)"""
+    if booking_id is None:
+        return 0
+    try:
+        return document_service.invalidate(f"booking-{booking_id}")
+    except Exception as e:
+        print(f"⚠️ WARNING: Could not invalidate documents for booking #{booking_id}: {e}")
+        return 0
+
+# Bulk quotation/invoice runs
+DOCUMENT_BATCH_WORKERS = int(os.getenv('DOCUMENT_BATCH_WORKERS', '4'))
+DOCUMENT_BATCH_MAX_BOOKINGS = int(os.getenv('DOCUMENT_BATCH_MAX_BOOKINGS', '1000'))
+
+document_batches = DocumentBatchRegistry(max_jobs=int(os.getenv('DOCUMENT_BATCH_KEEP_JOBS', '20')))
+
+def start_document_batch(bookings, render, document_type, delivery='zip', deliver=None, description=None):
+    """Start a background job producing one document per booking, zipped or handed to deliver"""
+    job = DocumentBatchJob(bookings, render, document_type=document_type, deliver=deliver,
+                           workers=DOCUMENT_BATCH_WORKERS, description=description)
+    if delivery == 'zip':
+        job.archive_path = os.path.join(DOCUMENT_CACHE_DIR, 'batches', f"{document_type}s_{job.id}.zip")
+    return document_batches.start(job)
+
+def get_document_batch(job_id):
+    return document_batches.get(job_id)
+
+def get_document_service_stats():
+    try:
+        return document_service.stats()
+    except Exception as e:
+        print(f"❌ ERROR: Failed to read document service stats: {e}")
+        return {'error': str(e)}
+
+# ===============================
+# ROOM UTILIZATION
+# ===============================
+
+# Business day (CAT) that utilization is measured against
+BUSINESS_OPEN_HOUR = int(os.getenv('BUSINESS_OPEN_HOUR', '8'))
+BUSINESS_CLOSE_HOUR = int(os.getenv('BUSINESS_CLOSE_HOUR', '18'))
+
+def get_room_utilization(start_date, end_date):
+    """Utilization matrices for CAT days in [start_date, end_date], built from every booking overlapping the range"""
+    range_start = datetime.combine(start_date, datetime.min.time()).replace(tzinfo=CAT)
+    range_end = datetime.combine(end_date + timedelta(days=1), datetime.min.time()).replace(tzinfo=CAT)
+    rows = iter_rows(lambda: select_shape(supabase_admin, 'booking_utilization_interval').lt(
+        'start_time', range_end.isoformat()).gt('end_time', range_start.isoformat()).neq('status', 'cancelled'))
+    return compute_utilization(rows, start_date, end_date, BUSINESS_OPEN_HOUR, BUSINESS_CLOSE_HOUR,
+                               utc_offset_hours=CAT.utcoffset(None).total_seconds() / 3600)
+
 # ===============================
 # SCHEDULING FUNCTIONS
 # ===============================
@@ -3120,6 +3912,7 @@ def run_daily_report_scheduler():
         if should_send_daily_report():
             print("📧 Time to send daily report!")
             success = send_daily_report()
+            flush_email_outbox()
             if success:
                 print("✅ Daily report sent successfully")
             else:
@@ -3151,7 +3944,7 @@ def test_email_system():
         </html>
         """.format(datetime.now(CAT).strftime('%Y-%m-%d %H:%M %Z'))
         
-        success = send_email(
+        success = send_email_now(
             TEST_EMAIL,
             "🧪 Email System Test",
             test_html,
@@ -3176,6 +3969,7 @@ def test_daily_report():
     try:
         print("🧪 Testing daily report generation...")
         success = send_daily_report()
+        flush_email_outbox()
         if success:
             print("✅ Test daily report sent successfully!")
             return True
@@ -0,0 +1,16 @@
+-- =====================================================
+-- DASHBOARD STATS SNAPSHOT TABLE
+-- Copy and paste these commands into your Supabase SQL Editor
+-- =====================================================
+
+-- Single-row snapshot of the incrementally maintained dashboard aggregate.
+-- core.get_dashboard_stats restores it on startup, booking writes update it,
+-- and it is fully recomputed on demand or every DASHBOARD_STATS_RECOMPUTE_HOURS.
+-- Without this table the aggregate is kept in memory only.
+CREATE TABLE IF NOT EXISTS dashboard_stats_snapshot (
+    id SMALLINT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    data JSONB NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+COMMENT ON TABLE dashboard_stats_snapshot IS 'Persisted dashboard statistics aggregate (counters and per-day buckets)';
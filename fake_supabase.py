@@ -0,0 +1,167 @@
+"""
+In-memory stand-in for the Supabase client, shared by the root-level tests.
+
+``FakeSupabase`` holds tables as lists of dicts and counts round trips;
+``FakeQuery`` implements the slice of the PostgREST builder the app uses
+(filters, order, limit, insert/update/upsert/delete and plain column
+projection). ``max_rows`` mimics PostgREST's response cap.
+"""
+
+from datetime import datetime, timedelta, UTC
+
+
+class FakeResponse:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class FakeQuery:
+    """Minimal PostgREST query builder that filters an in-memory table"""
+
+    def __init__(self, client, table_name):
+        self.client = client
+        self.table_name = table_name
+        self.predicates = []
+        self.order_columns = []
+        self.row_limit = None
+        self.upsert_rows = None
+        self.conflict_columns = ['id']
+        self.insert_rows = None
+        self.update_values = None
+        self.deleting = False
+        self.columns = None
+
+    def select(self, columns, count=None):
+        # Plain column lists are projected so tests catch reads of unselected fields
+        if '*' not in columns and '(' not in columns:
+            self.columns = [column.strip() for column in columns.split(',')]
+        return self
+
+    def upsert(self, rows, on_conflict='id', **kwargs):
+        self.upsert_rows = rows if isinstance(rows, list) else [rows]
+        self.conflict_columns = [column.strip() for column in on_conflict.split(',')]
+        return self
+
+    def delete(self):
+        self.deleting = True
+        return self
+
+    def update(self, values):
+        self.update_values = values
+        return self
+
+    def insert(self, rows, **kwargs):
+        self.insert_rows = rows if isinstance(rows, list) else [rows]
+        return self
+
+    def limit(self, row_limit):
+        self.row_limit = row_limit
+        return self
+
+    def eq(self, column, value):
+        self.predicates.append(lambda row: row.get(column) == value)
+        return self
+
+    def neq(self, column, value):
+        self.predicates.append(lambda row: row.get(column) != value)
+        return self
+
+    def gte(self, column, value):
+        self.predicates.append(lambda row: row.get(column) >= value)
+        return self
+
+    def gt(self, column, value):
+        self.predicates.append(lambda row: row.get(column) > value)
+        return self
+
+    def lt(self, column, value):
+        self.predicates.append(lambda row: row.get(column) < value)
+        return self
+
+    def lte(self, column, value):
+        self.predicates.append(lambda row: row.get(column) <= value)
+        return self
+
+    def in_(self, column, values):
+        values = set(values)
+        self.predicates.append(lambda row: row.get(column) in values)
+        return self
+
+    def order(self, column, desc=False):
+        self.order_columns.append((column, desc))
+        return self
+
+    def execute(self):
+        self.client.round_trips += 1
+        table = self.client.tables.setdefault(self.table_name, [])
+        if self.upsert_rows is not None:
+            for new_row in self.upsert_rows:
+                key = tuple(new_row.get(column) for column in self.conflict_columns)
+                existing = next((row for row in table
+                                 if tuple(row.get(column) for column in self.conflict_columns) == key), None)
+                if existing is not None:
+                    existing.update(new_row)
+                else:
+                    # Identity column for tables keyed on something other than id
+                    table.append(dict(new_row) if 'id' in new_row else
+                                 dict(new_row, id=max((row.get('id') or 0 for row in table), default=0) + 1))
+            return FakeResponse(self.upsert_rows)
+        if self.insert_rows is not None:
+            for new_row in self.insert_rows:
+                table.append(dict(new_row) if 'id' in new_row else
+                             dict(new_row, id=max((row.get('id') or 0 for row in table), default=0) + 1))
+            return FakeResponse(self.insert_rows)
+        rows = [row for row in table if all(predicate(row) for predicate in self.predicates)]
+        if self.update_values is not None:
+            for row in rows:
+                row.update(self.update_values)
+            return FakeResponse(rows)
+        if self.deleting:
+            deleted = {id(row) for row in rows}
+            table[:] = [row for row in table if id(row) not in deleted]
+            return FakeResponse(rows)
+        # Later order() calls break ties, so sort by them first (the sort is stable)
+        for column, desc in reversed(self.order_columns):
+            rows.sort(key=lambda row: (row.get(column) is None, '' if row.get(column) is None else row.get(column)),
+                      reverse=desc)
+        count = len(rows)
+        if self.row_limit is not None:
+            rows = rows[:self.row_limit]
+        # PostgREST's max-rows: a response never holds more, whatever the limit asked for
+        if getattr(self.client, 'max_rows', None) is not None:
+            rows = rows[:self.client.max_rows]
+        if self.columns:
+            rows = [{column: row.get(column) for column in self.columns} for row in rows]
+        return FakeResponse(rows, count)
+
+
+class FakeSupabase:
+    def __init__(self, tables, max_rows=None):
+        self.tables = tables
+        self.max_rows = max_rows
+        self.round_trips = 0
+
+    def table(self, table_name):
+        return FakeQuery(self, table_name)
+
+
+def build_bookings(room_count):
+    """Create one past confirmed, one future tentative and one cancelled booking per room"""
+    now = datetime.now(UTC)
+    bookings = []
+    for room_id in range(1, room_count + 1):
+        past_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        future_start = now + timedelta(days=2)
+        bookings.extend([
+            {'id': room_id * 10 + 1, 'room_id': room_id, 'status': 'confirmed', 'total_price': 100.0,
+             'title': 'Past', 'start_time': past_start.isoformat(),
+             'end_time': (past_start + timedelta(hours=2)).isoformat()},
+            {'id': room_id * 10 + 2, 'room_id': room_id, 'status': 'tentative', 'total_price': 50.0,
+             'title': 'Upcoming', 'start_time': future_start.isoformat(),
+             'end_time': (future_start + timedelta(hours=1)).isoformat()},
+            {'id': room_id * 10 + 3, 'room_id': room_id, 'status': 'cancelled', 'total_price': 75.0,
+             'title': 'Cancelled', 'start_time': future_start.isoformat(),
+             'end_time': (future_start + timedelta(hours=3)).isoformat()},
+        ])
+    return bookings
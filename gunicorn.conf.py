@@ -0,0 +1,12 @@
+"""
+Gunicorn settings, read from the working directory by the Procfile's gunicorn.
+
+The app is loaded once in the master (--preload) and each worker is forked
+from it. Threads do not survive a fork, so per-process background workers are
+started here, in each worker, rather than in create_app().
+"""
+
+
+def post_fork(server, worker):
+    from core import start_email_outbox
+    start_email_outbox()
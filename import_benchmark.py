@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Import-time benchmark - how long a cold `import app` (or `import core`, as the
+cron scripts do) takes, and which modules it spends the time in.
+
+Each run imports the module in a fresh interpreter with `python -X importtime`
+and the median is reported, together with the slowest top-level imports and
+any heavy library that should only be imported on first use.
+
+    python import_benchmark.py                       # app, 5 runs
+    python import_benchmark.py --module core --runs 9
+    python import_benchmark.py --save import_times.json
+    python import_benchmark.py --compare import_times.json --tolerance 0.25
+
+--compare exits with status 1 when a module got slower than the saved figure
+by more than the tolerance, so the check can run in CI next to the tests.
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+# Libraries that must only be imported by the code paths that use them
+LAZY_MODULES = ('reportlab', 'openpyxl', 'xlsxwriter')
+
+_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def parse_importtime(output):
+    """[(name, depth, self_us, cumulative_us)] from `-X importtime` stderr"""
+    entries = []
+    for line in output.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append((name, (len(indent) - 1) // 2, int(self_us), int(cumulative_us)))
+    return entries
+
+
+def measure(module, environment=None):
+    """One cold import of module: (entries, stdout)"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=here, env=environment or os.environ.copy(),
+                            capture_output=True, text=True, timeout=300)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr), result.stdout
+
+
+def benchmark(module, runs=5, top=10):
+    totals = []
+    entries = []
+    for _ in range(runs):
+        entries, _ = measure(module)
+        total = next((cumulative for name, depth, _, cumulative in entries if name == module and depth == 0), 0)
+        totals.append(total / 1000)
+
+    slowest = sorted((entry for entry in entries if entry[1] == 1), key=lambda entry: -entry[3])[:top]
+    imported = {entry[0] for entry in entries}
+    return {
+        'module': module,
+        'runs': runs,
+        'median_ms': round(statistics.median(totals), 1),
+        'min_ms': round(min(totals), 1),
+        'max_ms': round(max(totals), 1),
+        'modules_imported': len(imported),
+        'slowest_imports': [{'module': name, 'cumulative_ms': round(cumulative / 1000, 1)}
+                            for name, _, _, cumulative in slowest],
+        'eager_heavy_imports': sorted(name for name in imported if name.split('.')[0] in LAZY_MODULES
+                                      and '.' not in name)
+    }
+
+
+def print_report(result):
+    print(f"⏱️ import {result['module']}: median {result['median_ms']} ms "
+          f"(min {result['min_ms']}, max {result['max_ms']}, {result['runs']} runs, "
+          f"{result['modules_imported']} modules)")
+    for entry in result['slowest_imports']:
+        print(f"   {entry['cumulative_ms']:>8.1f} ms  {entry['module']}")
+    if result['eager_heavy_imports']:
+        print(f"⚠️ WARNING: imported at startup: {', '.join(result['eager_heavy_imports'])}")
+    else:
+        print(f"✅ None of {', '.join(LAZY_MODULES)} imported at startup")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure cold import time of the app')
+    parser.add_argument('--module', action='append', help='Module to import (repeatable, default: app)')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10, help='How many of the slowest imports to list')
+    parser.add_argument('--save', help='Write the results to this JSON file')
+    parser.add_argument('--compare', help='Compare against results saved with --save')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed slowdown for --compare (0.25 = 25%%)')
+    args = parser.parse_args()
+
+    results = {}
+    for module in args.module or ['app']:
+        results[module] = benchmark(module, args.runs, args.top)
+        print_report(results[module])
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"💾 Saved to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        slower = []
+        for module, result in results.items():
+            if module not in baseline:
+                continue
+            before, after = baseline[module]['median_ms'], result['median_ms']
+            change = (after - before) / before if before else 0.0
+            print(f"📊 {module}: {before} ms -> {after} ms ({change:+.0%})")
+            if change > args.tolerance:
+                slower.append(module)
+        if slower:
+            print(f"❌ Import time regressed beyond {args.tolerance:.0%}: {', '.join(slower)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Load test - measures request throughput and latency of the app.
+
+Against a running deployment:
+    python load_test.py --url https://rooms.example.com --path /health --concurrency 16 --requests 800
+
+Or start gunicorn here once per worker/thread count and compare (same settings as the Procfile):
+    python load_test.py --workers 1,2,4 --threads 8 --path /dashboard --cookie "session=..."
+    python load_test.py --workers 1 --threads 1,2,4,8,16 --stub-db-ms 40
+
+--stub-db-ms routes the started servers' Supabase traffic through a local
+proxy that holds each connection for that many milliseconds and then refuses
+it, and makes /health query the database on every request. Each request
+then waits on the network like a database-bound page does, which is what
+the thread count has to cover, without needing a real project.
+
+Pages behind login need the session cookie of a signed-in browser.
+"""
+
+import argparse
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+
+def run_load(url, total_requests, concurrency, cookie=None):
+    """Fire total_requests GETs from concurrency threads; returns throughput and latency figures"""
+    local = threading.local()
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def one_request(_):
+        http = getattr(local, 'http', None)
+        if http is None:
+            http = local.http = requests.Session()
+            if cookie:
+                http.headers['Cookie'] = cookie
+        started = time.perf_counter()
+        try:
+            response = http.get(url, timeout=60, allow_redirects=False)
+            ok = response.status_code < 500
+        except requests.RequestException as e:
+            ok = False
+            response = e
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            if not ok:
+                errors.append(str(getattr(response, 'status_code', response)))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one_request, range(total_requests)))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': total_requests,
+        'errors': len(errors),
+        'seconds': round(wall, 2),
+        'requests_per_second': round(total_requests / wall, 1) if wall else 0.0,
+        'p50_ms': round(statistics.median(latencies) * 1000, 1),
+        'p95_ms': round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 1),
+        'max_ms': round(latencies[-1] * 1000, 1)
+    }
+
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+def start_latency_proxy(latency_ms):
+    """Local HTTPS proxy that holds every connection for latency_ms, then refuses it.
+
+    The started servers reach Supabase through it, so each database call costs a
+    fixed network wait on the request thread, like a real round trip.
+    """
+
+    class LatencyHandler(BaseHTTPRequestHandler):
+        def do_CONNECT(self):
+            time.sleep(latency_ms / 1000)
+            self.send_error(502, 'load test stub database')
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', free_port()), LatencyHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='latency-proxy', daemon=True).start()
+    return server
+
+
+def start_gunicorn(workers, threads, port, proxy_url=None):
+    command = [sys.executable, '-m', 'gunicorn', 'app:create_app()', '--preload', '--bind', f'127.0.0.1:{port}',
+               '--worker-class', 'gthread', '--workers', str(workers), '--threads', str(threads),
+               '--timeout', '120', '--log-level', 'warning']
+    environment = dict(os.environ, WEB_CONCURRENCY=str(workers))
+    if proxy_url:
+        environment.update(HTTPS_PROXY=proxy_url, DATABASE_PROBE_TTL_SECONDS='0')
+    return subprocess.Popen(command, env=environment, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+
+
+def wait_until_up(base_url, timeout=90):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            requests.get(f"{base_url}/health", timeout=5)
+            return True
+        except requests.RequestException:
+            time.sleep(0.5)
+    return False
+
+
+def compare_server_sizes(sizes, path, total_requests, cookie, proxy_url=None):
+    """Start gunicorn once per (workers, threads) and load it; prints a scaling table"""
+    results = []
+    for workers, threads in sizes:
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        print(f"🚀 Starting gunicorn with {workers} worker(s) x {threads} thread(s)...")
+        server = start_gunicorn(workers, threads, port, proxy_url)
+        try:
+            if not wait_until_up(base_url):
+                print(f"❌ Server with {workers} worker(s) did not come up")
+                continue
+            concurrency = workers * threads * 2
+            run_load(base_url + path, min(50, total_requests), concurrency, cookie)  # warm every worker
+            result = run_load(base_url + path, total_requests, concurrency, cookie)
+            result.update(workers=workers, threads=threads)
+            results.append(result)
+            print(f"   {result['requests_per_second']} req/s, p50 {result['p50_ms']} ms, "
+                  f"p95 {result['p95_ms']} ms, {result['errors']} errors")
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait(timeout=30)
+
+    if results:
+        baseline = results[0]['requests_per_second'] or 1
+        print("\n📊 Throughput by server size")
+        print(f"{'workers':>8} {'threads':>8} {'req/s':>10} {'scaling':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}")
+        for result in results:
+            print(f"{result['workers']:>8} {result['threads']:>8} {result['requests_per_second']:>10} "
+                  f"{result['requests_per_second'] / baseline:>7.2f}x {result['p50_ms']:>8} "
+                  f"{result['p95_ms']:>8} {result['errors']:>7}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure request throughput of the booking app')
+    parser.add_argument('--url', help='Base URL of a running deployment')
+    parser.add_argument('--path', default='/health')
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--workers', help='Comma-separated gunicorn worker counts to start and compare, e.g. 1,2,4')
+    parser.add_argument('--threads', default='8', help='Threads per gunicorn worker, or a comma-separated list to compare')
+    parser.add_argument('--stub-db-ms', type=float, help='Give every database call of the started servers this '
+                                                         'latency, and query the database from every /health')
+    parser.add_argument('--cookie', help='Cookie header for pages behind login')
+    args = parser.parse_args()
+
+    if args.workers:
+        sizes = [(int(workers), int(threads)) for workers in args.workers.split(',')
+                 for threads in args.threads.split(',')]
+        stub = start_latency_proxy(args.stub_db_ms) if args.stub_db_ms is not None else None
+        try:
+            proxy_url = f"http://127.0.0.1:{stub.server_address[1]}" if stub else None
+            compare_server_sizes(sizes, args.path, args.requests, args.cookie, proxy_url)
+        finally:
+            if stub:
+                stub.shutdown()
+    elif args.url:
+        result = run_load(args.url.rstrip('/') + args.path, args.requests, args.concurrency, args.cookie)
+        print(f"📊 {result}")
+    else:
+        parser.error('give --url for a running deployment or --workers to start gunicorn here')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Daily rollup rebuild runner - recomputes the booking_daily_rollup table from
+the bookings table. Run it once after creating the table, after bulk edits
+made outside the app, or nightly as a safety net, e.g.:
+0 3 * * * cd /path/to/your/app && python rebuild_daily_rollup.py
+
+Optionally limit it to a date range (UTC days, inclusive):
+python rebuild_daily_rollup.py 2025-01-01 2025-03-31
+"""
+
+import os
+import sys
+from datetime import datetime
+
+# Add current directory to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+
+# Change to the script directory
+os.chdir(current_dir)
+
+try:
+    from core import rebuild_daily_rollup
+
+    start_date = datetime.strptime(sys.argv[1], '%Y-%m-%d').date() if len(sys.argv) > 1 else None
+    end_date = datetime.strptime(sys.argv[2], '%Y-%m-%d').date() if len(sys.argv) > 2 else None
+
+    print(f"📊 Daily Rollup Rebuild - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"   Range: {start_date or 'beginning'} to {end_date or 'end'}")
+    print("=" * 50)
+
+    if rebuild_daily_rollup(start_date, end_date):
+        sys.exit(0)
+    sys.exit(1)
+
+except Exception as e:
+    print(f"❌ Error rebuilding daily rollup: {str(e)}")
+    sys.exit(1)
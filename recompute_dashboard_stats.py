@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Dashboard stats recompute runner - rebuilds the persisted dashboard aggregate
+from the bookings table. Schedule it (cron / Windows Task Scheduler) to run
+nightly, e.g.:
+0 2 * * * cd /path/to/your/app && python recompute_dashboard_stats.py
+"""
+
+import os
+import sys
+from datetime import datetime
+
+# Add current directory to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+
+# Change to the script directory
+os.chdir(current_dir)
+
+try:
+    from core import recompute_dashboard_stats, flush_dashboard_snapshot
+
+    print(f"📊 Dashboard Stats Recompute - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print("=" * 50)
+
+    if recompute_dashboard_stats() and flush_dashboard_snapshot():
+        print("✅ Dashboard stats snapshot saved")
+        sys.exit(0)
+    sys.exit(1)
+
+except Exception as e:
+    print(f"❌ Error recomputing dashboard stats: {str(e)}")
+    sys.exit(1)
@@ -1,6 +1,7 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
 from flask_login import login_required
-from core import supabase_select, supabase_insert, supabase_update, supabase_delete, AddonForm, AddonCategoryForm
+from core import (supabase_select, supabase_insert, supabase_update, supabase_delete, AddonForm, AddonCategoryForm,
+                  get_cached_addons)
 
 addons_bp = Blueprint('addons', __name__)
 
@@ -8,8 +9,7 @@ addons_bp = Blueprint('addons', __name__)
 @login_required
 def addons():
     try:
-        response = supabase_admin.table('addons').select('*').order('name').execute()
-        addons_data = response.data if response.data else []
+        addons_data = get_cached_addons()
     except Exception as e:
         print(f"❌ ERROR: Failed to fetch addons from Supabase: {e}")
         addons_data = []
@@ -1,8 +1,11 @@
 from flask import Blueprint, jsonify, request
 from flask_login import login_required, current_user
-from core import (supabase_admin, get_clients_with_booking_counts, get_client_by_id_from_db, 
-                  get_client_bookings_from_db, get_booking_calendar_events_supabase, supabase_select,
-                  get_booking_with_details, calculate_booking_totals)
+from core import (supabase_admin, get_client_by_id_from_db, get_client_bookings_from_db,
+                  get_booking_with_details, calculate_booking_totals, get_cached_rooms, get_cached_room,
+                  get_cached_addons, get_cached_addon_categories, get_reference_cache_stats,
+                  get_calendar_feed, calendar_feed_response, iter_rows, search_clients_indexed,
+                  search_company_names, get_client_search_stats, get_document_service_stats,
+                  fan_out, get_fanout_stats)
 from utils.logging import log_user_activity
 from core import ActivityTypes
 from datetime import datetime, UTC, timedelta
@@ -25,36 +28,15 @@ def search_clients():
 
         print(f"🔍 DEBUG: Searching for clients with query: {query}")
         
-        # Get all clients
-        response = supabase_admin.table('clients').select(
-            'id, contact_person, company_name, email'
-        ).execute()
-
-        if not response.data:
-            print("ℹ️ No clients found in database")
-            return jsonify([])
-
-        # Safe string comparison
+        # Ranked matches from the in-process client search index
         results = []
-        query = query.lower()
-        
-        for client in response.data:
-            # Safely get client fields with fallbacks
-            contact = (client.get('contact_person') or '').lower()
-            company = (client.get('company_name') or '').lower()
-            email = (client.get('email') or '').lower()
-
-            # Check for matches
-            if (query in contact or 
-                query in company or 
-                query in email):
-                
-                results.append({
-                    'id': client.get('id'),
-                    'name': client.get('contact_person', ''),
-                    'company': client.get('company_name', ''),
-                    'email': client.get('email', '')
-                })
+        for client in search_clients_indexed(query, limit=10):
+            results.append({
+                'id': client.get('id'),
+                'name': client.get('contact_person') or '',
+                'company': client.get('company_name') or '',
+                'email': client.get('email') or ''
+            })
 
         print(f"✅ Found {len(results)} matching clients")
         return jsonify(results)
@@ -67,7 +49,7 @@ def search_clients():
 def api_search_companies():
     """Search companies specifically"""
     query = request.args.get('q', '').strip().lower()
-    limit = request.args.get('limit', 10, type=int)
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 50)
     
     if not query:
         return jsonify([])
@@ -75,27 +57,17 @@ def api_search_companies():
     try:
         print(f"🔍 DEBUG: Searching companies with query: '{query}'")
         
-        # Search only by company name
-        response = supabase_admin.table('clients').select('*').execute()
-        clients = response.data if response.data else []
-        
+        # Distinct company names from the in-process client search index
         matches = []
-        for client in clients:
-            company = (client.get('company_name') or '').lower()
-            
-            if company and query in company:
-                matches.append({
-                    'id': client.get('id'),
-                    'company_name': client.get('company_name'),
-                    'contact_person': client.get('contact_person'),
-                    'email': client.get('email'),
-                    'phone': client.get('phone'),
-                    'relevance': 10 if company.startswith(query) else 5
-                })
-        
-        # Sort by relevance
-        matches.sort(key=lambda x: x['relevance'], reverse=True)
-        matches = matches[:limit]
+        for client in search_company_names(query, limit=limit):
+            matches.append({
+                'id': client.get('id'),
+                'company_name': client.get('company_name'),
+                'contact_person': client.get('contact_person'),
+                'email': client.get('email'),
+                'phone': client.get('phone'),
+                'relevance': client.get('score')
+            })
         
         print(f"✅ DEBUG: Found {len(matches)} matching companies")
         return jsonify(matches)
@@ -154,7 +126,7 @@ def api_check_room_availability():
             return jsonify({'error': 'Missing required parameters: room_id, start_time, end_time'}), 400
         
         from datetime import datetime
-        from core import check_room_conflicts
+        from core import check_room_conflicts, classify_room_conflicts
         
         # Parse datetime strings
         try:
@@ -167,15 +139,15 @@ def api_check_room_availability():
         conflicting_bookings = check_room_conflicts(room_id, start_dt, end_dt, exclude_booking_id)
         
         # Categorize conflicts
-        confirmed_conflicts = [b for b in conflicting_bookings if b.get('status') == 'confirmed']
-        tentative_conflicts = [b for b in conflicting_bookings if b.get('status') == 'tentative']
+        conflicts_by_status = classify_room_conflicts(conflicting_bookings)
+        confirmed_conflicts = conflicts_by_status['confirmed']
+        tentative_conflicts = conflicts_by_status['tentative']
         
         # Room is available if no confirmed conflicts
         is_available = len(confirmed_conflicts) == 0
         
         # Get room info for capacity check
-        room_response = supabase_admin.table('rooms').select('name, capacity').eq('id', room_id).execute()
-        room_info = room_response.data[0] if room_response.data else {}
+        room_info = get_cached_room(room_id) or {}
         
         return jsonify({
             'available': is_available,
@@ -200,13 +172,11 @@ def api_check_room_availability():
 def api_get_room_rates(room_id):
     """Get room pricing rates and details"""
     try:
-        room_data = supabase_select('rooms', filters=[('id', 'eq', room_id)])
+        room = get_cached_room(room_id)
         
-        if not room_data:
+        if not room:
             return jsonify({'error': 'Room not found'}), 404
         
-        room = room_data[0]
-        
         return jsonify({
             'room_id': room_id,
             'name': room.get('name'),
@@ -229,8 +199,7 @@ def api_get_room_rates(room_id):
 def api_get_rooms():
     """Get all rooms with basic information"""
     try:
-        rooms_response = supabase_admin.table('rooms').select('*').order('name').execute()
-        rooms = rooms_response.data if rooms_response.data else []
+        rooms = get_cached_rooms()
         
         # Format rooms for API response
         formatted_rooms = []
@@ -260,49 +229,31 @@ def api_get_rooms():
 @api_bp.route('/api/bookings/calendar')
 @login_required
 def api_get_calendar_events():
-    """Get calendar events for booking calendar"""
+    """Get calendar events overlapping the start/end window, or only the changes since a cursor"""
     try:
-        # Get date range filters if provided
-        start_date = request.args.get('start')
-        end_date = request.args.get('end')
         room_id = request.args.get('room_id', type=int)
-        
-        events = get_booking_calendar_events_supabase()
-        
-        # Filter events if parameters provided
-        if start_date or end_date or room_id:
-            filtered_events = []
-            for event in events:
-                # Filter by date range
-                if start_date and event.get('start'):
-                    if event['start'] < start_date:
-                        continue
-                
-                if end_date and event.get('end'):
-                    if event['end'] > end_date:
-                        continue
-                
-                # Filter by room
-                if room_id and event.get('extendedProps', {}).get('roomId') != room_id:
-                    continue
-                
-                filtered_events.append(event)
-            
-            events = filtered_events
-        
-        # Log API access
-        log_user_activity(
-            ActivityTypes.API_CALL,
-            "Fetched calendar events via API",
-            resource_type='api',
-            metadata={'events_count': len(events)}
-        )
-        
-        return jsonify(events)
-        
+        since = request.args.get('since')
+        feed = get_calendar_feed(start=request.args.get('start'), end=request.args.get('end'),
+                                 room_id=room_id, since=since)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         print(f"❌ ERROR: Failed to get calendar events: {e}")
-        return jsonify([])
+        return jsonify({'error': 'Failed to load calendar events'}), 500
+    
+    if since:
+        payload = {key: feed[key] for key in ('incremental', 'reset', 'events', 'removed')}
+        return calendar_feed_response(feed, payload)
+    
+    # Log full window loads only; incremental polls would log every minute per open tab
+    log_user_activity(
+        ActivityTypes.API_CALL,
+        "Fetched calendar events via API",
+        resource_type='api',
+        metadata={'events_count': len(feed['events']), 'window_start': feed['window_start'],
+                  'window_end': feed['window_end']}
+    )
+    return calendar_feed_response(feed, feed['events'])
 
 @api_bp.route('/api/bookings/<int:booking_id>')
 @login_required
@@ -405,41 +356,38 @@ def api_recent_bookings():
 def api_dashboard_stats():
     """Get comprehensive dashboard statistics"""
     try:
-        # Get basic counts
-        bookings_response = supabase_admin.table('bookings').select('id, status, total_price, created_at').execute()
-        bookings = bookings_response.data if bookings_response.data else []
-        
-        clients_response = supabase_admin.table('clients').select('id').execute()
-        clients_count = len(clients_response.data) if clients_response.data else 0
-        
-        rooms_response = supabase_admin.table('rooms').select('id, status').execute()
-        rooms = rooms_response.data if rooms_response.data else []
-        
-        # Calculate stats
-        total_bookings = len(bookings)
-        confirmed_bookings = len([b for b in bookings if b.get('status') == 'confirmed'])
-        tentative_bookings = len([b for b in bookings if b.get('status') == 'tentative'])
-        cancelled_bookings = len([b for b in bookings if b.get('status') == 'cancelled'])
+        clients_response = supabase_admin.table('clients').select('id', count='exact').limit(1).execute()
+        clients_count = clients_response.count or 0
         
-        # Calculate revenue
-        total_revenue = sum(float(b.get('total_price', 0)) for b in bookings if b.get('status') == 'confirmed')
+        rooms = get_cached_rooms()
         
-        # This month's stats
+        # Single streamed pass over every booking
         current_month = datetime.now(UTC).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        this_month_bookings = []
+        status_counts = {}
+        total_bookings = 0
+        total_revenue = 0
+        this_month_count = 0
         this_month_revenue = 0
         
-        for b in bookings:
+        for b in iter_rows(lambda: supabase_admin.table('bookings').select('id, status, total_price, created_at')):
+            total_bookings += 1
+            status_counts[b.get('status')] = status_counts.get(b.get('status'), 0) + 1
+            if b.get('status') == 'confirmed':
+                total_revenue += float(b.get('total_price', 0))
             if b.get('created_at'):
                 try:
                     created_date = datetime.fromisoformat(b['created_at'].replace('Z', ''))
                     if created_date >= current_month:
-                        this_month_bookings.append(b)
+                        this_month_count += 1
                         if b.get('status') == 'confirmed':
                             this_month_revenue += float(b.get('total_price', 0))
                 except:
                     continue
         
+        confirmed_bookings = status_counts.get('confirmed', 0)
+        tentative_bookings = status_counts.get('tentative', 0)
+        cancelled_bookings = status_counts.get('cancelled', 0)
+        
         # Room stats
         available_rooms = len([r for r in rooms if r.get('status') == 'available'])
         maintenance_rooms = len([r for r in rooms if r.get('status') == 'maintenance'])
@@ -449,7 +397,7 @@ def api_dashboard_stats():
             'confirmed_bookings': confirmed_bookings,
             'tentative_bookings': tentative_bookings,
             'cancelled_bookings': cancelled_bookings,
-            'this_month_bookings': len(this_month_bookings),
+            'this_month_bookings': this_month_count,
             'total_clients': clients_count,
             'available_rooms': available_rooms,
             'maintenance_rooms': maintenance_rooms,
@@ -469,7 +417,12 @@ def api_dashboard_stats():
 def api_dashboard_refresh():
     """Refresh dashboard data - returns updated statistics for AJAX refresh"""
     try:
-        from core import get_dashboard_stats
+        from core import get_dashboard_stats, recompute_dashboard_stats
+        
+        # Full recompute on demand (admins/managers only); normally stats are maintained incrementally
+        if request.args.get('recompute', '').lower() in ('1', 'true', 'yes') and \
+                getattr(current_user, 'role', None) in ('admin', 'manager'):
+            recompute_dashboard_stats()
         
         # Get comprehensive stats using the core function
         stats = get_dashboard_stats()
@@ -556,6 +509,37 @@ def api_revenue_trends():
             'period_days': days
         })
 
+MAX_UTILIZATION_DAYS = 366
+
+@api_bp.route('/api/stats/room-utilization')
+@login_required
+def api_room_utilization():
+    """Per-room, per-day and per-hour booked business hours for ?start_date=YYYY-MM-DD&end_date=YYYY-MM-DD"""
+    try:
+        from core import get_room_utilization
+        
+        today = datetime.now(UTC).date()
+        start_date = datetime.strptime(request.args.get('start_date', today.replace(day=1).isoformat()), '%Y-%m-%d').date()
+        end_date = datetime.strptime(request.args.get('end_date', today.isoformat()), '%Y-%m-%d').date()
+        if end_date < start_date:
+            return jsonify({'error': 'end_date must not be before start_date'}), 400
+        if (end_date - start_date).days + 1 > MAX_UTILIZATION_DAYS:
+            return jsonify({'error': f'At most {MAX_UTILIZATION_DAYS} days per request'}), 400
+        
+        rooms = get_cached_rooms()
+        utilization = get_room_utilization(start_date, end_date)
+        result = utilization.to_dict(room['id'] for room in rooms)
+        names = {room['id']: room.get('name') for room in rooms}
+        for room in result['rooms']:
+            room['room_name'] = names.get(room['room_id'])
+        return jsonify(result)
+        
+    except ValueError:
+        return jsonify({'error': 'Invalid date format, expected YYYY-MM-DD'}), 400
+    except Exception as e:
+        print(f"❌ ERROR: Failed to compute room utilization: {e}")
+        return jsonify({'error': 'Failed to compute room utilization'}), 500
+
 # ===============================
 # ADDON API ENDPOINTS
 # ===============================
@@ -565,17 +549,13 @@ def api_revenue_trends():
 def api_get_addons():
     """Get all available addons"""
     try:
-        response = supabase_admin.table('addons').select("""
-            id, name, description, price, is_active,
-            category:addon_categories(id, name)
-        """).eq('is_active', True).order('name').execute()
-        
-        addons = response.data if response.data else []
+        addons = get_cached_addons(active_only=True)
+        categories_by_id = {category['id']: category for category in get_cached_addon_categories()}
         
         # Format for frontend
         formatted_addons = []
         for addon in addons:
-            category = addon.get('category', {})
+            category = categories_by_id.get(addon.get('category_id'), {})
             formatted_addons.append({
                 'id': addon.get('id'),
                 'name': addon.get('name'),
@@ -597,8 +577,7 @@ def api_get_addons():
 def api_get_addon_categories():
     """Get all addon categories"""
     try:
-        response = supabase_admin.table('addon_categories').select('*').order('name').execute()
-        categories = response.data if response.data else []
+        categories = get_cached_addon_categories()
         
         return jsonify(categories)
         
@@ -610,6 +589,11 @@ def api_get_addon_categories():
 # UTILITY API ENDPOINTS
 # ===============================
 
+MAX_PRICING_BATCH = 200
+
+def _parse_pricing_datetime(value):
+    return datetime.fromisoformat(str(value).replace('Z', ''))
+
 @api_bp.route('/api/calculate-pricing')
 @login_required
 def api_calculate_pricing():
@@ -623,70 +607,68 @@ def api_calculate_pricing():
         if not all([room_id, start_time, end_time]):
             return jsonify({'error': 'Missing required parameters'}), 400
         
-        from datetime import datetime
-        from core import calculate_booking_total
+        from core import get_price_breakdown
         
         # Parse datetime strings
-        start_dt = datetime.fromisoformat(start_time.replace('Z', ''))
-        end_dt = datetime.fromisoformat(end_time.replace('Z', ''))
-        
-        # Calculate total
-        total = calculate_booking_total(room_id, start_dt, end_dt, addon_ids)
-        
-        # Get room details for breakdown
-        room_data = supabase_select('rooms', filters=[('id', 'eq', room_id)])
-        room = room_data[0] if room_data else {}
-        
-        # Calculate duration and rate type
-        duration_hours = (end_dt - start_dt).total_seconds() / 3600
-        
-        if duration_hours <= 4:
-            rate_type = "Hourly Rate"
-            room_rate = float(room.get('hourly_rate', 0)) * duration_hours
-        elif duration_hours <= 6:
-            rate_type = "Half-day Rate"
-            room_rate = float(room.get('half_day_rate', 0))
-        else:
-            rate_type = "Full-day Rate"
-            room_rate = float(room.get('full_day_rate', 0))
-        
-        # Calculate addons total
-        addons_total = 0
-        addon_items = []
-        
-        if addon_ids:
-            for addon_id in addon_ids:
-                addon_data = supabase_select('addons', filters=[('id', 'eq', addon_id)])
-                if addon_data:
-                    addon = addon_data[0]
-                    price = float(addon.get('price', 0))
-                    addons_total += price
-                    addon_items.append({
-                        'id': addon_id,
-                        'name': addon.get('name'),
-                        'price': price
-                    })
+        start_dt = _parse_pricing_datetime(start_time)
+        end_dt = _parse_pricing_datetime(end_time)
         
-        return jsonify({
-            'room_rate': round(room_rate, 2),
-            'rate_type': rate_type,
-            'addons_total': round(addons_total, 2),
-            'addon_items': addon_items,
-            'duration_hours': round(duration_hours, 1),
-            'total': round(total, 2)
-        })
+        # Room and add-on rates come from the cached rate table - no per-item queries
+        breakdown = get_price_breakdown(room_id, start_dt, end_dt, addon_ids)
+        if breakdown is None:
+            return jsonify({'error': 'Room not found'}), 404
+        
+        return jsonify(breakdown)
         
+    except ValueError:
+        return jsonify({'error': 'Invalid datetime format'}), 400
     except Exception as e:
         print(f"❌ ERROR: Failed to calculate pricing: {e}")
         return jsonify({'error': 'Failed to calculate pricing'}), 500
 
+@api_bp.route('/api/calculate-pricing/batch', methods=['POST'])
+@login_required
+def api_calculate_pricing_batch():
+    """Price many candidate bookings at once: {"bookings": [{room_id, start_time, end_time, addon_ids}, ...]}"""
+    try:
+        payload = request.get_json(silent=True) or {}
+        requested = payload.get('bookings')
+        if not isinstance(requested, list) or not requested:
+            return jsonify({'error': 'bookings must be a non-empty list'}), 400
+        if len(requested) > MAX_PRICING_BATCH:
+            return jsonify({'error': f'At most {MAX_PRICING_BATCH} bookings per request'}), 400
+        
+        from core import price_bookings
+        
+        candidates = []
+        for position, item in enumerate(requested):
+            try:
+                candidates.append({
+                    'room_id': item['room_id'],
+                    'start_time': _parse_pricing_datetime(item['start_time']),
+                    'end_time': _parse_pricing_datetime(item['end_time']),
+                    'addon_ids': item.get('addon_ids') or []
+                })
+            except (KeyError, TypeError, ValueError):
+                return jsonify({'error': f'Booking {position} needs room_id and valid start_time/end_time'}), 400
+        
+        results = []
+        for breakdown in price_bookings(candidates):
+            results.append(breakdown if breakdown is not None else {'error': 'Room not found'})
+        
+        return jsonify({'results': results, 'count': len(results)})
+        
+    except Exception as e:
+        print(f"❌ ERROR: Failed to calculate batch pricing: {e}")
+        return jsonify({'error': 'Failed to calculate pricing'}), 500
+
 @api_bp.route('/api/health')
 @login_required
 def api_health_check():
     """API health check endpoint"""
     try:
         # Test database connection
-        test_response = supabase_admin.table('rooms').select('id').limit(1).execute()
+        supabase_admin.table('rooms').select('id').limit(1).execute()
         
         return jsonify({
             'status': 'healthy',
@@ -704,6 +686,76 @@ def api_health_check():
             'error': str(e)
         }), 500
 
+@api_bp.route('/api/cache/stats')
+@login_required
+def api_cache_stats():
+    """Reference data cache hit/miss counters"""
+    return jsonify(get_reference_cache_stats())
+
+@api_bp.route('/api/email/outbox')
+@login_required
+def api_email_outbox_stats():
+    """Email outbox queue depth, retries, failures and worker state"""
+    from core import get_email_outbox_stats
+    return jsonify(get_email_outbox_stats())
+
+@api_bp.route('/api/logging/stats')
+@login_required
+def api_log_buffer_stats():
+    """Buffered audit/activity log queue depth, overflow and batch counters"""
+    from core import get_log_buffer_stats
+    return jsonify(get_log_buffer_stats())
+
+@api_bp.route('/api/query-shapes/stats')
+@login_required
+def api_query_shape_stats():
+    """Calls, rows and payload bytes per named query shape, largest first; ?reset=1 clears the counters"""
+    from utils.query_shapes import QUERY_SHAPES, get_query_shape_metrics, reset_query_shape_metrics
+    
+    metrics = get_query_shape_metrics()
+    if request.args.get('reset', '').lower() in ('1', 'true', 'yes'):
+        reset_query_shape_metrics()
+    return jsonify({
+        'shapes': metrics,
+        'registered': {name: shape['columns'] for name, shape in QUERY_SHAPES.items()}
+    })
+
+@api_bp.route('/api/identity-map/stats')
+@login_required
+def api_identity_map_stats():
+    """Reads served from the request identity maps instead of the database, across all requests"""
+    from utils.identity_map import get_identity_map_stats
+    return jsonify(get_identity_map_stats())
+
+@api_bp.route('/api/fanout/stats')
+@login_required
+def api_fanout_stats():
+    """Concurrent page read counters: calls, failures, timeouts"""
+    return jsonify(get_fanout_stats())
+
+@api_bp.route('/api/rooms/conflict-index')
+@login_required
+def api_conflict_index_status():
+    """Booking conflict index counters, with an optional full cross-check against the database"""
+    from core import booking_index, verify_booking_index
+    
+    result = {'stats': booking_index.stats()}
+    if request.args.get('verify', '').lower() in ('1', 'true', 'yes'):
+        result['verification'] = verify_booking_index()
+    return jsonify(result)
+
+@api_bp.route('/api/clients/search/stats')
+@login_required
+def api_client_search_stats():
+    """Client search index size, age and counters"""
+    return jsonify(get_client_search_stats())
+
+@api_bp.route('/api/documents/stats')
+@login_required
+def api_document_stats():
+    """PDF render pool and document cache counters"""
+    return jsonify(get_document_service_stats())
+
 # ===============================
 # DASHBOARD STATS API ENDPOINTS
 # ===============================
@@ -720,39 +772,40 @@ def get_dashboard_stats():
         start_of_today = datetime.combine(today, datetime.min.time()).replace(tzinfo=UTC)
         end_of_today = datetime.combine(today, datetime.max.time()).replace(tzinfo=UTC)
         
-        today_bookings = supabase_admin.table('bookings').select(
-            'id, start_time, status'
-        ).gte('start_time', start_of_today.isoformat()).lte('start_time', end_of_today.isoformat()).execute()
-        
-        today_events = len([b for b in today_bookings.data if b['status'] in ['confirmed', 'checked_in']])
-        
         # Get weekly revenue (last 7 days)
         week_start = today - timedelta(days=7)
         week_start_dt = datetime.combine(week_start, datetime.min.time()).replace(tzinfo=UTC)
         
-        weekly_bookings = supabase_admin.table('bookings').select(
-            'id, total_price, start_time, status'
-        ).gte('start_time', week_start_dt.isoformat()).execute()
+        # The three reads are independent; run them side by side, and a read that fails counts as empty
+        loaded = fan_out({
+            'today': lambda: supabase_admin.table('bookings').select(
+                'id, start_time, status'
+            ).gte('start_time', start_of_today.isoformat()).lte('start_time', end_of_today.isoformat()).execute().data or [],
+            'weekly': lambda: supabase_admin.table('bookings').select(
+                'id, total_price, start_time, status'
+            ).gte('start_time', week_start_dt.isoformat()).execute().data or [],
+            'rooms': lambda: supabase_admin.table('rooms').select(
+                'id, name'
+            ).execute().data or []
+        }, fallbacks={'today': [], 'weekly': [], 'rooms': []}, label='dashboard stats API')
+        today_bookings, weekly_bookings, rooms = loaded['today'], loaded['weekly'], loaded['rooms']
+        
+        today_events = len([b for b in today_bookings if b['status'] in ['confirmed', 'checked_in']])
         
         weekly_revenue = sum(
             float(booking['total_price'] or 0) 
-            for booking in weekly_bookings.data 
+            for booking in weekly_bookings 
             if booking['status'] == 'confirmed'
         )
         
-        # Get active/available rooms
-        rooms_response = supabase_admin.table('rooms').select(
-            'id, name'
-        ).execute()
-        
         # For now, assume all rooms are available since we don't know the exact schema
-        active_rooms = len(rooms_response.data)
-        total_rooms = len(rooms_response.data)
+        active_rooms = len(rooms)
+        total_rooms = len(rooms)
         
         # Calculate utilization (bookings this week vs capacity)
         utilization = 0
         if total_rooms > 0:
-            weekly_booked_days = len(weekly_bookings.data)
+            weekly_booked_days = len(weekly_bookings)
             total_capacity = total_rooms * 7  # 7 days
             utilization = min(100, (weekly_booked_days / total_capacity * 100)) if total_capacity > 0 else 0
         
@@ -767,6 +820,7 @@ def get_dashboard_stats():
             'weeklyRevenue': int(weekly_revenue),
             'activeRooms': active_rooms,
             'utilization': round(utilization, 1),
+            'partial': loaded.partial,
             'timestamp': now.isoformat()
         })
         
@@ -1,8 +1,8 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, send_file, session, Response
 from flask_login import login_required, current_user
 from datetime import datetime, UTC, timedelta, date
+import importlib.util
 import io
-import tempfile
 import os
 import re
 import pytz
@@ -16,21 +16,20 @@ from core import (
     extract_booking_form_data, validate_booking_business_rules,
     find_or_create_client_enhanced, find_or_create_event_type,
     create_complete_booking, safe_log_user_activity,
-    format_booking_success_message, safe_str, safe_str_lower
+    format_booking_success_message, safe_str,
+    get_cached_rooms, get_cached_room, booking_changed, send_email,
+    search_clients_indexed, search_company_names, render_document_pdf,
+    get_bookings_with_details, start_document_batch, get_document_batch, DOCUMENT_BATCH_MAX_BOOKINGS,
+    load_booking_detail, get_booking_audit_trail, fan_out
 )
+from utils.validation import safe_float_conversion
+from utils.query_shapes import select_shape
 from httpx import TimeoutException
 from functools import wraps
 
-# Try importing reportlab, but make it optional
-try:
-    from reportlab.lib.pagesizes import A4
-    from reportlab.lib import colors
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-    from reportlab.lib.units import inch
-    REPORTLAB_AVAILABLE = True
-except ImportError:
-    REPORTLAB_AVAILABLE = False
+# reportlab is optional; PDFs are built by utils/pdf_documents.py, which imports it on first render
+REPORTLAB_AVAILABLE = importlib.util.find_spec('reportlab') is not None
+if not REPORTLAB_AVAILABLE:
     print("⚠️ WARNING: reportlab not available - PDF generation will be disabled")
 
 bookings_bp = Blueprint('bookings', __name__)
@@ -135,6 +134,7 @@ def save_booking_to_db(booking_data):
         ).execute(timeout=30)  # 30 second timeout
         
         if result and result.data:
+            booking_changed(None, result.data[0])
             return result.data[0]
         return None
     except Exception as e:
@@ -193,8 +193,7 @@ def bookings():
         bookings_data = response.data if response.data else []
         
         # Get rooms for filter dropdown
-        rooms_response = supabase_admin.table('rooms').select('id, name').order('name').execute()
-        rooms = rooms_response.data if rooms_response.data else []
+        rooms = [{'id': room['id'], 'name': room['name']} for room in get_cached_rooms()]
         
         # Enhance booking data for display
         for booking in bookings_data:
@@ -257,8 +256,7 @@ def new_booking():
     
     try:
         # Get available rooms for the form
-        rooms_response = supabase_admin.table('rooms').select('*').eq('status', 'available').order('name').execute()
-        rooms = rooms_response.data or []
+        rooms = get_cached_rooms(status='available')
         
         if not rooms:
             flash('❌ No rooms available for booking. Please contact administrator.', 'warning')
@@ -405,7 +403,12 @@ def new_booking():
 def view_booking(id):
     """View booking details with improved error handling and audit trail"""
     try:
-        booking = get_booking_with_details(id)
+        # The booking and its audit trail are independent reads
+        loaded = fan_out({
+            'booking': lambda: get_booking_with_details(id),
+            'audit_trail': lambda: get_booking_audit_trail(id)
+        }, fallbacks={'audit_trail': []}, label=f'booking #{id}')
+        booking = loaded['booking']
         
         if not booking:
             flash('❌ Booking not found', 'danger')
@@ -432,9 +435,7 @@ def view_booking(id):
                 booking['updated_at'] = pytz.UTC.localize(booking['updated_at'])
             booking['updated_at'] = booking['updated_at'].astimezone(local_tz)
         
-        # Get audit trail for this booking
-        from core import get_booking_audit_trail
-        audit_trail = get_booking_audit_trail(id)
+        audit_trail = loaded['audit_trail']
             
         return render_template(
             'bookings/view.html',
@@ -459,7 +460,7 @@ def edit_booking(id):
     
     try:
         # Get rooms for the form
-        rooms = supabase_admin.table('rooms').select('*').order('name').execute().data or []
+        rooms = get_cached_rooms()
         form.room_id.choices = [(room['id'], f"{room['name']} (Capacity: {room.get('capacity', 'N/A')})") for room in rooms]
         
         # Fetch existing booking
@@ -518,7 +519,7 @@ def delete_booking(id):
     """Delete a booking"""
     try:
         # Get booking details for logging
-        booking_response = supabase_admin.table('bookings').select('*').eq('id', id).execute()
+        booking_response = select_shape(supabase_admin, 'booking_write_row').eq('id', id).execute()
         
         if not booking_response.data:
             flash('Booking not found', 'danger')
@@ -531,6 +532,7 @@ def delete_booking(id):
         
         # Delete the booking
         supabase_admin.table('bookings').delete().eq('id', id).execute()
+        booking_changed(booking, None)
         
         # Log deletion
         safe_log_user_activity(
@@ -559,7 +561,7 @@ def update_booking_status(id):
             return redirect(url_for('bookings.view_booking', id=id))
 
         # Get current booking to compare status
-        current_booking = supabase_admin.table('bookings').select('status').eq('id', id).execute()
+        current_booking = select_shape(supabase_admin, 'booking_write_row').eq('id', id).execute()
         if not current_booking.data:
             flash('❌ Booking not found', 'danger')
             return redirect(url_for('bookings.bookings'))
@@ -589,6 +591,7 @@ def update_booking_status(id):
         ).eq('id', id).execute()
 
         if result.data:
+            booking_changed(current_booking.data[0], result.data[0])
             flash(f'✅ Booking status updated to {status}', 'success')
             
             # Log activity
@@ -666,132 +669,31 @@ def check_pdf_dependencies():
         print(f"⚠️ Warning: ReportLab not available: {e}")
         return False
 
-def create_quotation_pdf(booking, output_path, current_time, valid_until):
-    """Create a professional quotation PDF using ReportLab"""
-    doc = SimpleDocTemplate(output_path, pagesize=A4)
-    styles = getSampleStyleSheet()
-    story = []
-    
-    # Custom styles
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        spaceAfter=30,
-        textColor=colors.HexColor('#2E8B57')
-    )
-    
-    header_style = ParagraphStyle(
-        'CustomHeader',
-        parent=styles['Heading2'],
-        fontSize=16,
-        spaceAfter=12,
-        textColor=colors.HexColor('#1a1a1a')
-    )
-    
-    # Title
-    story.append(Paragraph("RAINBOW TOWERS CONFERENCE BOOKING", title_style))
-    story.append(Paragraph("QUOTATION", styles['Heading1']))
-    story.append(Spacer(1, 20))
-    
-    # Quotation details
-    quotation_number = f"Q{booking['id']:04d}-{current_time.strftime('%Y%m')}"
-    story.append(Paragraph(f"Quotation Number: <b>{quotation_number}</b>", styles['Normal']))
-    story.append(Paragraph(f"Date: <b>{current_time.strftime('%d %B %Y')}</b>", styles['Normal']))
-    story.append(Paragraph(f"Valid Until: <b>{valid_until.strftime('%d %B %Y')}</b>", styles['Normal']))
-    story.append(Spacer(1, 20))
-    
-    # Client Information
-    story.append(Paragraph("CLIENT INFORMATION", header_style))
-    client_name = booking.get('client_name', 'Unknown Client')
-    contact_person = booking.get('contact_person', 'N/A')
-    story.append(Paragraph(f"Client: <b>{client_name}</b>", styles['Normal']))
-    story.append(Paragraph(f"Contact Person: <b>{contact_person}</b>", styles['Normal']))
-    story.append(Spacer(1, 20))
-    
-    # Booking Details
-    story.append(Paragraph("BOOKING DETAILS", header_style))
-    
-    # Create booking details table
-    booking_data = [
-        ['Event Title:', booking.get('title', 'Conference Booking')],
-        ['Room:', booking.get('room_name', 'Conference Room')],
-        ['Date:', safe_format_date(booking.get('start_time'), 'date') or 'TBD'],
-        ['Time:', f"{safe_format_date(booking.get('start_time'), 'time') or 'TBD'} - {safe_format_date(booking.get('end_time'), 'time') or 'TBD'}"],
-        ['Attendees:', str(booking.get('attendees', 'TBD'))],
-        ['Duration:', f"{booking.get('duration_hours', 0)} hours" if booking.get('duration_hours') else 'TBD'],
-    ]
-    
-    booking_table = Table(booking_data, colWidths=[2*inch, 4*inch])
-    booking_table.setStyle(TableStyle([
-        ('ALIGN', (0,0), (-1,-1), 'LEFT'),
-        ('FONTNAME', (0,0), (0,-1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0,0), (-1,-1), 11),
-        ('ROWBACKGROUNDS', (0,0), (-1,-1), [colors.white, colors.HexColor('#f8f9fa')]),
-        ('GRID', (0,0), (-1,-1), 1, colors.HexColor('#dee2e6')),
-    ]))
-    
-    story.append(booking_table)
-    story.append(Spacer(1, 20))
-    
-    # Pricing
-    story.append(Paragraph("PRICING", header_style))
-    
-    pricing_data = [
-        ['Item', 'Quantity', 'Rate', 'Amount'],
-        ['Room Rental', '1', f"${booking.get('room_price', 0):.2f}", f"${booking.get('room_price', 0):.2f}"],
-    ]
-    
-    # Add addons if any
-    if booking.get('total_addons_price', 0) > 0:
-        pricing_data.append(['Add-ons/Services', '1', f"${booking.get('total_addons_price', 0):.2f}", f"${booking.get('total_addons_price', 0):.2f}"])
-    
-    # Add totals
-    subtotal = booking.get('subtotal', 0)
-    tax_amount = booking.get('tax_amount', 0)
-    total_price = booking.get('total_price', 0)
-    
-    pricing_data.extend([
-        ['', '', 'Subtotal:', f"${subtotal:.2f}"],
-        ['', '', 'Tax:', f"${tax_amount:.2f}"],
-        ['', '', 'TOTAL:', f"${total_price:.2f}"],
-    ])
-    
-    pricing_table = Table(pricing_data, colWidths=[2.5*inch, 1*inch, 1.5*inch, 1.5*inch])
-    pricing_table.setStyle(TableStyle([
-        ('BACKGROUND', (0,0), (-1,0), colors.HexColor('#2E8B57')),
-        ('TEXTCOLOR', (0,0), (-1,0), colors.whitesmoke),
-        ('ALIGN', (0,0), (-1,-1), 'CENTER'),
-        ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0,0), (-1,0), 12),
-        ('BOTTOMPADDING', (0,0), (-1,0), 12),
-        ('BACKGROUND', (0,-3), (-1,-1), colors.HexColor('#f8f9fa')),
-        ('FONTNAME', (0,-1), (-1,-1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0,-1), (-1,-1), 12),
-        ('GRID', (0,0), (-1,-1), 1, colors.HexColor('#dee2e6')),
-    ]))
-    
-    story.append(pricing_table)
-    story.append(Spacer(1, 30))
-    
-    # Terms and conditions
-    story.append(Paragraph("TERMS & CONDITIONS", header_style))
-    terms = [
-        "1. This quotation is valid for 30 days from the date of issue.",
-        "2. Payment is required to confirm the booking.",
-        "3. Cancellation policy applies as per our standard terms.",
-        "4. All prices are in USD and inclusive of applicable taxes.",
-        "5. Additional services may incur extra charges."
-    ]
-    
-    for term in terms:
-        story.append(Paragraph(term, styles['Normal']))
-    
-    story.append(Spacer(1, 20))
-    story.append(Paragraph("Thank you for choosing Rainbow Towers Conference Center!", styles['Normal']))
-    
-    # Build the PDF
-    doc.build(story)
+def quotation_payload(booking, current_time, valid_until):
+    """The fields a quotation/invoice PDF prints; they also key its cached copy"""
+    return {
+        'quotation_number': f"Q{booking['id']:04d}-{current_time.strftime('%Y%m')}",
+        'issue_date': current_time.strftime('%d %B %Y'),
+        'valid_until': valid_until.strftime('%d %B %Y'),
+        'client_name': booking.get('client_name', 'Unknown Client'),
+        'contact_person': booking.get('contact_person', 'N/A'),
+        'title': booking.get('title', 'Conference Booking'),
+        'room_name': booking.get('room_name', 'Conference Room'),
+        'date': safe_format_date(booking.get('start_time'), 'date') or 'TBD',
+        'time': f"{safe_format_date(booking.get('start_time'), 'time') or 'TBD'} - {safe_format_date(booking.get('end_time'), 'time') or 'TBD'}",
+        'attendees': str(booking.get('attendees', 'TBD')),
+        'duration': f"{booking.get('duration_hours', 0)} hours" if booking.get('duration_hours') else 'TBD',
+        'room_price': booking.get('room_price', 0),
+        'total_addons_price': booking.get('total_addons_price', 0),
+        'subtotal': booking.get('subtotal', 0),
+        'tax_amount': booking.get('tax_amount', 0),
+        'total_price': booking.get('total_price', 0),
+    }
+
+def create_quotation_pdf(booking, current_time, valid_until):
+    """Quotation PDF bytes, served from the document cache or rendered in the PDF worker pool"""
+    return render_document_pdf('quotation', quotation_payload(booking, current_time, valid_until),
+                               booking_id=booking.get('id'))
 
 @bookings_bp.route('/bookings/<int:id>/quotation/download')
 @login_required
@@ -817,17 +719,8 @@ def download_quotation(id):
         current_time = datetime.now(tz)
         valid_until = current_time + timedelta(days=30)
 
-        # Create temporary file
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
-        temp_file_path = temp_file.name
-        temp_file.close()
-
-        # Generate PDF using ReportLab
-        create_quotation_pdf(booking, temp_file_path, current_time, valid_until)
-        
-        # Verify file was created
-        if not os.path.exists(temp_file_path):
-            raise Exception("PDF file was not created successfully")
+        # Generate PDF (cached per booking content)
+        file_content = create_quotation_pdf(booking, current_time, valid_until)
 
         # Log activity
         safe_log_user_activity(
@@ -844,10 +737,6 @@ def download_quotation(id):
         from flask import Response
         import mimetypes
         
-        # Read the file content
-        with open(temp_file_path, 'rb') as f:
-            file_content = f.read()
-        
         # Create response with explicit headers
         response = Response(
             file_content,
@@ -867,14 +756,6 @@ def download_quotation(id):
         error_msg = handle_pdf_generation_error(e)
         flash(f'❌ {error_msg}', 'danger')
         return redirect(url_for('bookings.view_booking', id=id))
-    
-    finally:
-        # Clean up temporary file
-        if 'temp_file_path' in locals() and os.path.exists(temp_file_path):
-            try:
-                os.unlink(temp_file_path)
-            except Exception as cleanup_error:
-                print(f"⚠️ Warning: Failed to cleanup temp file {temp_file_path}: {cleanup_error}")
 
 @bookings_bp.route('/bookings/<int:id>/invoice/download')
 @login_required
@@ -896,17 +777,8 @@ def download_invoice(id):
         current_time = datetime.now(tz)
         valid_until = current_time + timedelta(days=30)
 
-        # Create temporary file
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
-        temp_file_path = temp_file.name
-        temp_file.close()
-
-        # Generate PDF using ReportLab
-        create_quotation_pdf(booking, temp_file_path, current_time, valid_until)
-        
-        # Verify file was created
-        if not os.path.exists(temp_file_path):
-            raise Exception("PDF file was not created successfully")
+        # Generate PDF (cached per booking content)
+        file_content = create_quotation_pdf(booking, current_time, valid_until)
 
         # Log activity
         safe_log_user_activity(
@@ -922,10 +794,6 @@ def download_invoice(id):
         # Send file with explicit headers to force filename
         from flask import Response
         
-        # Read the file content
-        with open(temp_file_path, 'rb') as f:
-            file_content = f.read()
-        
         # Create response with explicit headers
         response = Response(
             file_content,
@@ -945,14 +813,6 @@ def download_invoice(id):
         error_msg = handle_pdf_generation_error(e)
         flash(f'❌ {error_msg}', 'danger')
         return redirect(url_for('bookings.view_booking', id=id))
-    
-    finally:
-        # Clean up temporary file
-        if 'temp_file_path' in locals() and os.path.exists(temp_file_path):
-            try:
-                os.unlink(temp_file_path)
-            except Exception as cleanup_error:
-                print(f"⚠️ Warning: Failed to cleanup temp file {temp_file_path}: {cleanup_error}")
 
 @bookings_bp.route('/bookings/<int:id>/invoice')
 @login_required
@@ -962,29 +822,18 @@ def generate_invoice(id):
         from datetime import datetime, timedelta
         import pytz
 
-        # Get booking data with all related information
-        booking_response = supabase_admin.table('bookings').select("""
-            *,
-            room:rooms(*),
-            client:clients(*),
-            event_type:event_types(*)
-        """).eq('id', id).execute()
+        # Get booking data with all related information and custom addons
+        booking = load_booking_detail(id)
 
-        if not booking_response.data:
+        if not booking:
             flash('❌ Booking not found', 'danger')
             return redirect(url_for('bookings.bookings'))
 
-        booking = booking_response.data[0]
-
-        # Get custom addons
-        addons_response = supabase_admin.table('booking_custom_addons').select('*').eq('booking_id', id).execute()
-        booking['custom_addons'] = addons_response.data if addons_response.data else []
-
         # Ensure all required data structures exist with safe fallbacks
         if not booking.get('client') or not isinstance(booking['client'], dict):
             # Try to get client data separately if join failed
             if booking.get('client_id'):
-                client_response = supabase_admin.table('clients').select('*').eq('id', booking['client_id']).execute()
+                client_response = select_shape(supabase_admin, 'client_document_contact').eq('id', booking['client_id']).execute()
                 if client_response.data:
                     booking['client'] = client_response.data[0]
                 else:
@@ -1011,9 +860,9 @@ def generate_invoice(id):
         if not booking.get('room') or not isinstance(booking['room'], dict):
             # Try to get room data separately if join failed
             if booking.get('room_id'):
-                room_response = supabase_admin.table('rooms').select('*').eq('id', booking['room_id']).execute()
-                if room_response.data:
-                    booking['room'] = room_response.data[0]
+                cached_room = get_cached_room(booking['room_id'])
+                if cached_room:
+                    booking['room'] = cached_room
                 else:
                     # Create fallback room data
                     booking['room'] = {
@@ -1168,23 +1017,72 @@ def generate_invoice(id):
         flash(f'❌ Failed to generate invoice: {str(e)}', 'danger')
         return redirect(url_for('bookings.bookings'))
 
+def render_booking_document_pdf(booking, document_type):
+    """Render the quotation/invoice PDF into memory; returns (filename, bytes) or None"""
+    if not REPORTLAB_AVAILABLE or not check_pdf_dependencies():
+        return None
+    
+    tz = pytz.timezone('Africa/Harare')
+    current_time = datetime.now(tz)
+    try:
+        content = create_quotation_pdf(booking, current_time, current_time + timedelta(days=30))
+        return generate_pdf_filename(booking, document_type), content
+    except Exception as e:
+        print(f"⚠️ WARNING: Could not render {document_type} PDF for booking #{booking.get('id')}: {e}")
+        return None
+
+def queue_booking_document_email(booking, document_type, document=None):
+    """Queue a quotation or invoice email with the PDF attached; returns the recipient or None.
+
+    document is an already rendered (filename, bytes) pair; it is rendered here when omitted.
+    """
+    client = booking.get('client') or {}
+    client_email = client.get('email') or booking.get('client_email')
+    if not client_email:
+        return None
+    
+    label = 'Quotation' if document_type == 'quotation' else 'Invoice'
+    client_name = client.get('contact_person') or client.get('company_name') or booking.get('client_name') or 'Valued Customer'
+    total = safe_float_conversion(booking.get('total_price', 0))
+    start_time = booking.get('start_time')
+    start_display = start_time.strftime('%d %B %Y %H:%M') if hasattr(start_time, 'strftime') else (start_time or 'N/A')
+    
+    subject = f"{label} for booking #{booking.get('id')} - {booking.get('title') or 'Your event'}"
+    html_body = f"""
+    <html>
+    <body style="font-family: Arial, sans-serif; color: #333;">
+        <p>Dear {client_name},</p>
+        <p>Please find attached the {label.lower()} for your booking <strong>#{booking.get('id')}</strong>.</p>
+        <p><strong>Event:</strong> {booking.get('title') or 'N/A'}<br>
+           <strong>Venue:</strong> {(booking.get('room') or {}).get('name', 'N/A')}<br>
+           <strong>Start:</strong> {start_display}<br>
+           <strong>Total:</strong> USD {total:,.2f}</p>
+        <p>Thank you for choosing our venue!</p>
+    </body>
+    </html>
+    """
+    text_body = (f"Dear {client_name},\n\nPlease find attached the {label.lower()} for your booking "
+                 f"#{booking.get('id')} ({booking.get('title') or 'N/A'}), total USD {total:,.2f}.\n\n"
+                 f"Thank you for choosing our venue!")
+    
+    if document is None:
+        document = render_booking_document_pdf(booking, document_type)
+    attachments = [(document[0], document[1], 'application/pdf')] if document else None
+    if not send_email(client_email, subject, html_body, text_body, attachments):
+        raise RuntimeError(f'Could not queue {document_type} email')
+    return client_email
+
 @bookings_bp.route('/bookings/<int:id>/send-quotation', methods=['POST'])
 @login_required
 def send_quotation_email(id):
-    """Send quotation email to client"""
+    """Queue the quotation email to the client; the outbox worker delivers it"""
     try:
         booking = get_booking_with_details(id)
         if not booking:
             flash('❌ Booking not found', 'danger')
             return redirect(url_for('bookings.bookings'))
 
-        # Get client email
-        client_email = None
-        if booking.get('client'):
-            client_email = booking['client'].get('email')
-        elif booking.get('client_email'):
-            client_email = booking['client_email']
-
+        client_email = queue_booking_document_email(booking, 'quotation')
         if not client_email:
             flash('❌ No client email address available', 'danger')
             return redirect(url_for('bookings.view_booking', id=id))
@@ -1203,7 +1101,7 @@ def send_quotation_email(id):
             resource_id=id
         )
 
-        flash('✅ Quotation email sent successfully!', 'success')
+        flash(f'✅ Quotation email queued for {client_email}', 'success')
         return redirect(url_for('bookings.view_booking', id=id))
 
     except Exception as e:
@@ -1214,15 +1112,134 @@ def send_quotation_email(id):
 @bookings_bp.route('/bookings/<int:id>/send-invoice', methods=['POST'])
 @login_required
 def send_invoice_email(id):
-    """Send invoice email to client"""
+    """Queue the invoice email to the client; the outbox worker delivers it"""
     try:
-        # ... email sending logic ...
+        booking = get_booking_with_details(id)
+        if not booking:
+            flash('❌ Booking not found', 'danger')
+            return redirect(url_for('bookings.bookings'))
+
+        client_email = queue_booking_document_email(booking, 'invoice')
+        if not client_email:
+            flash('❌ No client email address available', 'danger')
+            return redirect(url_for('bookings.view_booking', id=id))
+
+        safe_log_user_activity(
+            ActivityTypes.GENERATE_REPORT,
+            f"Sent invoice email for booking #{id}",
+            resource_type='booking',
+            resource_id=id
+        )
+
+        flash(f'✅ Invoice email queued for {client_email}', 'success')
         return redirect(url_for('bookings.view_booking', id=id))
     except Exception as e:
         print(f"❌ ERROR: Failed to send invoice email: {e}")
         flash('❌ Error sending invoice email', 'danger')
         return redirect(url_for('bookings.view_booking', id=id))
 
+# ===============================
+# BULK DOCUMENTS
+# ===============================
+
+BATCH_DOCUMENT_TYPES = ('quotation', 'invoice')
+BATCH_DELIVERIES = ('zip', 'email')
+
+def batch_document_job_payload(job):
+    progress = job.progress()
+    progress['progress_url'] = url_for('bookings.document_batch_progress', job_id=job.id)
+    if job.archive_path:
+        progress['download_url'] = url_for('bookings.download_document_batch', job_id=job.id)
+    return progress
+
+@bookings_bp.route('/bookings/documents/batch', methods=['POST'])
+@login_required
+def start_document_batch_job():
+    """Start a bulk quotation/invoice run for bookings selected by date range, status and client.
+
+    Parameters (form or JSON): start_date, end_date (YYYY-MM-DD, CAT), status (one or more,
+    default confirmed), client_id, document_type (quotation|invoice), delivery (zip|email).
+    """
+    if not REPORTLAB_AVAILABLE or not check_pdf_dependencies():
+        return jsonify({'error': 'PDF generation is not available'}), 503
+    
+    params = request.get_json(silent=True) or request.form
+    try:
+        document_type = params.get('document_type', 'invoice')
+        delivery = params.get('delivery', 'zip')
+        if document_type not in BATCH_DOCUMENT_TYPES or delivery not in BATCH_DELIVERIES:
+            raise ValueError('document_type must be quotation or invoice and delivery zip or email')
+        start_date = datetime.strptime(params['start_date'], '%Y-%m-%d').date()
+        end_date = datetime.strptime(params['end_date'], '%Y-%m-%d').date()
+        if end_date < start_date:
+            raise ValueError('end_date must not be before start_date')
+        if hasattr(params, 'getlist'):
+            statuses = params.getlist('status') or ['confirmed']
+        else:
+            statuses = params.get('status') or ['confirmed']
+            statuses = [statuses] if isinstance(statuses, str) else list(statuses)
+        client_id = int(params['client_id']) if params.get('client_id') else None
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid batch parameters: {e}'}), 400
+    
+    try:
+        bookings = get_bookings_with_details(start_date, end_date, statuses=statuses, client_id=client_id,
+                                             max_bookings=DOCUMENT_BATCH_MAX_BOOKINGS)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"❌ ERROR: Failed to load bookings for document batch: {e}")
+        return jsonify({'error': 'Failed to load bookings'}), 500
+    
+    # One issue date for the whole run, so every document in it matches its cached copy
+    issued_at = datetime.now(pytz.timezone('Africa/Harare'))
+    
+    def render(booking):
+        content = create_quotation_pdf(booking, issued_at, issued_at + timedelta(days=30))
+        return generate_pdf_filename(booking, document_type), content
+    
+    def email_document(booking, filename, content):
+        recipient = queue_booking_document_email(booking, document_type, (filename, content))
+        if not recipient:
+            raise ValueError('No client email address available')
+        if document_type == 'quotation':
+            supabase_update('bookings', {'quotation_sent': True}, [('id', 'eq', booking['id'])])
+        return recipient
+    
+    deliver = email_document if delivery == 'email' else None
+    description = f"{len(bookings)} {document_type}s for {start_date} to {end_date} ({', '.join(statuses)})"
+    job = start_document_batch(bookings, render, document_type, delivery=delivery, deliver=deliver,
+                               description=description)
+    
+    safe_log_user_activity(
+        ActivityTypes.GENERATE_REPORT,
+        f"Started bulk {document_type} {delivery} run: {description}",
+        resource_type='booking'
+    )
+    
+    return jsonify(batch_document_job_payload(job)), 202
+
+@bookings_bp.route('/bookings/documents/batch/<job_id>')
+@login_required
+def document_batch_progress(job_id):
+    """Progress and throughput of a bulk document run"""
+    job = get_document_batch(job_id)
+    if job is None:
+        return jsonify({'error': 'Batch not found'}), 404
+    return jsonify(batch_document_job_payload(job))
+
+@bookings_bp.route('/bookings/documents/batch/<job_id>/download')
+@login_required
+def download_document_batch(job_id):
+    """Zip archive of a finished bulk run"""
+    job = get_document_batch(job_id)
+    if job is None or not job.archive_path:
+        return jsonify({'error': 'Batch not found'}), 404
+    if job.status != 'completed' or not os.path.exists(job.archive_path):
+        return jsonify({'error': 'Batch is not finished yet', 'status': job.status}), 409
+    return send_file(job.archive_path, mimetype='application/zip', as_attachment=True,
+                     download_name=os.path.basename(job.archive_path))
+
 # ===============================
 # API ROUTES
 # ===============================
@@ -1246,33 +1263,16 @@ def search_clients():
         if len(query) > 50:
             return jsonify({'error': 'Query too long', 'results': []})
 
-        # Search in database with optimized query
-        response = supabase_admin.table('clients').select('id, contact_person, company_name, email').limit(20).execute()
-        if not response.data:
-            return jsonify({'results': []})
-
+        # Ranked matches from the in-process client search index
         results = []
-        for client in response.data:
-            # Safely convert all searchable fields
-            company = safe_str(client.get('company_name')).lower()
-            contact = safe_str(client.get('contact_person')).lower()
-            email = safe_str(client.get('email')).lower()
-
-            # Check if query matches any field
-            if (query in company or 
-                query in contact or 
-                query in email):
-                results.append({
-                    'id': client.get('id'),
-                    'name': client.get('contact_person', ''),
-                    'company': client.get('company_name', ''),
-                    'email': client.get('email', ''),
-                    'display_name': client.get('company_name') or client.get('contact_person', 'Unknown')
-                })
-                
-                # Limit results
-                if len(results) >= 10:
-                    break
+        for client in search_clients_indexed(query, limit=10):
+            results.append({
+                'id': client.get('id'),
+                'name': client.get('contact_person') or '',
+                'company': client.get('company_name') or '',
+                'email': client.get('email') or '',
+                'display_name': client.get('company_name') or client.get('contact_person') or 'Unknown'
+            })
 
         return jsonify({'results': results, 'total': len(results)})
 
@@ -1294,43 +1294,21 @@ def search_companies():
         if len(query) > 50:
             return jsonify({'error': 'Query too long', 'results': []})
         
-        # Get unique company names with better query
-        response = supabase_admin.table('clients').select('company_name').not_.is_('company_name', 'null').execute()
-        
-        if not response.data:
-            return jsonify({'results': []})
-        
+        # Distinct company names from the in-process client search index
         companies = []
-        seen_companies = set()
-        query_lower = safe_str_lower(query)
-        
-        for row in response.data:
-            try:
-                company_name = safe_str(row.get('company_name')).strip()
-                
-                # Skip empty, None values, or common invalid entries
-                if (not company_name or 
-                    company_name.lower() in ['none', 'null', 'n/a', 'na', 'unknown']):
-                    continue
-                
-                # Check if matches and not already added
-                if (query_lower in safe_str_lower(company_name) and 
-                    company_name not in seen_companies and
-                    len(company_name) >= 2):
-                    
-                    companies.append({
-                        'name': company_name,
-                        'value': company_name
-                    })
-                    seen_companies.add(company_name)
-                    
-                    # Limit results for performance
-                    if len(companies) >= 10:
-                        break
-                        
-            except Exception as e:
-                print(f"⚠️ WARNING: Error processing company: {e}")
+        for client in search_company_names(query, limit=20):
+            company_name = safe_str(client.get('company_name')).strip()
+            
+            # Skip common invalid entries
+            if company_name.lower() in ['none', 'null', 'n/a', 'na', 'unknown'] or len(company_name) < 2:
                 continue
+            
+            companies.append({
+                'name': company_name,
+                'value': company_name
+            })
+            if len(companies) >= 10:
+                break
         
         return jsonify({'results': companies, 'total': len(companies)})
         
@@ -1431,8 +1409,7 @@ def calendar_view():
                 continue
         
         # Get available rooms for filtering
-        rooms_response = supabase_admin.table('rooms').select('id, name').order('name').execute()
-        available_rooms = rooms_response.data if rooms_response.data else []
+        available_rooms = [{'id': room['id'], 'name': room['name']} for room in get_cached_rooms()]
         
         # Generate calendar navigation
         prev_month = start_date.replace(day=1) - timedelta(days=1)
@@ -1536,6 +1513,7 @@ def update_booking_status_api(booking_id):
         
         if not response.data:
             return jsonify({'error': 'Failed to update booking status'}), 500
+        booking_changed(booking, response.data[0])
         
         # Log the activity
         safe_log_user_activity(
@@ -1,14 +1,13 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, send_file
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
 from flask_login import login_required, current_user
 from utils.decorators import activity_logged
 from utils.logging import log_user_activity
-from core import (get_clients_with_booking_counts, get_client_by_id_from_db, get_client_bookings_from_db, 
-                  update_client_in_db, delete_client_from_db, create_client_in_db, ClientForm, 
-                  ActivityTypes, supabase_admin, convert_datetime_strings)
+from core import (get_clients_with_booking_counts, get_client_booking_aggregates, get_client_by_id_from_db, get_client_bookings_from_db, 
+                  delete_client_from_db, create_client_in_db, ClientForm, 
+                  ActivityTypes, supabase_admin, convert_datetime_strings, iter_clients_with_booking_counts,
+                  search_clients_indexed, client_changed, fan_out)
+from utils.streaming_export import csv_response
 from datetime import datetime, UTC, timedelta, timezone
-import pytz  # You may need to install this: pip install pytz
-import io
-import csv
 from collections import defaultdict
 
 clients_bp = Blueprint('clients', __name__)
@@ -266,6 +265,7 @@ def edit_client(id):
             ).eq('id', id).execute()
             
             if result.data:
+                client_changed(id, result.data[0])
                 flash('✅ Client updated successfully', 'success')
                 return redirect(url_for('clients.view_client', id=id))
             
@@ -345,23 +345,22 @@ def client_analytics(id):
     try:
         print(f"🔍 DEBUG: Loading client analytics for ID {id}")
         
-        # Get client data
-        client = get_client_by_id_from_db(id)
+        # The client and its bookings are independent reads
+        loaded = fan_out({
+            'client': lambda: get_client_by_id_from_db(id),
+            'bookings': lambda: get_enhanced_client_bookings(id)
+        }, fallbacks={'bookings': []}, label=f'client #{id} analytics')
+        client = loaded['client']
         if not client:
             flash('❌ Client not found.', 'danger')
             return redirect(url_for('clients.clients'))
         
-        # Get comprehensive analytics
-        analytics_data = get_comprehensive_client_analytics(id)
-        
-        # Get booking trends
-        booking_trends = get_client_booking_trends(id)
-        
-        # Get revenue trends
-        revenue_trends = get_client_revenue_trends(id)
-        
-        # Get seasonal patterns
-        seasonal_patterns = get_client_seasonal_patterns(id)
+        # Every analytics view is computed from the same booking list
+        bookings = loaded['bookings']
+        analytics_data = get_comprehensive_client_analytics(id, bookings)
+        booking_trends = get_client_booking_trends(id, bookings)
+        revenue_trends = get_client_revenue_trends(id, bookings)
+        seasonal_patterns = get_client_seasonal_patterns(id, bookings)
         
         # Log analytics view
         try:
@@ -398,8 +397,8 @@ def export_clients():
         format_type = request.args.get('format', 'csv')
         include_bookings = request.args.get('include_bookings', 'false').lower() == 'true'
         
-        # Get all clients with enhanced data
-        clients_data = get_enhanced_clients_list()
+        # Stream clients page by page (id order) straight into the response
+        clients_data = iter_clients_with_booking_counts()
         
         if format_type == 'csv':
             return export_clients_csv(clients_data, include_bookings)
@@ -419,7 +418,8 @@ def export_clients():
 def get_enhanced_clients_list(search_query='', sort_by='company_name', order='asc', filter_by='all'):
     """Get enhanced client list with search, sorting, and filtering"""
     try:
-        # Get base client data with booking counts
+        # Get base client data with booking counts, last booking and revenue
+        # (one grouped aggregation for the whole directory)
         clients_data = get_clients_with_booking_counts()
         
         if not clients_data:
@@ -448,7 +448,7 @@ def get_enhanced_clients_list(search_query='', sort_by='company_name', order='as
         if filter_by != 'all':
             clients_data = apply_client_filters(clients_data, filter_by)
         
-        # Enhance with additional data
+        # Add display helpers
         for client in clients_data:
             enhance_client_data(client)
         
@@ -485,50 +485,23 @@ def apply_client_filters(clients_data, filter_by):
         print(f"❌ ERROR: Failed to apply filters: {e}")
         return clients_data
 
-def enhance_client_data(client):
+def enhance_client_data(client, aggregates=None):
     """Add enhanced data to client record"""
     try:
         client_id = client.get('id')
         if not client_id:
             return client
         
-        # Get last booking date
-        try:
-            last_booking_response = supabase_admin.table('bookings').select(
-                'start_time'
-            ).eq('client_id', client_id).order('start_time', desc=True).limit(1).execute()
-            
-            if last_booking_response.data:
-                last_booking_date = datetime.fromisoformat(
-                    last_booking_response.data[0]['start_time'].replace('Z', '')
-                ).date()
-                client['last_booking_date'] = last_booking_date
-                
-                # Calculate days since last booking
-                days_since = (datetime.now(UTC).date() - last_booking_date).days
-                client['days_since_last_booking'] = days_since
-            else:
-                client['last_booking_date'] = None
-                client['days_since_last_booking'] = None
-        except Exception as e:
-            print(f"⚠️ WARNING: Failed to get last booking date for client {client_id}: {e}")
-            client['last_booking_date'] = None
-            client['days_since_last_booking'] = None
-        
-        # Calculate total revenue
-        try:
-            revenue_response = supabase_admin.table('bookings').select(
-                'total_price'
-            ).eq('client_id', client_id).eq('status', 'confirmed').execute()
-            
-            total_revenue = sum(
-                float(booking.get('total_price', 0)) 
-                for booking in revenue_response.data if revenue_response.data
-            )
-            client['total_revenue'] = round(total_revenue, 2)
-        except Exception as e:
-            print(f"⚠️ WARNING: Failed to get total revenue for client {client_id}: {e}")
-            client['total_revenue'] = 0
+        # Booking aggregates normally arrive precomputed from
+        # get_clients_with_booking_counts; only look them up for a lone client
+        if 'total_revenue' not in client or 'last_booking_date' not in client:
+            if aggregates is None:
+                aggregates = get_client_booking_aggregates([client_id])
+            client_aggregate = aggregates.get(client_id) or {}
+            client['booking_count'] = client_aggregate.get('booking_count', client.get('booking_count', 0))
+            client['last_booking_date'] = client_aggregate.get('last_booking_date')
+            client['days_since_last_booking'] = client_aggregate.get('days_since_last_booking')
+            client['total_revenue'] = client_aggregate.get('total_revenue', 0)
         
         # Add display helpers
         client['display_name'] = client.get('company_name') or client.get('contact_person', 'Unknown Client')
@@ -921,11 +894,12 @@ def get_status_badge_class(status):
 # ANALYTICS FUNCTIONS (IMPROVED)
 # ===============================
 
-def get_comprehensive_client_analytics(client_id):
-    """Get comprehensive analytics for a specific client"""
+def get_comprehensive_client_analytics(client_id, bookings=None):
+    """Get comprehensive analytics for a specific client; pass bookings already loaded to skip the query"""
     try:
         # Get client bookings for analysis
-        bookings = get_enhanced_client_bookings(client_id)
+        if bookings is None:
+            bookings = get_enhanced_client_bookings(client_id)
         
         if not bookings:
             return {
@@ -975,10 +949,11 @@ def get_comprehensive_client_analytics(client_id):
             'recommendations': []
         }
 
-def get_client_booking_trends(client_id):
-    """Get client booking trends over time"""
+def get_client_booking_trends(client_id, bookings=None):
+    """Get client booking trends over time; pass bookings already loaded to skip the query"""
     try:
-        bookings = get_enhanced_client_bookings(client_id)
+        if bookings is None:
+            bookings = get_enhanced_client_bookings(client_id)
         
         # Monthly trends
         monthly_trends = defaultdict(int)
@@ -998,10 +973,11 @@ def get_client_booking_trends(client_id):
         print(f"❌ ERROR: Failed to get booking trends: {e}")
         return {'monthly_trends': [], 'total_bookings': 0}
 
-def get_client_revenue_trends(client_id):
-    """Get client revenue trends over time"""
+def get_client_revenue_trends(client_id, bookings=None):
+    """Get client revenue trends over time; pass bookings already loaded to skip the query"""
     try:
-        bookings = get_enhanced_client_bookings(client_id)
+        if bookings is None:
+            bookings = get_enhanced_client_bookings(client_id)
         
         # Monthly revenue
         monthly_revenue = defaultdict(float)
@@ -1022,10 +998,11 @@ def get_client_revenue_trends(client_id):
         print(f"❌ ERROR: Failed to get revenue trends: {e}")
         return {'monthly_revenue': [], 'total_revenue': 0}
 
-def get_client_seasonal_patterns(client_id):
-    """Get client seasonal booking patterns"""
+def get_client_seasonal_patterns(client_id, bookings=None):
+    """Get client seasonal booking patterns; pass bookings already loaded to skip the query"""
     try:
-        bookings = get_enhanced_client_bookings(client_id)
+        if bookings is None:
+            bookings = get_enhanced_client_bookings(client_id)
         
         # Quarterly breakdown
         quarterly_breakdown = defaultdict(int)
@@ -1063,28 +1040,25 @@ def get_client_seasonal_patterns(client_id):
 # ===============================
 
 def export_clients_csv(clients_data, include_bookings=False):
-    """Export clients to CSV format"""
-    try:
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
+    """Export clients to CSV format, streamed row by row from any iterable of clients"""
+    def generate_rows():
         # Write header
         if include_bookings:
-            writer.writerow([
+            yield [
                 'Client ID', 'Company Name', 'Contact Person', 'Email', 'Phone', 
                 'Address', 'Total Bookings', 'Total Revenue', 'Last Booking Date',
                 'Created Date', 'Notes'
-            ])
+            ]
         else:
-            writer.writerow([
+            yield [
                 'Client ID', 'Company Name', 'Contact Person', 'Email', 'Phone', 
                 'Address', 'Booking Count', 'Created Date', 'Notes'
-            ])
+            ]
         
         # Write data
         for client in clients_data:
             if include_bookings:
-                writer.writerow([
+                yield [
                     client.get('id', ''),
                     client.get('company_name', ''),
                     client.get('contact_person', ''),
@@ -1096,9 +1070,9 @@ def export_clients_csv(clients_data, include_bookings=False):
                     client.get('last_booking_date', ''),
                     client.get('created_at', ''),
                     client.get('notes', '')
-                ])
+                ]
             else:
-                writer.writerow([
+                yield [
                     client.get('id', ''),
                     client.get('company_name', ''),
                     client.get('contact_person', ''),
@@ -1108,24 +1082,13 @@ def export_clients_csv(clients_data, include_bookings=False):
                     client.get('booking_count', 0),
                     client.get('created_at', ''),
                     client.get('notes', '')
-                ])
-        
-        output.seek(0)
-        
-        # Create filename
-        timestamp = datetime.now(UTC).strftime('%Y%m%d_%H%M%S')
-        filename = f'clients_export_{timestamp}.csv'
-        
-        return send_file(
-            io.BytesIO(output.getvalue().encode('utf-8')),
-            mimetype='text/csv',
-            as_attachment=True,
-            download_name=filename
-        )
-        
-    except Exception as e:
-        print(f"❌ ERROR: Failed to export clients CSV: {e}")
-        raise
+                ]
+    
+    # Create filename
+    timestamp = datetime.now(UTC).strftime('%Y%m%d_%H%M%S')
+    filename = f'clients_export_{timestamp}.csv'
+    
+    return csv_response(generate_rows(), filename)
 
 # ===============================
 # API ENDPOINTS
@@ -1134,28 +1097,37 @@ def export_clients_csv(clients_data, include_bookings=False):
 @clients_bp.route('/api/clients/search')
 @login_required
 def api_search_clients():
-    """API endpoint for client search"""
+    """API endpoint for client search (served from the in-process search index)"""
     try:
         query = request.args.get('q', '').strip()
-        limit = request.args.get('limit', 10, type=int)
+        limit = min(max(request.args.get('limit', 10, type=int), 1), 50)
         
         if not query:
             return jsonify([])
         
-        clients = get_enhanced_clients_list(search_query=query)
+        clients = search_clients_indexed(query, limit=limit)
+        if not clients:
+            return jsonify([])
+        
+        # Booking aggregates for the matches only
+        aggregates = get_client_booking_aggregates([client['id'] for client in clients])
         
         # Format for API response
         results = []
-        for client in clients[:limit]:
+        for client in clients:
+            aggregate = aggregates.get(client['id']) or {}
             results.append({
                 'id': client.get('id'),
                 'company_name': client.get('company_name'),
                 'contact_person': client.get('contact_person'),
                 'email': client.get('email'),
                 'phone': client.get('phone'),
-                'display_name': client.get('display_name'),
-                'booking_count': client.get('booking_count', 0),
-                'total_revenue': client.get('total_revenue', 0)
+                'name': client.get('contact_person') or '',
+                'company': client.get('company_name') or '',
+                'display_name': client.get('company_name') or client.get('contact_person', 'Unknown Client'),
+                'booking_count': aggregate.get('booking_count', 0),
+                'total_revenue': aggregate.get('total_revenue', 0),
+                'score': client.get('score')
             })
         
         return jsonify(results)
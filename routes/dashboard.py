@@ -1,7 +1,8 @@
 from flask import Blueprint, render_template, jsonify
 from flask_login import login_required
 from datetime import datetime, UTC
-from core import get_dashboard_stats, get_recent_bookings, get_upcoming_bookings, get_todays_bookings, get_revenue_trends
+from core import (get_dashboard_stats, get_recent_bookings, get_upcoming_bookings, get_todays_bookings,
+                  get_revenue_trends, fan_out, _empty_dashboard_stats)
 from utils.timezone_utils import get_cat_now
 
 dashboard_bp = Blueprint('dashboard', __name__)
@@ -12,11 +13,20 @@ def index():  # Changed from dashboard to index
     """Display dashboard"""
     try:
         print("🔍 DEBUG: Loading enhanced dashboard")
-        stats = get_dashboard_stats()
-        recent_bookings = get_recent_bookings(5)
-        upcoming_bookings = get_upcoming_bookings(5)
-        todays_bookings = get_todays_bookings()
-        revenue_trends = get_revenue_trends()
+        # The cards are independent, so load them side by side; a slow card falls back to empty
+        cards = fan_out({
+            'stats': get_dashboard_stats,
+            'recent_bookings': lambda: get_recent_bookings(5),
+            'upcoming_bookings': lambda: get_upcoming_bookings(5),
+            'todays_bookings': get_todays_bookings,
+            'revenue_trends': get_revenue_trends
+        }, fallbacks={'stats': _empty_dashboard_stats(), 'recent_bookings': [], 'upcoming_bookings': [],
+                      'todays_bookings': [], 'revenue_trends': []}, label='dashboard')
+        stats = cards['stats']
+        recent_bookings = cards['recent_bookings']
+        upcoming_bookings = cards['upcoming_bookings']
+        todays_bookings = cards['todays_bookings']
+        revenue_trends = cards['revenue_trends']
 
         print("✅ DEBUG: Enhanced dashboard loaded successfully")
         return render_template('dashboard.html',
@@ -32,7 +42,7 @@ def index():  # Changed from dashboard to index
         print(f"❌ ERROR: Failed to load enhanced dashboard: {e}")
         return render_template('dashboard.html',
                              title='Dashboard',
-                             stats={},
+                             stats=_empty_dashboard_stats(),
                              recent_bookings=[],
                              upcoming_bookings=[],
                              todays_bookings=[],
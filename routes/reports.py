@@ -2,14 +2,16 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash,
 from flask_login import login_required, current_user
 from utils.logging import log_user_activity
 from utils.decorators import activity_logged
-from core import supabase_admin, convert_datetime_strings, ActivityTypes
+from core import (supabase_admin, convert_datetime_strings, ActivityTypes, get_cached_rooms, iter_rows,
+                  get_daily_rollup, render_document_pdf)
+from utils.query_shapes import select_shape
+from utils.pdf_documents import daily_summary_payload, weekly_summary_payload, monthly_summary_payload
+from utils.streaming_export import csv_response, xlsx_response
 from datetime import datetime, UTC, timedelta, timezone
+import importlib.util
 import io
-import csv
 import traceback
 from collections import defaultdict
-from decimal import Decimal
-from decimal import Decimal
 
 # CAT (Central Africa Time) timezone - UTC+2
 CAT = timezone(timedelta(hours=2))
@@ -22,25 +24,10 @@ def get_utc_time():
     """Get current time in UTC for database operations"""
     return datetime.now(UTC)
 
-try:
-    from reportlab.lib.pagesizes import letter, A4
-    from reportlab.pdfgen import canvas
-    from reportlab.lib.units import inch
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-    from reportlab.lib.styles import getSampleStyleSheet
-    from reportlab.lib import colors
-    REPORTLAB_AVAILABLE = True
-except ImportError:
-    REPORTLAB_AVAILABLE = False
-
-try:
-    import openpyxl
-    from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-    from openpyxl.utils import get_column_letter
-    import xlsxwriter
-    EXCEL_AVAILABLE = True
-except ImportError:
-    EXCEL_AVAILABLE = False
+# PDF and Excel libraries are optional and only imported by the exports that use them
+# (utils/pdf_documents.py, utils/streaming_export.py), not when the app starts
+REPORTLAB_AVAILABLE = importlib.util.find_spec('reportlab') is not None
+EXCEL_AVAILABLE = importlib.util.find_spec('xlsxwriter') is not None
 
 reports_bp = Blueprint('reports', __name__)
 
@@ -394,15 +381,11 @@ def get_daily_summary_data(report_date):
         print(f"🔍 DEBUG: Fetching bookings for {report_date} ({start_dt} to {end_dt})")
         
         # Get bookings that START on the specified date
-        response = supabase_admin.table('bookings').select("""
-            *,
-            room:rooms(id, name, capacity),
-            client:clients(id, contact_person, company_name, email, phone)
-        """).gte('start_time', start_dt.isoformat()).lte(
-            'start_time', end_dt.isoformat()
-        ).order('start_time').execute()
-        
-        bookings = response.data if response.data else []
+        bookings = list(iter_rows(
+            lambda: select_shape(supabase_admin, 'booking_report_row').gte('start_time', start_dt.isoformat()).lte(
+                'start_time', end_dt.isoformat()),
+            key='start_time', unique=False
+        ))
         print(f"🔍 DEBUG: Found {len(bookings)} bookings for {report_date}")
         
         # Convert datetime strings
@@ -493,15 +476,11 @@ def get_weekly_summary_data(start_date, end_date):
         print(f"🔍 DEBUG: Fetching weekly bookings from {start_dt} to {end_dt}")
         
         # Get all bookings for the week
-        response = supabase_admin.table('bookings').select("""
-            *,
-            room:rooms(id, name, capacity),
-            client:clients(id, contact_person, company_name, email, phone)
-        """).gte('start_time', start_dt.isoformat()).lte(
-            'start_time', end_dt.isoformat()
-        ).neq('status', 'cancelled').order('start_time').execute()
-        
-        bookings = response.data if response.data else []
+        bookings = list(iter_rows(
+            lambda: select_shape(supabase_admin, 'booking_report_row').gte('start_time', start_dt.isoformat()).lte(
+                'start_time', end_dt.isoformat()).neq('status', 'cancelled'),
+            key='start_time', unique=False
+        ))
         print(f"🔍 DEBUG: Found {len(bookings)} bookings for the week")
         
         # Convert datetime strings
@@ -509,8 +488,7 @@ def get_weekly_summary_data(start_date, end_date):
             booking = convert_datetime_strings(booking)
         
         # Get all rooms for the table structure
-        rooms_response = supabase_admin.table('rooms').select('*').order('name').execute()
-        rooms = rooms_response.data if rooms_response.data else []
+        rooms = get_cached_rooms()
         
         # Create week structure
         week_days = []
@@ -606,36 +584,54 @@ def get_weekly_summary_data(start_date, end_date):
             'bookings': []
         }
 
+def get_monthly_client_activity(start_date, end_date, limit=10):
+    """Top clients by confirmed revenue for bookings starting in [start_date, end_date]"""
+    start_dt = datetime.combine(start_date, datetime.min.time()).replace(tzinfo=UTC)
+    end_dt = datetime.combine(end_date, datetime.max.time()).replace(tzinfo=UTC)
+    
+    # Narrow booking columns, no joins; names are looked up for the top clients only
+    client_activity = defaultdict(lambda: {
+        'events': 0,
+        'confirmed': 0,
+        'revenue': 0,
+        'attendees': 0
+    })
+    for booking in iter_rows(lambda: select_shape(supabase_admin, 'booking_client_activity').gte(
+            'start_time', start_dt.isoformat()).lte('start_time', end_dt.isoformat())):
+        activity = client_activity[booking.get('client_id')]
+        activity['events'] += 1
+        activity['attendees'] += int(booking.get('attendees') or 0)
+        if booking.get('status') == 'confirmed':
+            activity['confirmed'] += 1
+            activity['revenue'] += float(booking.get('total_price') or 0)
+    
+    top = sorted(client_activity.items(), key=lambda x: x[1]['revenue'], reverse=True)[:limit]
+    client_ids = [client_id for client_id, _ in top if client_id is not None]
+    names = {}
+    if client_ids:
+        response = supabase_admin.table('clients').select('id, company_name, contact_person').in_('id', client_ids).execute()
+        for client in response.data or []:
+            names[client['id']] = client.get('company_name') or client.get('contact_person') or 'Unknown Client'
+    
+    top_clients = defaultdict(lambda: {'events': 0, 'confirmed': 0, 'revenue': 0, 'attendees': 0})
+    for client_id, activity in top:
+        entry = top_clients[names.get(client_id, 'Unknown Client')]
+        for key, value in activity.items():
+            entry[key] += value
+    return sorted(top_clients.items(), key=lambda x: x[1]['revenue'], reverse=True)
+
 def get_monthly_summary_data(start_date, end_date):
     """Get monthly summary data with weekly breakdown"""
     try:
-        # Convert to datetime range for database query
-        start_dt = datetime.combine(start_date, datetime.min.time()).replace(tzinfo=UTC)
-        end_dt = datetime.combine(end_date, datetime.max.time()).replace(tzinfo=UTC)
-        
-        print(f"🔍 DEBUG: Fetching monthly bookings from {start_dt} to {end_dt}")
-        
-        # Get all bookings for the month
-        response = supabase_admin.table('bookings').select("""
-            *,
-            room:rooms(id, name, capacity),
-            client:clients(id, contact_person, company_name, email, phone)
-        """).gte('start_time', start_dt.isoformat()).lte(
-            'start_time', end_dt.isoformat()
-        ).order('start_time').execute()
-        
-        bookings = response.data if response.data else []
-        print(f"🔍 DEBUG: Found {len(bookings)} bookings for the month")
-        
-        # Convert datetime strings
-        for booking in bookings:
-            booking = convert_datetime_strings(booking)
+        print(f"🔍 DEBUG: Fetching monthly rollup from {start_date} to {end_date}")
         
-        # Group bookings by week
-        weekly_breakdown = defaultdict(list)
-        weekly_summaries = {}
+        # Pre-aggregated (day, room, status) rows rather than every booking in the month
+        rollup_rows = get_daily_rollup(start_date, end_date)
+        print(f"🔍 DEBUG: Found {len(rollup_rows)} rollup rows for the month")
         
         # Calculate weeks in the month
+        weekly_summaries = {}
+        week_of_day = {}
         current_date = start_date
         week_number = 1
         
@@ -654,11 +650,13 @@ def get_monthly_summary_data(start_date, end_date):
                 'revenue': 0,
                 'attendees': 0
             }
+            for offset in range((week_end - week_start).days + 1):
+                week_of_day[(week_start + timedelta(days=offset)).isoformat()] = week_key
             
             current_date = week_end + timedelta(days=1)
             week_number += 1
         
-        # Process bookings
+        # Process rollup rows
         total_events = 0
         total_confirmed = 0
         total_tentative = 0
@@ -667,6 +665,7 @@ def get_monthly_summary_data(start_date, end_date):
         total_attendees = 0
         
         # Group by room for room utilization
+        room_names = {room['id']: room.get('name', 'Unknown Room') for room in get_cached_rooms()}
         room_utilization = defaultdict(lambda: {
             'events': 0,
             'confirmed': 0,
@@ -674,71 +673,49 @@ def get_monthly_summary_data(start_date, end_date):
             'attendees': 0
         })
         
-        # Group by client for client analysis
-        client_analysis = defaultdict(lambda: {
-            'events': 0,
-            'confirmed': 0,
-            'revenue': 0,
-            'attendees': 0
-        })
-        
-        for booking in bookings:
-            start_time = booking.get('start_time')
-            if isinstance(start_time, str):
-                start_time = datetime.fromisoformat(start_time.replace('Z', '+00:00'))
-            
-            booking_date = start_time.date()
-            status = booking.get('status', 'tentative')
-            revenue = float(booking.get('total_price', 0))
-            attendees = int(booking.get('attendees', 0))
+        for row in rollup_rows:
+            status = row.get('status', 'tentative')
+            events = int(row.get('event_count') or 0)
+            revenue = float(row.get('revenue') or 0)
+            attendees = int(row.get('attendees') or 0)
             
             # Update totals
-            total_events += 1
+            total_events += events
             total_attendees += attendees
             
             if status == 'confirmed':
-                total_confirmed += 1
+                total_confirmed += events
                 total_revenue += revenue
             elif status == 'tentative':
-                total_tentative += 1
+                total_tentative += events
             elif status == 'cancelled':
-                total_cancelled += 1
+                total_cancelled += events
             
-            # Find which week this booking belongs to
-            for week_key, week_info in weekly_summaries.items():
-                if week_info['start_date'] <= booking_date <= week_info['end_date']:
-                    week_info['events'] += 1
-                    week_info['attendees'] += attendees
-                    
-                    if status == 'confirmed':
-                        week_info['confirmed'] += 1
-                        week_info['revenue'] += revenue
-                    elif status == 'tentative':
-                        week_info['tentative'] += 1
-                    elif status == 'cancelled':
-                        week_info['cancelled'] += 1
-                    break
+            # Week this day belongs to
+            week_info = weekly_summaries.get(week_of_day.get(str(row.get('day'))))
+            if week_info is not None:
+                week_info['events'] += events
+                week_info['attendees'] += attendees
+                
+                if status == 'confirmed':
+                    week_info['confirmed'] += events
+                    week_info['revenue'] += revenue
+                elif status == 'tentative':
+                    week_info['tentative'] += events
+                elif status == 'cancelled':
+                    week_info['cancelled'] += events
             
             # Room utilization
-            room_name = booking.get('room', {}).get('name', 'Unknown Room')
-            room_utilization[room_name]['events'] += 1
+            room_name = room_names.get(row.get('room_id'), 'Unknown Room')
+            room_utilization[room_name]['events'] += events
             room_utilization[room_name]['attendees'] += attendees
             if status == 'confirmed':
-                room_utilization[room_name]['confirmed'] += 1
+                room_utilization[room_name]['confirmed'] += events
                 room_utilization[room_name]['revenue'] += revenue
-            
-            # Client analysis
-            client = booking.get('client', {})
-            client_name = client.get('company_name') or client.get('contact_person', 'Unknown Client')
-            client_analysis[client_name]['events'] += 1
-            client_analysis[client_name]['attendees'] += attendees
-            if status == 'confirmed':
-                client_analysis[client_name]['confirmed'] += 1
-                client_analysis[client_name]['revenue'] += revenue
         
         # Convert to sorted lists for display
         top_rooms = sorted(room_utilization.items(), key=lambda x: x[1]['revenue'], reverse=True)[:10]
-        top_clients = sorted(client_analysis.items(), key=lambda x: x[1]['revenue'], reverse=True)[:10]
+        top_clients = get_monthly_client_activity(start_date, end_date)
         
         # Overall summary
         summary = {
@@ -760,8 +737,7 @@ def get_monthly_summary_data(start_date, end_date):
             'weekly_summaries': weekly_summaries,
             'summary': summary,
             'top_rooms': top_rooms,
-            'top_clients': top_clients,
-            'bookings': bookings  # Keep original bookings for export
+            'top_clients': top_clients
         }
         
     except Exception as e:
@@ -784,8 +760,7 @@ def get_monthly_summary_data(start_date, end_date):
                 'days_in_month': 0
             },
             'top_rooms': [],
-            'top_clients': [],
-            'bookings': []
+            'top_clients': []
         }
 
 # ===============================
@@ -926,114 +901,105 @@ def export_daily_summary_excel(daily_data, report_date):
         if not EXCEL_AVAILABLE:
             return export_daily_summary_csv(daily_data, report_date)
         
-        output = io.BytesIO()
-        workbook = xlsxwriter.Workbook(output, {'in_memory': True})
-        
-        # Create formats
-        title_format = workbook.add_format({
-            'bold': True,
-            'font_size': 16,
-            'align': 'center',
-            'bg_color': '#2E86AB',
-            'font_color': 'white',
-            'border': 1
-        })
+        # constant_memory workbook on a temp file, streamed back in chunks
+        def write_workbook(workbook):
+            # Create formats
+            title_format = workbook.add_format({
+                'bold': True,
+                'font_size': 16,
+                'align': 'center',
+                'bg_color': '#2E86AB',
+                'font_color': 'white',
+                'border': 1
+            })
         
-        header_format = workbook.add_format({
-            'bold': True,
-            'bg_color': '#A23B72',
-            'font_color': 'white',
-            'border': 1,
-            'align': 'center'
-        })
+            header_format = workbook.add_format({
+                'bold': True,
+                'bg_color': '#A23B72',
+                'font_color': 'white',
+                'border': 1,
+                'align': 'center'
+            })
         
-        cell_format = workbook.add_format({
-            'border': 1,
-            'align': 'left',
-            'valign': 'top',
-            'text_wrap': True
-        })
+            cell_format = workbook.add_format({
+                'border': 1,
+                'align': 'left',
+                'valign': 'top',
+                'text_wrap': True
+            })
         
-        # Create worksheet
-        worksheet = workbook.add_worksheet('Daily Summary')
-        
-        # Set column widths
-        worksheet.set_column('A:A', 20)  # Room
-        worksheet.set_column('B:B', 25)  # Event
-        worksheet.set_column('C:C', 20)  # Client
-        worksheet.set_column('D:D', 10)  # PAX
-        worksheet.set_column('E:E', 15)  # Time
-        worksheet.set_column('F:F', 10)  # Duration
-        worksheet.set_column('G:G', 12)  # Revenue
-        worksheet.set_column('H:H', 10)  # Status
-        
-        # Title
-        worksheet.merge_range('A1:H1', f'Daily Summary Report - {report_date.strftime("%A, %B %d, %Y")}', title_format)
-        
-        # Summary statistics
-        row = 3
-        summary = daily_data['summary']
-        worksheet.write(row, 0, 'SUMMARY STATISTICS', header_format)
-        worksheet.merge_range(row, 1, row, 7, '', header_format)
-        row += 1
-        
-        stats = [
-            ['Total Events', summary['total_events']],
-            ['Confirmed Events', summary['confirmed_events']],
-            ['Tentative Events', summary['tentative_events']],
-            ['Total Revenue', f"${summary['total_revenue']:,.2f}"],
-            ['Total Attendees', f"{summary['total_attendees']:,}"],
-            ['Rooms in Use', summary['rooms_in_use']]
-        ]
-        
-        for stat_name, stat_value in stats:
-            worksheet.write(row, 0, stat_name, cell_format)
-            worksheet.write(row, 1, stat_value, cell_format)
+            # Create worksheet
+            worksheet = workbook.add_worksheet('Daily Summary')
+        
+            # Set column widths
+            worksheet.set_column('A:A', 20)  # Room
+            worksheet.set_column('B:B', 25)  # Event
+            worksheet.set_column('C:C', 20)  # Client
+            worksheet.set_column('D:D', 10)  # PAX
+            worksheet.set_column('E:E', 15)  # Time
+            worksheet.set_column('F:F', 10)  # Duration
+            worksheet.set_column('G:G', 12)  # Revenue
+            worksheet.set_column('H:H', 10)  # Status
+        
+            # Title
+            worksheet.merge_range('A1:H1', f'Daily Summary Report - {report_date.strftime("%A, %B %d, %Y")}', title_format)
+        
+            # Summary statistics
+            row = 3
+            summary = daily_data['summary']
+            worksheet.write(row, 0, 'SUMMARY STATISTICS', header_format)
+            worksheet.merge_range(row, 1, row, 7, '', header_format)
             row += 1
         
-        # Events by room
-        row += 2
-        worksheet.write(row, 0, 'EVENTS BY ROOM', header_format)
-        worksheet.merge_range(row, 1, row, 7, '', header_format)
-        row += 1
-        
-        # Headers
-        headers = ['Room', 'Event', 'Client', 'PAX', 'Time', 'Duration (hrs)', 'Revenue', 'Status']
-        for col, header in enumerate(headers):
-            worksheet.write(row, col, header, header_format)
-        row += 1
-        
-        # Events data
-        for room_name, events in daily_data['events_by_room'].items():
-            for i, event in enumerate(events):
-                # Room name only on first event for this room
-                if i == 0:
-                    worksheet.write(row, 0, room_name, cell_format)
-                else:
-                    worksheet.write(row, 0, '', cell_format)
-                
-                worksheet.write(row, 1, event['title'], cell_format)
-                worksheet.write(row, 2, event['client_name'], cell_format)
-                worksheet.write(row, 3, event['attendees'], cell_format)
-                worksheet.write(row, 4, event['time_display'], cell_format)
-                worksheet.write(row, 5, event['duration_hours'], cell_format)
-                worksheet.write(row, 6, f"${event['total_price']:,.2f}", cell_format)
-                worksheet.write(row, 7, event['status_display'], cell_format)
-                row += 1
-            
-            # Add empty row between rooms
-            if events:
+            stats = [
+                ['Total Events', summary['total_events']],
+                ['Confirmed Events', summary['confirmed_events']],
+                ['Tentative Events', summary['tentative_events']],
+                ['Total Revenue', f"${summary['total_revenue']:,.2f}"],
+                ['Total Attendees', f"{summary['total_attendees']:,}"],
+                ['Rooms in Use', summary['rooms_in_use']]
+            ]
+        
+            for stat_name, stat_value in stats:
+                worksheet.write(row, 0, stat_name, cell_format)
+                worksheet.write(row, 1, stat_value, cell_format)
                 row += 1
         
-        workbook.close()
-        output.seek(0)
+            # Events by room
+            row += 2
+            worksheet.write(row, 0, 'EVENTS BY ROOM', header_format)
+            worksheet.merge_range(row, 1, row, 7, '', header_format)
+            row += 1
         
-        return send_file(
-            output,
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            as_attachment=True,
-            download_name=f'daily_summary_{report_date.strftime("%Y-%m-%d")}.xlsx'
-        )
+            # Headers
+            headers = ['Room', 'Event', 'Client', 'PAX', 'Time', 'Duration (hrs)', 'Revenue', 'Status']
+            for col, header in enumerate(headers):
+                worksheet.write(row, col, header, header_format)
+            row += 1
+        
+            # Events data
+            for room_name, events in daily_data['events_by_room'].items():
+                for i, event in enumerate(events):
+                    # Room name only on first event for this room
+                    if i == 0:
+                        worksheet.write(row, 0, room_name, cell_format)
+                    else:
+                        worksheet.write(row, 0, '', cell_format)
+                
+                    worksheet.write(row, 1, event['title'], cell_format)
+                    worksheet.write(row, 2, event['client_name'], cell_format)
+                    worksheet.write(row, 3, event['attendees'], cell_format)
+                    worksheet.write(row, 4, event['time_display'], cell_format)
+                    worksheet.write(row, 5, event['duration_hours'], cell_format)
+                    worksheet.write(row, 6, f"${event['total_price']:,.2f}", cell_format)
+                    worksheet.write(row, 7, event['status_display'], cell_format)
+                    row += 1
+            
+                # Add empty row between rooms
+                if events:
+                    row += 1
+        
+        return xlsx_response(write_workbook, f'daily_summary_{report_date.strftime("%Y-%m-%d")}.xlsx')
         
     except Exception as e:
         print(f"❌ ERROR: Failed to export daily summary Excel: {e}")
@@ -1045,109 +1011,100 @@ def export_weekly_summary_excel(weekly_data, start_date, end_date):
         if not EXCEL_AVAILABLE:
             return export_weekly_summary_csv(weekly_data, start_date, end_date)
         
-        output = io.BytesIO()
-        workbook = xlsxwriter.Workbook(output, {'in_memory': True})
-        
-        # Create formats
-        title_format = workbook.add_format({
-            'bold': True,
-            'font_size': 16,
-            'align': 'center',
-            'bg_color': '#2E86AB',
-            'font_color': 'white',
-            'border': 1
-        })
+        # constant_memory workbook on a temp file, streamed back in chunks
+        def write_workbook(workbook):
+            # Create formats
+            title_format = workbook.add_format({
+                'bold': True,
+                'font_size': 16,
+                'align': 'center',
+                'bg_color': '#2E86AB',
+                'font_color': 'white',
+                'border': 1
+            })
         
-        header_format = workbook.add_format({
-            'bold': True,
-            'bg_color': '#A23B72',
-            'font_color': 'white',
-            'border': 1,
-            'align': 'center',
-            'text_wrap': True
-        })
+            header_format = workbook.add_format({
+                'bold': True,
+                'bg_color': '#A23B72',
+                'font_color': 'white',
+                'border': 1,
+                'align': 'center',
+                'text_wrap': True
+            })
         
-        cell_format = workbook.add_format({
-            'border': 1,
-            'align': 'left',
-            'valign': 'top',
-            'text_wrap': True,
-            'font_size': 9
-        })
+            cell_format = workbook.add_format({
+                'border': 1,
+                'align': 'left',
+                'valign': 'top',
+                'text_wrap': True,
+                'font_size': 9
+            })
         
-        # Create worksheet
-        worksheet = workbook.add_worksheet('Weekly Summary')
+            # Create worksheet
+            worksheet = workbook.add_worksheet('Weekly Summary')
         
-        # Set column widths
-        worksheet.set_column('A:A', 15)  # Room column
-        for i in range(len(weekly_data['week_days'])):
-            worksheet.set_column(i + 1, i + 1, 18)  # Day columns
+            # Set column widths
+            worksheet.set_column('A:A', 15)  # Room column
+            for i in range(len(weekly_data['week_days'])):
+                worksheet.set_column(i + 1, i + 1, 18)  # Day columns
         
-        # Set row height for better text wrapping
-        worksheet.set_default_row(60)
+            # Set row height for better text wrapping
+            worksheet.set_default_row(60)
         
-        # Title
-        title_text = f'Weekly Summary Report - {start_date} to {end_date}'
-        worksheet.merge_range(0, 0, 0, len(weekly_data['week_days']), title_text, title_format)
+            # Title
+            title_text = f'Weekly Summary Report - {start_date} to {end_date}'
+            worksheet.merge_range(0, 0, 0, len(weekly_data['week_days']), title_text, title_format)
         
-        # Headers
-        row = 2
-        worksheet.write(row, 0, 'ROOM', header_format)
+            # Headers
+            row = 2
+            worksheet.write(row, 0, 'ROOM', header_format)
         
-        for col, day in enumerate(weekly_data['week_days']):
-            day_header = f"{day['day_name']}\n{day['date_display']}"
-            worksheet.write(row, col + 1, day_header, header_format)
+            for col, day in enumerate(weekly_data['week_days']):
+                day_header = f"{day['day_name']}\n{day['date_display']}"
+                worksheet.write(row, col + 1, day_header, header_format)
         
-        row += 1
+            row += 1
         
-        # Room schedule data
-        for room_name, room_data in weekly_data['room_schedule'].items():
-            worksheet.write(row, 0, room_name, cell_format)
+            # Room schedule data
+            for room_name, room_data in weekly_data['room_schedule'].items():
+                worksheet.write(row, 0, room_name, cell_format)
             
-            for col, day in enumerate(weekly_data['week_days']):
-                day_date = day['date']
-                events = room_data['days'].get(day_date, [])
+                for col, day in enumerate(weekly_data['week_days']):
+                    day_date = day['date']
+                    events = room_data['days'].get(day_date, [])
                 
-                if events:
-                    cell_content = '\n\n'.join([
-                        f"{event['client_name']}\n{event['attendees']}PAX {event['start_time']}\n${event['price_per_person']:.0f}PP"
-                        for event in events
-                    ])
-                else:
-                    cell_content = ''
+                    if events:
+                        cell_content = '\n\n'.join([
+                            f"{event['client_name']}\n{event['attendees']}PAX {event['start_time']}\n${event['price_per_person']:.0f}PP"
+                            for event in events
+                        ])
+                    else:
+                        cell_content = ''
                 
-                worksheet.write(row, col + 1, cell_content, cell_format)
+                    worksheet.write(row, col + 1, cell_content, cell_format)
             
-            row += 1
+                row += 1
         
-        # Summary section
-        row += 2
-        summary = weekly_data['summary']
-        worksheet.write(row, 0, 'WEEKLY SUMMARY', header_format)
-        row += 1
-        
-        summary_stats = [
-            ['Total Events', summary['total_events']],
-            ['Total Revenue', f"${summary['total_revenue']:,.2f}"],
-            ['Total Attendees', f"{summary['total_attendees']:,}"],
-            ['Rooms with Events', summary['rooms_with_events']],
-            ['Average Daily Events', summary['average_daily_events']]
-        ]
-        
-        for stat_name, stat_value in summary_stats:
-            worksheet.write(row, 0, stat_name, cell_format)
-            worksheet.write(row, 1, stat_value, cell_format)
+            # Summary section
+            row += 2
+            summary = weekly_data['summary']
+            worksheet.write(row, 0, 'WEEKLY SUMMARY', header_format)
             row += 1
         
-        workbook.close()
-        output.seek(0)
+            summary_stats = [
+                ['Total Events', summary['total_events']],
+                ['Total Revenue', f"${summary['total_revenue']:,.2f}"],
+                ['Total Attendees', f"{summary['total_attendees']:,}"],
+                ['Rooms with Events', summary['rooms_with_events']],
+                ['Average Daily Events', summary['average_daily_events']]
+            ]
+        
+            for stat_name, stat_value in summary_stats:
+                worksheet.write(row, 0, stat_name, cell_format)
+                worksheet.write(row, 1, stat_value, cell_format)
+                row += 1
         
-        return send_file(
-            output,
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            as_attachment=True,
-            download_name=f'weekly_summary_{start_date}_to_{end_date}.xlsx'
-        )
+        return xlsx_response(write_workbook, f'weekly_summary_{start_date}_to_{end_date}.xlsx')
         
     except Exception as e:
         print(f"❌ ERROR: Failed to export weekly summary Excel: {e}")
@@ -1159,132 +1116,123 @@ def export_monthly_summary_excel(monthly_data, start_date, end_date):
         if not EXCEL_AVAILABLE:
             return export_monthly_summary_csv(monthly_data, start_date, end_date)
         
-        output = io.BytesIO()
-        workbook = xlsxwriter.Workbook(output, {'in_memory': True})
-        
-        # Create formats
-        title_format = workbook.add_format({
-            'bold': True,
-            'font_size': 16,
-            'align': 'center',
-            'bg_color': '#2E86AB',
-            'font_color': 'white',
-            'border': 1
-        })
+        # constant_memory workbook on a temp file, streamed back in chunks
+        def write_workbook(workbook):
+            # Create formats
+            title_format = workbook.add_format({
+                'bold': True,
+                'font_size': 16,
+                'align': 'center',
+                'bg_color': '#2E86AB',
+                'font_color': 'white',
+                'border': 1
+            })
         
-        header_format = workbook.add_format({
-            'bold': True,
-            'bg_color': '#A23B72',
-            'font_color': 'white',
-            'border': 1,
-            'align': 'center'
-        })
+            header_format = workbook.add_format({
+                'bold': True,
+                'bg_color': '#A23B72',
+                'font_color': 'white',
+                'border': 1,
+                'align': 'center'
+            })
         
-        cell_format = workbook.add_format({
-            'border': 1,
-            'align': 'left'
-        })
+            cell_format = workbook.add_format({
+                'border': 1,
+                'align': 'left'
+            })
         
-        # Create worksheet
-        worksheet = workbook.add_worksheet('Monthly Summary')
+            # Create worksheet
+            worksheet = workbook.add_worksheet('Monthly Summary')
         
-        # Set column widths
-        worksheet.set_column('A:H', 15)
+            # Set column widths
+            worksheet.set_column('A:H', 15)
         
-        # Title
-        worksheet.merge_range('A1:H1', f'Monthly Summary Report - {monthly_data["month_name"]}', title_format)
+            # Title
+            worksheet.merge_range('A1:H1', f'Monthly Summary Report - {monthly_data["month_name"]}', title_format)
         
-        # Overall summary
-        row = 3
-        summary = monthly_data['summary']
-        worksheet.write(row, 0, 'OVERALL SUMMARY', header_format)
-        worksheet.merge_range(row, 1, row, 7, '', header_format)
-        row += 1
-        
-        overall_stats = [
-            ['Total Events', summary['total_events']],
-            ['Confirmed Events', summary['confirmed_events']],
-            ['Tentative Events', summary['tentative_events']],
-            ['Total Revenue', f"${summary['total_revenue']:,.2f}"],
-            ['Total Attendees', f"{summary['total_attendees']:,}"],
-            ['Conversion Rate', f"{summary['conversion_rate']}%"],
-            ['Average Event Value', f"${summary['average_event_value']:,.2f}"]
-        ]
-        
-        for stat_name, stat_value in overall_stats:
-            worksheet.write(row, 0, stat_name, cell_format)
-            worksheet.write(row, 1, stat_value, cell_format)
+            # Overall summary
+            row = 3
+            summary = monthly_data['summary']
+            worksheet.write(row, 0, 'OVERALL SUMMARY', header_format)
+            worksheet.merge_range(row, 1, row, 7, '', header_format)
             row += 1
         
-        # Weekly breakdown
-        row += 2
-        worksheet.write(row, 0, 'WEEKLY BREAKDOWN', header_format)
-        worksheet.merge_range(row, 1, row, 7, '', header_format)
-        row += 1
-        
-        # Weekly headers
-        weekly_headers = ['Week', 'Events', 'Confirmed', 'Tentative', 'Revenue', 'Attendees']
-        for col, header in enumerate(weekly_headers):
-            worksheet.write(row, col, header, header_format)
-        row += 1
-        
-        # Weekly data
-        for week_name, week_data in monthly_data['weekly_summaries'].items():
-            worksheet.write(row, 0, week_name, cell_format)
-            worksheet.write(row, 1, week_data['events'], cell_format)
-            worksheet.write(row, 2, week_data['confirmed'], cell_format)
-            worksheet.write(row, 3, week_data['tentative'], cell_format)
-            worksheet.write(row, 4, f"${week_data['revenue']:,.2f}", cell_format)
-            worksheet.write(row, 5, week_data['attendees'], cell_format)
+            overall_stats = [
+                ['Total Events', summary['total_events']],
+                ['Confirmed Events', summary['confirmed_events']],
+                ['Tentative Events', summary['tentative_events']],
+                ['Total Revenue', f"${summary['total_revenue']:,.2f}"],
+                ['Total Attendees', f"{summary['total_attendees']:,}"],
+                ['Conversion Rate', f"{summary['conversion_rate']}%"],
+                ['Average Event Value', f"${summary['average_event_value']:,.2f}"]
+            ]
+        
+            for stat_name, stat_value in overall_stats:
+                worksheet.write(row, 0, stat_name, cell_format)
+                worksheet.write(row, 1, stat_value, cell_format)
+                row += 1
+        
+            # Weekly breakdown
+            row += 2
+            worksheet.write(row, 0, 'WEEKLY BREAKDOWN', header_format)
+            worksheet.merge_range(row, 1, row, 7, '', header_format)
             row += 1
         
-        # Top rooms
-        row += 2
-        worksheet.write(row, 0, 'TOP PERFORMING ROOMS', header_format)
-        worksheet.merge_range(row, 1, row, 7, '', header_format)
-        row += 1
-        
-        room_headers = ['Room', 'Events', 'Confirmed', 'Revenue', 'Attendees']
-        for col, header in enumerate(room_headers):
-            worksheet.write(row, col, header, header_format)
-        row += 1
-        
-        for room_name, room_data in monthly_data['top_rooms'][:10]:
-            worksheet.write(row, 0, room_name, cell_format)
-            worksheet.write(row, 1, room_data['events'], cell_format)
-            worksheet.write(row, 2, room_data['confirmed'], cell_format)
-            worksheet.write(row, 3, f"${room_data['revenue']:,.2f}", cell_format)
-            worksheet.write(row, 4, room_data['attendees'], cell_format)
+            # Weekly headers
+            weekly_headers = ['Week', 'Events', 'Confirmed', 'Tentative', 'Revenue', 'Attendees']
+            for col, header in enumerate(weekly_headers):
+                worksheet.write(row, col, header, header_format)
             row += 1
         
-        # Top clients
-        row += 2
-        worksheet.write(row, 0, 'TOP CLIENTS', header_format)
-        worksheet.merge_range(row, 1, row, 7, '', header_format)
-        row += 1
-        
-        client_headers = ['Client', 'Events', 'Confirmed', 'Revenue', 'Attendees']
-        for col, header in enumerate(client_headers):
-            worksheet.write(row, col, header, header_format)
-        row += 1
-        
-        for client_name, client_data in monthly_data['top_clients'][:10]:
-            worksheet.write(row, 0, client_name, cell_format)
-            worksheet.write(row, 1, client_data['events'], cell_format)
-            worksheet.write(row, 2, client_data['confirmed'], cell_format)
-            worksheet.write(row, 3, f"${client_data['revenue']:,.2f}", cell_format)
-            worksheet.write(row, 4, client_data['attendees'], cell_format)
+            # Weekly data
+            for week_name, week_data in monthly_data['weekly_summaries'].items():
+                worksheet.write(row, 0, week_name, cell_format)
+                worksheet.write(row, 1, week_data['events'], cell_format)
+                worksheet.write(row, 2, week_data['confirmed'], cell_format)
+                worksheet.write(row, 3, week_data['tentative'], cell_format)
+                worksheet.write(row, 4, f"${week_data['revenue']:,.2f}", cell_format)
+                worksheet.write(row, 5, week_data['attendees'], cell_format)
+                row += 1
+        
+            # Top rooms
+            row += 2
+            worksheet.write(row, 0, 'TOP PERFORMING ROOMS', header_format)
+            worksheet.merge_range(row, 1, row, 7, '', header_format)
             row += 1
         
-        workbook.close()
-        output.seek(0)
+            room_headers = ['Room', 'Events', 'Confirmed', 'Revenue', 'Attendees']
+            for col, header in enumerate(room_headers):
+                worksheet.write(row, col, header, header_format)
+            row += 1
         
-        return send_file(
-            output,
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            as_attachment=True,
-            download_name=f'monthly_summary_{start_date.strftime("%Y-%m")}.xlsx'
-        )
+            for room_name, room_data in monthly_data['top_rooms'][:10]:
+                worksheet.write(row, 0, room_name, cell_format)
+                worksheet.write(row, 1, room_data['events'], cell_format)
+                worksheet.write(row, 2, room_data['confirmed'], cell_format)
+                worksheet.write(row, 3, f"${room_data['revenue']:,.2f}", cell_format)
+                worksheet.write(row, 4, room_data['attendees'], cell_format)
+                row += 1
+        
+            # Top clients
+            row += 2
+            worksheet.write(row, 0, 'TOP CLIENTS', header_format)
+            worksheet.merge_range(row, 1, row, 7, '', header_format)
+            row += 1
+        
+            client_headers = ['Client', 'Events', 'Confirmed', 'Revenue', 'Attendees']
+            for col, header in enumerate(client_headers):
+                worksheet.write(row, col, header, header_format)
+            row += 1
+        
+            for client_name, client_data in monthly_data['top_clients'][:10]:
+                worksheet.write(row, 0, client_name, cell_format)
+                worksheet.write(row, 1, client_data['events'], cell_format)
+                worksheet.write(row, 2, client_data['confirmed'], cell_format)
+                worksheet.write(row, 3, f"${client_data['revenue']:,.2f}", cell_format)
+                worksheet.write(row, 4, client_data['attendees'], cell_format)
+                row += 1
+        
+        return xlsx_response(write_workbook, f'monthly_summary_{start_date.strftime("%Y-%m")}.xlsx')
         
     except Exception as e:
         print(f"❌ ERROR: Failed to export monthly summary Excel: {e}")
@@ -1297,50 +1245,41 @@ def export_monthly_summary_excel(monthly_data, start_date, end_date):
 def export_daily_summary_csv(daily_data, report_date):
     """Export daily summary as CSV file (fallback)"""
     try:
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Header
-        writer.writerow([f'Daily Summary Report - {report_date.strftime("%A, %B %d, %Y")}'])
-        writer.writerow([f'Generated: {get_current_time().strftime("%Y-%m-%d %H:%M CAT")}'])
-        writer.writerow([])
-        
-        # Summary
-        summary = daily_data['summary']
-        writer.writerow(['SUMMARY STATISTICS'])
-        writer.writerow(['Total Events', summary['total_events']])
-        writer.writerow(['Confirmed Events', summary['confirmed_events']])
-        writer.writerow(['Tentative Events', summary['tentative_events']])
-        writer.writerow(['Total Revenue', f"${summary['total_revenue']:,.2f}"])
-        writer.writerow(['Total Attendees', f"{summary['total_attendees']:,}"])
-        writer.writerow(['Rooms in Use', summary['rooms_in_use']])
-        writer.writerow([])
-        
-        # Events
-        writer.writerow(['EVENTS BY ROOM'])
-        writer.writerow(['Room', 'Event', 'Client', 'PAX', 'Time', 'Duration (hrs)', 'Revenue', 'Status'])
-        
-        for room_name, events in daily_data['events_by_room'].items():
-            for event in events:
-                writer.writerow([
-                    room_name,
-                    event['title'],
-                    event['client_name'],
-                    event['attendees'],
-                    event['time_display'],
-                    event['duration_hours'],
-                    f"${event['total_price']:,.2f}",
-                    event['status_display']
-                ])
-        
-        output.seek(0)
+        def generate_rows():
+            # Header
+            yield [f'Daily Summary Report - {report_date.strftime("%A, %B %d, %Y")}']
+            yield [f'Generated: {get_current_time().strftime("%Y-%m-%d %H:%M CAT")}']
+            yield []
+        
+            # Summary
+            summary = daily_data['summary']
+            yield ['SUMMARY STATISTICS']
+            yield ['Total Events', summary['total_events']]
+            yield ['Confirmed Events', summary['confirmed_events']]
+            yield ['Tentative Events', summary['tentative_events']]
+            yield ['Total Revenue', f"${summary['total_revenue']:,.2f}"]
+            yield ['Total Attendees', f"{summary['total_attendees']:,}"]
+            yield ['Rooms in Use', summary['rooms_in_use']]
+            yield []
+        
+            # Events
+            yield ['EVENTS BY ROOM']
+            yield ['Room', 'Event', 'Client', 'PAX', 'Time', 'Duration (hrs)', 'Revenue', 'Status']
+        
+            for room_name, events in daily_data['events_by_room'].items():
+                for event in events:
+                    yield [
+                        room_name,
+                        event['title'],
+                        event['client_name'],
+                        event['attendees'],
+                        event['time_display'],
+                        event['duration_hours'],
+                        f"${event['total_price']:,.2f}",
+                        event['status_display']
+                    ]
         
-        return send_file(
-            io.BytesIO(output.getvalue().encode('utf-8')),
-            mimetype='text/csv',
-            as_attachment=True,
-            download_name=f'daily_summary_{report_date.strftime("%Y-%m-%d")}.csv'
-        )
+        return csv_response(generate_rows(), f'daily_summary_{report_date.strftime("%Y-%m-%d")}.csv')
         
     except Exception as e:
         print(f"❌ ERROR: Failed to export daily summary CSV: {e}")
@@ -1349,54 +1288,45 @@ def export_daily_summary_csv(daily_data, report_date):
 def export_weekly_summary_csv(weekly_data, start_date, end_date):
     """Export weekly summary as CSV file (fallback)"""
     try:
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Header
-        writer.writerow([f'Weekly Summary Report - {start_date} to {end_date}'])
-        writer.writerow([f'Generated: {get_current_time().strftime("%Y-%m-%d %H:%M CAT")}'])
-        writer.writerow([])
+        def generate_rows():
+            # Header
+            yield [f'Weekly Summary Report - {start_date} to {end_date}']
+            yield [f'Generated: {get_current_time().strftime("%Y-%m-%d %H:%M CAT")}']
+            yield []
         
-        # Create table structure
-        headers = ['Room'] + [f"{day['day_name']} {day['date_display']}" for day in weekly_data['week_days']]
-        writer.writerow(headers)
+            # Create table structure
+            headers = ['Room'] + [f"{day['day_name']} {day['date_display']}" for day in weekly_data['week_days']]
+            yield headers
         
-        for room_name, room_data in weekly_data['room_schedule'].items():
-            row = [room_name]
+            for room_name, room_data in weekly_data['room_schedule'].items():
+                row = [room_name]
             
-            for day in weekly_data['week_days']:
-                day_date = day['date']
-                events = room_data['days'].get(day_date, [])
+                for day in weekly_data['week_days']:
+                    day_date = day['date']
+                    events = room_data['days'].get(day_date, [])
                 
-                if events:
-                    cell_content = ' | '.join([
-                        f"{event['client_name']} {event['attendees']}PAX {event['start_time']} ${event['price_per_person']:.0f}PP"
-                        for event in events
-                    ])
-                else:
-                    cell_content = ''
+                    if events:
+                        cell_content = ' | '.join([
+                            f"{event['client_name']} {event['attendees']}PAX {event['start_time']} ${event['price_per_person']:.0f}PP"
+                            for event in events
+                        ])
+                    else:
+                        cell_content = ''
                 
-                row.append(cell_content)
+                    row.append(cell_content)
             
-            writer.writerow(row)
-        
-        # Summary
-        writer.writerow([])
-        writer.writerow(['WEEKLY SUMMARY'])
-        summary = weekly_data['summary']
-        writer.writerow(['Total Events', summary['total_events']])
-        writer.writerow(['Total Revenue', f"${summary['total_revenue']:,.2f}"])
-        writer.writerow(['Total Attendees', f"{summary['total_attendees']:,}"])
-        writer.writerow(['Rooms with Events', summary['rooms_with_events']])
+                yield row
         
-        output.seek(0)
+            # Summary
+            yield []
+            yield ['WEEKLY SUMMARY']
+            summary = weekly_data['summary']
+            yield ['Total Events', summary['total_events']]
+            yield ['Total Revenue', f"${summary['total_revenue']:,.2f}"]
+            yield ['Total Attendees', f"{summary['total_attendees']:,}"]
+            yield ['Rooms with Events', summary['rooms_with_events']]
         
-        return send_file(
-            io.BytesIO(output.getvalue().encode('utf-8')),
-            mimetype='text/csv',
-            as_attachment=True,
-            download_name=f'weekly_summary_{start_date}_to_{end_date}.csv'
-        )
+        return csv_response(generate_rows(), f'weekly_summary_{start_date}_to_{end_date}.csv')
         
     except Exception as e:
         print(f"❌ ERROR: Failed to export weekly summary CSV: {e}")
@@ -1405,77 +1335,68 @@ def export_weekly_summary_csv(weekly_data, start_date, end_date):
 def export_monthly_summary_csv(monthly_data, start_date, end_date):
     """Export monthly summary as CSV file (fallback)"""
     try:
-        output = io.StringIO()
-        writer = csv.writer(output)
+        def generate_rows():
+            # Header
+            yield [f'Monthly Summary Report - {monthly_data["month_name"]}']
+            yield [f'Generated: {get_current_time().strftime("%Y-%m-%d %H:%M CAT")}']
+            yield []
+        
+            # Overall summary
+            summary = monthly_data['summary']
+            yield ['OVERALL SUMMARY']
+            yield ['Total Events', summary['total_events']]
+            yield ['Confirmed Events', summary['confirmed_events']]
+            yield ['Tentative Events', summary['tentative_events']]
+            yield ['Total Revenue', f"${summary['total_revenue']:,.2f}"]
+            yield ['Total Attendees', f"{summary['total_attendees']:,}"]
+            yield ['Conversion Rate', f"{summary['conversion_rate']}%"]
+            yield []
+        
+            # Weekly breakdown
+            yield ['WEEKLY BREAKDOWN']
+            yield ['Week', 'Events', 'Confirmed', 'Tentative', 'Revenue', 'Attendees']
+        
+            for week_name, week_data in monthly_data['weekly_summaries'].items():
+                yield [
+                    week_name,
+                    week_data['events'],
+                    week_data['confirmed'],
+                    week_data['tentative'],
+                    f"${week_data['revenue']:,.2f}",
+                    week_data['attendees']
+                ]
+        
+            yield []
+        
+            # Top rooms
+            yield ['TOP PERFORMING ROOMS']
+            yield ['Room', 'Events', 'Confirmed', 'Revenue', 'Attendees']
         
-        # Header
-        writer.writerow([f'Monthly Summary Report - {monthly_data["month_name"]}'])
-        writer.writerow([f'Generated: {get_current_time().strftime("%Y-%m-%d %H:%M CAT")}'])
-        writer.writerow([])
+            for room_name, room_data in monthly_data['top_rooms'][:10]:
+                yield [
+                    room_name,
+                    room_data['events'],
+                    room_data['confirmed'],
+                    f"${room_data['revenue']:,.2f}",
+                    room_data['attendees']
+                ]
         
-        # Overall summary
-        summary = monthly_data['summary']
-        writer.writerow(['OVERALL SUMMARY'])
-        writer.writerow(['Total Events', summary['total_events']])
-        writer.writerow(['Confirmed Events', summary['confirmed_events']])
-        writer.writerow(['Tentative Events', summary['tentative_events']])
-        writer.writerow(['Total Revenue', f"${summary['total_revenue']:,.2f}"])
-        writer.writerow(['Total Attendees', f"{summary['total_attendees']:,}"])
-        writer.writerow(['Conversion Rate', f"{summary['conversion_rate']}%"])
-        writer.writerow([])
-        
-        # Weekly breakdown
-        writer.writerow(['WEEKLY BREAKDOWN'])
-        writer.writerow(['Week', 'Events', 'Confirmed', 'Tentative', 'Revenue', 'Attendees'])
-        
-        for week_name, week_data in monthly_data['weekly_summaries'].items():
-            writer.writerow([
-                week_name,
-                week_data['events'],
-                week_data['confirmed'],
-                week_data['tentative'],
-                f"${week_data['revenue']:,.2f}",
-                week_data['attendees']
-            ])
-        
-        writer.writerow([])
-        
-        # Top rooms
-        writer.writerow(['TOP PERFORMING ROOMS'])
-        writer.writerow(['Room', 'Events', 'Confirmed', 'Revenue', 'Attendees'])
-        
-        for room_name, room_data in monthly_data['top_rooms'][:10]:
-            writer.writerow([
-                room_name,
-                room_data['events'],
-                room_data['confirmed'],
-                f"${room_data['revenue']:,.2f}",
-                room_data['attendees']
-            ])
-        
-        writer.writerow([])
-        
-        # Top clients
-        writer.writerow(['TOP CLIENTS'])
-        writer.writerow(['Client', 'Events', 'Confirmed', 'Revenue', 'Attendees'])
-        
-        for client_name, client_data in monthly_data['top_clients'][:10]:
-            writer.writerow([
-                client_name,
-                client_data['events'],
-                client_data['confirmed'],
-                f"${client_data['revenue']:,.2f}",
-                client_data['attendees']
-            ])
-        
-        output.seek(0)
+            yield []
         
-        return send_file(
-            io.BytesIO(output.getvalue().encode('utf-8')),
-            mimetype='text/csv',
-            as_attachment=True,
-            download_name=f'monthly_summary_{start_date.strftime("%Y-%m")}.csv'
-        )
+            # Top clients
+            yield ['TOP CLIENTS']
+            yield ['Client', 'Events', 'Confirmed', 'Revenue', 'Attendees']
+        
+            for client_name, client_data in monthly_data['top_clients'][:10]:
+                yield [
+                    client_name,
+                    client_data['events'],
+                    client_data['confirmed'],
+                    f"${client_data['revenue']:,.2f}",
+                    client_data['attendees']
+                ]
+        
+        return csv_response(generate_rows(), f'monthly_summary_{start_date.strftime("%Y-%m")}.csv')
         
     except Exception as e:
         print(f"❌ ERROR: Failed to export monthly summary CSV: {e}")
@@ -1491,87 +1412,10 @@ def export_daily_summary_pdf(daily_data, report_date):
         if not REPORTLAB_AVAILABLE:
             return export_daily_summary_csv(daily_data, report_date)
         
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4)
-        
-        # Build content
-        story = []
-        styles = getSampleStyleSheet()
-        
-        # Title
-        story.append(Paragraph(f"<b>Daily Summary Report</b>", styles['Title']))
-        story.append(Paragraph(f"<b>{report_date.strftime('%A, %B %d, %Y')}</b>", styles['Heading2']))
-        story.append(Spacer(1, 12))
-        
-        # Summary statistics
-        summary = daily_data['summary']
-        story.append(Paragraph("<b>Summary Statistics</b>", styles['Heading2']))
-        
-        summary_data = [
-            ['Metric', 'Value'],
-            ['Total Events', str(summary['total_events'])],
-            ['Confirmed Events', str(summary['confirmed_events'])],
-            ['Tentative Events', str(summary['tentative_events'])],
-            ['Total Revenue', f"${summary['total_revenue']:,.2f}"],
-            ['Total Attendees', f"{summary['total_attendees']:,}"],
-            ['Rooms in Use', str(summary['rooms_in_use'])]
-        ]
-        
-        summary_table = Table(summary_data)
-        summary_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        
-        story.append(summary_table)
-        story.append(Spacer(1, 20))
-        
-        # Events by room
-        story.append(Paragraph("<b>Events by Room</b>", styles['Heading2']))
-        
-        for room_name, events in daily_data['events_by_room'].items():
-            if events:
-                story.append(Paragraph(f"<b>{room_name}</b>", styles['Heading3']))
-                
-                events_data = [['Event', 'Client', 'PAX', 'Time', 'Revenue', 'Status']]
-                
-                for event in events:
-                    events_data.append([
-                        event['title'],
-                        event['client_name'],
-                        str(event['attendees']),
-                        event['time_display'],
-                        f"${event['total_price']:,.2f}",
-                        event['status_display']
-                    ])
-                
-                events_table = Table(events_data)
-                events_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.lightblue),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-                    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, 0), 8),
-                    ('FONTSIZE', (0, 1), (-1, -1), 7),
-                    ('BOTTOMPADDING', (0, 0), (-1, 0), 6),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black)
-                ]))
-                
-                story.append(events_table)
-                story.append(Spacer(1, 12))
-        
-        # Build PDF
-        doc.build(story)
-        buffer.seek(0)
+        content = render_document_pdf('daily_summary', daily_summary_payload(daily_data, report_date))
         
         return send_file(
-            buffer,
+            io.BytesIO(content),
             mimetype='application/pdf',
             as_attachment=True,
             download_name=f'daily_summary_{report_date.strftime("%Y-%m-%d")}.pdf'
@@ -1587,92 +1431,10 @@ def export_weekly_summary_pdf(weekly_data, start_date, end_date):
         if not REPORTLAB_AVAILABLE:
             return export_weekly_summary_csv(weekly_data, start_date, end_date)
         
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4)
-        
-        # Build content
-        story = []
-        styles = getSampleStyleSheet()
-        
-        # Title
-        story.append(Paragraph(f"<b>Weekly Summary Report</b>", styles['Title']))
-        story.append(Paragraph(f"<b>{start_date} to {end_date}</b>", styles['Heading2']))
-        story.append(Spacer(1, 12))
-        
-        # Note about table format
-        story.append(Paragraph("<i>Note: This is a simplified view. For the full table format, please use Excel export.</i>", styles['Normal']))
-        story.append(Spacer(1, 12))
-        
-        # Summary
-        summary = weekly_data['summary']
-        story.append(Paragraph("<b>Weekly Summary</b>", styles['Heading2']))
-        
-        summary_data = [
-            ['Metric', 'Value'],
-            ['Total Events', str(summary['total_events'])],
-            ['Total Revenue', f"${summary['total_revenue']:,.2f}"],
-            ['Total Attendees', f"{summary['total_attendees']:,}"],
-            ['Rooms with Events', str(summary['rooms_with_events'])],
-            ['Average Daily Events', str(summary['average_daily_events'])]
-        ]
-        
-        summary_table = Table(summary_data)
-        summary_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        
-        story.append(summary_table)
-        story.append(Spacer(1, 20))
-        
-        # Events by day
-        for day in weekly_data['week_days']:
-            day_events = []
-            for room_name, room_data in weekly_data['room_schedule'].items():
-                events = room_data['days'].get(day['date'], [])
-                for event in events:
-                    day_events.append({
-                        'room': room_name,
-                        'event': event
-                    })
-            
-            if day_events:
-                story.append(Paragraph(f"<b>{day['day_name']} - {day['date_display']}</b>", styles['Heading3']))
-                
-                day_data = [['Room', 'Client', 'PAX', 'Time', 'Revenue']]
-                
-                for item in day_events:
-                    event = item['event']
-                    day_data.append([
-                        item['room'],
-                        event['client_name'],
-                        str(event['attendees']),
-                        event['start_time'],
-                        f"${event['total_price']:,.2f}"
-                    ])
-                
-                day_table = Table(day_data)
-                day_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.lightblue),
-                    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, 0), 8),
-                    ('FONTSIZE', (0, 1), (-1, -1), 7),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black)
-                ]))
-                
-                story.append(day_table)
-                story.append(Spacer(1, 12))
-        
-        # Build PDF
-        doc.build(story)
-        buffer.seek(0)
+        content = render_document_pdf('weekly_summary', weekly_summary_payload(weekly_data, start_date, end_date))
         
         return send_file(
-            buffer,
+            io.BytesIO(content),
             mimetype='application/pdf',
             as_attachment=True,
             download_name=f'weekly_summary_{start_date}_to_{end_date}.pdf'
@@ -1688,98 +1450,10 @@ def export_monthly_summary_pdf(monthly_data, start_date, end_date):
         if not REPORTLAB_AVAILABLE:
             return export_monthly_summary_csv(monthly_data, start_date, end_date)
         
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4)
-        
-        # Build content
-        story = []
-        styles = getSampleStyleSheet()
-        
-        # Title
-        story.append(Paragraph(f"<b>Monthly Summary Report</b>", styles['Title']))
-        story.append(Paragraph(f"<b>{monthly_data['month_name']}</b>", styles['Heading2']))
-        story.append(Spacer(1, 12))
-        
-        # Overall summary
-        summary = monthly_data['summary']
-        story.append(Paragraph("<b>Overall Summary</b>", styles['Heading2']))
-        
-        summary_data = [
-            ['Metric', 'Value'],
-            ['Total Events', str(summary['total_events'])],
-            ['Confirmed Events', str(summary['confirmed_events'])],
-            ['Tentative Events', str(summary['tentative_events'])],
-            ['Total Revenue', f"${summary['total_revenue']:,.2f}"],
-            ['Total Attendees', f"{summary['total_attendees']:,}"],
-            ['Conversion Rate', f"{summary['conversion_rate']}%"],
-            ['Average Event Value', f"${summary['average_event_value']:,.2f}"]
-        ]
-        
-        summary_table = Table(summary_data)
-        summary_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        
-        story.append(summary_table)
-        story.append(Spacer(1, 20))
-        
-        # Top rooms
-        if monthly_data['top_rooms']:
-            story.append(Paragraph("<b>Top Performing Rooms</b>", styles['Heading2']))
-            
-            rooms_data = [['Room', 'Events', 'Confirmed', 'Revenue']]
-            for room_name, room_data in monthly_data['top_rooms'][:10]:
-                rooms_data.append([
-                    room_name,
-                    str(room_data['events']),
-                    str(room_data['confirmed']),
-                    f"${room_data['revenue']:,.2f}"
-                ])
-            
-            rooms_table = Table(rooms_data)
-            rooms_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.lightblue),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            
-            story.append(rooms_table)
-            story.append(Spacer(1, 20))
-        
-        # Top clients
-        if monthly_data['top_clients']:
-            story.append(Paragraph("<b>Top Clients</b>", styles['Heading2']))
-            
-            clients_data = [['Client', 'Events', 'Confirmed', 'Revenue']]
-            for client_name, client_data in monthly_data['top_clients'][:10]:
-                clients_data.append([
-                    client_name,
-                    str(client_data['events']),
-                    str(client_data['confirmed']),
-                    f"${client_data['revenue']:,.2f}"
-                ])
-            
-            clients_table = Table(clients_data)
-            clients_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.lightgreen),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            
-            story.append(clients_table)
-        
-        # Build PDF
-        doc.build(story)
-        buffer.seek(0)
+        content = render_document_pdf('monthly_summary', monthly_summary_payload(monthly_data))
         
         return send_file(
-            buffer,
+            io.BytesIO(content),
             mimetype='application/pdf',
             as_attachment=True,
             download_name=f'monthly_summary_{start_date.strftime("%Y-%m")}.pdf'
@@ -1,14 +1,14 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, send_file
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
 from flask_login import login_required, current_user
 from utils.decorators import activity_logged
 from utils.logging import log_user_activity
-from core import (supabase_select, supabase_insert, supabase_update, supabase_delete, RoomForm, 
-                  supabase_admin, ActivityTypes, convert_datetime_strings)
+from core import (supabase_insert, supabase_update, supabase_delete, RoomForm, 
+                  supabase_admin, ActivityTypes, convert_datetime_strings, get_cached_rooms,
+                  get_cached_room, invalidate_reference_data, iter_rows)
 from datetime import datetime, UTC, timedelta
-import io
-import csv
 from collections import defaultdict
-from decimal import Decimal
+from utils.query_shapes import select_shape
+from utils.streaming_export import csv_response
 
 rooms_bp = Blueprint('rooms', __name__)
 
@@ -114,6 +114,8 @@ def new_room():
                 result = supabase_insert('rooms', room_data)
                 
                 if result:
+                    invalidate_reference_data('rooms')
+                    
                     # Log activity
                     log_user_activity(
                         ActivityTypes.CREATE_ROOM,
@@ -272,6 +274,8 @@ def edit_room(id):
                     result = supabase_update('rooms', room_data, [('id', 'eq', id)])
                     
                     if result:
+                        invalidate_reference_data('rooms')
+                        
                         # Track changes for logging
                         changes_made = track_room_changes(room, room_data)
                         
@@ -343,6 +347,8 @@ def delete_room(id):
         success = supabase_delete('rooms', [('id', 'eq', id)])
         
         if success:
+            invalidate_reference_data('rooms')
+            
             # Log successful deletion
             log_user_activity(
                 ActivityTypes.DELETE_ROOM,
@@ -477,11 +483,13 @@ def room_availability():
         end_time = request.args.get('end_time', '17:00')
         min_capacity = request.args.get('min_capacity', 0, type=int)
         
-        # Get room availability for the specified time
-        availability_data = get_room_availability_data(check_date, start_time, end_time, min_capacity)
+        duration_minutes = request.args.get('duration', MIN_BOOKING_MINUTES, type=int)
         
-        # Get room suggestions
-        room_suggestions = get_room_suggestions(check_date, start_time, end_time, min_capacity)
+        # Free slots and suggestions for every room from a single bookings fetch
+        availability = search_room_availability(check_date, check_date, duration_minutes, min_capacity,
+                                                day_start=start_time, day_end=end_time)
+        availability_data = availability['rooms']
+        room_suggestions = availability['suggestions']
         
         return render_template('rooms/availability.html',
                              title='Room Availability',
@@ -594,8 +602,7 @@ def get_enhanced_rooms_list(search_query='', status_filter='all', capacity_filte
     """Get enhanced room list with search, filtering, and analytics"""
     try:
         # Get base room data
-        response = supabase_admin.table('rooms').select('*').execute()
-        rooms_data = response.data if response.data else []
+        rooms_data = get_cached_rooms()
         
         # Apply search filter
         if search_query:
@@ -623,9 +630,10 @@ def get_enhanced_rooms_list(search_query='', status_filter='all', capacity_filte
         if capacity_filter != 'all':
             rooms_data = apply_capacity_filter(rooms_data, capacity_filter)
         
-        # Enhance with additional data
+        # Enhance with additional data (batched: two queries for all rooms)
+        aggregates = get_rooms_booking_aggregates([room.get('id') for room in rooms_data])
         for room in rooms_data:
-            enhance_room_data(room)
+            enhance_room_data(room, aggregates)
         
         # Apply sorting
         rooms_data = sort_rooms_data(rooms_data, sort_by, order)
@@ -647,81 +655,119 @@ def apply_capacity_filter(rooms_data, capacity_filter):
     else:
         return rooms_data
 
-def enhance_room_data(room):
+def get_rooms_booking_aggregates(room_ids):
+    """
+    Compute booking aggregates for many rooms at once.
+    
+    Issues two batched, keyset-paged reads regardless of how many rooms are
+    listed: one lightweight pass over (room_id, status, total_price) for counts
+    and confirmed revenue, and one range-limited pass over bookings starting
+    from the beginning of the current month for utilization and the next
+    booking. Paging keeps rows past PostgREST's row cap in the totals.
+    
+    Args:
+        room_ids (list): Room IDs to aggregate
+    
+    Returns:
+        dict: room_id -> {booking_count, total_revenue, month_hours, next_booking}
+    """
+    aggregates = {
+        room_id: {
+            'booking_count': 0,
+            'total_revenue': 0.0,
+            'month_hours': 0.0,
+            'next_booking': None
+        }
+        for room_id in room_ids
+    }
+    
+    if not aggregates:
+        return aggregates
+    
+    room_id_list = list(aggregates.keys())
+    now = datetime.now(UTC)
+    current_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    next_month = (current_month + timedelta(days=32)).replace(day=1)
+    
+    # Query 1: booking counts and confirmed revenue for every listed room
+    try:
+        totals = iter_rows(lambda: select_shape(supabase_admin, 'booking_room_totals').in_('room_id', room_id_list))
+        
+        for booking in totals:
+            room_stats = aggregates.get(booking.get('room_id'))
+            if room_stats is None:
+                continue
+            room_stats['booking_count'] += 1
+            if booking.get('status') == 'confirmed':
+                try:
+                    room_stats['total_revenue'] += float(booking.get('total_price') or 0)
+                except (TypeError, ValueError):
+                    pass
+    except Exception as e:
+        print(f"❌ ERROR: Failed to fetch room booking totals: {e}")
+    
+    # Query 2: this month's and future bookings, ordered so the first future
+    # booking seen for a room is its next booking
+    try:
+        schedule = iter_rows(
+            lambda: select_shape(supabase_admin, 'booking_room_schedule').in_('room_id', room_id_list).gte(
+                'start_time', current_month.isoformat()
+            ).neq('status', 'cancelled'),
+            key='start_time', unique=False
+        )
+        
+        for booking in schedule:
+            room_stats = aggregates.get(booking.get('room_id'))
+            if room_stats is None:
+                continue
+            try:
+                start_dt = _parse_booking_datetime(booking['start_time'])
+                end_dt = _parse_booking_datetime(booking['end_time'])
+            except (KeyError, TypeError, ValueError):
+                continue
+            
+            if start_dt < next_month:
+                room_stats['month_hours'] += (end_dt - start_dt).total_seconds() / 3600
+            
+            if room_stats['next_booking'] is None and start_dt >= now:
+                room_stats['next_booking'] = {
+                    'title': booking.get('title', 'Unknown Event'),
+                    'start_time': start_dt.replace(tzinfo=None),
+                    'days_until': (start_dt.date() - now.date()).days
+                }
+    except Exception as e:
+        print(f"❌ ERROR: Failed to fetch room schedules: {e}")
+    
+    return aggregates
+
+def _parse_booking_datetime(value):
+    """Parse a Supabase timestamp into an aware UTC datetime"""
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=UTC)
+    return parsed.astimezone(UTC)
+
+def enhance_room_data(room, aggregates=None):
     """Add enhanced data to room record"""
     try:
         room_id = room.get('id')
         
-        # Get booking count
-        try:
-            bookings_response = supabase_admin.table('bookings').select('id').eq('room_id', room_id).execute()
-            room['booking_count'] = len(bookings_response.data) if bookings_response.data else 0
-        except:
-            room['booking_count'] = 0
+        # Fall back to a single-room aggregation when called on its own
+        if aggregates is None:
+            aggregates = get_rooms_booking_aggregates([room_id])
         
-        # Get total revenue
-        try:
-            revenue_response = supabase_admin.table('bookings').select('total_price').eq(
-                'room_id', room_id
-            ).eq('status', 'confirmed').execute()
-            
-            total_revenue = sum(
-                float(booking.get('total_price', 0)) 
-                for booking in revenue_response.data if revenue_response.data
-            )
-            room['total_revenue'] = round(total_revenue, 2)
-        except:
-            room['total_revenue'] = 0
+        room_stats = aggregates.get(room_id) or {}
         
-        # Calculate utilization (simplified)
-        try:
-            # Get current month bookings
-            current_month = datetime.now(UTC).replace(day=1)
-            next_month = (current_month + timedelta(days=32)).replace(day=1)
-            
-            month_bookings = supabase_admin.table('bookings').select('start_time, end_time').eq(
-                'room_id', room_id
-            ).gte('start_time', current_month.isoformat()).lt(
-                'start_time', next_month.isoformat()
-            ).neq('status', 'cancelled').execute()
-            
-            # Calculate total booking hours
-            total_hours = 0
-            for booking in month_bookings.data if month_bookings.data else []:
-                try:
-                    start_dt = datetime.fromisoformat(booking['start_time'].replace('Z', ''))
-                    end_dt = datetime.fromisoformat(booking['end_time'].replace('Z', ''))
-                    booking_hours = (end_dt - start_dt).total_seconds() / 3600
-                    total_hours += booking_hours
-                except:
-                    continue
-            
-            # Assume 8 hours/day, 22 working days/month = 176 available hours
-            available_hours = 176
-            utilization_percentage = (total_hours / available_hours) * 100 if available_hours > 0 else 0
-            room['utilization_percentage'] = round(min(utilization_percentage, 100), 1)
-        except:
-            room['utilization_percentage'] = 0
-        
-        # Get next booking
-        try:
-            next_booking = supabase_admin.table('bookings').select(
-                'start_time, title'
-            ).eq('room_id', room_id).gte(
-                'start_time', datetime.now(UTC).isoformat()
-            ).neq('status', 'cancelled').order('start_time').limit(1).execute()
-            
-            if next_booking.data:
-                next_start = datetime.fromisoformat(next_booking.data[0]['start_time'].replace('Z', ''))
-                room['next_booking'] = {
-                    'title': next_booking.data[0].get('title', 'Unknown Event'),
-                    'start_time': next_start,
-                    'days_until': (next_start.date() - datetime.now(UTC).date()).days
-                }
-            else:
-                room['next_booking'] = None
-        except:
-            room['next_booking'] = None
+        room['booking_count'] = room_stats.get('booking_count', 0)
+        room['total_revenue'] = round(room_stats.get('total_revenue', 0), 2)
+        
+        # Assume 8 hours/day, 22 working days/month = 176 available hours
+        available_hours = 176
+        total_hours = room_stats.get('month_hours', 0)
+        utilization_percentage = (total_hours / available_hours) * 100 if available_hours > 0 else 0
+        room['utilization_percentage'] = round(min(utilization_percentage, 100), 1)
+        
+        room['next_booking'] = room_stats.get('next_booking')
         
         # Add display helpers
         room['capacity_category'] = get_capacity_category(room.get('capacity', 0))
@@ -836,8 +882,7 @@ def get_rooms_utilization_summary():
 def get_room_by_id(room_id):
     """Get room by ID with error handling"""
     try:
-        response = supabase_admin.table('rooms').select('*').eq('id', room_id).execute()
-        return response.data[0] if response.data else None
+        return get_cached_room(room_id)
     except Exception as e:
         print(f"❌ ERROR: Failed to get room by ID: {e}")
         return None
@@ -1062,15 +1107,153 @@ def create_maintenance_record(maintenance_data):
     # Placeholder - would create maintenance record
     return True
 
+MAX_AVAILABILITY_SEARCH_DAYS = 31
+MIN_BOOKING_MINUTES = 30
+
+def _merge_busy_intervals(intervals):
+    """Merge start-sorted (start, end) pairs into disjoint busy blocks"""
+    merged = []
+    for start, end in intervals:
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return merged
+
+def search_room_availability(start_date, end_date, duration_minutes, min_capacity=0,
+                             day_start='09:00', day_end='17:00', ignore_tentative=False, limit=5):
+    """Free gaps and ranked suggestions for every suitable room over a date range.
+
+    Uses the cached room list and a single (paged) bookings read; each room's merged busy
+    blocks are swept once across all daily windows. Times are wall-clock times in
+    the same form the booking form submits them.
+    """
+    if isinstance(start_date, str):
+        start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
+    if isinstance(end_date, str):
+        end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
+    window_start = datetime.strptime(day_start, '%H:%M').time()
+    window_end = datetime.strptime(day_end, '%H:%M').time()
+    duration = timedelta(minutes=duration_minutes)
+    
+    if end_date < start_date:
+        raise ValueError('end_date must not be before start_date')
+    if (end_date - start_date).days >= MAX_AVAILABILITY_SEARCH_DAYS:
+        raise ValueError(f'Date range cannot exceed {MAX_AVAILABILITY_SEARCH_DAYS} days')
+    if window_end <= window_start:
+        raise ValueError('end_time must be after start_time')
+    if duration_minutes < MIN_BOOKING_MINUTES:
+        raise ValueError(f'Duration must be at least {MIN_BOOKING_MINUTES} minutes')
+    
+    day_count = (end_date - start_date).days + 1
+    windows = []
+    for offset in range(day_count):
+        day = start_date + timedelta(days=offset)
+        windows.append((datetime.combine(day, window_start, tzinfo=UTC), datetime.combine(day, window_end, tzinfo=UTC)))
+    
+    rooms = [room for room in get_cached_rooms(status='available') if (room.get('capacity') or 0) >= min_capacity]
+    result = {
+        'start_date': start_date.isoformat(),
+        'end_date': end_date.isoformat(),
+        'day_start': day_start,
+        'day_end': day_end,
+        'duration_minutes': duration_minutes,
+        'min_capacity': min_capacity,
+        'rooms': [],
+        'suggestions': [],
+        'bookings_considered': 0
+    }
+    if not rooms:
+        return result
+    
+    # One keyset-paged read of every booking touching the range for all candidate rooms;
+    # a truncated read would leave booked time looking free
+    blocking_statuses = ['confirmed'] if ignore_tentative else None
+    room_ids = [room['id'] for room in rooms]
+    bookings = list(iter_rows(
+        lambda: select_shape(supabase_admin, 'booking_room_busy')
+            .in_('room_id', room_ids)
+            .neq('status', 'cancelled')
+            .lt('start_time', windows[-1][1].replace(tzinfo=None).isoformat())
+            .gt('end_time', windows[0][0].replace(tzinfo=None).isoformat()),
+        key='start_time', unique=False
+    ))
+    result['bookings_considered'] = len(bookings)
+    
+    busy_by_room = defaultdict(list)
+    for booking in bookings:
+        if blocking_statuses and booking.get('status') not in blocking_statuses:
+            continue
+        busy_by_room[booking['room_id']].append(
+            (_parse_booking_datetime(booking['start_time']), _parse_booking_datetime(booking['end_time']))
+        )
+    
+    for room in rooms:
+        busy = _merge_busy_intervals(busy_by_room.get(room['id'], []))
+        free_slots = []
+        pointer = 0
+        for day_open, day_close in windows:
+            # Busy blocks are disjoint and sorted, so the pointer only moves forward
+            while pointer < len(busy) and busy[pointer][1] <= day_open:
+                pointer += 1
+            cursor = day_open
+            index = pointer
+            while index < len(busy) and busy[index][0] < day_close:
+                if busy[index][0] - cursor >= duration:
+                    free_slots.append((cursor, busy[index][0]))
+                cursor = max(cursor, busy[index][1])
+                index += 1
+            if day_close - cursor >= duration:
+                free_slots.append((cursor, day_close))
+        
+        total_free_minutes = int(sum((end - start).total_seconds() for start, end in free_slots) // 60)
+        result['rooms'].append({
+            'room_id': room['id'],
+            'room_name': room.get('name'),
+            'capacity': room.get('capacity'),
+            'hourly_rate': float(room.get('hourly_rate') or 0),
+            'fits': bool(free_slots),
+            'total_free_minutes': total_free_minutes,
+            'free_slots': [{
+                'date': start.date().isoformat(),
+                'start_time': start.replace(tzinfo=None).isoformat(),
+                'end_time': end.replace(tzinfo=None).isoformat(),
+                'duration_minutes': int((end - start).total_seconds() // 60)
+            } for start, end in free_slots]
+        })
+        
+        if free_slots:
+            first_start = free_slots[0][0]
+            result['suggestions'].append({
+                'room_id': room['id'],
+                'room_name': room.get('name'),
+                'capacity': room.get('capacity'),
+                'slot_start': first_start.replace(tzinfo=None).isoformat(),
+                'slot_end': (first_start + duration).replace(tzinfo=None).isoformat(),
+                'total_free_minutes': total_free_minutes,
+                '_rank_key': (first_start, (room.get('capacity') or 0) - min_capacity, -total_free_minutes)
+            })
+    
+    # Earliest slot first, then the tightest capacity fit, then the most open room
+    result['suggestions'].sort(key=lambda suggestion: suggestion['_rank_key'])
+    result['suggestions'] = result['suggestions'][:limit]
+    for rank, suggestion in enumerate(result['suggestions'], start=1):
+        suggestion.pop('_rank_key')
+        suggestion['rank'] = rank
+    
+    return result
+
 def get_room_availability_data(check_date, start_time, end_time, min_capacity):
-    """Get room availability data"""
-    # Placeholder - would check real availability
-    return {}
+    """Get per-room free slots for a single day window"""
+    return search_room_availability(check_date, check_date, MIN_BOOKING_MINUTES, min_capacity,
+                                    day_start=start_time, day_end=end_time)['rooms']
 
 def get_room_suggestions(check_date, start_time, end_time, min_capacity):
-    """Get room suggestions based on criteria"""
-    # Placeholder - would suggest alternative rooms
-    return []
+    """Get ranked rooms that are free for the whole window"""
+    window = datetime.strptime(end_time, '%H:%M') - datetime.strptime(start_time, '%H:%M')
+    return search_room_availability(check_date, check_date, int(window.total_seconds() // 60), min_capacity,
+                                    day_start=start_time, day_end=end_time)['suggestions']
 
 # ===============================
 # ANALYTICS HELPER FUNCTIONS (PLACEHOLDER)
@@ -1097,28 +1280,25 @@ def get_room_utilization_analysis(room_id):
 # ===============================
 
 def export_rooms_csv(rooms_data, include_analytics=False):
-    """Export rooms to CSV format"""
-    try:
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
+    """Export rooms to CSV format, streamed row by row"""
+    def generate_rows():
         # Write header
         if include_analytics:
-            writer.writerow([
+            yield [
                 'Room ID', 'Name', 'Capacity', 'Status', 'Hourly Rate', 'Half Day Rate', 
                 'Full Day Rate', 'Total Bookings', 'Total Revenue', 'Utilization %', 
                 'Description', 'Amenities'
-            ])
+            ]
         else:
-            writer.writerow([
+            yield [
                 'Room ID', 'Name', 'Capacity', 'Status', 'Hourly Rate', 'Half Day Rate', 
                 'Full Day Rate', 'Description', 'Amenities'
-            ])
+            ]
         
         # Write data
         for room in rooms_data:
             if include_analytics:
-                writer.writerow([
+                yield [
                     room.get('id', ''),
                     room.get('name', ''),
                     room.get('capacity', 0),
@@ -1131,9 +1311,9 @@ def export_rooms_csv(rooms_data, include_analytics=False):
                     room.get('utilization_percentage', 0),
                     room.get('description', ''),
                     room.get('amenities', '')
-                ])
+                ]
             else:
-                writer.writerow([
+                yield [
                     room.get('id', ''),
                     room.get('name', ''),
                     room.get('capacity', 0),
@@ -1143,24 +1323,13 @@ def export_rooms_csv(rooms_data, include_analytics=False):
                     room.get('full_day_rate', 0),
                     room.get('description', ''),
                     room.get('amenities', '')
-                ])
-        
-        output.seek(0)
-        
-        # Create filename
-        timestamp = datetime.now(UTC).strftime('%Y%m%d_%H%M%S')
-        filename = f'rooms_export_{timestamp}.csv'
-        
-        return send_file(
-            io.BytesIO(output.getvalue().encode('utf-8')),
-            mimetype='text/csv',
-            as_attachment=True,
-            download_name=filename
-        )
-        
-    except Exception as e:
-        print(f"❌ ERROR: Failed to export rooms CSV: {e}")
-        raise
+                ]
+    
+    # Create filename
+    timestamp = datetime.now(UTC).strftime('%Y%m%d_%H%M%S')
+    filename = f'rooms_export_{timestamp}.csv'
+    
+    return csv_response(generate_rows(), filename)
 
 # ===============================
 # API ENDPOINTS
@@ -1245,6 +1414,34 @@ def api_check_availability():
         print(f"❌ ERROR: Failed to check availability via API: {e}")
         return jsonify({'error': 'Failed to check availability'}), 500
 
+@rooms_bp.route('/api/rooms/availability/search')
+@login_required
+def api_search_availability():
+    """Bulk availability search across all rooms for a date range, duration and capacity"""
+    try:
+        today = datetime.now(UTC).date().isoformat()
+        start_date = request.args.get('start_date', today)
+        end_date = request.args.get('end_date', start_date)
+        duration_minutes = request.args.get('duration', 60, type=int)
+        min_capacity = request.args.get('min_capacity', 0, type=int)
+        start_time = request.args.get('start_time', '09:00')
+        end_time = request.args.get('end_time', '17:00')
+        ignore_tentative = request.args.get('ignore_tentative', 'false').lower() == 'true'
+        limit = request.args.get('limit', 5, type=int)
+        
+        try:
+            availability = search_room_availability(start_date, end_date, duration_minutes, min_capacity,
+                                                    day_start=start_time, day_end=end_time,
+                                                    ignore_tentative=ignore_tentative, limit=limit)
+        except ValueError as ve:
+            return jsonify({'error': str(ve)}), 400
+        
+        return jsonify(availability)
+        
+    except Exception as e:
+        print(f"❌ ERROR: Failed to search room availability: {e}")
+        return jsonify({'error': 'Failed to search availability'}), 500
+
 # ===============================
 # ERROR HANDLERS
 # ===============================
@@ -16,12 +16,14 @@ os.chdir(current_dir)
 
 try:
     # Try to import and run daily report from core
-    from core import send_daily_report
+    from core import send_daily_report, flush_email_outbox
     
     print(f"🕐 Daily Report Runner - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print("=" * 50)
     
     success = send_daily_report()
+    # The report is queued in the outbox; send it before this process exits
+    flush_email_outbox()
     
     if success:
         print("✅ Daily report sent successfully!")
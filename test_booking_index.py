@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Test booking interval index - verifies indexed conflict checks match a brute
+force overlap scan, follow incremental updates and fall back to the database
+outside the indexed horizon
+"""
+
+import os
+import sys
+import random
+from datetime import datetime, timedelta, UTC
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import core
+from utils.booking_index import BookingIntervalIndex
+from fake_supabase import FakeSupabase
+
+
+def build_booking(booking_id, room_id, start, hours, status='confirmed'):
+    return {'id': booking_id, 'room_id': room_id, 'title': f'Booking {booking_id}', 'status': status,
+            'start_time': start.isoformat(), 'end_time': (start + timedelta(hours=hours)).isoformat()}
+
+
+def brute_force_conflicts(bookings, room_id, start, end, exclude_booking_id=None):
+    return sorted(
+        b['id'] for b in bookings
+        if b['room_id'] == room_id and b['status'] != 'cancelled' and b['id'] != exclude_booking_id
+        and datetime.fromisoformat(b['start_time']) < end and datetime.fromisoformat(b['end_time']) > start
+    )
+
+
+def test_index_matches_brute_force():
+    """Random overlapping bookings (including multi-day ones) give the same answers as a scan"""
+    print("🧪 Testing interval index against brute force...")
+
+    rng = random.Random(42)
+    base = datetime.now(UTC).replace(minute=0, second=0, microsecond=0)
+    bookings = [
+        build_booking(i, rng.randint(1, 3), base + timedelta(hours=rng.randint(0, 500)),
+                      rng.choice([1, 2, 4, 8, 72]), rng.choice(['confirmed', 'tentative', 'cancelled']))
+        for i in range(1, 400)
+    ]
+    index = BookingIntervalIndex(lambda since: [b for b in bookings if b['status'] != 'cancelled'])
+
+    for _ in range(300):
+        room_id = rng.randint(1, 3)
+        start = base + timedelta(hours=rng.randint(0, 520))
+        end = start + timedelta(hours=rng.randint(1, 30))
+        exclude = rng.choice([None, rng.randint(1, 400)])
+        indexed = sorted(b['id'] for b in index.conflicts(room_id, start, end, exclude))
+        assert indexed == brute_force_conflicts(bookings, room_id, start, end, exclude)
+
+    print("✅ Indexed answers match brute force")
+
+
+def test_incremental_updates():
+    """Create, move, cancel and delete are reflected without reloading"""
+    print("🧪 Testing incremental index updates...")
+
+    start = datetime.now(UTC) + timedelta(days=1)
+    loads = []
+    index = BookingIntervalIndex(lambda since: loads.append(since) or [build_booking(1, 1, start, 2)])
+    window = (start, start + timedelta(hours=1))
+
+    assert [b['id'] for b in index.conflicts(1, *window)] == [1]
+
+    index.upsert(build_booking(2, 1, start, 1, status='tentative'))
+    assert sorted(b['status'] for b in index.conflicts(1, *window)) == ['confirmed', 'tentative']
+
+    # Moving booking 1 to another room and cancelling booking 2 via a partial status update
+    index.upsert({'id': 1, 'room_id': 2})
+    index.upsert({'id': 2, 'status': 'cancelled'})
+    assert index.conflicts(1, *window) == []
+    assert [b['id'] for b in index.conflicts(2, *window)] == [1]
+
+    index.remove(1)
+    assert index.conflicts(2, *window) == []
+
+    # Windows reaching before the indexed horizon are left to the database
+    assert index.conflicts(2, start - timedelta(days=60), start) is None
+    assert len(loads) == 1
+
+    print("✅ Incremental updates are applied in place")
+
+
+def test_core_conflict_checks_use_index():
+    """Repeated availability checks cost one load, and verify mode catches a stale index"""
+    print("🧪 Testing core conflict checks through the index...")
+
+    start = datetime.now(UTC).replace(tzinfo=None, microsecond=0) + timedelta(days=1)
+    fake = FakeSupabase({'bookings': [build_booking(1, 1, start, 2), build_booking(2, 1, start, 2, 'tentative')]})
+    original_client = core.supabase_admin
+    try:
+        core.supabase_admin = fake
+        core.booking_index.invalidate()
+
+        for _ in range(12):
+            assert not core.is_room_available_supabase(1, start, start + timedelta(hours=1))
+        assert core.is_room_available_supabase(1, start, start + timedelta(hours=1), exclude_booking_id=1) is False
+        assert core.is_room_available_supabase(2, start, start + timedelta(hours=1))
+        print(f"   - 14 checks -> {fake.round_trips} round-trip(s)")
+        assert fake.round_trips == 1
+
+        conflicts = core.classify_room_conflicts(core.check_room_conflicts(1, start, start + timedelta(hours=1)))
+        assert [b['id'] for b in conflicts['confirmed']] == [1]
+        assert [b['id'] for b in conflicts['tentative']] == [2]
+
+        # A write made behind the index's back is detected by the cross-check
+        fake.tables['bookings'].append(build_booking(3, 2, start, 1))
+        report = core.verify_booking_index()
+        assert not report['verified'] and report['missing'] == [3]
+        assert not core.is_room_available_supabase(2, start, start + timedelta(hours=1))
+    finally:
+        core.supabase_admin = original_client
+        core.booking_index.invalidate()
+
+    print("✅ Conflict checks are served from the index")
+
+
+def test_index_load_is_not_truncated_by_row_cap():
+    """A horizon holding more bookings than one response can carry is loaded in full"""
+    start = datetime.now(UTC).replace(tzinfo=None, microsecond=0) + timedelta(days=1)
+    bookings = [build_booking(i, 1 + i % 3, start + timedelta(hours=2 * i), 1) for i in range(1, 26)]
+    fake = FakeSupabase({'bookings': bookings}, max_rows=10)
+    original_client, original_page_size = core.supabase_admin, core.SUPABASE_PAGE_SIZE
+    try:
+        core.supabase_admin = fake
+        core.SUPABASE_PAGE_SIZE = 10
+        core.booking_index.invalidate()
+
+        last = bookings[-1]
+        last_start = datetime.fromisoformat(last['start_time'])
+        assert not core.is_room_available_supabase(last['room_id'], last_start, last_start + timedelta(minutes=30))
+        assert fake.round_trips == 3
+    finally:
+        core.supabase_admin = original_client
+        core.SUPABASE_PAGE_SIZE = original_page_size
+        core.booking_index.invalidate()
+
+
+if __name__ == "__main__":
+    test_index_matches_brute_force()
+    test_incremental_updates()
+    test_core_conflict_checks_use_index()
+    test_index_load_is_not_truncated_by_row_cap()
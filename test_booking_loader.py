@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Test the canonical booking loader - verifies that a booking with its room,
+client, event type and custom add-ons comes from one embedded query, that
+repeated loads within a request are served from the request memo without
+sharing mutable rows, and that a booking write in the same request forces
+a fresh read
+"""
+
+import os
+import sys
+from datetime import datetime
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+import core
+from utils.query_shapes import QUERY_SHAPES
+from fake_supabase import FakeSupabase
+
+ADDONS = [{'id': 1, 'booking_id': 7, 'description': 'Projector', 'quantity': 1, 'unit_price': 40.0, 'total_price': 40.0}]
+
+
+def make_fake():
+    return FakeSupabase({
+        'bookings': [{
+            'id': 7, 'title': 'Strategy Day', 'room_id': 1, 'client_id': 2, 'status': 'confirmed', 'created_by': 'u1',
+            'start_time': '2025-03-10T08:00:00+00:00', 'end_time': '2025-03-10T12:00:00+00:00', 'attendees': 20,
+            'total_price': 240.0, 'room_rate': 200.0,
+            # Embedded relations, as PostgREST returns them for the booking_detail shape
+            'room': {'id': 1, 'name': 'Boardroom'}, 'client': {'id': 2, 'company_name': 'Acme'},
+            'event_type': {'id': 3, 'name': 'Workshop'}, 'custom_addons': ADDONS
+        }],
+        'users': [{'id': 'u1', 'first_name': 'Tendai', 'last_name': 'Moyo', 'username': 'tmoyo', 'email': 't@example.com'}]
+    })
+
+
+def with_fake(run):
+    fake = make_fake()
+    original = core.supabase_admin
+    try:
+        core.supabase_admin = fake
+        return run(fake)
+    finally:
+        core.supabase_admin = original
+
+
+def test_shape_embeds_custom_addons():
+    assert 'custom_addons:booking_custom_addons(*)' in QUERY_SHAPES['booking_detail']['columns']
+
+
+def test_loads_are_memoized_per_request():
+    """View, edit and quotation helpers share one read per request"""
+    print("🧪 Testing request-scoped booking loader...")
+
+    def run(fake):
+        app = Flask(__name__)
+        with app.test_request_context('/bookings/7'):
+            booking = core.get_booking_with_details(7)
+            assert booking['room']['name'] == 'Boardroom' and booking['custom_addons'] == ADDONS
+            assert booking['created_by_name'] == 'Tendai Moyo'
+            assert isinstance(booking['start_time'], datetime)
+            assert booking['addons_total'] == 40.0
+            assert fake.round_trips == 2  # booking with embeds + creator
+
+            # Callers get their own copies
+            booking['room']['name'] = 'Changed'
+            booking['custom_addons'].append({'total_price': 1})
+            again = core.get_complete_booking_details(7)
+            assert again['room']['name'] == 'Boardroom' and len(again['custom_addons']) == 1
+            core.get_booking_with_details(7)
+            assert core.load_booking_detail(404) is None and core.load_booking_detail(404) is None
+            assert fake.round_trips == 3  # only the missing booking, once
+
+        # A new request reads again
+        with app.test_request_context('/bookings/7'):
+            core.get_complete_booking_details(7)
+            assert fake.round_trips == 4
+
+        # Outside a request nothing is memoized
+        core.load_booking_detail(7)
+        core.load_booking_detail(7)
+        assert fake.round_trips == 6
+
+    with_fake(run)
+    print("✅ A booking is read once per request")
+
+
+def test_write_in_request_forces_fresh_read():
+    """booking_changed drops the memo so later loads see the write"""
+    def run(fake):
+        app = Flask(__name__)
+        rollup_available = core.DAILY_ROLLUP_TABLE_AVAILABLE
+        try:
+            core.DAILY_ROLLUP_TABLE_AVAILABLE = False
+            with app.test_request_context('/bookings/7/edit', method='POST'):
+                before = core.load_booking_detail(7)
+                fake.tables['bookings'][0] = {**fake.tables['bookings'][0], 'title': 'Renamed'}
+                assert core.load_booking_detail(7)['title'] == 'Strategy Day'
+                core.booking_changed(before, dict(fake.tables['bookings'][0]))
+                assert core.load_booking_detail(7)['title'] == 'Renamed'
+        finally:
+            core.DAILY_ROLLUP_TABLE_AVAILABLE = rollup_available
+
+    with_fake(run)
+
+
+if __name__ == "__main__":
+    test_shape_embeds_custom_addons()
+    test_loads_are_memoized_per_request()
+    test_write_in_request_forces_fresh_read()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Test windowed calendar feed - verifies that only bookings overlapping the
+requested window are loaded, that a since cursor returns just the changes
+(including cancellations, moves out of view and hard deletes), and that an
+unchanged window is answered with 304 Not Modified
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta, UTC
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+import core
+from utils.calendar_feed import DeletedBookingLog
+from fake_supabase import FakeSupabase
+
+BASE = datetime(2025, 3, 3, tzinfo=UTC)
+
+
+def build_booking(booking_id, day, status='confirmed', room_id=1):
+    start = BASE + timedelta(days=day, hours=9)
+    return {'id': booking_id, 'room_id': room_id, 'title': f'Meeting {booking_id}', 'status': status,
+            'start_time': start.isoformat(), 'end_time': (start + timedelta(hours=2)).isoformat(),
+            'attendees': 10, 'total_price': 100.0, 'updated_at': (BASE - timedelta(days=10)).isoformat()}
+
+
+def with_fake_client(tables, run):
+    fake = FakeSupabase(tables)
+    original_client, original_log = core.supabase_admin, core.deleted_bookings_log
+    try:
+        core.supabase_admin = fake
+        core.deleted_bookings_log = DeletedBookingLog(complete_from=BASE - timedelta(days=30))
+        return run(fake)
+    finally:
+        core.supabase_admin, core.deleted_bookings_log = original_client, original_log
+        core.booking_index.invalidate()
+
+
+def test_window_and_since_cursor():
+    """A window returns overlapping bookings only; a cursor returns changes and removals"""
+    print("🧪 Testing windowed and incremental calendar feed...")
+
+    bookings = [build_booking(i, day) for i, day in enumerate([-60, -2, 0, 3, 10, 200], start=1)]
+    bookings.append(build_booking(7, 1, status='cancelled'))
+    window = ((BASE - timedelta(days=7)).isoformat(), (BASE + timedelta(days=14)).isoformat())
+
+    def run(fake):
+        feed = core.get_calendar_feed(start=window[0], end=window[1])
+        assert sorted(event['id'] for event in feed['events']) == [2, 3, 4, 5]
+        assert fake.round_trips == 1
+
+        cursor = feed['cursor']
+        changed_at = (datetime.now(UTC) + timedelta(seconds=1)).isoformat()
+        rows = {row['id']: row for row in fake.tables['bookings']}
+        rows[3].update(status='cancelled', updated_at=changed_at)                      # cancelled in view
+        rows[4].update(start_time=(BASE + timedelta(days=90)).isoformat(),
+                       end_time=(BASE + timedelta(days=90, hours=1)).isoformat(), updated_at=changed_at)  # moved out
+        rows[5].update(title='Renamed', updated_at=changed_at)                         # edited in view
+        fake.tables['bookings'].append(build_booking(8, 4))                          # untouched since the cursor
+        fake.tables['bookings'].append(dict(build_booking(9, 5), updated_at=changed_at))  # created in view
+        fake.tables['bookings'] = [row for row in fake.tables['bookings'] if row['id'] != 2]
+        core.booking_changed(rows[2], None)                                            # hard delete
+
+        delta = core.get_calendar_feed(start=window[0], end=window[1], since=cursor)
+        assert delta['incremental'] and not delta['reset']
+        assert sorted(event['id'] for event in delta['events']) == [5, 9]
+        assert {event['id']: event['title'] for event in delta['events']}[5] == 'Renamed'
+        assert delta['removed'] == [2, 3, 4]
+
+        # A cursor older than the deletion log forces a full reload
+        stale = core.get_calendar_feed(start=window[0], end=window[1],
+                                       since=(BASE - timedelta(days=365)).isoformat())
+        assert stale['reset'] and stale['events'] == []
+
+    with_fake_client({'bookings': bookings}, run)
+    print("✅ Calendar feed honours the window and the since cursor")
+
+
+def test_unchanged_window_returns_304():
+    """Repeating a request with the returned ETag gives 304 until the window changes"""
+    print("🧪 Testing calendar feed ETags...")
+
+    app = Flask(__name__)
+    bookings = [build_booking(1, 0), build_booking(2, 1)]
+    window = ((BASE - timedelta(days=1)).isoformat(), (BASE + timedelta(days=3)).isoformat())
+
+    def respond(headers=None):
+        with app.test_request_context('/api/bookings/calendar', headers=headers or {}):
+            feed = core.get_calendar_feed(start=window[0], end=window[1])
+            return core.calendar_feed_response(feed, feed['events'])
+
+    def run(fake):
+        first = respond()
+        etag = first.headers['ETag']
+        assert first.status_code == 200 and first.headers['X-Calendar-Cursor']
+
+        assert respond({'If-None-Match': etag}).status_code == 304
+
+        fake.tables['bookings'][0]['title'] = 'Moved to the afternoon'
+        assert respond({'If-None-Match': etag}).status_code == 200
+
+    with_fake_client({'bookings': bookings}, run)
+    print("✅ Unchanged windows are answered with 304")
+
+
+if __name__ == "__main__":
+    test_window_and_since_cursor()
+    test_unchanged_window_returns_304()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Test the thread-safe Supabase client provider - verifies that every thread
+gets its own long-lived client, that sign-ins run on private clients and
+leave the shared ones untouched, and that throughput grows with threads
+once requests no longer share one client
+"""
+
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+import core
+from utils.supabase_clients import ClientProvider
+
+
+class FakeAuth:
+    def __init__(self, client):
+        self.client = client
+
+    def sign_in_with_password(self, credentials):
+        # Mirrors supabase-py: a sign-in switches the client's requests to the user's token
+        self.client.token = f"user-token-{credentials['email']}"
+        user = SimpleNamespace(id='user-1', email=credentials['email'], user_metadata={}, app_metadata={})
+        return SimpleNamespace(user=user, session=SimpleNamespace(access_token=self.client.token,
+                                                                  refresh_token='refresh'))
+
+
+class FakeClient:
+    """One client = one connection: its requests are served one at a time"""
+
+    def __init__(self, url, key, latency=0.0):
+        self.token = key
+        self.latency = latency
+        self.auth = FakeAuth(self)
+        self._connection = threading.Lock()
+
+    def query(self):
+        with self._connection:
+            time.sleep(self.latency)
+            return self.token
+
+
+def fake_factory(latency=0.0):
+    return lambda url, key: FakeClient(url, key, latency)
+
+
+def make_provider(latency=0.0):
+    return ClientProvider('https://example.supabase.co', 'anon-key', factory=fake_factory(latency),
+                          options_factory=lambda: None, name='test')
+
+
+def test_one_client_per_thread():
+    print("🧪 Testing per-thread clients...")
+    provider = make_provider()
+    main_client = provider.get()
+    assert provider.get() is main_client
+    assert provider.query() == 'anon-key'
+
+    seen = []
+    worker = threading.Thread(target=lambda: seen.append(provider.get()))
+    worker.start()
+    worker.join()
+    assert seen[0] is not main_client
+    assert provider.stats()['clients'] == 2
+
+    provider.reset()
+    assert provider.get() is not main_client
+    print("✅ Each thread keeps its own client")
+
+
+def test_sign_in_does_not_touch_shared_client():
+    provider = make_provider()
+    shared = provider.get()
+    with provider.auth_client() as auth_client:
+        assert auth_client is not shared
+        auth_client.auth.sign_in_with_password({'email': 'alice@example.com', 'password': 'x'})
+        assert auth_client.token == 'user-token-alice@example.com'
+    assert shared.token == 'anon-key'
+    assert provider.stats()['auth_clients'] == 1
+
+
+def test_authenticate_user_uses_private_client():
+    provider = make_provider()
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = 'test'
+    original = core.supabase
+    try:
+        core.supabase = provider
+        with app.test_request_context('/login', method='POST'):
+            user = core.authenticate_user('alice@example.com', 'secret')
+            assert user is not None and user.email == 'alice@example.com'
+            assert core.session['supabase_session']['access_token'] == 'user-token-alice@example.com'
+    finally:
+        core.supabase = original
+    assert provider.get().token == 'anon-key'
+
+
+def test_throughput_scales_with_threads():
+    print("🧪 Testing throughput with 1 and 4 threads...")
+    calls = 40
+
+    def run(threads):
+        provider = make_provider(latency=0.02)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(lambda _: provider.query(), range(calls)))
+        return calls / (time.perf_counter() - started)
+
+    single, threaded = run(1), run(4)
+    print(f"   - {single:.0f} calls/s on 1 thread, {threaded:.0f} calls/s on 4 threads")
+    assert threaded > single * 2.5
+    print("✅ Throughput scales with threads")
+
+
+if __name__ == "__main__":
+    test_one_client_per_thread()
+    test_sign_in_does_not_touch_shared_client()
+    test_authenticate_user_uses_private_client()
+    test_throughput_scales_with_threads()
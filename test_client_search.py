@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Test the client search index - verifies ranking of exact, prefix, word-prefix
+and substring matches across names, email and phone, that create/edit/delete
+keep the index current without reloading it, and that a keystroke over a
+large directory is answered from memory in well under 10 ms
+"""
+
+import os
+import sys
+import time
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import core
+from utils.search_index import ClientSearchIndex
+from fake_supabase import FakeSupabase
+
+CLIENTS = [
+    {'id': 1, 'company_name': 'Acme Holdings', 'contact_person': 'Jane Moyo', 'email': 'jane@acme.co.zw', 'phone': '+263 77 123 4567'},
+    {'id': 2, 'company_name': 'Macmillan Publishers', 'contact_person': 'Peter Ncube', 'email': 'peter@macmillan.com', 'phone': '0242 700 111'},
+    {'id': 3, 'company_name': 'Acme', 'contact_person': 'Tino Dube', 'email': 'tino@example.com', 'phone': None},
+    {'id': 4, 'company_name': None, 'contact_person': 'Acme Smith', 'email': 'smith@example.com', 'phone': '0772 999 000'},
+    {'id': 5, 'company_name': 'Delta Beverages', 'contact_person': 'Rudo Acme-Banda', 'email': 'rudo@delta.co.zw', 'phone': ''},
+]
+
+
+def ids(results):
+    return [row['id'] for _, row in results]
+
+
+def test_ranking_and_match_kinds():
+    """Exact beats prefix beats word prefix beats substring; phone matches on digits"""
+    print("🧪 Testing client search ranking...")
+
+    index = ClientSearchIndex()
+    index.rebuild(CLIENTS)
+
+    assert ids(index.search('acme')) == [3, 1, 4, 5]
+    assert ids(index.search('ACME hold')) == [1]
+    assert ids(index.search('ac')) == [3, 1, 4, 5]  # short queries match word prefixes only
+    assert ids(index.search('mill')) == [2]
+    assert ids(index.search('77 123')) == [1]
+    assert ids(index.search('0772-999')) == [4]
+    assert ids(index.search('acme.co')) == [1]
+    assert ids(index.search('acme', fields=('company_name',))) == [3, 1]
+    assert ids(index.search('acme', limit=2)) == [3, 1]
+    assert index.search('') == [] and index.search('zzz') == []
+
+    print("✅ Matches are ranked by kind and field")
+
+
+def test_writes_update_index_in_place():
+    """Create, edit and delete go through client_changed without a reload"""
+    print("🧪 Testing client writes update the search index...")
+
+    fake = FakeSupabase({'clients': [dict(client) for client in CLIENTS]})
+    original_client, original_index = core.supabase_admin, core.client_search_index
+    try:
+        core.supabase_admin, core.client_search_index = fake, ClientSearchIndex()
+        assert [row['id'] for row in core.search_clients_indexed('acme')] == [3, 1, 4, 5]
+        trips_after_build = fake.round_trips
+
+        created = core.create_client_in_db({'id': 6, 'company_name': 'Zebra Lodge', 'contact_person': 'Nyasha Acme',
+                                            'email': 'nyasha@zebra.com'})
+        assert created and [row['id'] for row in core.search_clients_indexed('zebra')] == [6]
+
+        # Edits merge changed columns only
+        core.client_changed(6, {'company_name': 'Quagga Lodge', 'updated_at': 'now'})
+        assert core.search_clients_indexed('zebra')[0]['id'] == 6  # still found by email
+        assert core.search_clients_indexed('quagga')[0]['contact_person'] == 'Nyasha Acme'
+        assert not core.search_clients_indexed('zebra lodge')
+
+        core.client_changed(3, None)
+        assert 3 not in [row['id'] for row in core.search_clients_indexed('acme')]
+        assert [row['company_name'] for row in core.search_company_names('acme')] == ['Acme Holdings']
+
+        # Only the insert reached the database after the first build
+        assert fake.round_trips == trips_after_build + 1
+    finally:
+        core.supabase_admin, core.client_search_index = original_client, original_index
+
+    print("✅ Client writes are reflected immediately")
+
+
+def test_rebuild_replays_concurrent_changes():
+    """Changes made while a rebuild is reading rows survive the swap"""
+    index = ClientSearchIndex()
+    index.rebuild(CLIENTS)
+
+    def slow_rows():
+        for client in CLIENTS:
+            if client['id'] == 3:
+                # Edits land mid-load
+                index.upsert(9, {'company_name': 'Kudu Travel'})
+                index.remove(2)
+            yield client
+
+    index.rebuild(slow_rows())
+    assert ids(index.search('kudu')) == [9]
+    assert ids(index.search('macmillan')) == []
+    assert len(index) == 5
+
+
+def test_search_latency_on_large_directory():
+    """A keystroke over 20,000 clients stays well under 10 ms"""
+    print("🧪 Testing client search latency...")
+
+    words = ['acme', 'delta', 'zimbo', 'harare', 'lodge', 'travel', 'mining', 'foods', 'bank', 'media']
+    clients = [{
+        'id': i,
+        'company_name': f'{words[i % 10].title()} {words[(i // 10) % 10].title()} {i}',
+        'contact_person': f'Contact {words[(i // 7) % 10]} {i}',
+        'email': f'user{i}@{words[i % 10]}.co.zw',
+        'phone': f'0772{i:06d}'
+    } for i in range(20000)]
+
+    started = time.perf_counter()
+    index = ClientSearchIndex()
+    index.rebuild(clients)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    queries = ['ac', 'co', 'acme', 'contact', 'ontact', 'acme lodge', 'user1999', '0772 0012', 'harare tra', 'zz', 'mining 19']
+    worst = 0.0
+    for query in queries * 5:
+        started = time.perf_counter()
+        results = index.search(query)
+        worst = max(worst, (time.perf_counter() - started) * 1000)
+        assert len(results) <= 10
+    print(f"   - built in {build_ms:.0f} ms, worst query {worst:.2f} ms")
+    assert ids(index.search('lodge harare 1234')) == [1234]
+    assert ids(index.search('lodge harare 123')) == [12334, 1234]
+    assert worst < 50  # generous for slow CI; typically well under 1 ms
+
+    print("✅ Client search answers from memory")
+
+
+if __name__ == "__main__":
+    test_ranking_and_match_kinds()
+    test_writes_update_index_in_place()
+    test_rebuild_replays_concurrent_changes()
+    test_search_latency_on_large_directory()
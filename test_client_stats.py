@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Test client booking aggregates - verifies that the client directory reads the
+client_booking_stats view when it exists, groups one bookings fetch locally
+when it does not, and only stops using the view when it is actually missing
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta, UTC
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import core
+from fake_supabase import FakeSupabase
+
+NOW = datetime.now(UTC).replace(microsecond=0)
+
+CLIENTS = [{'id': 1, 'company_name': 'Zeta Ltd', 'contact_person': 'Ann'},
+           {'id': 2, 'company_name': 'Acme', 'contact_person': 'Bob'},
+           {'id': 3, 'company_name': None, 'contact_person': 'Cara'}]
+
+
+def make_bookings():
+    return [
+        {'id': 1, 'client_id': 1, 'status': 'confirmed', 'total_price': 100.0,
+         'start_time': (NOW - timedelta(days=10)).isoformat()},
+        {'id': 2, 'client_id': 1, 'status': 'tentative', 'total_price': 40.0,
+         'start_time': (NOW - timedelta(days=2)).isoformat()},
+        {'id': 3, 'client_id': 1, 'status': 'cancelled', 'total_price': 75.0,
+         'start_time': (NOW - timedelta(days=1)).isoformat()},
+        {'id': 4, 'client_id': 2, 'status': 'confirmed', 'total_price': 250.0,
+         'start_time': (NOW - timedelta(days=30)).isoformat()},
+        {'id': 5, 'client_id': None, 'status': 'confirmed', 'total_price': 10.0,
+         'start_time': NOW.isoformat()},
+    ]
+
+
+class FailingView:
+    """Wraps a fake client so reads of the client_booking_stats view raise the given error"""
+
+    def __init__(self, fake, error):
+        self.fake = fake
+        self.error = error
+
+    def table(self, table_name):
+        query = self.fake.table(table_name)
+        if table_name == 'client_booking_stats':
+            def execute():
+                raise self.error
+            query.execute = execute
+        return query
+
+
+def with_client(client, run):
+    originals = (core.supabase_admin, core.CLIENT_STATS_VIEW_AVAILABLE)
+    try:
+        core.supabase_admin = client
+        core.CLIENT_STATS_VIEW_AVAILABLE = True
+        return run()
+    finally:
+        core.supabase_admin, core.CLIENT_STATS_VIEW_AVAILABLE = originals
+
+
+def test_aggregates_read_the_view():
+    """With the view deployed its pre-grouped rows are used as they are"""
+    print("🧪 Testing client aggregates from the client_booking_stats view...")
+
+    fake = FakeSupabase({'bookings': make_bookings(), 'clients': [dict(client) for client in CLIENTS],
+                         'client_booking_stats': [
+                             {'client_id': 1, 'booking_count': 7, 'total_revenue': 900.5,
+                              'last_booking_at': (NOW - timedelta(days=4)).isoformat()},
+                             {'client_id': 2, 'booking_count': 1, 'total_revenue': 250.0,
+                              'last_booking_at': (NOW - timedelta(days=30)).isoformat()}]})
+
+    aggregates = with_client(fake, core.get_client_booking_aggregates)
+    assert aggregates[1]['booking_count'] == 7 and aggregates[1]['total_revenue'] == 900.5
+    assert aggregates[1]['days_since_last_booking'] == 4
+    assert 3 not in aggregates
+    assert fake.round_trips == 1
+
+    clients = with_client(fake, core.get_clients_with_booking_counts)
+    assert [client['display_name'] for client in clients] == ['Acme', 'Zeta Ltd', 'Cara']
+    assert clients[2]['booking_count'] == 0 and clients[2]['last_booking_date'] is None
+
+    print("✅ The view is read in one query")
+
+
+def test_fallback_groups_bookings_when_view_is_missing():
+    """Without the view one bookings fetch is grouped into the same figures, and the view is not probed again"""
+    print("🧪 Testing client aggregates without the view...")
+
+    fake = FakeSupabase({'bookings': make_bookings(), 'clients': [dict(client) for client in CLIENTS]})
+    client = FailingView(fake, Exception('relation "public.client_booking_stats" does not exist'))
+
+    def run():
+        aggregates = core.get_client_booking_aggregates()
+        assert not core.CLIENT_STATS_VIEW_AVAILABLE
+
+        # Every booking counts, only confirmed ones earn revenue, bookings without a client are skipped
+        assert aggregates[1]['booking_count'] == 3 and aggregates[1]['total_revenue'] == 100.0
+        assert aggregates[1]['active_booking_count'] == 2
+        assert aggregates[1]['days_since_last_booking'] == 1
+        assert aggregates[2]['booking_count'] == 1 and aggregates[2]['total_revenue'] == 250.0
+        assert set(aggregates) == {1, 2}
+
+        trips = fake.round_trips
+        assert core.get_client_booking_aggregates([2]) == {2: aggregates[2]}
+        assert fake.round_trips - trips == 1
+
+    with_client(client, run)
+    print("✅ Bookings are grouped locally without the view")
+
+
+def test_transient_view_error_keeps_the_view():
+    """A timeout falls back for that call only"""
+    fake = FakeSupabase({'bookings': make_bookings(), 'clients': [dict(client) for client in CLIENTS]})
+    client = FailingView(fake, Exception('canceling statement due to statement timeout'))
+
+    def run():
+        aggregates = core.get_client_booking_aggregates()
+        assert aggregates[1]['booking_count'] == 3
+        assert core.CLIENT_STATS_VIEW_AVAILABLE
+
+    with_client(client, run)
+
+
+def test_legacy_directory_excludes_cancelled_bookings():
+    """app.py's /clients and booking-counts API keep counting only bookings that were not cancelled"""
+    print("🧪 Testing booking counts without cancelled bookings...")
+    import app as app_module
+
+    fake = FakeSupabase({'bookings': make_bookings(), 'clients': [dict(client) for client in CLIENTS]})
+    client = FailingView(fake, Exception('relation "public.client_booking_stats" does not exist'))
+
+    def run():
+        every = {row['id']: row['booking_count'] for row in core.get_clients_with_booking_counts()}
+        active = {row['id']: row['booking_count'] for row in core.get_clients_with_booking_counts(exclude_cancelled=True)}
+        assert every[1] == 3 and active[1] == 2
+
+        try:
+            app_module.app.config['LOGIN_DISABLED'] = True
+            with app_module.app.test_request_context('/api/clients/booking-counts'):
+                payload = app_module.api_client_booking_counts().get_json()
+        finally:
+            app_module.app.config.pop('LOGIN_DISABLED', None)
+        assert payload['booking_counts'] == {str(client_id): count for client_id, count in active.items()}
+
+    with_client(client, run)
+    print("✅ Cancelled bookings are left out of the legacy counts")
+
+
+if __name__ == "__main__":
+    test_aggregates_read_the_view()
+    test_fallback_groups_bookings_when_view_is_missing()
+    test_transient_view_error_keeps_the_view()
+    test_legacy_directory_excludes_cancelled_bookings()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Test the daily booking rollup - verifies that a rebuild aggregates bookings
+per (day, room, status), that booking writes recompute only the cells they
+touch and leave the table equal to a full rebuild, and that the monthly
+summary is built from rollup rows without reading joined bookings
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta, date, UTC
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import core
+import routes.reports as reports_module
+from utils.daily_rollup import build_rollup_rows, summarize_rollup
+from fake_supabase import FakeSupabase
+
+BASE = datetime(2025, 3, 3, 8, 0, tzinfo=UTC)
+ROOMS = [{'id': 1, 'name': 'Boardroom'}, {'id': 2, 'name': 'Hall'}]
+CLIENTS = [{'id': 1, 'company_name': 'Acme', 'contact_person': 'Jane'},
+           {'id': 2, 'company_name': None, 'contact_person': 'Peter'}]
+
+
+def make_bookings():
+    bookings = []
+    for i in range(1, 61):
+        start = BASE + timedelta(days=i % 20, hours=i % 3)
+        bookings.append({
+            'id': i, 'room_id': 1 + i % 2, 'client_id': 1 + i % 2,
+            'status': ('confirmed', 'tentative', 'cancelled')[i % 3],
+            'start_time': start.isoformat(), 'end_time': (start + timedelta(hours=1 + i % 4)).isoformat(),
+            'attendees': 10 + i % 5, 'total_price': 100.0 + i
+        })
+    return bookings
+
+
+def stored_rollup(fake):
+    """Non-empty rollup rows keyed by (day, room_id, status)"""
+    return {(row['day'], row['room_id'], row['status']): {key: row[key] for key in
+            ('event_count', 'attendees', 'revenue', 'booked_hours')}
+            for row in fake.tables.get('booking_daily_rollup', []) if row['event_count']}
+
+
+def expected_rollup(bookings):
+    return {key: {column: row[column] for column in ('event_count', 'attendees', 'revenue', 'booked_hours')}
+            for key, row in build_rollup_rows(bookings).items()}
+
+
+def with_fake_client(run):
+    fake = FakeSupabase({'bookings': make_bookings(), 'rooms': [dict(room) for room in ROOMS],
+                         'clients': [dict(client) for client in CLIENTS]})
+    originals = (core.supabase_admin, reports_module.supabase_admin, core.DAILY_ROLLUP_TABLE_AVAILABLE)
+    try:
+        core.supabase_admin = reports_module.supabase_admin = fake
+        core.DAILY_ROLLUP_TABLE_AVAILABLE = True
+        core.invalidate_reference_data()
+        return run(fake)
+    finally:
+        core.supabase_admin, reports_module.supabase_admin, core.DAILY_ROLLUP_TABLE_AVAILABLE = originals
+        core.invalidate_reference_data()
+
+
+def test_rebuild_aggregates_and_drops_stale_rows():
+    """A rebuild writes one row per (day, room, status) and removes rows no booking backs"""
+    print("🧪 Testing daily rollup rebuild...")
+
+    def run(fake):
+        fake.tables['booking_daily_rollup'] = [{'id': 99, 'day': '2025-03-04', 'room_id': 7, 'status': 'confirmed',
+                                                'event_count': 5, 'attendees': 1, 'revenue': 1.0, 'booked_hours': 1.0}]
+        assert core.rebuild_daily_rollup()
+        assert stored_rollup(fake) == expected_rollup(fake.tables['bookings'])
+        assert all(row['id'] != 99 for row in fake.tables['booking_daily_rollup'])
+
+        totals = summarize_rollup(fake.tables['booking_daily_rollup'])
+        assert totals['event_count'] == 60
+        assert totals['revenue'] == round(sum(b['total_price'] for b in fake.tables['bookings']), 2)
+        print(f"   - {len(fake.tables['booking_daily_rollup'])} rollup rows for 60 bookings")
+
+    with_fake_client(run)
+    print("✅ Rollup rebuild matches the bookings")
+
+
+def test_booking_writes_keep_rollup_current():
+    """Create, move, status-only change and delete each leave the rollup equal to a rebuild"""
+    print("🧪 Testing incremental rollup maintenance...")
+
+    def run(fake):
+        assert core.rebuild_daily_rollup()
+        bookings = fake.tables['bookings']
+
+        new = {'id': 100, 'room_id': 2, 'client_id': 1, 'status': 'confirmed', 'attendees': 30, 'total_price': 500.0,
+               'start_time': (BASE + timedelta(days=3, hours=2)).isoformat(),
+               'end_time': (BASE + timedelta(days=3, hours=6)).isoformat()}
+        bookings.append(new)
+        core.booking_changed(None, new)
+        assert stored_rollup(fake) == expected_rollup(bookings)
+
+        # Moved to another room and day
+        old = dict(new)
+        new.update(room_id=1, start_time=(BASE + timedelta(days=25)).isoformat(),
+                   end_time=(BASE + timedelta(days=25, hours=2)).isoformat())
+        trips = fake.round_trips
+        core.booking_changed(old, dict(new))
+        assert stored_rollup(fake) == expected_rollup(bookings)
+        assert fake.round_trips - trips == 4  # read + write for each of the two cells
+
+        # Status-only update with a partial row
+        new['status'] = 'cancelled'
+        core.booking_changed({'id': 100}, {'id': 100, 'status': 'cancelled'})
+        assert stored_rollup(fake) == expected_rollup(bookings)
+
+        bookings.remove(new)
+        core.booking_changed(dict(new), None)
+        assert stored_rollup(fake) == expected_rollup(bookings)
+        assert core.DAILY_ROLLUP_TABLE_AVAILABLE
+
+    with_fake_client(run)
+    print("✅ Booking writes recompute only their cells")
+
+
+def test_monthly_summary_reads_rollup():
+    """The monthly summary matches the bookings while reading only rollup rows and narrow client columns"""
+    print("🧪 Testing monthly summary from the rollup...")
+
+    def run(fake):
+        assert core.rebuild_daily_rollup()
+        bookings = fake.tables['bookings']
+        original_bookings = list(bookings)
+
+        data = reports_module.get_monthly_summary_data(date(2025, 3, 1), date(2025, 3, 31))
+        summary = data['summary']
+        assert summary['total_events'] == len(original_bookings)
+        assert summary['confirmed_events'] == sum(1 for b in original_bookings if b['status'] == 'confirmed')
+        confirmed_revenue = sum(b['total_price'] for b in original_bookings if b['status'] == 'confirmed')
+        assert summary['total_revenue'] == round(confirmed_revenue, 2)
+        assert sum(week['events'] for week in data['weekly_summaries'].values()) == len(original_bookings)
+        assert round(sum(week['revenue'] for week in data['weekly_summaries'].values()), 2) == round(confirmed_revenue, 2)
+        assert {name for name, _ in data['top_rooms']} == {'Boardroom', 'Hall'}
+        assert {name for name, _ in data['top_clients']} == {'Acme', 'Peter'}
+
+        # The rollup, not the bookings, carries the room and week figures
+        fake.tables['booking_daily_rollup'].append({'id': 500, 'day': '2025-03-30', 'room_id': 1, 'status': 'confirmed',
+                                                    'event_count': 1, 'attendees': 0, 'revenue': 1000.0, 'booked_hours': 1})
+        again = reports_module.get_monthly_summary_data(date(2025, 3, 1), date(2025, 3, 31))
+        assert again['summary']['total_revenue'] == round(confirmed_revenue + 1000, 2)
+
+    with_fake_client(run)
+    print("✅ Monthly summary is built from rollup rows")
+
+
+def test_fallback_without_rollup_table():
+    """Without the table, readers aggregate their range's bookings into the same rows"""
+    def run(fake):
+        core.DAILY_ROLLUP_TABLE_AVAILABLE = False
+        rows = core.get_daily_rollup(date(2025, 3, 1), date(2025, 3, 10))
+        in_range = [b for b in fake.tables['bookings'] if b['start_time'] < '2025-03-11']
+        assert summarize_rollup(rows)['event_count'] == len(in_range)
+
+    with_fake_client(run)
+
+
+class FailingRollupWrites:
+    """Wraps a fake client so upserts to booking_daily_rollup raise the given error"""
+
+    def __init__(self, fake, error):
+        self.fake = fake
+        self.error = error
+        self.failing = True
+
+    def table(self, table_name):
+        query = self.fake.table(table_name)
+        if table_name == 'booking_daily_rollup' and self.failing:
+            def upsert(*args, **kwargs):
+                raise self.error
+            query.upsert = upsert
+        return query
+
+
+def test_failed_cell_write_is_retried_not_latched():
+    """A transient write failure queues the cell; readers fall back for its range until the retry lands"""
+    print("🧪 Testing a failed rollup cell write...")
+
+    def run(fake):
+        assert core.rebuild_daily_rollup()
+        bookings = fake.tables['bookings']
+        flaky = FailingRollupWrites(fake, Exception('canceling statement due to statement timeout'))
+        core.supabase_admin = reports_module.supabase_admin = flaky
+        try:
+            new = {'id': 100, 'room_id': 2, 'client_id': 1, 'status': 'confirmed', 'attendees': 30,
+                   'total_price': 500.0, 'start_time': (BASE + timedelta(days=3, hours=2)).isoformat(),
+                   'end_time': (BASE + timedelta(days=3, hours=6)).isoformat()}
+            bookings.append(new)
+            core.booking_changed(None, new)
+            assert core.DAILY_ROLLUP_TABLE_AVAILABLE
+            assert core._pending_rollup_cells == {('2025-03-06', 2)}
+
+            # The queued cell's range is aggregated from bookings; other ranges still read the table
+            rows = core.get_daily_rollup(date(2025, 3, 1), date(2025, 3, 31))
+            assert summarize_rollup(rows)['event_count'] == len(bookings)
+            assert not core._rollup_pending_between(date(2025, 3, 10), date(2025, 3, 31))
+
+            flaky.failing = False
+            rows = core.get_daily_rollup(date(2025, 3, 1), date(2025, 3, 31))
+            assert not core._pending_rollup_cells
+            assert stored_rollup(fake) == expected_rollup(bookings)
+            assert summarize_rollup(rows)['event_count'] == len(bookings)
+
+            # Only a missing table switches the rollup off
+            flaky.error, flaky.failing = Exception('relation "booking_daily_rollup" does not exist'), True
+            core.booking_changed(dict(new), None)
+            assert not core.DAILY_ROLLUP_TABLE_AVAILABLE
+        finally:
+            core._pending_rollup_cells.clear()
+            core._pending_rollup_bookings.clear()
+
+    with_fake_client(run)
+    print("✅ Failed cell writes are retried")
+
+
+if __name__ == "__main__":
+    test_rebuild_aggregates_and_drops_stale_rows()
+    test_booking_writes_keep_rollup_current()
+    test_monthly_summary_reads_rollup()
+    test_fallback_without_rollup_table()
+    test_failed_cell_write_is_retried_not_latched()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Test incrementally maintained dashboard stats - verifies that applying booking
+deltas gives the same figures as a full recompute, and that the dashboard only
+scans the bookings table when the aggregate has to be rebuilt
+"""
+
+import os
+import sys
+import random
+from datetime import datetime, timedelta, UTC
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import core
+from utils.dashboard_stats import DashboardStatsAggregate
+from fake_supabase import FakeSupabase
+
+NOW = datetime(2025, 3, 15, 12, 0, tzinfo=UTC)
+
+
+def random_booking(rng, booking_id):
+    start = NOW + timedelta(days=rng.randint(-120, 60), hours=rng.randint(0, 23))
+    return {'id': booking_id, 'room_id': rng.randint(1, 4), 'total_price': float(rng.randint(0, 500)),
+            'status': rng.choice(['confirmed', 'tentative', 'cancelled']), 'start_time': start.isoformat()}
+
+
+def test_deltas_match_full_recompute():
+    """Creates, edits, status changes and deletes leave the aggregate equal to a rebuild"""
+    print("🧪 Testing dashboard stats deltas against a full recompute...")
+
+    rng = random.Random(7)
+    bookings = {i: random_booking(rng, i) for i in range(1, 300)}
+    aggregate = DashboardStatsAggregate()
+    aggregate.rebuild(bookings.values(), now=NOW)
+
+    next_id = 300
+    for _ in range(500):
+        action = rng.choice(['create', 'update', 'status', 'delete'])
+        if action == 'create' or not bookings:
+            booking = random_booking(rng, next_id)
+            next_id += 1
+            aggregate.apply(None, booking)
+            bookings[booking['id']] = booking
+            continue
+        booking_id = rng.choice(list(bookings))
+        old = bookings[booking_id]
+        if action == 'delete':
+            aggregate.apply(old, None)
+            del bookings[booking_id]
+            continue
+        new = random_booking(rng, booking_id) if action == 'update' else dict(old, status=rng.choice(['confirmed', 'cancelled']))
+        aggregate.apply(old, new)
+        bookings[booking_id] = new
+
+    expected = DashboardStatsAggregate()
+    expected.rebuild(bookings.values(), now=NOW)
+
+    incremental_stats = aggregate.compute_stats(total_rooms=4, now=NOW)
+    recomputed_stats = expected.compute_stats(total_rooms=4, now=NOW)
+    for key in ('stats_computed_at', 'stats_updated_at'):
+        incremental_stats.pop(key)
+        recomputed_stats.pop(key)
+    for key, value in recomputed_stats.items():
+        assert abs(incremental_stats[key] - value) < 0.01, (key, incremental_stats[key], value)
+
+    # Partial rows cannot be applied and force a rebuild instead
+    assert not aggregate.apply({'id': 1}, {'id': 1, 'status': 'confirmed'})
+    assert aggregate.needs_rebuild(24, now=NOW)
+
+    print("✅ Incremental stats match a full recompute")
+
+
+def test_dashboard_reads_do_not_scan_bookings():
+    """Only the first dashboard load scans bookings; writes update the persisted snapshot"""
+    print("🧪 Testing dashboard stats reads...")
+
+    now = datetime.now(UTC)
+    fake = FakeSupabase({
+        'rooms': [{'id': 1, 'name': 'Boardroom'}, {'id': 2, 'name': 'Hall'}],
+        'clients': [{'id': 1}, {'id': 2}, {'id': 3}],
+        'bookings': [
+            {'id': 1, 'room_id': 1, 'status': 'confirmed', 'total_price': 100.0, 'start_time': now.isoformat()},
+            {'id': 2, 'room_id': 2, 'status': 'tentative', 'total_price': 50.0,
+             'start_time': (now + timedelta(days=3)).isoformat()},
+        ],
+    })
+    original_client = core.supabase_admin
+    original_aggregate = core.dashboard_stats
+    try:
+        core.supabase_admin = fake
+        core.dashboard_stats = DashboardStatsAggregate()
+        core._dashboard_snapshot_checked = False
+        core.DASHBOARD_SNAPSHOT_TABLE_AVAILABLE = True
+        core.invalidate_reference_data()
+
+        stats = core.get_dashboard_stats()
+        assert stats['total_bookings'] == 2 and stats['total_clients'] == 3
+        assert stats['confirmed_revenue'] == 100.0 and stats['todays_bookings'] == 1
+
+        bookings_table = fake.tables['bookings']
+        fake.tables['bookings'] = []  # any further full scan would now lose both bookings
+        new_booking = {'id': 3, 'room_id': 1, 'status': 'confirmed', 'total_price': 25.0,
+                       'start_time': (now + timedelta(days=1)).isoformat(),
+                       'end_time': (now + timedelta(days=1, hours=1)).isoformat()}
+        core.booking_changed(None, new_booking)
+        core.booking_changed(bookings_table[1], dict(bookings_table[1], status='cancelled'))
+
+        stats = core.get_dashboard_stats()
+        assert stats['total_bookings'] == 2
+        assert stats['confirmed_revenue'] == 125.0
+        assert stats['cancelled_bookings'] == 1
+
+        # Writes only mark the snapshot dirty; it is saved off the request path
+        assert core._dashboard_snapshot_dirty.is_set()
+        assert core.flush_dashboard_snapshot()
+
+        # A fresh process restores the persisted snapshot instead of scanning
+        snapshot = fake.tables['dashboard_stats_snapshot'][0]['data']
+        restored = DashboardStatsAggregate()
+        assert restored.load_snapshot(snapshot)
+        assert restored.compute_stats()['confirmed_revenue'] == 125.0
+    finally:
+        core.supabase_admin = original_client
+        core.dashboard_stats = original_aggregate
+        core._dashboard_snapshot_checked = False
+        core.invalidate_reference_data()
+        core.booking_index.invalidate()
+
+    print("✅ Dashboard stats are served from the maintained aggregate")
+
+
+def test_writes_during_rebuild_are_counted_once():
+    """Bookings written while a rebuild pages are settled when the fresh aggregate is swapped in"""
+    print("🧪 Testing booking writes during a dashboard stats rebuild...")
+
+    rng = random.Random(11)
+    bookings = {i: random_booking(rng, i) for i in range(1, 41)}
+    aggregate = DashboardStatsAggregate()
+    aggregate.rebuild(bookings.values(), now=NOW)
+
+    def paged_rows():
+        # The scan reads booking 5 before its write and booking 30 after it
+        for booking_id in sorted(bookings):
+            if booking_id == 20:
+                old = bookings[5]
+                bookings[5] = dict(old, status='cancelled' if old['status'] != 'cancelled' else 'confirmed')
+                aggregate.apply(old, bookings[5])
+                old = bookings[30]
+                bookings[30] = dict(old, total_price=old['total_price'] + 1000)
+                aggregate.apply(old, bookings[30])
+                created = random_booking(rng, 99)
+                bookings[99] = created
+                aggregate.apply(None, created)
+                aggregate.apply(bookings[12], None)
+                deleted = bookings.pop(12)
+                assert deleted
+            if booking_id in bookings:
+                yield dict(bookings[booking_id])
+
+    aggregate.rebuild(paged_rows(), now=NOW)
+
+    expected = DashboardStatsAggregate()
+    expected.rebuild(bookings.values(), now=NOW)
+    rebuilt_stats = aggregate.compute_stats(total_rooms=4, now=NOW)
+    for key, value in expected.compute_stats(total_rooms=4, now=NOW).items():
+        if key not in ('stats_computed_at', 'stats_updated_at'):
+            assert abs(rebuilt_stats[key] - value) < 0.01, (key, rebuilt_stats[key], value)
+    assert not aggregate.needs_rebuild(24, now=NOW)
+
+    # A write the rebuild cannot settle leaves the result stale rather than wrong
+    def rows_with_partial_write():
+        aggregate.apply({'id': 1}, {'id': 1, 'status': 'confirmed'})
+        yield from bookings.values()
+
+    aggregate.rebuild(rows_with_partial_write(), now=NOW)
+    assert aggregate.needs_rebuild(24, now=NOW)
+
+    print("✅ Writes during a rebuild are counted once")
+
+
+if __name__ == "__main__":
+    test_deltas_match_full_recompute()
+    test_dashboard_reads_do_not_scan_bookings()
+    test_writes_during_rebuild_are_counted_once()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Test bulk quotation/invoice runs - verifies that many bookings and their
+add-ons are prefetched page by page, that a run zips one PDF per
+booking or queues one email per booking while reporting progress, and that
+a booking that fails does not stop the rest
+"""
+
+import io
+import os
+import sys
+import tempfile
+import time
+import zipfile
+from datetime import datetime, timedelta, date, UTC
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+import core
+import routes.bookings as bookings_module
+from utils.document_batch import DocumentBatchJob
+from utils.document_service import DocumentCache, DocumentService
+from fake_supabase import FakeSupabase
+
+BASE = datetime(2025, 3, 1, 8, 0, tzinfo=UTC)
+
+
+def make_tables(count=300):
+    clients = [{'id': i, 'company_name': f'Company {i}', 'contact_person': f'Contact {i}',
+                'email': f'c{i}@example.com' if i % 10 else None} for i in range(1, 31)]
+    rooms = [{'id': i, 'name': f'Room {i}', 'hourly_rate': 50} for i in range(1, 6)]
+    bookings = []
+    for i in range(1, count + 1):
+        start = BASE + timedelta(days=i % 31, hours=i % 4)
+        client = clients[i % 30]
+        bookings.append({
+            'id': i, 'title': f'Event {i}', 'room_id': 1 + i % 5, 'client_id': client['id'],
+            'client_name': client['contact_person'], 'status': 'confirmed' if i % 4 else 'tentative',
+            'start_time': start.isoformat(), 'end_time': (start + timedelta(hours=3)).isoformat(),
+            'attendees': 10 + i % 20, 'total_price': 100.0 + i, 'room_rate': 80.0,
+            # Embedded relations, as PostgREST returns them for the booking_detail shape
+            'room': rooms[i % 5], 'client': client, 'event_type': None,
+            'custom_addons': [{'id': i, 'booking_id': i, 'description': 'Tea', 'quantity': 10, 'unit_price': 2.0,
+                               'total_price': 20.0}]
+        })
+    return {'bookings': bookings, 'clients': clients, 'rooms': rooms}
+
+
+class Harness:
+    """Core pointed at an in-memory database and a temporary document cache"""
+
+    def __enter__(self):
+        self.fake = FakeSupabase(make_tables())
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.originals = (core.supabase_admin, core.document_service, core.DOCUMENT_CACHE_DIR)
+        core.supabase_admin = self.fake
+        core.document_service = DocumentService(DocumentCache(self.cache_dir.name), workers=0)
+        core.DOCUMENT_CACHE_DIR = self.cache_dir.name
+        return self
+
+    def __exit__(self, *exc):
+        core.supabase_admin, core.document_service, core.DOCUMENT_CACHE_DIR = self.originals
+        self.cache_dir.cleanup()
+
+
+def wait_for(client, url):
+    for _ in range(600):
+        progress = client.get(url).get_json()
+        if progress['status'] in ('completed', 'failed'):
+            return progress
+        time.sleep(0.05)
+    raise AssertionError('batch did not finish')
+
+
+def make_app():
+    app = Flask(__name__)
+    app.config['LOGIN_DISABLED'] = True
+    app.config['SECRET_KEY'] = 'test'
+    app.register_blueprint(bookings_module.bookings_bp)
+    return app
+
+
+def test_prefetch_uses_few_queries():
+    """300 bookings with add-ons load in one round-trip per page"""
+    print("🧪 Testing bulk booking prefetch...")
+
+    with Harness() as harness:
+        bookings = core.get_bookings_with_details(date(2025, 3, 1), date(2025, 3, 31), statuses=['confirmed'])
+        expected = [b for b in harness.fake.tables['bookings'] if b['status'] == 'confirmed']
+        assert len(bookings) == len(expected)
+        assert all(len(b['custom_addons']) == 1 and b['addons_total'] == 20.0 for b in bookings)
+        assert all(isinstance(b['start_time'], datetime) for b in bookings)
+        print(f"   - {len(bookings)} bookings in {harness.fake.round_trips} round-trips")
+        assert harness.fake.round_trips <= 2
+
+        only_client = core.get_bookings_with_details(date(2025, 3, 1), date(2025, 3, 31), client_id=3)
+        assert only_client and all(b['client_id'] == 3 for b in only_client)
+
+        try:
+            core.get_bookings_with_details(date(2025, 3, 1), date(2025, 3, 31), max_bookings=10)
+            assert False, 'expected ValueError'
+        except ValueError:
+            pass
+
+    print("✅ Bulk prefetch reads add-ons with their bookings")
+
+
+def test_zip_run_reports_progress():
+    """A zip run produces one PDF per booking and reports throughput"""
+    print("🧪 Testing bulk invoice zip run...")
+
+    with Harness() as harness:
+        client = make_app().test_client()
+        response = client.post('/bookings/documents/batch', json={
+            'start_date': '2025-03-01', 'end_date': '2025-03-10', 'status': ['confirmed', 'tentative'],
+            'document_type': 'invoice', 'delivery': 'zip'})
+        assert response.status_code == 202, response.get_json()
+        started = response.get_json()
+        expected = sum(1 for b in harness.fake.tables['bookings'] if b['start_time'] < '2025-03-10T22:00')
+        assert started['total'] == expected
+
+        progress = wait_for(client, started['progress_url'])
+        assert progress['status'] == 'completed' and progress['succeeded'] == expected
+        assert progress['documents_per_second'] > 0
+        print(f"   - {progress['succeeded']} invoices in {progress['elapsed_seconds']}s "
+              f"({progress['documents_per_second']}/s)")
+
+        archive = client.get(started['download_url'])
+        assert archive.status_code == 200
+        with zipfile.ZipFile(io.BytesIO(archive.data)) as zipped:
+            names = zipped.namelist()
+            assert len(names) == len(set(names)) == expected
+            assert zipped.read(names[0]).startswith(b'%PDF')
+
+        assert client.post('/bookings/documents/batch', json={'start_date': 'soon'}).status_code == 400
+
+    print("✅ Zip runs produce one PDF per booking")
+
+
+def test_email_run_records_failures():
+    """An email run queues one message per booking and records bookings without an address"""
+    sent = []
+    original_send = bookings_module.send_email
+    try:
+        bookings_module.send_email = lambda to, subject, html, text=None, attachments=None: sent.append(
+            (to, attachments[0][0])) or True
+        with Harness():
+            client = make_app().test_client()
+            started = client.post('/bookings/documents/batch', json={
+                'start_date': '2025-03-01', 'end_date': '2025-03-31', 'document_type': 'quotation',
+                'delivery': 'email'}).get_json()
+            progress = wait_for(client, started['progress_url'])
+            no_email = [b for b in core.get_bookings_with_details(date(2025, 3, 1), date(2025, 3, 31), ['confirmed'])
+                        if not b['client'].get('email')]
+            assert progress['failed'] == len(no_email) > 0
+            assert progress['delivered'] == len(sent) == progress['total'] - len(no_email)
+            assert 'download_url' not in progress
+    finally:
+        bookings_module.send_email = original_send
+
+
+def test_failed_booking_does_not_stop_run():
+    def render(booking):
+        if booking['id'] == 2:
+            raise RuntimeError('boom')
+        return f"doc_{booking['id']}.pdf", b'%PDF'
+
+    job = DocumentBatchJob([{'id': i} for i in range(1, 6)], render, workers=2)
+    job.run()
+    progress = job.progress()
+    assert progress['status'] == 'completed' and progress['succeeded'] == 4
+    assert progress['failures'] == [{'booking_id': 2, 'error': 'boom'}]
+
+
+if __name__ == "__main__":
+    test_prefetch_uses_few_queries()
+    test_zip_run_reports_progress()
+    test_email_run_records_failures()
+    test_failed_booking_does_not_stop_run()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Test the PDF document service - verifies that documents are cached by a hash
+of the fields they print, that repeat downloads are served from the cache,
+that a booking write drops its cached quotations, that concurrent requests
+share one render and that the process pool produces the same documents
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import core
+from routes.bookings import quotation_payload
+from utils.document_service import DocumentCache, DocumentService, document_key
+from utils.pdf_documents import TEMPLATE_VERSIONS, monthly_summary_payload
+from fake_supabase import FakeSupabase
+
+NOW = datetime(2025, 3, 3, 9, 30)
+
+BOOKING = {
+    'id': 12, 'title': 'Board Meeting', 'client_name': 'Acme', 'contact_person': 'Jane Moyo',
+    'room_name': 'Boardroom', 'start_time': '2025-03-10T08:00:00+00:00', 'end_time': '2025-03-10T12:00:00+00:00',
+    'attendees': 12, 'duration_hours': 4, 'room_price': 400.0, 'total_addons_price': 50.0,
+    'subtotal': 450.0, 'tax_amount': 67.5, 'total_price': 517.5, 'notes': 'Projector please'
+}
+
+MONTHLY = {
+    'month_name': 'March 2025',
+    'summary': {'total_events': 40, 'confirmed_events': 30, 'tentative_events': 10, 'cancelled_events': 0,
+                'total_revenue': 12000.0, 'total_attendees': 800, 'conversion_rate': 75.0,
+                'average_event_value': 400.0, 'days_in_month': 31},
+    'top_rooms': [(f'Room {i}', {'events': 10 - i, 'confirmed': 5, 'revenue': 1000.0 * i}) for i in range(12)],
+    'top_clients': [(f'Client {i}', {'events': 3, 'confirmed': 2, 'revenue': 300.0}) for i in range(5)],
+    'weekly_summaries': {}
+}
+
+
+def quotation(booking):
+    return quotation_payload(booking, NOW, NOW + timedelta(days=30))
+
+
+def test_key_follows_printed_fields():
+    """Only printed fields and the template version change a document's key"""
+    print("🧪 Testing document keys...")
+
+    key = document_key('quotation', quotation(BOOKING))
+    assert key == document_key('quotation', quotation(dict(BOOKING)))
+    assert key == document_key('quotation', quotation({**BOOKING, 'notes': 'No projector'}))
+    assert key != document_key('quotation', quotation({**BOOKING, 'total_price': 600.0}))
+    assert key != document_key('quotation', quotation_payload(BOOKING, NOW + timedelta(days=1), NOW + timedelta(days=31)))
+
+    original = TEMPLATE_VERSIONS['quotation']
+    try:
+        TEMPLATE_VERSIONS['quotation'] = original + 1
+        assert key != document_key('quotation', quotation(BOOKING))
+    finally:
+        TEMPLATE_VERSIONS['quotation'] = original
+
+    print("✅ Keys depend on printed fields and template version")
+
+
+def test_repeat_downloads_hit_cache_and_writes_invalidate():
+    """The second download is a cache hit; a booking write removes the cached copy"""
+    print("🧪 Testing document cache...")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        service = DocumentService(DocumentCache(cache_dir), workers=0)
+        original_service, original_client = core.document_service, core.supabase_admin
+        rollup_available = core.DAILY_ROLLUP_TABLE_AVAILABLE
+        try:
+            core.document_service = service
+            core.supabase_admin = FakeSupabase({'bookings': [dict(BOOKING)]})
+            core.DAILY_ROLLUP_TABLE_AVAILABLE = False
+
+            first = core.render_document_pdf('quotation', quotation(BOOKING), booking_id=12)
+            second = core.render_document_pdf('quotation', quotation(BOOKING), booking_id=12)
+            assert first.startswith(b'%PDF') and second == first
+            assert service.counters['renders'] == 1 and service.counters['hits'] == 1
+
+            core.render_document_pdf('monthly_summary', monthly_summary_payload(MONTHLY))
+            assert service.cache.stats()['files'] == 2
+
+            # A repriced booking renders a new document; the write drops the booking's copies
+            repriced = {**BOOKING, 'total_price': 600.0}
+            third = core.render_document_pdf('quotation', quotation(repriced), booking_id=12)
+            assert third != first and service.counters['renders'] == 3
+            core.booking_changed(BOOKING, repriced)
+            assert service.cache.stats()['files'] == 1  # only the report is left
+            assert service.counters['invalidations'] == 1
+        finally:
+            core.document_service, core.supabase_admin = original_service, original_client
+            core.DAILY_ROLLUP_TABLE_AVAILABLE = rollup_available
+
+    print("✅ Repeat downloads are served from the cache")
+
+
+def test_concurrent_requests_share_one_render():
+    """Requests for the same document while it renders wait for that render"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        service = DocumentService(DocumentCache(cache_dir), workers=0)
+        calls = []
+
+        def slow_render(kind, payload):
+            calls.append(kind)
+            time.sleep(0.2)
+            return b'%PDF-fake'
+
+        service._render = slow_render
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(service.render('quotation', {'id': 1}, 'booking-1')))
+                   for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert results == [b'%PDF-fake'] * 5
+        assert len(calls) == 1
+
+
+def test_process_pool_renders_documents():
+    """The worker pool renders the same multi-page document as an inline render"""
+    print("🧪 Testing the PDF process pool...")
+
+    payload = monthly_summary_payload({**MONTHLY, 'top_rooms': MONTHLY['top_rooms'] * 10})
+    with tempfile.TemporaryDirectory() as cache_dir:
+        service = DocumentService(DocumentCache(cache_dir), workers=1)
+        try:
+            started = time.perf_counter()
+            content = service.render('monthly_summary', payload)
+            print(f"   - pooled render (including worker start) in {(time.perf_counter() - started) * 1000:.0f} ms")
+            assert content.startswith(b'%PDF')
+            assert service.counters['inline'] == 0 and service.counters['renders'] == 1
+
+            started = time.perf_counter()
+            assert service.render('monthly_summary', payload) == content
+            print(f"   - cached download in {(time.perf_counter() - started) * 1000:.2f} ms")
+        finally:
+            service.shutdown()
+
+    print("✅ PDFs render in the process pool")
+
+
+if __name__ == "__main__":
+    test_key_follows_printed_fields()
+    test_repeat_downloads_hit_cache_and_writes_invalidate()
+    test_concurrent_requests_share_one_render()
+    test_process_pool_renders_documents()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Test the email outbox against a local SMTP stand-in - verifies that queued
+messages go out over one session per batch, that failures back off and
+retry, and that send_email returns without waiting on the mail server
+"""
+
+import os
+import sys
+import time
+import email
+import smtplib
+import tempfile
+import threading
+import socketserver
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import core
+from utils.email_outbox import EmailOutbox
+
+
+class SMTPStandInHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib: EHLO, MAIL, RCPT, DATA, RSET, NOOP, QUIT"""
+
+    def reply(self, line):
+        self.wfile.write((line + '\r\n').encode())
+
+    def handle(self):
+        server = self.server
+        server.sessions += 1
+        if server.delay:
+            time.sleep(server.delay)
+        self.reply('220 localhost SMTP stand-in')
+        recipients = []
+        while True:
+            line = self.rfile.readline().decode().strip()
+            if not line:
+                return
+            command = line.split(' ', 1)[0].upper()
+            if command in ('EHLO', 'HELO'):
+                self.reply('250-localhost')
+                self.reply('250 8BITMIME')
+            elif command == 'MAIL':
+                recipients = []
+                self.reply('250 OK')
+            elif command == 'RCPT':
+                if 'reject' in line.lower():
+                    self.reply('550 Mailbox unavailable')
+                else:
+                    recipients.append(line.split(':', 1)[1].strip(' <>'))
+                    self.reply('250 OK')
+            elif command == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                data = []
+                while True:
+                    data_line = self.rfile.readline()
+                    if data_line in (b'.\r\n', b''):
+                        break
+                    data.append(data_line)
+                server.messages.append((recipients, email.message_from_bytes(b''.join(data))))
+                self.reply('250 Queued')
+            elif command == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('250 OK')
+
+
+class SMTPStandIn(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, delay=0):
+        super().__init__(('127.0.0.1', 0), SMTPStandInHandler)
+        self.sessions = 0
+        self.messages = []
+        self.delay = delay
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    def connect(self):
+        return smtplib.SMTP('127.0.0.1', self.server_address[1], timeout=10)
+
+
+def test_batch_uses_one_session():
+    """Five queued messages, one with a PDF attachment, are sent over a single SMTP session"""
+    print("🧪 Testing outbox batch delivery...")
+
+    server = SMTPStandIn()
+    with tempfile.TemporaryDirectory() as spool:
+        outbox = EmailOutbox(os.path.join(spool, 'outbox.sqlite3'), server.connect, 'venue@example.com')
+        for i in range(4):
+            outbox.enqueue(f'client{i}@example.com', f'Booking #{i}', f'<p>Booking {i}</p>', f'Booking {i}')
+        outbox.enqueue('client4@example.com', 'Quotation', '<p>Attached</p>',
+                       attachments=[('quotation.pdf', b'%PDF-1.4 test', 'application/pdf')])
+
+        assert outbox.drain() == 5
+        stats = outbox.stats()
+    server.shutdown()
+
+    print(f"   - {len(server.messages)} messages over {server.sessions} SMTP session(s)")
+    assert server.sessions == 1 and stats['sessions'] == 1
+    assert stats['queued'] == 0 and stats['by_status'] == {'sent': 5}
+    attachment = [part for part in server.messages[-1][1].walk() if part.get_filename()][0]
+    assert attachment.get_filename() == 'quotation.pdf' and attachment.get_payload(decode=True) == b'%PDF-1.4 test'
+
+    print("✅ Batch delivered over one session")
+
+
+def test_failures_back_off_and_retry():
+    """An unreachable server reschedules the batch; a refused recipient fails alone after max_attempts"""
+    print("🧪 Testing outbox retries...")
+
+    server = SMTPStandIn()
+    attempts = {'down': True}
+
+    def connect():
+        if attempts['down']:
+            raise ConnectionRefusedError('mail server down')
+        return server.connect()
+
+    with tempfile.TemporaryDirectory() as spool:
+        outbox = EmailOutbox(os.path.join(spool, 'outbox.sqlite3'), connect, 'venue@example.com',
+                             max_attempts=3, base_delay=60)
+        outbox.enqueue('client@example.com', 'Confirmation', '<p>Confirmed</p>')
+        outbox.enqueue('reject@example.com', 'Confirmation', '<p>Confirmed</p>')
+
+        now = time.time()
+        assert outbox.drain(now=now) == 0
+        assert outbox.stats()['retried'] == 2
+        attempts['down'] = False
+        assert outbox.drain(now=now + 30) == 0          # still backing off
+        assert outbox.drain(now=now + 70) == 1          # first retry after ~60s
+        assert outbox.drain(now=now + 300) == 0         # refused again, backoff doubled
+        stats = outbox.stats()
+    server.shutdown()
+
+    assert [recipients for recipients, _ in server.messages] == [['client@example.com']]
+    assert stats['by_status'] == {'sent': 1, 'failed': 1} and stats['failed'] == 1
+
+    print("✅ Failures back off and give up after max_attempts")
+
+
+def test_send_email_does_not_wait_for_smtp():
+    """send_email returns immediately while a slow server is handled by the background worker"""
+    print("🧪 Testing send_email latency with a slow mail server...")
+
+    server = SMTPStandIn(delay=1.0)
+    original_outbox, original_enabled = core.email_outbox, core.EMAIL_OUTBOX_ENABLED
+    with tempfile.TemporaryDirectory() as spool:
+        outbox = EmailOutbox(os.path.join(spool, 'outbox.sqlite3'), server.connect, 'venue@example.com',
+                             poll_interval=0.1)
+        try:
+            core.email_outbox, core.EMAIL_OUTBOX_ENABLED = outbox, True
+            started = time.perf_counter()
+            assert core.send_email('client@example.com', 'Booking Confirmation #1', '<p>Confirmed</p>')
+            elapsed = time.perf_counter() - started
+            print(f"   - send_email returned in {elapsed * 1000:.1f} ms")
+            assert elapsed < 0.5
+
+            deadline = time.time() + 10
+            while not server.messages and time.time() < deadline:
+                time.sleep(0.05)
+            assert len(server.messages) == 1
+        finally:
+            outbox.stop()
+            core.email_outbox, core.EMAIL_OUTBOX_ENABLED = original_outbox, original_enabled
+    server.shutdown()
+
+    print("✅ Email is delivered in the background")
+
+
+def test_startup_sends_mail_queued_before_a_restart():
+    """Messages spooled by a previous process go out once the new process starts its outbox"""
+    print("🧪 Testing outbox start after a restart...")
+
+    server = SMTPStandIn()
+    original_outbox, original_enabled = core.email_outbox, core.EMAIL_OUTBOX_ENABLED
+    with tempfile.TemporaryDirectory() as spool:
+        path = os.path.join(spool, 'outbox.sqlite3')
+        EmailOutbox(path, server.connect, 'venue@example.com').enqueue(
+            'client@example.com', 'Booking Confirmation #2', '<p>Confirmed</p>')
+        outbox = EmailOutbox(path, server.connect, 'venue@example.com', poll_interval=0.1)
+        try:
+            core.email_outbox, core.EMAIL_OUTBOX_ENABLED = outbox, True
+            assert core.start_email_outbox()
+            deadline = time.time() + 10
+            while not server.messages and time.time() < deadline:
+                time.sleep(0.05)
+            assert len(server.messages) == 1
+        finally:
+            outbox.stop()
+            core.email_outbox, core.EMAIL_OUTBOX_ENABLED = original_outbox, original_enabled
+    server.shutdown()
+
+    print("✅ Queued mail is sent at startup")
+
+
+if __name__ == "__main__":
+    test_batch_uses_one_session()
+    test_failures_back_off_and_retry()
+    test_send_email_does_not_wait_for_smtp()
+    test_startup_sends_mail_queued_before_a_restart()
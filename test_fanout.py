@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Test concurrent page reads - verifies that independent calls run side by side,
+that a call which fails or overruns its deadline falls back without holding
+up the rest, and that worker threads share the request's identity map and
+query trace
+"""
+
+import os
+import sys
+import time
+from datetime import datetime, timedelta, UTC
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask, g, request, session
+from flask_login import current_user
+import core
+import routes.api as api_module
+from utils.fanout import FanOutExecutor
+from utils.identity_map import IdentityMapClient
+from utils.query_budget import InstrumentedClient, current_query_trace
+from fake_supabase import FakeSupabase
+
+
+def sleeper(seconds, value):
+    def call():
+        time.sleep(seconds)
+        return value
+    return call
+
+
+def test_latency_tracks_the_slowest_call():
+    print("🧪 Testing fan-out latency...")
+    executor = FanOutExecutor(workers=4, timeout=5)
+    try:
+        results = executor.run({f'card{index}': sleeper(0.2, index) for index in range(4)})
+        assert dict(results) == {'card0': 0, 'card1': 1, 'card2': 2, 'card3': 3}
+        assert not results.partial
+        print(f"   - 4 x 200 ms calls in {results.elapsed * 1000:.0f} ms")
+        assert results.elapsed < 0.5
+    finally:
+        executor.shutdown()
+    print("✅ Independent calls run concurrently")
+
+
+def test_timeouts_and_failures_fall_back():
+    executor = FanOutExecutor(workers=4, timeout=5)
+
+    def broken():
+        raise RuntimeError('connection reset')
+
+    try:
+        started = time.perf_counter()
+        results = executor.run({'fast': sleeper(0.05, 'ok'), 'slow': sleeper(1.0, 'late'), 'broken': broken},
+                               fallbacks={'slow': [], 'broken': {}}, timeout={'slow': 0.2})
+        assert time.perf_counter() - started < 0.6
+        assert results['fast'] == 'ok' and results['slow'] == [] and results['broken'] == {}
+        assert results.timed_out == ['slow'] and 'connection reset' in results.failed['broken']
+        assert executor.stats()['timeouts'] == 1 and executor.stats()['failures'] == 1
+    finally:
+        executor.shutdown()
+
+
+def test_workers_share_the_request_scope():
+    """Worker queries are traced with the request and served from its identity map"""
+    fake = FakeSupabase({'rooms': [{'id': 1, 'name': 'Boardroom'}], 'clients': [{'id': 3, 'company_name': 'Acme'}]})
+    client = IdentityMapClient(InstrumentedClient(fake))
+    executor = FanOutExecutor(workers=4, timeout=5)
+
+    def nested():
+        # A fan-out inside a worker runs inline instead of waiting on its own pool
+        return dict(executor.run({'a': lambda: 1, 'b': lambda: 2}))
+
+    try:
+        with Flask(__name__).test_request_context('/dashboard'):
+            client.table('rooms').select('*').execute()
+            results = executor.run({
+                'rooms': lambda: client.table('rooms').select('*').execute().data,
+                'clients': lambda: client.table('clients').select('*').execute().data,
+                'nested': nested
+            })
+            assert results['rooms'] == [{'id': 1, 'name': 'Boardroom'}]
+            assert results['nested'] == {'a': 1, 'b': 2}
+            assert fake.round_trips == 2  # rooms once, clients once
+            assert sorted(query[0] for query in current_query_trace().queries) == ['clients', 'rooms']
+        assert executor.stats()['inline'] == 2
+    finally:
+        executor.shutdown()
+
+
+def test_workers_see_the_request_session_and_user():
+    """Calls on pool threads run in a copy of the request context with the request's g"""
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = 'test'
+    executor = FanOutExecutor(workers=4, timeout=5)
+
+    def context():
+        return request.path, session.get('user_email'), current_user.username
+
+    try:
+        with app.test_request_context('/bookings/7'):
+            session['user_email'] = 'ann@example.com'
+            g._login_user = type('User', (), {'username': 'ann', 'is_authenticated': True})()
+            results = executor.run({'first': context, 'second': context})
+        assert not results.partial, results.failed
+        assert results['first'] == results['second'] == ('/bookings/7', 'ann@example.com', 'ann')
+    finally:
+        executor.shutdown()
+
+
+def test_real_app_request_survives_a_fan_out():
+    """Workers must not run the app's teardown handlers on the request that started them"""
+    from app import app
+    from utils.identity_map import current_identity_map
+
+    executor = FanOutExecutor(workers=4, timeout=5)
+    try:
+        with app.test_request_context('/bookings/7?view=full'):
+            identity_map = current_identity_map()
+            results = executor.run({
+                'path': lambda: request.path,
+                'same_map': lambda: current_identity_map() is identity_map
+            })
+            assert results['path'] == '/bookings/7' and results['same_map']
+            assert g._identity_map is identity_map and current_identity_map() is identity_map
+            assert request.args.get('view') == 'full'
+            assert request.environ.get('werkzeug.request') is request._get_current_object()
+    finally:
+        executor.shutdown()
+
+
+def test_dashboard_lock_wait_is_bounded():
+    """A timed-out rebuild still holding the lock does not block the next dashboard load"""
+    fake = FakeSupabase({'rooms': [{'id': 1, 'name': 'Boardroom'}], 'clients': [{'id': 1}], 'bookings': []})
+    originals = core.supabase_admin, core.DASHBOARD_STATS_LOCK_WAIT_SECONDS
+    core._dashboard_stats_lock.acquire()
+    try:
+        core.supabase_admin = fake
+        core.DASHBOARD_STATS_LOCK_WAIT_SECONDS = 0.1
+        core.invalidate_reference_data()
+        started = time.perf_counter()
+        stats = core.get_dashboard_stats()
+        assert time.perf_counter() - started < 1
+        assert stats['total_rooms'] == 1 and stats['total_clients'] == 1
+    finally:
+        core._dashboard_stats_lock.release()
+        core.supabase_admin, core.DASHBOARD_STATS_LOCK_WAIT_SECONDS = originals
+        core.invalidate_reference_data()
+
+
+def test_dashboard_stats_api_uses_fan_out():
+    now = datetime.now(UTC)
+    fake = FakeSupabase({
+        'bookings': [
+            {'id': 1, 'status': 'confirmed', 'total_price': 100.0, 'start_time': (now - timedelta(days=2)).isoformat()},
+            {'id': 2, 'status': 'confirmed', 'total_price': 50.0, 'start_time': now.isoformat()},
+        ],
+        'rooms': [{'id': 1, 'name': 'Boardroom'}, {'id': 2, 'name': 'Hall'}]
+    })
+    app = Flask(__name__)
+    app.config['LOGIN_DISABLED'] = True
+    app.config['SECRET_KEY'] = 'test'
+    app.register_blueprint(api_module.api_bp)
+    original = api_module.supabase_admin
+    try:
+        api_module.supabase_admin = fake
+        payload = app.test_client().get('/api/dashboard/stats').get_json()
+    finally:
+        api_module.supabase_admin = original
+    assert payload['weeklyRevenue'] == 150 and payload['activeRooms'] == 2
+    assert fake.round_trips == 3 and not payload['partial']
+
+    # A read that fails is counted as empty instead of failing the whole response
+    class NoRooms:
+        def table(self, table_name):
+            if table_name == 'rooms':
+                raise RuntimeError('connection reset')
+            return fake.table(table_name)
+
+    try:
+        api_module.supabase_admin = NoRooms()
+        response = app.test_client().get('/api/dashboard/stats')
+    finally:
+        api_module.supabase_admin = original
+    payload = response.get_json()
+    assert response.status_code == 200 and payload['partial']
+    assert payload['weeklyRevenue'] == 150 and payload['activeRooms'] == 0
+
+
+if __name__ == "__main__":
+    test_latency_tracks_the_slowest_call()
+    test_timeouts_and_failures_fall_back()
+    test_workers_share_the_request_scope()
+    test_workers_see_the_request_session_and_user()
+    test_real_app_request_survives_a_fan_out()
+    test_dashboard_lock_wait_is_bounded()
+    test_dashboard_stats_api_uses_fan_out()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Test the request-scoped identity map - verifies that repeated reads within a
+request are served locally (by query fingerprint and by primary key), that
+writes drop what the request holds for the written table, and that nothing
+is kept outside a request or across requests
+"""
+
+import os
+import sys
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+import core
+from utils.identity_map import IdentityMapClient, close_identity_map, get_identity_map_stats
+from fake_supabase import FakeSupabase
+
+
+def make_fake():
+    return FakeSupabase({
+        'rooms': [{'id': 1, 'name': 'Boardroom', 'capacity': 12}, {'id': 2, 'name': 'Hall', 'capacity': 200}],
+        'bookings': [{'id': 7, 'room_id': 1, 'status': 'confirmed', 'title': 'Strategy Day'}]
+    })
+
+
+def test_repeated_reads_are_served_locally():
+    """The same select, or a primary-key read of a row already loaded, costs no round trip"""
+    print("🧪 Testing request identity map...")
+    fake = make_fake()
+    client = IdentityMapClient(fake)
+    app = Flask(__name__)
+
+    with app.test_request_context('/bookings/new', method='POST'):
+        rooms = client.table('rooms').select('*').order('name').execute().data
+        rooms[0]['name'] = 'Changed'
+        again = client.table('rooms').select('*').order('name').execute().data
+        assert again[0]['name'] == 'Boardroom'
+        assert fake.round_trips == 1
+
+        # Primary-key reads are answered from rows the list query returned
+        room = client.table('rooms').select('*').eq('id', 2).limit(1).execute().data
+        assert room == [{'id': 2, 'name': 'Hall', 'capacity': 200}]
+        assert fake.round_trips == 1
+
+        # Filters applied without reassigning the builder are part of the fingerprint
+        query = client.table('rooms').select('*')
+        query.eq('capacity', 200)
+        assert [row['id'] for row in query.execute().data] == [2]
+        assert fake.round_trips == 2
+
+        report = close_identity_map('POST /bookings/new')
+    assert report == {'reads': 4, 'served': 2, 'round_trips': 2, 'writes': 0, 'served_by_table': {'rooms': 2}}
+    assert get_identity_map_stats()['served'] >= 2
+    print("✅ Repeated reads are served from the identity map")
+
+
+def test_writes_invalidate_the_table_and_embedding_reads():
+    fake = make_fake()
+    client = IdentityMapClient(fake)
+    app = Flask(__name__)
+
+    with app.test_request_context('/bookings/7/edit', method='POST'):
+        client.table('bookings').select('*, room:rooms(*)').eq('id', 7).execute()
+        client.table('rooms').select('*').execute()
+        client.table('bookings').select('*').eq('id', 7).execute()
+        assert fake.round_trips == 3
+
+        client.table('rooms').update({'name': 'Renamed'}).eq('id', 1).execute()
+        assert fake.round_trips == 4
+        # Reads of rooms, and bookings embedding rooms, go back to the database; plain bookings reads do not
+        assert client.table('rooms').select('*').execute().data[0]['name'] == 'Renamed'
+        client.table('bookings').select('*, room:rooms(*)').eq('id', 7).execute()
+        client.table('bookings').select('*').eq('id', 7).execute()
+        assert fake.round_trips == 6
+
+
+def test_no_map_outside_or_across_requests():
+    fake = make_fake()
+    client = IdentityMapClient(fake)
+    client.table('rooms').select('*').execute()
+    client.table('rooms').select('*').execute()
+    assert fake.round_trips == 2
+
+    app = Flask(__name__)
+    for _ in range(2):
+        with app.test_request_context('/rooms'):
+            client.table('rooms').select('*').execute()
+    assert fake.round_trips == 4
+
+    disabled = IdentityMapClient(fake, enabled=False)
+    with app.test_request_context('/rooms'):
+        disabled.table('rooms').select('*').execute()
+        disabled.table('rooms').select('*').execute()
+    assert fake.round_trips == 6
+
+
+def test_supabase_select_goes_through_the_map():
+    fake = make_fake()
+    original = core.supabase_admin
+    try:
+        core.supabase_admin = IdentityMapClient(fake)
+        with Flask(__name__).test_request_context('/bookings/7'):
+            first = core.supabase_select('bookings', filters=[('id', 'eq', 7)])
+            second = core.supabase_select('bookings', filters=[('id', 'eq', 7)])
+            assert first == second and fake.round_trips == 1
+    finally:
+        core.supabase_admin = original
+
+
+if __name__ == "__main__":
+    test_repeated_reads_are_served_locally()
+    test_writes_invalidate_the_table_and_embedding_reads()
+    test_no_map_outside_or_across_requests()
+    test_supabase_select_goes_through_the_map()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Test buffered audit/activity logging - verifies that logging on the request
+path makes no Supabase round-trips, that a multi-field edit is written as one
+multi-row insert, that overflow drops and counts the oldest rows, and that
+stopping the writer flushes what is still queued
+"""
+
+import os
+import sys
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+import core
+import utils.logging as activity_logging
+from utils.log_buffer import BufferedLogWriter
+from fake_supabase import FakeSupabase
+
+
+def test_edit_audit_rows_are_one_insert():
+    """Per-field audit rows plus the summary cost nothing on the request and one insert on flush"""
+    print("🧪 Testing batched booking audit trail...")
+
+    fake = FakeSupabase({'booking_audit_trail': []})
+    original_client, original_writer = core.supabase_admin, core.audit_log_writer
+    app = Flask(__name__)
+    app.config['LOGIN_DISABLED'] = True
+    try:
+        core.supabase_admin = fake
+        # Long interval so only the explicit flush writes
+        core.audit_log_writer = BufferedLogWriter(core.insert_log_rows, flush_interval=60)
+        changes = [('title', 'Board meeting', 'Board review'), ('attendees', 10, 14), ('room_id', 1, 2),
+                   ('total_price', 100.0, 140.0), ('notes', '', 'Projector')]
+        with app.test_request_context('/bookings/7/edit', headers={'User-Agent': 'pytest'}):
+            for field, old, new in changes:
+                core.log_booking_change(7, 'updated', field, old, new, f"Changed {field}")
+            core.log_booking_change(7, 'updated', change_summary=f"Updated {len(changes)} fields")
+        print(f"   - {fake.round_trips} round-trip(s) while handling the edit")
+        assert fake.round_trips == 0
+
+        assert core.audit_log_writer.flush() == len(changes) + 1
+        rows = fake.tables['booking_audit_trail']
+        print(f"   - {len(rows)} audit rows written in {fake.round_trips} insert(s)")
+        assert fake.round_trips == 1
+        assert [row['field_changed'] for row in rows] == [field for field, _, _ in changes] + [None]
+        assert rows[1]['old_value'] == '10' and rows[1]['new_value'] == '14' and rows[0]['user_agent'] == 'pytest'
+    finally:
+        core.audit_log_writer.stop()
+        core.supabase_admin, core.audit_log_writer = original_client, original_writer
+
+    print("✅ Edit audit trail written as one insert")
+
+
+def test_overflow_fallback_and_stop():
+    """A full queue drops the oldest rows, a rejected batch falls back per row, stop flushes the rest"""
+    print("🧪 Testing log buffer overflow and shutdown flush...")
+
+    written = []
+
+    def write_batch(table, rows):
+        if any(row.get('bad') for row in rows):
+            raise ValueError('column "bad" does not exist')
+        written.extend(row['n'] for row in rows)
+
+    writer = BufferedLogWriter(write_batch, batch_size=4, max_queue=6, flush_interval=60)
+    for n in range(10):
+        writer.enqueue('user_activity_log', {'n': n, 'bad': n == 7})
+    stats = writer.stats()
+    assert stats['queued'] == 6 and stats['dropped'] == 4 and stats['high_water'] == 6
+
+    writer.stop()
+    stats = writer.stats()
+    print(f"   - written {written}, dropped {stats['dropped']}, failed {stats['failed']}")
+    assert written == [4, 5, 6, 8, 9]
+    assert stats['queued'] == 0 and stats['failed'] == 1 and stats['written'] == 5
+    assert not stats['worker_running']
+
+    print("✅ Overflow is counted and shutdown flushes the buffer")
+
+
+def test_detail_page_sees_queued_edit_rows():
+    """The audit trail read flushes an edit's queued rows; activity rows go through core's client"""
+    print("🧪 Testing audit trail read after an edit...")
+
+    fake = FakeSupabase({'booking_audit_trail': [], 'user_activity_log': []})
+    original_client, original_writer = core.supabase_admin, core.audit_log_writer
+    original_activity_writer = activity_logging.activity_log_writer
+    app = Flask(__name__)
+    app.config['LOGIN_DISABLED'] = True
+    try:
+        core.supabase_admin = fake
+        core.audit_log_writer = BufferedLogWriter(core.insert_log_rows, flush_interval=60)
+        with app.test_request_context('/bookings/7/edit'):
+            core.log_booking_change(7, 'updated', 'title', 'Board meeting', 'Board review', 'Changed title')
+        assert fake.tables['booking_audit_trail'] == []
+
+        trail = core.get_booking_audit_trail(7)
+        assert len(trail) == 1 and trail[0]['field_changed'] == 'title'
+        trips = fake.round_trips
+        core.get_booking_audit_trail(7)
+        assert fake.round_trips - trips == 1  # nothing queued, nothing flushed
+
+        activity_logging.activity_log_writer = BufferedLogWriter(
+            activity_logging.activity_log_writer.write_batch, flush_interval=60)
+        activity_logging.activity_log_writer.enqueue('user_activity_log', {'activity_type': 'view_booking'})
+        activity_logging.activity_log_writer.flush()
+        assert [row['activity_type'] for row in fake.tables['user_activity_log']] == ['view_booking']
+    finally:
+        core.audit_log_writer.stop()
+        activity_logging.activity_log_writer.stop()
+        core.supabase_admin, core.audit_log_writer = original_client, original_writer
+        activity_logging.activity_log_writer = original_activity_writer
+
+    print("✅ The detail page shows the edit's audit rows")
+
+
+if __name__ == "__main__":
+    test_edit_audit_rows_are_one_insert()
+    test_overflow_fallback_and_stop()
+    test_detail_page_sees_queued_edit_rows()
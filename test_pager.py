@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Test keyset pagination - verifies that bulk readers walk a table page by page
+past the PostgREST row cap, that a non-unique start_time key neither skips nor
+repeats rows (even when more rows share one value than fit on a page), and
+that the dashboard recompute and client directory see every row
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta, UTC
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import core
+from utils.pager import iter_keyset
+from fake_supabase import FakeSupabase
+
+BASE = datetime(2025, 3, 3, 9, 0, tzinfo=UTC)
+
+
+def test_unique_and_composite_keys():
+    """Pages follow the key; ties on start_time are walked by id"""
+    print("🧪 Testing keyset pager...")
+
+    rows = [{'id': i, 'start_time': (BASE + timedelta(hours=i // 7)).isoformat()} for i in range(1, 251)]
+    # 40 bookings at the same moment - more than one page of ties
+    rows += [{'id': 1000 + i, 'start_time': (BASE + timedelta(hours=3)).isoformat()} for i in range(40)]
+    fake = FakeSupabase({'bookings': list(reversed(rows))})
+
+    stats = {}
+    by_id = list(iter_keyset(lambda: fake.table('bookings').select('id, start_time'), page_size=25, stats=stats))
+    assert [row['id'] for row in by_id] == sorted(row['id'] for row in rows)
+    print(f"   - {stats['rows']} rows by id in {stats['pages']} pages")
+    assert stats['pages'] == len(rows) // 25 + 1
+
+    by_start = list(iter_keyset(lambda: fake.table('bookings').select('id, start_time'), key='start_time',
+                                page_size=25, unique=False))
+    expected = sorted(rows, key=lambda row: (row['start_time'], row['id']))
+    assert [row['id'] for row in by_start] == [row['id'] for row in expected]
+
+    # Filters from build_query apply on every page
+    later = BASE + timedelta(hours=20)
+    filtered = list(iter_keyset(lambda: fake.table('bookings').select('id, start_time').gte('start_time', later.isoformat()),
+                                key='start_time', page_size=10, unique=False))
+    assert len(filtered) == len([row for row in rows if row['start_time'] >= later.isoformat()])
+
+    print("✅ Keyset pages are complete and free of repeats")
+
+
+def test_bulk_readers_are_complete():
+    """Dashboard recompute and the client directory read past one page"""
+    print("🧪 Testing bulk readers over several pages...")
+
+    bookings = [{'id': i, 'room_id': 1, 'status': 'confirmed', 'total_price': 10.0,
+                 'start_time': (BASE - timedelta(days=i % 30)).isoformat()} for i in range(1, 121)]
+    clients = [{'id': i, 'company_name': None if i % 10 == 0 else f'Company {i:03d}'} for i in range(1, 58)]
+    fake = FakeSupabase({'bookings': bookings, 'clients': clients})
+    original_client, original_page_size = core.supabase_admin, core.SUPABASE_PAGE_SIZE
+    try:
+        core.supabase_admin, core.SUPABASE_PAGE_SIZE = fake, 20
+        assert core.recompute_dashboard_stats()
+        assert sum(core.dashboard_stats.counts.values()) == 120
+
+        directory = core.get_all_clients_from_db()
+        assert len(directory) == 57
+        assert [c['company_name'] for c in directory[:2]] == ['Company 001', 'Company 002']
+        assert directory[-1]['company_name'] is None
+    finally:
+        core.supabase_admin, core.SUPABASE_PAGE_SIZE = original_client, original_page_size
+        core.dashboard_stats.stale = True
+
+    print("✅ Bulk readers see every row")
+
+
+def test_legacy_app_readers_read_past_the_row_cap():
+    """The reports overview and client directory in app.py see rows beyond PostgREST's cap"""
+    print("🧪 Testing app.py bulk readers against a capped client...")
+    import app as app_module
+
+    now = datetime.now(UTC)
+    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    bookings = [{'id': i, 'client_id': i % 5 + 1, 'room_id': 1, 'total_price': 10.0,
+                 'status': 'cancelled' if i % 10 == 0 else 'confirmed',
+                 'start_time': (month_start + timedelta(minutes=i)).isoformat(),
+                 'end_time': (month_start + timedelta(minutes=i + 30)).isoformat()} for i in range(1, 61)]
+    clients = [{'id': i, 'company_name': f'Company {i}', 'contact_person': f'Person {i}'} for i in range(1, 6)]
+    fake = FakeSupabase({'bookings': bookings, 'clients': clients, 'rooms': [{'id': 1, 'status': 'available'}],
+                         'booking_addons': []}, max_rows=20)
+
+    def failing_directory(exclude_cancelled=False):
+        raise RuntimeError('view unavailable')
+
+    rendered = {}
+    originals = (app_module.supabase_admin, core.SUPABASE_PAGE_SIZE, app_module.render_template,
+                 app_module.log_user_activity, app_module.get_clients_with_booking_counts)
+    try:
+        app_module.supabase_admin, core.SUPABASE_PAGE_SIZE = fake, 20
+        app_module.render_template = lambda template, **context: rendered.setdefault(template, context)
+        app_module.log_user_activity = lambda *args, **kwargs: None
+        app_module.get_clients_with_booking_counts = failing_directory
+        app_module.app.config['LOGIN_DISABLED'] = True
+        with app_module.app.test_request_context('/reports'):
+            app_module.reports()
+            app_module.clients()
+    finally:
+        (app_module.supabase_admin, core.SUPABASE_PAGE_SIZE, app_module.render_template,
+         app_module.log_user_activity, app_module.get_clients_with_booking_counts) = originals
+        app_module.app.config.pop('LOGIN_DISABLED', None)
+
+    assert rendered['reports/index.html']['stats']['current_month_bookings'] == 54
+    directory = rendered['clients/index.html']['clients']
+    assert sum(client['booking_count'] for client in directory) == 54
+    print("✅ app.py bulk readers see every row")
+
+
+if __name__ == "__main__":
+    test_unique_and_composite_keys()
+    test_bulk_readers_are_complete()
+    test_legacy_app_readers_read_past_the_row_cap()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test the shared PDF theme - verifies that every document builder uses the
+styles built once at import, that rendering leaves the shared styles
+untouched, that images are decoded once, and measures the per-document
+setup cost the registry removes
+"""
+
+import os
+import sys
+import time
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from reportlab.lib import colors
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import TableStyle
+
+from utils.pdf_documents import render_document
+from utils.pdf_theme import THEME
+
+QUOTATION = {
+    'quotation_number': 'Q0012-202503', 'issue_date': '03 March 2025', 'valid_until': '02 April 2025',
+    'client_name': 'Acme', 'contact_person': 'Jane Moyo', 'title': 'Board Meeting', 'room_name': 'Boardroom',
+    'date': '2025-03-10', 'time': '08:00 - 12:00', 'attendees': '12', 'duration': '4 hours',
+    'room_price': 400.0, 'total_addons_price': 50.0, 'subtotal': 450.0, 'tax_amount': 67.5, 'total_price': 517.5
+}
+
+
+def legacy_setup():
+    """What each quotation used to build before drawing anything"""
+    styles = getSampleStyleSheet()
+    ParagraphStyle('CustomTitle', parent=styles['Heading1'], fontSize=24, spaceAfter=30,
+                   textColor=colors.HexColor('#2E8B57'))
+    ParagraphStyle('CustomHeader', parent=styles['Heading2'], fontSize=16, spaceAfter=12,
+                   textColor=colors.HexColor('#1a1a1a'))
+    TableStyle([
+        ('ALIGN', (0,0), (-1,-1), 'LEFT'),
+        ('FONTNAME', (0,0), (0,-1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0,0), (-1,-1), 11),
+        ('ROWBACKGROUNDS', (0,0), (-1,-1), [colors.white, colors.HexColor('#f8f9fa')]),
+        ('GRID', (0,0), (-1,-1), 1, colors.HexColor('#dee2e6')),
+    ])
+    TableStyle([
+        ('BACKGROUND', (0,0), (-1,0), colors.HexColor('#2E8B57')),
+        ('TEXTCOLOR', (0,0), (-1,0), colors.whitesmoke),
+        ('ALIGN', (0,0), (-1,-1), 'CENTER'),
+        ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0,0), (-1,0), 12),
+        ('BOTTOMPADDING', (0,0), (-1,0), 12),
+        ('BACKGROUND', (0,-3), (-1,-1), colors.HexColor('#f8f9fa')),
+        ('FONTNAME', (0,-1), (-1,-1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0,-1), (-1,-1), 12),
+        ('GRID', (0,0), (-1,-1), 1, colors.HexColor('#dee2e6')),
+    ])
+
+
+def theme_setup():
+    styles = THEME.styles
+    styles['CustomTitle'], styles['CustomHeader']
+    THEME.table_style('quotation_details'), THEME.table_style('quotation_pricing')
+
+
+def per_call_ms(function, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - started) * 1000 / repeat
+
+
+def test_rendering_leaves_shared_styles_untouched():
+    """Documents render from the shared theme without changing it"""
+    print("🧪 Testing shared PDF theme...")
+
+    before = {name: list(style.getCommands()) for name, style in THEME.table_styles.items()}
+    title = THEME.styles['CustomTitle']
+    for _ in range(3):
+        assert render_document('quotation', QUOTATION).startswith(b'%PDF')
+    assert {name: list(style.getCommands()) for name, style in THEME.table_styles.items()} == before
+    assert THEME.styles['CustomTitle'] is title and title.fontSize == 24
+
+    assert THEME.logo is THEME.logo
+    assert THEME.logo.getSize()[0] > 0
+
+    print("✅ Shared theme is reused unchanged")
+
+
+def test_setup_cost_benchmark():
+    """Per-document style setup drops from a stylesheet build to dictionary lookups"""
+    print("🧪 Benchmarking per-document PDF setup...")
+
+    legacy_ms = per_call_ms(legacy_setup, 300)
+    theme_ms = per_call_ms(theme_setup, 300)
+    render_ms = per_call_ms(lambda: render_document('quotation', QUOTATION), 20)
+    print(f"   - style setup per document: {legacy_ms:.3f} ms before, {theme_ms:.4f} ms with the theme")
+    print(f"   - full quotation render: {render_ms:.2f} ms "
+          f"(old setup would be {legacy_ms / (render_ms + legacy_ms) * 100:.0f}% of it)")
+    assert theme_ms < legacy_ms
+
+    print("✅ Setup cost measured")
+
+
+if __name__ == "__main__":
+    test_rendering_leaves_shared_styles_untouched()
+    test_setup_cost_benchmark()
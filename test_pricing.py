@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test the pricing engine - verifies the hourly/half-day/full-day rules, that a
+quote with many add-ons is priced from the cached rate table without per-item
+queries, and that a batch of candidate bookings shares one rate table
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import core
+from fake_supabase import FakeSupabase
+
+START = datetime(2025, 3, 3, 9, 0)
+
+ROOMS = [
+    {'id': 1, 'name': 'Boardroom', 'hourly_rate': '50.00', 'half_day_rate': '180.00', 'full_day_rate': '320.00'},
+    {'id': 2, 'name': 'Hall', 'hourly_rate': 120, 'half_day_rate': 400, 'full_day_rate': None},
+]
+ADDONS = [{'id': i, 'name': f'Addon {i}', 'price': f'{i * 5}.00'} for i in range(1, 11)]
+
+
+def with_fake_client(run):
+    fake = FakeSupabase({'rooms': [dict(room) for room in ROOMS], 'addons': [dict(addon) for addon in ADDONS]})
+    original_client = core.supabase_admin
+    try:
+        core.supabase_admin = fake
+        core.invalidate_reference_data()
+        return run(fake)
+    finally:
+        core.supabase_admin = original_client
+        core.invalidate_reference_data()
+
+
+def test_quote_with_ten_addons_needs_no_per_item_queries():
+    """Rates load once per reference-cache lifetime; repeat previews make no round-trips"""
+    print("🧪 Testing pricing engine round-trips...")
+
+    def run(fake):
+        addon_ids = list(range(1, 11))
+        breakdown = core.get_price_breakdown(1, START, START + timedelta(hours=3), addon_ids)
+        first_trips = fake.round_trips
+        print(f"   - first quote with {len(addon_ids)} add-ons: {first_trips} round-trip(s)")
+        assert first_trips == 2  # whole rooms table + whole addons table
+
+        assert breakdown['rate_type'] == 'Hourly Rate' and breakdown['room_rate'] == 150.0
+        assert breakdown['addons_total'] == 275.0 and len(breakdown['addon_items']) == 10
+        assert breakdown['total'] == 425.0 and breakdown['room_name'] == 'Boardroom'
+
+        for _ in range(20):
+            core.calculate_booking_total(1, START, START + timedelta(hours=2), addon_ids)
+        assert fake.round_trips == first_trips
+        assert core.get_rate_table() is core.get_rate_table()
+
+        # Editing an add-on reloads the rate table
+        fake.tables['addons'][0]['price'] = '7.50'
+        core.invalidate_reference_data('addons')
+        assert core.get_price_breakdown(1, START, START + timedelta(hours=1), [1])['total'] == 57.5
+
+    with_fake_client(run)
+    print("✅ Quotes are priced from the cached rate table")
+
+
+def test_rate_rules_and_batch():
+    """Duration picks the rate; a batch prices every candidate, unknown rooms come back as None"""
+    print("🧪 Testing pricing rules and batch pricing...")
+
+    def run(fake):
+        candidates = [
+            {'room_id': 1, 'start_time': START, 'end_time': START + timedelta(hours=4)},
+            {'room_id': 1, 'start_time': START, 'end_time': START + timedelta(hours=5), 'addon_ids': [2, 2, 99]},
+            {'room_id': 1, 'start_time': START, 'end_time': START + timedelta(hours=8)},
+            {'room_id': '2', 'start_time': START, 'end_time': START + timedelta(hours=9)},
+            {'room_id': 42, 'start_time': START, 'end_time': START + timedelta(hours=1)},
+        ]
+        results = core.price_bookings(candidates * 40)
+        assert fake.round_trips == 2 and len(results) == 200
+
+        hourly, half_day, full_day, missing_rate, unknown = results[:5]
+        assert (hourly['rate_type'], hourly['total']) == ('Hourly Rate', 200.0)
+        assert (half_day['rate_type'], half_day['total']) == ('Half-day Rate', 200.0)
+        assert half_day['missing_addon_ids'] == [99]
+        assert (full_day['rate_type'], full_day['total']) == ('Full-day Rate', 320.0)
+        assert missing_rate['total'] == 0.0
+        assert unknown is None
+
+    with_fake_client(run)
+    print("✅ Rate rules and batch pricing hold")
+
+
+if __name__ == "__main__":
+    test_quote_with_ten_addons_needs_no_per_item_queries()
+    test_rate_rules_and_batch()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Test per-request query instrumentation - verifies that PostgREST calls are
+counted per request with a Server-Timing header and summary, that repeated
+query shapes are flagged as N+1, and holds the room endpoints to a query
+budget that does not grow with the number of rooms
+"""
+
+import os
+import sys
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask, jsonify, request
+import core
+import routes.rooms as rooms_module
+from utils.query_budget import InstrumentedClient, query_budget, start_query_trace, finish_query_trace
+from fake_supabase import FakeSupabase, build_bookings
+
+
+def room_tables(room_count):
+    rooms = [{'id': room_id, 'name': f'Room {room_id}', 'capacity': 10 * room_id, 'status': 'available',
+              'hourly_rate': 50.0, 'description': '', 'amenities': ''} for room_id in range(1, room_count + 1)]
+    return {'rooms': rooms, 'bookings': build_bookings(room_count), 'clients': []}
+
+
+class Harness:
+    """Points core and the rooms routes at one instrumented fake client"""
+
+    def __init__(self, room_count):
+        self.fake = FakeSupabase(room_tables(room_count))
+
+    def __enter__(self):
+        self.originals = core.supabase_admin, rooms_module.supabase_admin
+        core.supabase_admin = rooms_module.supabase_admin = InstrumentedClient(self.fake)
+        core.invalidate_reference_data()
+        return self
+
+    def __exit__(self, *exc_info):
+        core.supabase_admin, rooms_module.supabase_admin = self.originals
+        core.invalidate_reference_data()
+
+
+def make_app():
+    app = Flask(__name__)
+    app.config['LOGIN_DISABLED'] = True
+    app.config['SECRET_KEY'] = 'test'
+    app.register_blueprint(rooms_module.rooms_bp)
+    app.before_request(start_query_trace)
+
+    @app.after_request
+    def add_query_summary(response):
+        finish_query_trace(response, path=request.path)
+        return response
+    return app
+
+
+def test_trace_header_and_n_plus_one():
+    """Each request gets a Server-Timing header; a shape repeated per row is flagged"""
+    print("🧪 Testing request query trace...")
+    client = InstrumentedClient(FakeSupabase(room_tables(8)))
+    app = Flask(__name__)
+
+    @app.route('/per-room')
+    def per_room():
+        rooms = client.table('rooms').select('id').execute().data
+        for room in rooms:
+            client.table('bookings').select('id').eq('room_id', room['id']).execute()
+        return jsonify(len(rooms))
+
+    app.before_request(start_query_trace)
+    summaries = []
+    app.after_request(lambda response: summaries.append(finish_query_trace(response, path='/per-room')) or response)
+
+    response = app.test_client().get('/per-room')
+    assert response.headers['Server-Timing'].startswith('db;dur=')
+    assert '9 queries' in response.headers['Server-Timing']
+    summary = summaries[0]
+    assert summary['queries'] == 9 and summary['tables'] == {'bookings': 8, 'rooms': 1}
+    assert summary['n_plus_one'] == [{'table': 'bookings', 'shape': 'select(id).eq(room_id)', 'calls': 8}]
+    print("✅ Per-room loop flagged as N+1")
+
+
+def test_budget_helper_fails_loops():
+    client = InstrumentedClient(FakeSupabase(room_tables(6)))
+    try:
+        with query_budget(10, max_repeats=2, label='per-room loop'):
+            for room_id in range(1, 7):
+                client.table('bookings').select('id').eq('room_id', room_id).execute()
+        assert False, 'expected the budget to fail'
+    except AssertionError as e:
+        assert 'per-room loop repeats' in str(e)
+
+    try:
+        with query_budget(3, label='too many'):
+            for _ in range(4):
+                client.table('rooms').select('*').execute()
+        assert False, 'expected the budget to fail'
+    except AssertionError as e:
+        assert 'ran 4 queries, budget is 3' in str(e)
+
+
+def test_keyset_walk_is_not_n_plus_one():
+    """Later pages of one iter_rows walk share a shape but are not counted as repeats"""
+    print("🧪 Testing keyset pagination against the N+1 check...")
+    fake = FakeSupabase(room_tables(6))
+    client = InstrumentedClient(fake)
+    original_page_size = core.SUPABASE_PAGE_SIZE
+    try:
+        core.SUPABASE_PAGE_SIZE = 2
+        stats = {}
+        with query_budget(20, max_repeats=5, label='bookings walk') as trace:
+            rows = list(core.iter_rows(lambda: client.table('bookings').select('id, start_time'),
+                                       key='start_time', unique=False, stats=stats))
+        assert stats['pages'] > 5 and len(rows) == len(fake.tables['bookings'])
+        assert not trace.repeated(5)
+
+        # The first page of each walk still counts, so a walk per room is flagged
+        try:
+            with query_budget(50, max_repeats=5, label='walk per room'):
+                for room_id in range(1, 7):
+                    list(core.iter_rows(lambda: client.table('bookings').select('id').eq('room_id', room_id)))
+            assert False, 'expected the budget to fail'
+        except AssertionError as e:
+            assert 'walk per room repeats' in str(e)
+    finally:
+        core.SUPABASE_PAGE_SIZE = original_page_size
+    print("✅ Keyset pages are left out of the repeat count")
+
+
+def test_room_endpoint_budgets():
+    """Room directory and stats endpoints stay within a fixed budget for 1 or 40 rooms"""
+    print("🧪 Testing room endpoint query budgets...")
+    for room_count in (1, 40):
+        with Harness(room_count):
+            client = make_app().test_client()
+
+            with query_budget(3, max_repeats=1, label=f'/api/rooms/search ({room_count} rooms)'):
+                response = client.get('/api/rooms/search?status=available&limit=50')
+            assert len(response.get_json()) == room_count
+
+            with query_budget(1, label=f'/api/rooms/1/stats ({room_count} rooms)'):
+                response = client.get('/api/rooms/1/stats')
+            assert response.status_code == 200
+    print("✅ Room endpoints stay within budget")
+
+
+if __name__ == "__main__":
+    test_trace_header_and_n_plus_one()
+    test_budget_helper_fails_loops()
+    test_keyset_walk_is_not_n_plus_one()
+    test_room_endpoint_budgets()
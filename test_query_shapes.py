@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Test named query shapes - verifies shapes only list real booking columns,
+that shaped queries keep the builder chain working, and that payload bytes
+are recorded per shape
+"""
+
+import os
+import re
+import sys
+import json
+from datetime import datetime, timedelta, UTC
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import core
+import utils.query_shapes as query_shapes
+from utils.query_shapes import (QUERY_SHAPES, select_shape, get_query_shape_metrics,
+                                reset_query_shape_metrics)
+from fake_supabase import FakeSupabase
+
+# Columns of the bookings table; PostgREST rejects a select naming anything else
+BOOKING_COLUMNS = {
+    'id', 'room_id', 'client_id', 'event_type_id', 'title', 'start_time', 'end_time', 'attendees',
+    'status', 'notes', 'room_rate', 'addons_total', 'total_price', 'currency', 'created_by',
+    'created_at', 'updated_at', 'client_name', 'company_name', 'client_email', 'confirmed_at',
+    'cancelled_at', 'quotation_sent'
+}
+
+
+def top_level_columns(columns):
+    """Column names outside embedded relations such as room:rooms(id, name)"""
+    plain = re.sub(r'[\w:]+\([^()]*\)', '', columns)
+    return [name.strip() for name in plain.split(',') if name.strip() and name.strip() != '*']
+
+
+def test_booking_shapes_use_existing_columns():
+    """Every bookings shape names real columns only"""
+    print("🧪 Testing booking query shapes against the schema...")
+
+    for name, shape in QUERY_SHAPES.items():
+        if shape['table'] != 'bookings':
+            continue
+        unknown = set(top_level_columns(shape['columns'])) - BOOKING_COLUMNS
+        assert not unknown, (name, unknown)
+
+    print("✅ Booking shapes only select existing columns")
+
+
+def test_shaped_queries_record_payload_bytes():
+    """Chained filters still work and the narrow revenue shape moves fewer bytes than full rows"""
+    print("🧪 Testing query shape instrumentation...")
+
+    now = datetime.now(UTC)
+    bookings = [
+        {'id': i, 'room_id': 1, 'title': f'Quarterly review {i}', 'status': 'confirmed',
+         'notes': 'Projector and catering required' * 3, 'total_price': 100.0 + i,
+         'start_time': (now - timedelta(days=i)).isoformat(), 'end_time': (now - timedelta(days=i, hours=-2)).isoformat()}
+        for i in range(1, 41)
+    ]
+    fake = FakeSupabase({'bookings': bookings})
+    reset_query_shape_metrics()
+    original_client = core.supabase_admin
+    try:
+        core.supabase_admin = fake
+        trends = core.get_revenue_trends()
+        assert round(trends['total_revenue'], 2) == round(sum(b['total_price'] for b in bookings), 2)
+
+        response = select_shape(fake, 'booking_conflict', count='exact').eq('room_id', 1).limit(5).execute()
+        assert len(response.data) == 5 and response.count == 40
+        assert set(response.data[0]) == {'id', 'title', 'status', 'start_time', 'end_time'}
+    finally:
+        core.supabase_admin = original_client
+
+    metrics = {entry['shape']: entry for entry in get_query_shape_metrics()}
+    revenue = metrics['booking_revenue_point']
+    print(f"   - revenue trend: {revenue['rows']} rows, {revenue['bytes']} bytes "
+          f"({revenue['avg_bytes_per_row']} per row)")
+    assert revenue['calls'] == 1 and revenue['rows'] == 40
+    assert metrics['booking_conflict']['rows'] == 5
+
+    full_bytes = len(json.dumps(bookings, separators=(',', ':')).encode('utf-8'))
+    assert revenue['bytes'] * 3 < full_bytes
+    reset_query_shape_metrics()
+
+    print("✅ Shaped queries are instrumented per shape")
+
+
+def test_payload_bytes_are_sampled():
+    """Only every Nth call of a shape is serialised; the byte total is extrapolated per row"""
+    print("🧪 Testing sampled payload sizes...")
+
+    bookings = [{'id': i, 'title': 'Review', 'status': 'confirmed', 'start_time': '2025-03-01T08:00:00+00:00',
+                 'end_time': '2025-03-01T10:00:00+00:00'} for i in range(1, 11)]
+    fake = FakeSupabase({'bookings': bookings})
+    serialised = []
+    original_every, original_measure = query_shapes.QUERY_BYTES_SAMPLE_EVERY, query_shapes.payload_bytes
+    reset_query_shape_metrics()
+    try:
+        query_shapes.QUERY_BYTES_SAMPLE_EVERY = 4
+        query_shapes.payload_bytes = lambda data: serialised.append(len(data)) or original_measure(data)
+        for _ in range(8):
+            select_shape(fake, 'booking_conflict').execute()
+    finally:
+        query_shapes.QUERY_BYTES_SAMPLE_EVERY, query_shapes.payload_bytes = original_every, original_measure
+
+    conflict = {entry['shape']: entry for entry in get_query_shape_metrics()}['booking_conflict']
+    reset_query_shape_metrics()
+    assert serialised == [10, 10]  # calls 1 and 5
+    assert conflict['calls'] == 8 and conflict['rows'] == 80 and conflict['bytes_sampled_calls'] == 2
+    assert conflict['bytes'] == 8 * len(json.dumps(bookings, separators=(',', ':')).encode('utf-8'))
+
+    print("✅ Payload sizes are sampled")
+
+
+def test_calendar_events_api_uses_shapes():
+    """The /api/events loader in app.py reads bookings, clients and add-on totals through shapes"""
+    import app as app_module
+
+    now = datetime.now(UTC)
+    fake = FakeSupabase({
+        'rooms': [{'id': 1, 'name': 'Boardroom', 'capacity': 12}],
+        'clients': [{'id': 5, 'company_name': 'Acme', 'contact_person': 'Ann', 'notes': 'x' * 500}],
+        'bookings': [{'id': 1, 'room_id': 1, 'client_id': 5, 'title': 'Board meeting', 'status': 'confirmed',
+                      'attendees': 4, 'total_price': 100.0, 'start_time': now.isoformat(),
+                      'end_time': (now + timedelta(hours=2)).isoformat(), 'notes': ''}],
+        'booking_custom_addons': [{'id': 1, 'booking_id': 1, 'total_price': 60.0, 'description': 'Lunch'},
+                                  {'id': 2, 'booking_id': 1, 'total_price': 60.0, 'description': 'Tea'}],
+    })
+    reset_query_shape_metrics()
+    originals = app_module.supabase_admin, core.supabase_admin
+    try:
+        app_module.supabase_admin = core.supabase_admin = fake
+        core.invalidate_reference_data()
+        events = app_module.get_booking_calendar_events_supabase()
+    finally:
+        app_module.supabase_admin, core.supabase_admin = originals
+        core.invalidate_reference_data()
+
+    assert len(events) == 1
+    props = events[0]['extendedProps']
+    assert props['client'] == 'Acme' and props['room'] == 'Boardroom'
+    assert props['total'] == 120.0 and props['cost_per_person'] == 30.0
+    shapes = {entry['shape'] for entry in get_query_shape_metrics()}
+    assert {'booking_calendar_row', 'client_name_row', 'booking_addon_total'} <= shapes
+
+
+if __name__ == "__main__":
+    test_booking_shapes_use_existing_columns()
+    test_shaped_queries_record_payload_bytes()
+    test_payload_bytes_are_sampled()
+    test_calendar_events_api_uses_shapes()
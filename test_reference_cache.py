@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Test reference data cache - verifies rooms/addons lookups are served from
+memory between invalidations and that hit/miss counters are tracked
+"""
+
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import core
+from utils.reference_cache import ReferenceDataCache
+from fake_supabase import FakeSupabase
+
+
+def test_ttl_and_invalidation():
+    """Rows are reused within the TTL and reloaded after invalidation or expiry"""
+    print("🧪 Testing reference cache TTL and invalidation...")
+
+    loads = []
+    cache = ReferenceDataCache(ttl_seconds=60)
+    cache.register('rooms', lambda: loads.append(1) or [{'id': 1, 'name': 'Boardroom'}])
+
+    assert cache.get_by_id('rooms', 1)['name'] == 'Boardroom'
+    assert cache.get_by_id('rooms', '1')['name'] == 'Boardroom'
+    assert len(loads) == 1
+
+    # Callers get copies, so decorating a row does not leak into the cache
+    cache.get('rooms')[0]['name'] = 'Changed'
+    assert cache.get('rooms')[0]['name'] == 'Boardroom'
+
+    cache.invalidate('rooms')
+    cache.get('rooms')
+    assert len(loads) == 2
+
+    cache.ttl_seconds = 0
+    cache.get('rooms')
+    assert len(loads) == 3
+
+    stats = cache.stats()
+    assert stats['hits'] == 3
+    assert stats['misses'] == 3
+    assert stats['tables']['rooms']['invalidations'] == 1
+
+    print("✅ TTL and invalidation work")
+
+
+def test_stale_rows_served_on_load_error():
+    """A failed reload falls back to the last good copy"""
+    print("🧪 Testing reference cache fallback on load errors...")
+
+    state = {'fail': False}
+
+    def loader():
+        if state['fail']:
+            raise RuntimeError('database unreachable')
+        return [{'id': 7, 'name': 'Projector'}]
+
+    cache = ReferenceDataCache(ttl_seconds=0)
+    cache.register('addons', loader)
+    cache.get('addons')
+
+    state['fail'] = True
+    assert cache.get('addons') == [{'id': 7, 'name': 'Projector'}]
+    assert cache.stats()['tables']['addons']['load_errors'] == 1
+
+    print("✅ Stale rows are served while the database is unreachable")
+
+
+def test_reload_does_not_block_readers():
+    """A slow reload runs outside the lock: other tables and the expired copy stay readable"""
+    print("🧪 Testing reference cache reloads outside the lock...")
+
+    release = threading.Event()
+    versions = iter(['Boardroom', 'Boardroom (renovated)', 'Boardroom (late)'])
+
+    def slow_rooms():
+        name = next(versions)
+        if name != 'Boardroom':
+            release.wait(5)
+        return [{'id': 1, 'name': name}]
+
+    cache = ReferenceDataCache(ttl_seconds=60)
+    cache.register('rooms', slow_rooms)
+    cache.register('addons', lambda: [{'id': 7, 'name': 'Projector'}])
+    cache.get('rooms')
+    cache.ttl_seconds = 0
+
+    reloading = threading.Thread(target=cache.get, args=('rooms',))
+    reloading.start()
+    time.sleep(0.05)
+    started = time.perf_counter()
+    assert cache.get('addons')[0]['name'] == 'Projector'
+    assert cache.get('rooms')[0]['name'] == 'Boardroom'  # expired copy while the reload runs
+    assert time.perf_counter() - started < 0.5
+    release.set()
+    reloading.join(5)
+
+    # A load that started before an invalidation is not cached
+    release.clear()
+    cache.ttl_seconds = 60
+    late = {}
+    cache.invalidate('rooms')
+    loading = threading.Thread(target=lambda: late.setdefault('rows', cache.get('rooms')))
+    loading.start()
+    time.sleep(0.05)
+    cache.invalidate('rooms')
+    release.set()
+    loading.join(5)
+    assert late['rows'][0]['name'] == 'Boardroom (late)'
+    assert 'rooms' not in cache._entries
+
+    print("✅ Reloads do not hold up readers")
+
+
+def test_booking_pricing_uses_cache():
+    """Pricing a booking with add-ons should not query per item once the cache is warm"""
+    print("🧪 Testing cached booking pricing...")
+
+    fake = FakeSupabase({
+        'rooms': [{'id': 1, 'name': 'Boardroom', 'capacity': 10, 'hourly_rate': 50,
+                   'half_day_rate': 180, 'full_day_rate': 300}],
+        'addons': [{'id': 1, 'name': 'Coffee', 'price': 5}, {'id': 2, 'name': 'Projector', 'price': 20}],
+    })
+    original_client = core.supabase_admin
+    try:
+        core.supabase_admin = fake
+        core.invalidate_reference_data()
+
+        start = datetime(2025, 1, 6, 9, 0)
+        end = datetime(2025, 1, 6, 11, 0)
+        assert core.calculate_booking_total(1, start, end, [1, 2]) == 125.0
+        warm_round_trips = fake.round_trips
+
+        for _ in range(5):
+            assert core.calculate_booking_total(1, start, end, [1, 2]) == 125.0
+        assert core.get_room_name_by_id(1) == 'Boardroom'
+
+        print(f"   - first call {warm_round_trips} round-trips, next six calls {fake.round_trips - warm_round_trips}")
+        assert warm_round_trips == 2
+        assert fake.round_trips == warm_round_trips
+    finally:
+        core.supabase_admin = original_client
+        core.invalidate_reference_data()
+
+    print("✅ Pricing is served from the reference cache")
+
+
+if __name__ == "__main__":
+    test_ttl_and_invalidation()
+    test_stale_rows_served_on_load_error()
+    test_reload_does_not_block_readers()
+    test_booking_pricing_uses_cache()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test bulk room availability search - verifies free gaps, capacity filtering
+and suggestion ranking are computed from a single bookings fetch
+"""
+
+import os
+import sys
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import core
+import routes.rooms as rooms_module
+from fake_supabase import FakeSupabase
+
+
+def build_tables():
+    rooms = [
+        {'id': 1, 'name': 'Boardroom', 'capacity': 12, 'status': 'available', 'hourly_rate': 40},
+        {'id': 2, 'name': 'Hall', 'capacity': 200, 'status': 'available', 'hourly_rate': 150},
+        {'id': 3, 'name': 'Pod', 'capacity': 4, 'status': 'available', 'hourly_rate': 10},
+        {'id': 4, 'name': 'Annex', 'capacity': 30, 'status': 'maintenance', 'hourly_rate': 60},
+    ]
+    bookings = [
+        # Boardroom: busy 09:00-12:00 on day one (two overlapping bookings) and all of day two
+        {'id': 1, 'room_id': 1, 'status': 'confirmed', 'start_time': '2025-03-03T09:00:00', 'end_time': '2025-03-03T11:00:00'},
+        {'id': 2, 'room_id': 1, 'status': 'tentative', 'start_time': '2025-03-03T10:30:00', 'end_time': '2025-03-03T12:00:00'},
+        {'id': 3, 'room_id': 1, 'status': 'confirmed', 'start_time': '2025-03-03T20:00:00', 'end_time': '2025-03-05T08:00:00'},
+        {'id': 4, 'room_id': 1, 'status': 'cancelled', 'start_time': '2025-03-03T13:00:00', 'end_time': '2025-03-03T17:00:00'},
+        # Hall: only 13:00-14:00 on day one is taken
+        {'id': 5, 'room_id': 2, 'status': 'confirmed', 'start_time': '2025-03-03T13:00:00', 'end_time': '2025-03-03T14:00:00'},
+    ]
+    return {'rooms': rooms, 'bookings': bookings}
+
+
+def run_search(max_rows=None, **kwargs):
+    fake = FakeSupabase(build_tables(), max_rows=max_rows)
+    original_core, original_rooms = core.supabase_admin, rooms_module.supabase_admin
+    original_page_size = core.SUPABASE_PAGE_SIZE
+    try:
+        core.supabase_admin = rooms_module.supabase_admin = fake
+        core.SUPABASE_PAGE_SIZE = max_rows or original_page_size
+        core.invalidate_reference_data()
+        result = rooms_module.search_room_availability(**kwargs)
+    finally:
+        core.supabase_admin, rooms_module.supabase_admin = original_core, original_rooms
+        core.SUPABASE_PAGE_SIZE = original_page_size
+        core.invalidate_reference_data()
+    return result, fake.round_trips
+
+
+def test_free_gaps_and_suggestions():
+    """Gaps skip busy blocks, rooms below capacity or in maintenance are excluded"""
+    print("🧪 Testing bulk availability search...")
+
+    result, round_trips = run_search(start_date='2025-03-03', end_date='2025-03-04',
+                                     duration_minutes=120, min_capacity=10)
+
+    print(f"   - {len(result['rooms'])} rooms searched with {round_trips} round-trips")
+    assert round_trips == 2  # rooms (cached afterwards) + one bookings fetch
+    assert [room['room_id'] for room in result['rooms']] == [1, 2]
+
+    boardroom, hall = result['rooms']
+    assert [(slot['start_time'], slot['end_time']) for slot in boardroom['free_slots']] == [
+        ('2025-03-03T12:00:00', '2025-03-03T17:00:00')
+    ]
+    assert [(slot['start_time'], slot['end_time']) for slot in hall['free_slots']] == [
+        ('2025-03-03T09:00:00', '2025-03-03T13:00:00'),
+        ('2025-03-03T14:00:00', '2025-03-03T17:00:00'),
+        ('2025-03-04T09:00:00', '2025-03-04T17:00:00'),
+    ]
+
+    # Hall is free earliest, so it ranks first despite its size
+    assert [s['room_id'] for s in result['suggestions']] == [2, 1]
+    assert result['suggestions'][0]['slot_end'] == '2025-03-03T11:00:00'
+
+    print("✅ Free gaps and suggestions are correct")
+
+
+def test_ignore_tentative():
+    """Tentative bookings stop blocking when ignore_tentative is set"""
+    print("🧪 Testing availability search ignoring tentative bookings...")
+
+    result, _ = run_search(start_date='2025-03-03', end_date='2025-03-03',
+                           duration_minutes=60, min_capacity=10, ignore_tentative=True)
+    boardroom = result['rooms'][0]
+    assert boardroom['free_slots'][0]['start_time'] == '2025-03-03T11:00:00'
+
+    print("✅ Tentative bookings are ignored on request")
+
+
+def test_busy_time_past_row_cap_is_not_free():
+    """Bookings beyond one response's row cap still block their rooms"""
+    capped, _ = run_search(max_rows=2, start_date='2025-03-03', end_date='2025-03-04',
+                           duration_minutes=120, min_capacity=10)
+    full, _ = run_search(start_date='2025-03-03', end_date='2025-03-04',
+                         duration_minutes=120, min_capacity=10)
+    assert capped['bookings_considered'] == full['bookings_considered'] == 4
+    assert capped['rooms'] == full['rooms']
+
+
+if __name__ == "__main__":
+    test_free_gaps_and_suggestions()
+    test_ignore_tentative()
+    test_busy_time_past_row_cap_is_not_free()
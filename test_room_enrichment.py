@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test batched room enrichment - verifies the rooms directory needs a constant
+number of Supabase round-trips regardless of how many rooms are listed
+"""
+
+import os
+import sys
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import core
+import routes.rooms as rooms_module
+from fake_supabase import FakeSupabase, build_bookings
+
+
+def test_room_enrichment_round_trips_are_constant():
+    """Enriching 40 rooms should use the same number of queries as enriching 1"""
+    print("🧪 Testing batched room enrichment round-trips...")
+
+    original_client = rooms_module.supabase_admin
+    try:
+        for room_count in (1, 40):
+            fake = FakeSupabase({'bookings': build_bookings(room_count)})
+            rooms_module.supabase_admin = fake
+
+            aggregates = rooms_module.get_rooms_booking_aggregates(list(range(1, room_count + 1)))
+
+            print(f"   - {room_count} rooms -> {fake.round_trips} round-trips")
+            assert fake.round_trips == 2
+            assert len(aggregates) == room_count
+    finally:
+        rooms_module.supabase_admin = original_client
+
+    print("✅ Round-trips are constant")
+
+
+def test_room_enrichment_values():
+    """Aggregated values should match the per-room semantics"""
+    print("🧪 Testing batched room enrichment values...")
+
+    original_client = rooms_module.supabase_admin
+    try:
+        rooms_module.supabase_admin = FakeSupabase({'bookings': build_bookings(3)})
+        room = {'id': 2, 'name': 'Boardroom', 'capacity': 12, 'status': 'available'}
+        aggregates = rooms_module.get_rooms_booking_aggregates([1, 2, 3])
+        rooms_module.enhance_room_data(room, aggregates)
+    finally:
+        rooms_module.supabase_admin = original_client
+
+    # All bookings are counted, only confirmed ones earn revenue
+    assert room['booking_count'] == 3
+    assert room['total_revenue'] == 100.0
+    assert room['next_booking']['title'] == 'Upcoming'
+    assert room['utilization_percentage'] > 0
+    assert room['capacity_category'] == 'Medium'
+
+    print("✅ Aggregated values are correct")
+
+
+def test_room_enrichment_under_row_cap():
+    """Rooms whose bookings fall past PostgREST's row cap still get full totals"""
+    original_client, original_page_size = rooms_module.supabase_admin, core.SUPABASE_PAGE_SIZE
+    try:
+        fake = FakeSupabase({'bookings': build_bookings(10)}, max_rows=7)
+        rooms_module.supabase_admin = fake
+        core.SUPABASE_PAGE_SIZE = 7
+        aggregates = rooms_module.get_rooms_booking_aggregates(list(range(1, 11)))
+    finally:
+        rooms_module.supabase_admin = original_client
+        core.SUPABASE_PAGE_SIZE = original_page_size
+
+    for room_id, room_stats in aggregates.items():
+        assert room_stats['booking_count'] == 3, room_id
+        assert room_stats['total_revenue'] == 100.0, room_id
+        assert room_stats['month_hours'] > 0 and room_stats['next_booking']['title'] == 'Upcoming', room_id
+
+
+if __name__ == "__main__":
+    test_room_enrichment_round_trips_are_constant()
+    test_room_enrichment_values()
+    test_room_enrichment_under_row_cap()
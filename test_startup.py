@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Test application startup - verifies that importing the app touches neither the
+network nor the PDF/Excel libraries, and that the database probe now run by
+/health is cached and reports failures instead of raising
+"""
+
+import os
+import sys
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import core
+from import_benchmark import LAZY_MODULES, measure
+from fake_supabase import FakeSupabase
+
+
+def test_app_import_is_lazy_and_offline():
+    print("🧪 Testing cold import of app...")
+    environment = dict(os.environ, SUPABASE_URL='http://127.0.0.1:9', SUPABASE_ANON_KEY='x',
+                       SECRET_KEY=os.environ.get('SECRET_KEY', 'abcdefabcdefabcdefabcdefabcdefabcdef'))
+    entries, stdout = measure('app', environment)
+    imported = {name.split('.')[0] for name, _, _, _ in entries}
+    assert not imported & set(LAZY_MODULES), imported & set(LAZY_MODULES)
+    assert 'Database connection test' not in stdout
+    assert 'Supabase initialization failed' not in stdout
+    print(f"   - {len(entries)} modules imported")
+    print("✅ Importing the app makes no network calls and skips PDF/Excel libraries")
+
+
+def test_database_probe_is_cached():
+    fake = FakeSupabase({'rooms': [{'id': 1, 'name': 'Boardroom'}]})
+    original = core.supabase_admin
+    try:
+        core.supabase_admin = fake
+        core._database_probe.clear()
+        first = core.check_database_connection()
+        second = core.check_database_connection()
+        assert first['connected'] and first == second
+        assert fake.round_trips == 1
+        core.check_database_connection(max_age=0)
+        assert fake.round_trips == 2
+
+        core.supabase_admin = None
+        failed = core.check_database_connection(max_age=0)
+        assert not failed['connected'] and failed['error']
+    finally:
+        core.supabase_admin = original
+        core._database_probe.clear()
+
+
+if __name__ == "__main__":
+    test_app_import_is_lazy_and_offline()
+    test_database_probe_is_cached()
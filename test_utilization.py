@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Test the room utilization engine - verifies that bookings are clipped to the
+report range and to business hours, that overlapping bookings of one room are
+counted once, that the per-day and per-hour matrices add up, and that a year
+of bookings over twenty rooms is computed quickly
+"""
+
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone, date
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import core
+from utils.utilization import compute_utilization
+from fake_supabase import FakeSupabase
+
+CAT = timezone(timedelta(hours=2))
+
+
+def booking(booking_id, room_id, start, end, status='confirmed'):
+    return {'id': booking_id, 'room_id': room_id, 'status': status,
+            'start_time': start.isoformat(), 'end_time': end.isoformat()}
+
+
+def at(day, hour, minute=0):
+    return datetime(2025, 3, day, hour, minute, tzinfo=CAT)
+
+
+def test_clipping_to_range_and_business_hours():
+    """Straddling and multi-day bookings count only the business hours inside the range"""
+    print("🧪 Testing utilization clipping...")
+
+    bookings = [
+        booking(1, 1, at(2, 9), at(3, 12)),        # starts before the range: 8:00-12:00 on the 3rd
+        booking(2, 1, at(5, 16), at(8, 10)),       # ends after the range: 16-18 on 5th, 8-18 on 6th and 7th
+        booking(3, 2, at(4, 6), at(4, 21)),        # all day: only the 10 business hours
+        booking(4, 2, at(4, 19), at(4, 22)),       # evening only: nothing
+        booking(5, 2, at(3, 10), at(3, 11), 'cancelled'),
+        booking(6, 3, at(9, 10), at(9, 11)),       # outside the range entirely
+    ]
+    matrix = compute_utilization(bookings, date(2025, 3, 3), date(2025, 3, 7), 8, 18, utc_offset_hours=2)
+
+    assert matrix.day_count == 5 and matrix.available_hours == 50
+    assert list(matrix.daily[1]) == [4.0, 0.0, 2.0, 10.0, 10.0]
+    assert matrix.room_hours(1) == 26.0
+    assert list(matrix.daily[2]) == [0.0, 10.0, 0.0, 0.0, 0.0]
+    assert matrix.room_utilization(2) == 20.0
+    assert 3 not in matrix.daily
+    assert matrix.booking_counts == {1: 2, 2: 2}
+
+    print("✅ Bookings are clipped to the range and business hours")
+
+
+def test_overlaps_merged_and_hour_slots():
+    """Overlapping bookings of one room count once; partial hours land in their slots"""
+    print("🧪 Testing overlap merging and hour slots...")
+
+    bookings = [
+        booking(1, 1, at(3, 9), at(3, 11)),
+        booking(2, 1, at(3, 10), at(3, 12, 30)),   # overlaps booking 1
+        booking(3, 1, at(3, 11), at(3, 11, 30)),   # inside both
+        booking(4, 1, at(4, 9, 15), at(4, 9, 45)),
+        booking(5, 2, at(3, 10), at(3, 11)),       # other room, same hours
+    ]
+    matrix = compute_utilization(bookings, date(2025, 3, 3), date(2025, 3, 4), 8, 18, utc_offset_hours=2)
+
+    assert list(matrix.daily[1]) == [3.5, 0.5]
+    hourly = list(matrix.hourly[1])
+    assert hourly[:5] == [0.0, 1.5, 1.0, 1.0, 0.5]  # 8h, 9h, 10h, 11h, 12h slots
+    assert sum(hourly) == matrix.room_hours(1) == 4.0
+    assert matrix.hour_occupancy(1)[1] == 0.75
+    assert list(matrix.day_totals()) == [4.5, 0.5]
+
+    data = matrix.to_dict([1, 2, 3])
+    assert data['days'] == ['2025-03-03', '2025-03-04'] and data['hours'][0] == 8
+    assert [room['booked_hours'] for room in data['rooms']] == [4.0, 1.0, 0.0]
+    assert data['rooms'][2]['daily_hours'] == [0.0, 0.0]
+
+    print("✅ Overlaps are merged and hours are slotted")
+
+
+def test_core_reads_overlapping_bookings():
+    """get_room_utilization includes bookings that start before the range and skips cancelled ones"""
+    fake = FakeSupabase({'bookings': [
+        booking(1, 1, at(2, 9), at(3, 12)),
+        booking(2, 1, at(3, 14), at(3, 15), 'cancelled'),
+        booking(3, 2, at(4, 8), at(4, 9)),
+    ]})
+    original = core.supabase_admin
+    try:
+        core.supabase_admin = fake
+        matrix = core.get_room_utilization(date(2025, 3, 3), date(2025, 3, 3))
+    finally:
+        core.supabase_admin = original
+    assert matrix.room_hours(1) == 4.0
+    assert matrix.room_hours(2) == 0.0
+
+
+def test_year_of_bookings_is_fast():
+    """A year of bookings across 20 rooms is computed well under a second"""
+    print("🧪 Testing utilization performance...")
+
+    rng = random.Random(16)
+    start = datetime(2025, 1, 1, tzinfo=CAT)
+    bookings = []
+    for booking_id in range(20000):
+        begin = start + timedelta(days=rng.randrange(365), hours=rng.randrange(6, 20), minutes=rng.choice((0, 30)))
+        hours = rng.choice((1, 2, 3, 4, 8, 30))
+        bookings.append(booking(booking_id, rng.randrange(20), begin, begin + timedelta(hours=hours)))
+
+    started = time.perf_counter()
+    matrix = compute_utilization(bookings, date(2025, 1, 1), date(2025, 12, 31), 8, 18, utc_offset_hours=2)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(f"   - {len(bookings)} bookings, 20 rooms, 365 days in {elapsed_ms:.0f} ms")
+
+    for room_id in range(20):
+        assert abs(sum(matrix.daily[room_id]) - matrix.room_hours(room_id)) < 1e-6
+        assert abs(sum(matrix.hourly[room_id]) - matrix.room_hours(room_id)) < 1e-6
+        assert 0 < matrix.room_utilization(room_id) <= 100
+    assert elapsed_ms < 2000  # generous for slow CI
+
+    print("✅ Utilization over a year is computed quickly")
+
+
+if __name__ == "__main__":
+    test_clipping_to_range_and_business_hours()
+    test_overlaps_merged_and_hour_slots()
+    test_core_reads_overlapping_bookings()
+    test_year_of_bookings_is_fast()
@@ -0,0 +1,217 @@
+"""
+In-process interval index of non-cancelled bookings, used to answer room
+conflict checks without a Supabase round-trip per check.
+
+Each room keeps its bookings sorted by start time with an implicit balanced
+tree over the sorted list whose nodes store the maximum end time of their
+subtree, so an overlap query costs O(log n + k). The index covers bookings
+ending after a horizon (``horizon_days`` before the last load); queries that
+reach further back return None so callers fall back to the database.
+"""
+import threading
+import time
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta, UTC
+
+CONFLICT_FIELDS = ('id', 'title', 'status', 'start_time', 'end_time')
+
+
+def to_timestamp(value):
+    """Convert an ISO string or datetime to a UTC epoch; naive values are treated as UTC like the database does"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=UTC)
+    return value.timestamp()
+
+
+class RoomIntervals:
+    """Sorted bookings for a single room with a max-end augmented implicit tree"""
+
+    def __init__(self):
+        self.entries = []  # (start_ts, end_ts, booking_id), sorted
+        self.max_end = []
+        self.dirty = False
+
+    def add(self, entry):
+        insort(self.entries, entry)
+        self.dirty = True
+
+    def discard(self, entry):
+        position = bisect_left(self.entries, entry)
+        if position < len(self.entries) and self.entries[position] == entry:
+            self.entries.pop(position)
+            self.dirty = True
+
+    def _build(self, lo, hi):
+        if lo >= hi:
+            return float('-inf')
+        mid = (lo + hi) // 2
+        subtree_max = max(self.entries[mid][1], self._build(lo, mid), self._build(mid + 1, hi))
+        self.max_end[mid] = subtree_max
+        return subtree_max
+
+    def overlapping(self, start_ts, end_ts):
+        """Return entries with start < end_ts and end > start_ts, in start order"""
+        if self.dirty or len(self.max_end) != len(self.entries):
+            self.max_end = [0.0] * len(self.entries)
+            self._build(0, len(self.entries))
+            self.dirty = False
+
+        found = []
+        stack = [(0, len(self.entries), False)]
+        while stack:
+            lo, hi, emit_only = stack.pop()
+            if lo >= hi:
+                continue
+            mid = (lo + hi) // 2
+            if emit_only:
+                entry = self.entries[mid]
+                if entry[1] > start_ts:
+                    found.append(entry)
+                continue
+            # Nothing in this subtree ends after the query starts
+            if self.max_end[mid] <= start_ts:
+                continue
+            # In-order traversal: left subtree, node, right subtree (pushed in reverse)
+            if self.entries[mid][0] < end_ts:
+                stack.append((mid + 1, hi, False))
+                stack.append((mid, mid + 1, True))
+            stack.append((lo, mid, False))
+        return found
+
+
+class BookingIntervalIndex:
+    """Per-room interval index kept warm in-process and updated on every booking write"""
+
+    def __init__(self, loader, ttl_seconds=300, horizon_days=30):
+        # loader(since_iso) returns non-cancelled bookings ending after since_iso
+        self.loader = loader
+        self.ttl_seconds = ttl_seconds
+        self.horizon_days = horizon_days
+        self._lock = threading.RLock()
+        self._rooms = {}
+        self._bookings = {}  # booking_id -> (room_id, entry, row)
+        self._loaded_at = None
+        self._coverage_start = None
+        self._stats = {'loads': 0, 'load_errors': 0, 'queries': 0, 'fallbacks': 0,
+                       'updates': 0, 'verifications': 0, 'mismatches': 0}
+
+    def invalidate(self):
+        """Force a full reload on the next query"""
+        with self._lock:
+            self._loaded_at = None
+
+    def _ensure_loaded(self):
+        if self._loaded_at is not None and (time.monotonic() - self._loaded_at) < self.ttl_seconds:
+            return True
+        coverage_start = datetime.now(UTC) - timedelta(days=self.horizon_days)
+        try:
+            rows = self.loader(coverage_start.isoformat())
+        except Exception as e:
+            self._stats['load_errors'] += 1
+            print(f"❌ ERROR: Failed to load booking interval index: {e}")
+            return False
+
+        self._rooms = {}
+        self._bookings = {}
+        self._coverage_start = coverage_start.timestamp()
+        for row in rows or []:
+            self._add(row)
+        self._loaded_at = time.monotonic()
+        self._stats['loads'] += 1
+        return True
+
+    def _add(self, row):
+        start_ts = to_timestamp(row.get('start_time'))
+        end_ts = to_timestamp(row.get('end_time'))
+        if start_ts is None or end_ts is None or end_ts <= self._coverage_start:
+            return
+        entry = (start_ts, end_ts, row['id'])
+        self._rooms.setdefault(row['room_id'], RoomIntervals()).add(entry)
+        self._bookings[row['id']] = (row['room_id'], entry, {field: row.get(field) for field in CONFLICT_FIELDS})
+
+    def _discard(self, booking_id):
+        existing = self._bookings.pop(booking_id, None)
+        if existing:
+            room_id, entry, _ = existing
+            self._rooms[room_id].discard(entry)
+
+    def upsert(self, booking):
+        """Apply a created or updated booking row; cancelled bookings leave the index"""
+        with self._lock:
+            if self._loaded_at is None or not booking or booking.get('id') is None:
+                return
+            self._stats['updates'] += 1
+            existing = self._bookings.get(booking['id'])
+            row = dict(existing[2], room_id=existing[0]) if existing else {}
+            row.update(booking)
+            if not all(row.get(field) is not None for field in ('room_id', 'start_time', 'end_time', 'status')):
+                # Partial row for an unknown booking: cannot place it, so rebuild on next use
+                self._loaded_at = None
+                return
+            self._discard(booking['id'])
+            if row['status'] != 'cancelled':
+                self._add(row)
+
+    def remove(self, booking_id):
+        """Drop a deleted booking"""
+        with self._lock:
+            if self._loaded_at is None:
+                return
+            self._stats['updates'] += 1
+            self._discard(booking_id)
+
+    def conflicts(self, room_id, start_time, end_time, exclude_booking_id=None):
+        """Return overlapping bookings for a room, or None when the index cannot answer"""
+        start_ts = to_timestamp(start_time)
+        end_ts = to_timestamp(end_time)
+        with self._lock:
+            self._stats['queries'] += 1
+            if not self._ensure_loaded() or start_ts < self._coverage_start:
+                self._stats['fallbacks'] += 1
+                return None
+            room = self._rooms.get(room_id)
+            if not room:
+                return []
+            return [dict(self._bookings[booking_id][2])
+                    for _, _, booking_id in room.overlapping(start_ts, end_ts)
+                    if booking_id != exclude_booking_id]
+
+    def record_verification(self, room_id, index_rows, database_rows):
+        """Compare an indexed answer with the database answer; a mismatch forces a reload"""
+        index_ids = sorted(row['id'] for row in index_rows)
+        database_ids = sorted(row['id'] for row in database_rows)
+        with self._lock:
+            self._stats['verifications'] += 1
+            if index_ids == database_ids:
+                return True
+            self._stats['mismatches'] += 1
+            self._loaded_at = None
+        print(f"⚠️ WARNING: Booking index mismatch for room {room_id}: index={index_ids} database={database_ids}")
+        return False
+
+    def snapshot(self):
+        """Return {booking_id: (room_id, start_ts, end_ts, status)} for full cross-checks"""
+        with self._lock:
+            if not self._ensure_loaded():
+                return None
+            return {booking_id: (room_id, entry[0], entry[1], row['status'])
+                    for booking_id, (room_id, entry, row) in self._bookings.items()}
+
+    @property
+    def coverage_start(self):
+        return self._coverage_start
+
+    def stats(self):
+        """Return load/query/verification counters"""
+        with self._lock:
+            return dict(
+                self._stats,
+                rooms=len(self._rooms),
+                bookings=len(self._bookings),
+                age_seconds=round(time.monotonic() - self._loaded_at, 1) if self._loaded_at is not None else None,
+                coverage_start=datetime.fromtimestamp(self._coverage_start, UTC).isoformat() if self._coverage_start else None
+            )
@@ -0,0 +1,135 @@
+"""
+Windowed, incremental calendar feed helpers.
+
+The calendar asks for the range it is showing (FullCalendar's ``start`` and
+``end`` parameters) and, on refresh, only for bookings changed since the
+cursor it got last time (``since``, compared with ``updated_at``). Hard
+deletes leave no row to find, so they are remembered in a bounded in-process
+log; a cursor older than that log tells the client to reload the window.
+"""
+import threading
+from collections import deque
+from datetime import datetime, timedelta, UTC
+
+from utils.booking_index import to_timestamp
+
+
+def parse_feed_datetime(value):
+    """Parse a window or cursor parameter into an aware UTC datetime; naive values are treated as UTC"""
+    if not value:
+        return None
+    text = value.strip().replace('Z', '+00:00')
+    # An unescaped '+' in a query string arrives as a space before the UTC offset
+    if len(text) > 19 and text[-6] == ' ':
+        text = text[:-6] + '+' + text[-5:]
+    parsed = datetime.fromisoformat(text)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=UTC)
+    return parsed.astimezone(UTC)
+
+
+def resolve_calendar_window(start=None, end=None, now=None, past_days=31, future_days=92, max_days=400):
+    """Turn optional start/end parameters into a bounded UTC window"""
+    now = now or datetime.now(UTC)
+    window_start = parse_feed_datetime(start)
+    window_end = parse_feed_datetime(end)
+    if window_start is None and window_end is None:
+        window_start, window_end = now - timedelta(days=past_days), now + timedelta(days=future_days)
+    elif window_start is None:
+        window_start = window_end - timedelta(days=past_days + future_days)
+    elif window_end is None:
+        window_end = window_start + timedelta(days=past_days + future_days)
+    if window_end <= window_start:
+        raise ValueError('Calendar window end must be after its start')
+    if window_end - window_start > timedelta(days=max_days):
+        raise ValueError(f'Calendar window cannot exceed {max_days} days')
+    return window_start, window_end
+
+
+def event_status(event):
+    props = event.get('extendedProps') or {}
+    return (props.get('statusRaw') or props.get('status') or 'tentative').lower()
+
+
+def event_overlaps(event, window_start, window_end):
+    """True when an event's [start, end) range touches the window"""
+    try:
+        start = to_timestamp(event.get('start'))
+        end = to_timestamp(event.get('end')) or start
+    except (TypeError, ValueError):
+        return False
+    if start is None:
+        return False
+    return start < window_end.timestamp() and end > window_start.timestamp()
+
+
+class DeletedBookingLog:
+    """Bounded log of hard-deleted booking ids for incremental feeds"""
+
+    def __init__(self, max_entries=2000, complete_from=None):
+        self._lock = threading.Lock()
+        self._entries = deque()
+        self._max_entries = max_entries
+        # Deletions before this moment (process start, or the oldest dropped entry) are unknown
+        self._complete_from = complete_from or datetime.now(UTC)
+
+    def record(self, booking_id, when=None):
+        if booking_id is None:
+            return
+        when = when or datetime.now(UTC)
+        with self._lock:
+            self._entries.append((when, booking_id))
+            while len(self._entries) > self._max_entries:
+                dropped_at, _ = self._entries.popleft()
+                self._complete_from = max(self._complete_from, dropped_at)
+
+    def removed_since(self, since):
+        """Return (booking_ids, complete); complete is False when the log cannot cover the cursor"""
+        with self._lock:
+            booking_ids = [booking_id for when, booking_id in self._entries if when >= since]
+            return booking_ids, since >= self._complete_from
+
+
+def build_calendar_feed(load_events, deleted_log, start=None, end=None, room_id=None, since=None,
+                        overlap_seconds=5, now=None):
+    """Build a full window or an incremental delta.
+
+    load_events(window_start, window_end, room_id, updated_since) returns
+    calendar events; with updated_since it returns every changed booking,
+    cancelled ones included, and the window and room are applied here so
+    bookings moved out of view are reported as removed.
+    """
+    now = now or datetime.now(UTC)
+    window_start, window_end = resolve_calendar_window(start, end, now=now)
+    cursor = (now - timedelta(seconds=overlap_seconds)).isoformat()
+    feed = {
+        'window_start': window_start.isoformat(),
+        'window_end': window_end.isoformat(),
+        'cursor': cursor,
+        'incremental': False,
+        'reset': False,
+        'events': [],
+        'removed': []
+    }
+
+    since_dt = parse_feed_datetime(since)
+    if since_dt is None:
+        feed['events'] = load_events(window_start, window_end, room_id, None)
+        return feed
+
+    removed_ids, complete = deleted_log.removed_since(since_dt)
+    if not complete:
+        feed['reset'] = True
+        return feed
+
+    removed = set(removed_ids)
+    for event in load_events(None, None, None, since_dt):
+        props = event.get('extendedProps') or {}
+        if (event_status(event) == 'cancelled' or not event_overlaps(event, window_start, window_end)
+                or (room_id and str(props.get('roomId')) != str(room_id))):
+            removed.add(event.get('id'))
+        else:
+            feed['events'].append(event)
+    feed['incremental'] = True
+    feed['removed'] = sorted(removed, key=str)
+    return feed
@@ -0,0 +1,99 @@
+"""
+Daily booking rollup.
+
+One row per (day, room_id, status) holding the event count, attendees,
+revenue (total_price) and booked hours of the bookings that start on that
+UTC day. Reports sum a few hundred rollup rows instead of re-reading every
+booking in their range.
+
+The functions here are pure: they turn booking rows into rollup rows and
+work out which (day, room) cells a booking write touches. Reading and
+writing the booking_daily_rollup table is wired up in core.
+"""
+from datetime import timedelta
+
+from utils.dashboard_stats import booking_start_date
+from utils.booking_index import to_timestamp
+
+ROLLUP_MEASURES = ('event_count', 'attendees', 'revenue', 'booked_hours')
+
+
+def rollup_cell(booking):
+    """(day ISO string, room_id) a booking is counted under, or None if the row lacks them"""
+    if not booking or booking.get('start_time') is None or booking.get('room_id') is None:
+        return None
+    return booking_start_date(booking['start_time']).isoformat(), booking['room_id']
+
+
+def booking_hours(booking):
+    try:
+        return max(to_timestamp(booking['end_time']) - to_timestamp(booking['start_time']), 0) / 3600
+    except (KeyError, TypeError, ValueError):
+        return 0.0
+
+
+def empty_rollup_row(day, room_id, status):
+    return {'day': day, 'room_id': room_id, 'status': status,
+            'event_count': 0, 'attendees': 0, 'revenue': 0.0, 'booked_hours': 0.0}
+
+
+def build_rollup_rows(bookings):
+    """Aggregate booking rows into rollup rows keyed by (day, room_id, status)"""
+    rows = {}
+    for booking in bookings:
+        cell = rollup_cell(booking)
+        if cell is None:
+            continue
+        status = booking.get('status') or 'tentative'
+        key = cell + (status,)
+        row = rows.get(key)
+        if row is None:
+            row = rows[key] = empty_rollup_row(cell[0], cell[1], status)
+        row['event_count'] += 1
+        row['attendees'] += int(booking.get('attendees') or 0)
+        row['revenue'] += float(booking.get('total_price') or 0)
+        row['booked_hours'] += booking_hours(booking)
+    for row in rows.values():
+        row['revenue'] = round(row['revenue'], 2)
+        row['booked_hours'] = round(row['booked_hours'], 2)
+    return rows
+
+
+def day_bounds(day):
+    """ISO timestamps bounding one UTC day, for start_time >= first and < after"""
+    first = f"{day}T00:00:00+00:00"
+    after = (booking_start_date(first) + timedelta(days=1)).isoformat() + "T00:00:00+00:00"
+    return first, after
+
+
+def summarize_rollup(rows, statuses=None, group_by=None):
+    """Sum rollup measures, optionally only for some statuses and grouped by a column or function.
+
+    Returns one totals dict, or {group: totals} when group_by is given.
+    """
+    def totals():
+        return {'event_count': 0, 'attendees': 0, 'revenue': 0.0, 'booked_hours': 0.0}
+
+    grouped = {}
+    for row in rows:
+        if statuses is not None and row.get('status') not in statuses:
+            continue
+        if group_by is None:
+            group = None
+        elif callable(group_by):
+            group = group_by(row)
+        else:
+            group = row.get(group_by)
+        entry = grouped.get(group)
+        if entry is None:
+            entry = grouped[group] = totals()
+        entry['event_count'] += int(row.get('event_count') or 0)
+        entry['attendees'] += int(row.get('attendees') or 0)
+        entry['revenue'] += float(row.get('revenue') or 0)
+        entry['booked_hours'] += float(row.get('booked_hours') or 0)
+    for entry in grouped.values():
+        entry['revenue'] = round(entry['revenue'], 2)
+        entry['booked_hours'] = round(entry['booked_hours'], 2)
+    if group_by is None:
+        return grouped.get(None) or totals()
+    return grouped
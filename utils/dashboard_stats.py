@@ -0,0 +1,226 @@
+"""
+Incrementally maintained dashboard statistics.
+
+Keeps booking counters and revenue by status plus per-day buckets (counts,
+revenue and rooms used) for the days the dashboard's rolling windows need.
+Booking writes apply a delta (remove the old row's contribution, add the new
+one); a full rebuild is only needed on demand, on a schedule, or when a
+delta cannot be applied. A rebuild pages the bookings into a fresh aggregate
+without holding the lock and swaps it in at the end, settling the bookings
+written meanwhile. The whole state serialises to a small JSON snapshot.
+"""
+import threading
+from datetime import datetime, timedelta, UTC
+
+REQUIRED_FIELDS = ('status', 'start_time', 'room_id')
+SNAPSHOT_VERSION = 1
+
+
+def booking_start_date(value):
+    """UTC calendar date of a booking start time"""
+    parsed = value if isinstance(value, datetime) else datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=UTC)
+    return parsed.astimezone(UTC).date()
+
+
+def bucket_horizon(now):
+    """Earliest day the rolling windows can reach: last month's first day or 30 days back"""
+    current_month_start = now.date().replace(day=1)
+    last_month_start = (current_month_start - timedelta(days=1)).replace(day=1)
+    return min(last_month_start, now.date() - timedelta(days=30))
+
+
+class DashboardStatsAggregate:
+    """Booking counters by status with per-day buckets, updated by deltas"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._rebuild_lock = threading.Lock()
+        self._written_during_rebuild = None  # booking id -> latest row (None once deleted) while a rebuild pages
+        self._rebuild_missed_write = False
+        self._reset()
+
+    def _reset(self):
+        self.counts = {}
+        self.revenue = {}
+        self.days = {}  # 'YYYY-MM-DD' -> {'counts': {status: n}, 'revenue': {status: x}, 'rooms': {room_id: n}}
+        self.horizon = None
+        self.computed_at = None
+        self.updated_at = None
+        self.stale = True
+
+    def _apply_row(self, booking, sign):
+        status = booking.get('status') or 'tentative'
+        price = float(booking.get('total_price') or 0)
+        self.counts[status] = self.counts.get(status, 0) + sign
+        self.revenue[status] = self.revenue.get(status, 0.0) + sign * price
+
+        day = booking_start_date(booking['start_time'])
+        if day < self.horizon:
+            return
+        bucket = self.days.setdefault(day.isoformat(), {'counts': {}, 'revenue': {}, 'rooms': {}})
+        bucket['counts'][status] = bucket['counts'].get(status, 0) + sign
+        bucket['revenue'][status] = bucket['revenue'].get(status, 0.0) + sign * price
+        if status != 'cancelled':
+            room_key = str(booking['room_id'])
+            bucket['rooms'][room_key] = bucket['rooms'].get(room_key, 0) + sign
+            if bucket['rooms'][room_key] <= 0:
+                bucket['rooms'].pop(room_key)
+
+    def rebuild(self, bookings, now=None):
+        """Recompute everything from an iterable of booking rows.
+
+        The rows are summed into a fresh aggregate while deltas keep applying to
+        the current one, then swapped in under the lock. A booking written during
+        the scan may have been read before or after the write, so the row the scan
+        counted is taken back out and the latest row from the write put in.
+        """
+        now = now or datetime.now(UTC)
+        with self._rebuild_lock:
+            with self._lock:
+                self._written_during_rebuild = {}
+                self._rebuild_missed_write = False
+            try:
+                fresh = DashboardStatsAggregate()
+                fresh.horizon = bucket_horizon(now)
+                scanned = {}
+                for booking in bookings:
+                    if all(booking.get(field) is not None for field in REQUIRED_FIELDS):
+                        fresh._apply_row(booking, 1)
+                        scanned[booking.get('id')] = booking
+
+                with self._lock:
+                    for booking_id, latest in self._written_during_rebuild.items():
+                        if booking_id in scanned:
+                            fresh._apply_row(scanned[booking_id], -1)
+                        if latest is not None:
+                            fresh._apply_row(latest, 1)
+                    self.counts, self.revenue, self.days, self.horizon = fresh.counts, fresh.revenue, fresh.days, fresh.horizon
+                    self.computed_at = self.updated_at = now
+                    self.stale = self._rebuild_missed_write
+            finally:
+                with self._lock:
+                    self._written_during_rebuild = None
+
+    def apply(self, old_booking, new_booking):
+        """Apply a create (old None), update or delete (new None); returns False and marks the aggregate stale if a row is incomplete"""
+        with self._lock:
+            rows = [row for row in (old_booking, new_booking) if row is not None]
+            complete = all(all(row.get(field) is not None for field in REQUIRED_FIELDS) and 'total_price' in row
+                           for row in rows)
+            if self._written_during_rebuild is not None:
+                booking_id = (new_booking or old_booking or {}).get('id')
+                if complete and booking_id is not None:
+                    self._written_during_rebuild[booking_id] = new_booking
+                else:
+                    self._rebuild_missed_write = True
+            if self.stale:
+                return False
+            if not complete:
+                self.stale = True
+                return False
+            if old_booking is not None:
+                self._apply_row(old_booking, -1)
+            if new_booking is not None:
+                self._apply_row(new_booking, 1)
+            self.updated_at = datetime.now(UTC)
+            return True
+
+    def _sum_days(self, first_day, last_day, key, statuses=None):
+        """Sum a bucket field over non-cancelled (or the given) statuses for days in [first_day, last_day]"""
+        total = 0
+        first, last = first_day.isoformat(), last_day.isoformat() if last_day else None
+        for day, bucket in self.days.items():
+            if day < first or (last and day > last):
+                continue
+            for status, value in bucket[key].items():
+                if (status in statuses) if statuses else status != 'cancelled':
+                    total += value
+        return total
+
+    def compute_stats(self, total_rooms=0, available_rooms=0, total_clients=0, now=None):
+        """Build the dashboard stats dict from the counters and buckets"""
+        now = now or datetime.now(UTC)
+        today = now.date()
+        current_month_start = today.replace(day=1)
+        last_month_start = (current_month_start - timedelta(days=1)).replace(day=1)
+
+        with self._lock:
+            total_bookings = sum(count for status, count in self.counts.items() if status != 'cancelled')
+            total_revenue = sum(value for status, value in self.revenue.items() if status != 'cancelled')
+            confirmed_revenue = self.revenue.get('confirmed', 0.0)
+            revenue_this_month = self._sum_days(current_month_start, None, 'revenue')
+            confirmed_revenue_this_month = self._sum_days(current_month_start, None, 'revenue', ('confirmed',))
+            last_month_confirmed_revenue = self._sum_days(
+                last_month_start, current_month_start - timedelta(days=1), 'revenue', ('confirmed',))
+
+            occupied_rooms = set()
+            first_occupancy_day = (today - timedelta(days=30)).isoformat()
+            for day, bucket in self.days.items():
+                if first_occupancy_day <= day <= today.isoformat():
+                    occupied_rooms.update(bucket['rooms'])
+
+            stats = {
+                'total_bookings': total_bookings,
+                'total_clients': total_clients,
+                'total_rooms': total_rooms,
+                'available_rooms': available_rooms,
+                'confirmed_bookings': self.counts.get('confirmed', 0),
+                'tentative_bookings': self.counts.get('tentative', 0),
+                'cancelled_bookings': self.counts.get('cancelled', 0),
+                'total_revenue': round(total_revenue, 2),
+                'confirmed_revenue': round(confirmed_revenue, 2),
+                'tentative_revenue': round(total_revenue - confirmed_revenue, 2),
+                'revenue_this_month': round(revenue_this_month, 2),
+                'confirmed_revenue_this_month': round(confirmed_revenue_this_month, 2),
+                'tentative_revenue_this_month': round(revenue_this_month - confirmed_revenue_this_month, 2),
+                'average_booking_value': total_revenue / total_bookings if total_bookings else 0,
+                'upcoming_bookings': self._sum_days(today, today + timedelta(days=30), 'counts'),
+                'todays_bookings': self._sum_days(today, today, 'counts'),
+                'occupancy_rate': (len(occupied_rooms) / total_rooms) * 100 if total_rooms else 0,
+                'revenue_growth': 0,
+                'stats_computed_at': self.computed_at.isoformat() if self.computed_at else None,
+                'stats_updated_at': self.updated_at.isoformat() if self.updated_at else None
+            }
+
+        if last_month_confirmed_revenue > 0:
+            stats['revenue_growth'] = ((confirmed_revenue_this_month - last_month_confirmed_revenue) / last_month_confirmed_revenue) * 100
+        else:
+            stats['revenue_growth'] = 100 if confirmed_revenue_this_month > 0 else 0
+        return stats
+
+    def needs_rebuild(self, max_age_hours, now=None):
+        """True when stale, never computed, or the last full recompute is older than max_age_hours"""
+        now = now or datetime.now(UTC)
+        with self._lock:
+            return self.stale or self.computed_at is None or (now - self.computed_at) > timedelta(hours=max_age_hours)
+
+    def to_snapshot(self):
+        """Serialise the aggregate for persistence"""
+        with self._lock:
+            return {
+                'version': SNAPSHOT_VERSION,
+                'counts': dict(self.counts),
+                'revenue': dict(self.revenue),
+                'days': {day: {key: dict(values) for key, values in bucket.items()} for day, bucket in self.days.items()},
+                'horizon': self.horizon.isoformat() if self.horizon else None,
+                'computed_at': self.computed_at.isoformat() if self.computed_at else None,
+                'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            }
+
+    def load_snapshot(self, snapshot):
+        """Restore a persisted snapshot; returns False if it is unusable"""
+        if not snapshot or snapshot.get('version') != SNAPSHOT_VERSION or not snapshot.get('computed_at'):
+            return False
+        with self._lock:
+            self._reset()
+            self.counts = dict(snapshot.get('counts') or {})
+            self.revenue = dict(snapshot.get('revenue') or {})
+            self.days = {day: {key: dict(values) for key, values in bucket.items()}
+                         for day, bucket in (snapshot.get('days') or {}).items()}
+            self.horizon = datetime.fromisoformat(snapshot['horizon']).date()
+            self.computed_at = datetime.fromisoformat(snapshot['computed_at'])
+            self.updated_at = datetime.fromisoformat(snapshot['updated_at']) if snapshot.get('updated_at') else self.computed_at
+            self.stale = False
+        return True
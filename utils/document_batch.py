@@ -0,0 +1,158 @@
+"""
+Bulk quotation/invoice jobs.
+
+A job takes bookings that were prefetched in a few queries, renders one
+document per booking on a small thread pool (each render is handed to the
+PDF process pool and the document cache, so threads only wait), and then
+either writes the documents into one zip archive or hands each to a
+delivery callback (queueing an email). Jobs run in a background thread and
+report progress and throughput while they run; a failed booking is
+recorded and the job carries on with the rest.
+"""
+import os
+import threading
+import time
+import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+class DocumentBatchJob:
+    """One bulk run: render(booking) -> (filename, bytes); deliver(booking, filename, bytes) -> label or None"""
+
+    def __init__(self, bookings, render, document_type='invoice', archive_path=None, deliver=None, workers=4,
+                 description=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.bookings = list(bookings)
+        self.render = render
+        self.document_type = document_type
+        self.archive_path = archive_path
+        self.deliver = deliver
+        self.workers = max(1, workers)
+        self.description = description
+        self.status = 'queued'
+        self.done = 0
+        self.failures = []   # {'booking_id', 'error'}
+        self.delivered = []  # labels returned by deliver (e.g. recipient addresses)
+        self.bytes_written = 0
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def run(self):
+        self.started_at = time.time()
+        self.status = 'running'
+        archive = None
+        try:
+            if self.archive_path:
+                os.makedirs(os.path.dirname(self.archive_path), exist_ok=True)
+                archive = zipfile.ZipFile(self.archive_path, 'w', compression=zipfile.ZIP_STORED)
+            names = set()
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                futures = {pool.submit(self.render, booking): booking for booking in self.bookings}
+                # Results are written from this thread only, so the archive needs no lock
+                for future in as_completed(futures):
+                    booking = futures[future]
+                    try:
+                        filename, content = future.result()
+                        if archive is not None:
+                            archive.writestr(_unique_name(filename, booking, names), content)
+                        if self.deliver is not None:
+                            label = self.deliver(booking, filename, content)
+                            if label:
+                                self.delivered.append(label)
+                        with self._lock:
+                            self.done += 1
+                            self.bytes_written += len(content)
+                    except Exception as e:
+                        print(f"⚠️ WARNING: Batch {self.id} could not produce {self.document_type} "
+                              f"for booking #{booking.get('id')}: {e}")
+                        with self._lock:
+                            self.done += 1
+                            self.failures.append({'booking_id': booking.get('id'), 'error': str(e)})
+            if archive is not None:
+                archive.close()  # before 'completed', or a download can read a zip without its directory
+                archive = None
+            self.status = 'completed'
+        except Exception as e:
+            print(f"❌ ERROR: Document batch {self.id} failed: {e}")
+            self.status = 'failed'
+            self.failures.append({'booking_id': None, 'error': str(e)})
+        finally:
+            if archive is not None:
+                archive.close()
+            self.finished_at = time.time()
+        progress = self.progress()
+        print(f"📦 Batch {self.id}: {progress['succeeded']}/{progress['total']} {self.document_type}s "
+              f"in {progress['elapsed_seconds']}s ({progress['documents_per_second']}/s), "
+              f"{len(self.failures)} failed")
+
+    def progress(self):
+        with self._lock:
+            done, failed, size = self.done, len(self.failures), self.bytes_written
+        elapsed = ((self.finished_at or time.time()) - self.started_at) if self.started_at else 0.0
+        total = len(self.bookings)
+        rate = done / elapsed if elapsed else 0.0
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'document_type': self.document_type,
+            'description': self.description,
+            'total': total,
+            'done': done,
+            'succeeded': done - failed,
+            'failed': failed,
+            'percent': round(done / total * 100, 1) if total else 100.0,
+            'elapsed_seconds': round(elapsed, 2),
+            'documents_per_second': round(rate, 2),
+            'eta_seconds': round((total - done) / rate, 1) if rate and self.status == 'running' else None,
+            'bytes': size,
+            'archive_ready': bool(self.archive_path) and self.status == 'completed',
+            'delivered': len(self.delivered),
+            'failures': list(self.failures[:50])
+        }
+
+
+def _unique_name(filename, booking, names):
+    """Zip entry name; bookings that share a client and date get their id appended"""
+    name = filename
+    if name in names:
+        stem, ext = os.path.splitext(filename)
+        name = f"{stem}_{booking.get('id')}{ext}"
+    names.add(name)
+    return name
+
+
+class DocumentBatchRegistry:
+    """Runs jobs on background threads and keeps the most recent ones for progress polling"""
+
+    def __init__(self, max_jobs=20):
+        self.max_jobs = max_jobs
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def start(self, job):
+        with self._lock:
+            self._jobs[job.id] = job
+            for stale in sorted(self._jobs.values(), key=lambda item: item.created_at)[:-self.max_jobs]:
+                if stale.status in ('completed', 'failed'):
+                    self._discard(stale)
+        threading.Thread(target=job.run, name=f'document-batch-{job.id}', daemon=True).start()
+        return job
+
+    def _discard(self, job):
+        self._jobs.pop(job.id, None)
+        if job.archive_path and os.path.exists(job.archive_path):
+            try:
+                os.unlink(job.archive_path)
+            except OSError:
+                pass
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self):
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda item: item.created_at, reverse=True)
@@ -0,0 +1,210 @@
+"""
+PDF document service.
+
+Documents are rendered in a process pool, off the request thread and off
+the web worker's GIL, and cached on disk under a hash of the document kind,
+its template version and the payload it prints. The cache is content
+addressed: a booking whose printed fields change hashes to a new key, so a
+stale copy can never be served. Files carry the scope they belong to (e.g.
+"booking-12"), which lets a booking write delete its old copies right away
+instead of waiting for them to age out of the size bound.
+
+Concurrent requests for the same document share one render.
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from utils.pdf_documents import TEMPLATE_VERSIONS, render_document
+
+
+def document_key(kind, payload):
+    """Content hash of a document: kind, template version and the canonical payload"""
+    canonical = json.dumps([kind, TEMPLATE_VERSIONS.get(kind, 0), payload],
+                           sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class DocumentCache:
+    """Directory of rendered PDFs named <kind>.<scope>.<hash>.pdf, bounded to max_files"""
+
+    def __init__(self, directory, max_files=500):
+        self.directory = directory
+        self.max_files = max_files
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def _path(self, kind, scope, key):
+        return os.path.join(self.directory, f"{kind}.{scope}.{key}.pdf")
+
+    def get(self, kind, scope, key):
+        path = self._path(kind, scope, key)
+        try:
+            with open(path, 'rb') as f:
+                content = f.read()
+            os.utime(path)  # keeps recently used files out of the prune
+            return content
+        except OSError:
+            return None
+
+    def put(self, kind, scope, key, content):
+        os.makedirs(self.directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            os.replace(temp_path, self._path(kind, scope, key))
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % 50 == 0
+        if prune:
+            self.prune()
+
+    def invalidate(self, scope):
+        """Delete every cached document of one scope; returns how many were removed"""
+        marker = f".{scope}."
+        removed = 0
+        for entry in self._entries():
+            if marker in entry.name:
+                try:
+                    os.unlink(entry.path)
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
+
+    def prune(self):
+        """Drop the least recently used files beyond max_files"""
+        entries = []
+        for entry in self._entries():
+            try:
+                entries.append((entry.stat().st_mtime, entry.path))
+            except OSError:
+                pass
+        entries.sort(reverse=True)
+        for _, path in entries[self.max_files:]:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+    def _entries(self):
+        try:
+            return [entry for entry in os.scandir(self.directory) if entry.name.endswith('.pdf')]
+        except OSError:
+            return []
+
+    def stats(self):
+        entries = self._entries()
+        return {'files': len(entries), 'bytes': sum(entry.stat().st_size for entry in entries)}
+
+
+class DocumentService:
+    """Render-or-serve PDFs through a process pool and a DocumentCache.
+
+    workers=0 renders in the calling thread (scripts, tests, hosts without
+    multiprocessing). A pool that breaks is rebuilt on the next render and
+    the failed document is rendered inline.
+    """
+
+    def __init__(self, cache, workers=2, timeout=60, start_method='spawn'):
+        self.cache = cache
+        self.workers = workers
+        self.timeout = timeout
+        self.start_method = start_method
+        self._pool = None
+        self._lock = threading.Lock()
+        self._in_flight = {}  # key -> Future shared by concurrent requests
+        self.counters = {'hits': 0, 'misses': 0, 'renders': 0, 'shared': 0, 'inline': 0,
+                         'invalidations': 0, 'errors': 0}
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None and self.workers > 0:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context(self.start_method))
+            return self._pool
+
+    def _render(self, kind, payload):
+        pool = self._get_pool()
+        if pool is None:
+            self._count('inline')
+            return render_document(kind, payload)
+        try:
+            return pool.submit(render_document, kind, payload).result(timeout=self.timeout)
+        except BrokenProcessPool as e:
+            print(f"⚠️ WARNING: PDF render pool broke, rendering inline: {e}")
+            with self._lock:
+                if self._pool is pool:
+                    self._pool = None
+            pool.shutdown(wait=False, cancel_futures=True)
+            self._count('inline')
+            return render_document(kind, payload)
+
+    def render(self, kind, payload, scope='report'):
+        """PDF bytes for a document, from the cache or freshly rendered"""
+        key = document_key(kind, payload)
+        content = self.cache.get(kind, scope, key)
+        if content is not None:
+            self._count('hits')
+            return content
+        self._count('misses')
+
+        with self._lock:
+            shared = self._in_flight.get(key)
+            if shared is None:
+                future = self._in_flight[key] = Future()
+        if shared is not None:
+            self._count('shared')
+            return shared.result(timeout=self.timeout)
+
+        try:
+            started = time.perf_counter()
+            content = self._render(kind, payload)
+            self._count('renders')
+            print(f"📄 Rendered {kind} ({scope}) in {(time.perf_counter() - started) * 1000:.0f} ms")
+            try:
+                self.cache.put(kind, scope, key, content)
+            except OSError as e:
+                print(f"⚠️ WARNING: Could not cache {kind} PDF: {e}")
+            future.set_result(content)
+            return content
+        except BaseException as e:
+            self._count('errors')
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def invalidate(self, scope):
+        removed = self.cache.invalidate(scope)
+        if removed:
+            self._count('invalidations')
+        return removed
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.counters)
+            in_flight = len(self._in_flight)
+        return {'workers': self.workers, 'in_flight': in_flight, **counters, **self.cache.stats()}
@@ -0,0 +1,272 @@
+"""
+Persistent email outbox.
+
+Messages are spooled to a local SQLite file and sent by a background worker,
+so request handlers never wait on the mail server. The worker claims due
+messages in batches, sends a whole batch over one authenticated SMTP session
+and reschedules failures with exponential backoff until max_attempts.
+Messages left mid-send by a crashed process are reclaimed after claim_timeout.
+"""
+import base64
+import json
+import random
+import smtplib
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from email import encoders
+from email.mime.base import MIMEBase
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS email_outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    to_email TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    body_html TEXT NOT NULL,
+    body_text TEXT,
+    attachments TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    claimed_at REAL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    sent_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_email_outbox_due ON email_outbox(status, next_attempt_at);
+"""
+
+# Rejections of one message; the session stays usable for the rest of the batch
+MESSAGE_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError,
+                  smtplib.SMTPNotSupportedError, UnicodeError, ValueError)
+# Anything else at the socket or protocol level means the session is gone
+SESSION_ERRORS = (smtplib.SMTPException, OSError)
+
+
+def build_message(sender, to_email, subject, body_html, body_text=None, attachments=None):
+    """Build a MIME message; attachments are (filename, bytes, mimetype) tuples"""
+    msg = MIMEMultipart('mixed') if attachments else MIMEMultipart('alternative')
+    msg['Subject'] = subject
+    msg['From'] = sender
+    msg['To'] = to_email
+
+    body = MIMEMultipart('alternative') if attachments else msg
+    if body_text:
+        body.attach(MIMEText(body_text, 'plain'))
+    body.attach(MIMEText(body_html, 'html'))
+    if attachments:
+        msg.attach(body)
+        for filename, content, mimetype in attachments:
+            maintype, _, subtype = (mimetype or 'application/octet-stream').partition('/')
+            part = MIMEBase(maintype, subtype or 'octet-stream')
+            part.set_payload(content)
+            encoders.encode_base64(part)
+            part.add_header('Content-Disposition', f'attachment; filename="{filename}"')
+            msg.attach(part)
+    return msg
+
+
+class EmailOutbox:
+    """SQLite-backed outbox drained by a background sender thread"""
+
+    def __init__(self, db_path, connect, sender, batch_size=20, max_attempts=6, base_delay=30,
+                 max_delay=3600, poll_interval=5, claim_timeout=600):
+        self.db_path = db_path
+        self.connect = connect  # returns a logged-in smtplib.SMTP-like session
+        self.sender = sender
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.claim_timeout = claim_timeout
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._schema_ready = False
+        self.counters = {'enqueued': 0, 'sent': 0, 'retried': 0, 'failed': 0, 'sessions': 0, 'batches': 0}
+        self.last_error = None
+
+    # --- storage ---
+
+    @contextmanager
+    def _connection(self):
+        """One short transaction on a fresh connection (callers hold self._lock)"""
+        connection = sqlite3.connect(self.db_path, timeout=10)
+        connection.row_factory = sqlite3.Row
+        try:
+            if not self._schema_ready:
+                connection.execute('PRAGMA journal_mode=WAL')
+                connection.executescript(SCHEMA)
+                self._schema_ready = True
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def enqueue(self, to_email, subject, body_html, body_text=None, attachments=None):
+        """Spool a message and wake the worker; returns the outbox id"""
+        encoded = json.dumps([
+            {'filename': filename, 'content': base64.b64encode(content).decode('ascii'), 'mimetype': mimetype}
+            for filename, content, mimetype in attachments
+        ]) if attachments else None
+        now = time.time()
+        with self._lock, self._connection() as connection:
+            cursor = connection.execute(
+                'INSERT INTO email_outbox (to_email, subject, body_html, body_text, attachments, next_attempt_at, created_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (to_email, subject, body_html, body_text, encoded, now, now))
+            self.counters['enqueued'] += 1
+            message_id = cursor.lastrowid
+        self._wake.set()
+        return message_id
+
+    def _claim_batch(self, now):
+        """Mark up to batch_size due messages as sending, recovering stale claims first"""
+        with self._lock, self._connection() as connection:
+            connection.execute(
+                "UPDATE email_outbox SET status = 'pending' WHERE status = 'sending' AND claimed_at < ?",
+                (now - self.claim_timeout,))
+            rows = connection.execute(
+                "SELECT * FROM email_outbox WHERE status = 'pending' AND next_attempt_at <= ? "
+                "ORDER BY next_attempt_at, id LIMIT ?", (now, self.batch_size)).fetchall()
+            if rows:
+                connection.execute(
+                    f"UPDATE email_outbox SET status = 'sending', claimed_at = ? "
+                    f"WHERE id IN ({','.join('?' * len(rows))})", [now] + [row['id'] for row in rows])
+            return [dict(row) for row in rows]
+
+    def _mark_sent(self, message_id):
+        with self._lock, self._connection() as connection:
+            connection.execute("UPDATE email_outbox SET status = 'sent', sent_at = ?, last_error = NULL WHERE id = ?",
+                               (time.time(), message_id))
+            self.counters['sent'] += 1
+
+    def _reschedule(self, message, error, now):
+        """Back off exponentially, or give up after max_attempts"""
+        attempts = message['attempts'] + 1
+        self.last_error = str(error)
+        with self._lock, self._connection() as connection:
+            if attempts >= self.max_attempts:
+                connection.execute(
+                    "UPDATE email_outbox SET status = 'failed', attempts = ?, last_error = ? WHERE id = ?",
+                    (attempts, str(error), message['id']))
+                self.counters['failed'] += 1
+                print(f"❌ ERROR: Giving up on email #{message['id']} to {message['to_email']} after {attempts} attempts: {error}")
+                return
+            delay = min(self.max_delay, self.base_delay * (2 ** (attempts - 1)))
+            delay *= 1 + random.uniform(0, 0.1)
+            connection.execute(
+                "UPDATE email_outbox SET status = 'pending', attempts = ?, last_error = ?, next_attempt_at = ? WHERE id = ?",
+                (attempts, str(error), now + delay, message['id']))
+            self.counters['retried'] += 1
+        print(f"⚠️ WARNING: Email #{message['id']} to {message['to_email']} failed ({error}); retrying in {delay:.0f}s")
+
+    def _release(self, messages):
+        """Return claimed messages untouched (e.g. on shutdown)"""
+        if not messages:
+            return
+        with self._lock, self._connection() as connection:
+            connection.execute(
+                f"UPDATE email_outbox SET status = 'pending' WHERE id IN ({','.join('?' * len(messages))})",
+                [message['id'] for message in messages])
+
+    # --- sending ---
+
+    def _to_mime(self, message):
+        attachments = [
+            (item['filename'], base64.b64decode(item['content']), item['mimetype'])
+            for item in json.loads(message['attachments'])
+        ] if message['attachments'] else None
+        return build_message(self.sender, message['to_email'], message['subject'],
+                             message['body_html'], message['body_text'], attachments)
+
+    def drain(self, now=None):
+        """Send every due message, one SMTP session per batch; returns the number sent"""
+        sent = 0
+        while not self._stopping.is_set():
+            batch = self._claim_batch(now or time.time())
+            if not batch:
+                return sent
+            sent += self._send_batch(batch, now)
+        return sent
+
+    def _send_batch(self, batch, now=None):
+        self.counters['batches'] += 1
+        try:
+            session = self.connect()
+            self.counters['sessions'] += 1
+        except Exception as e:
+            print(f"❌ ERROR: Could not open SMTP session: {e}")
+            for message in batch:
+                self._reschedule(message, e, now or time.time())
+            return 0
+
+        sent = 0
+        try:
+            for position, message in enumerate(batch):
+                try:
+                    session.send_message(self._to_mime(message))
+                except MESSAGE_ERRORS as e:
+                    self._reschedule(message, e, now or time.time())
+                    continue
+                except SESSION_ERRORS as e:
+                    # The session is gone: charge this message and retry the rest in a new batch
+                    self._reschedule(message, e, now or time.time())
+                    self._release(batch[position + 1:])
+                    return sent
+                self._mark_sent(message['id'])
+                sent += 1
+        finally:
+            try:
+                session.quit()
+            except Exception:
+                pass
+        return sent
+
+    # --- worker ---
+
+    def start(self):
+        """Start the background sender if it is not already running"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name='email-outbox', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=10):
+        self._stopping.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                self.drain()
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"❌ ERROR: Email outbox worker error: {e}")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def stats(self):
+        """Message counts by status plus worker counters"""
+        with self._lock, self._connection() as connection:
+            by_status = {row['status']: row['count'] for row in connection.execute(
+                'SELECT status, COUNT(*) AS count FROM email_outbox GROUP BY status')}
+            oldest = connection.execute(
+                "SELECT MIN(created_at) FROM email_outbox WHERE status IN ('pending', 'sending')").fetchone()[0]
+        return {
+            'queued': by_status.get('pending', 0) + by_status.get('sending', 0),
+            'by_status': by_status,
+            'oldest_queued_seconds': round(time.time() - oldest, 1) if oldest else 0,
+            'worker_running': bool(self._thread and self._thread.is_alive()),
+            'last_error': self.last_error,
+            **self.counters
+        }
@@ -0,0 +1,137 @@
+"""
+Concurrent fan-out of independent page queries.
+
+A page that needs several unrelated reads (dashboard cards, a booking and
+its audit trail) hands them to ``FanOutExecutor.run`` as named callables.
+They run on a small bounded thread pool, so the page waits roughly as long
+as its slowest read instead of the sum of all of them. Each call has a
+deadline; a call that fails or misses it is replaced by its fallback value
+and reported, and the rest of the page still renders. A call that misses
+its deadline cannot be stopped: it keeps running on its pool thread, holding
+any lock it took, until it returns, so code called from a fan-out must not
+make later requests wait on such a lock without a bound.
+
+Workers borrow the calling request's scope (utils/request_scope.py), so
+they see its request, session and current_user, their queries are counted
+in the request's query trace and they share its identity map. A fan-out started from inside a worker runs inline rather
+than queueing behind its own parent on the same pool.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from utils.request_scope import borrowed, capture
+
+_worker = threading.local()
+
+
+class FanOutResults(dict):
+    """Results by name, plus which calls fell back and how long the fan-out took"""
+
+    def __init__(self):
+        super().__init__()
+        self.failed = {}     # name -> error message
+        self.timed_out = []  # names that missed their deadline
+        self.timings = {}    # name -> seconds, for calls that finished
+        self.elapsed = 0.0
+
+    @property
+    def partial(self):
+        return bool(self.failed or self.timed_out)
+
+
+class FanOutExecutor:
+    """Bounded thread pool for running a page's independent reads concurrently.
+
+    workers=0 runs every call inline, one after another (scripts, tests).
+    """
+
+    def __init__(self, workers=8, timeout=10.0, name='fanout'):
+        self.workers = workers
+        self.timeout = timeout
+        self.name = name
+        self._pool = None
+        self._lock = threading.Lock()
+        self.counters = {'fanouts': 0, 'calls': 0, 'failures': 0, 'timeouts': 0, 'inline': 0}
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None and self.workers > 0:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=self.name)
+            return self._pool
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    @staticmethod
+    def _timed(call):
+        started = time.perf_counter()
+        return call(), time.perf_counter() - started
+
+    @classmethod
+    def _in_worker(cls, scope, call):
+        _worker.active = True
+        try:
+            with borrowed(scope):
+                return cls._timed(call)
+        finally:
+            _worker.active = False
+
+    def run(self, calls, fallbacks=None, timeout=None, label='fan-out'):
+        """Run {name: zero-argument callable} concurrently and return FanOutResults.
+
+        timeout is seconds for every call or {name: seconds}; a call that
+        raises or runs past it yields fallbacks.get(name) instead.
+        """
+        fallbacks = fallbacks or {}
+        started = time.perf_counter()
+        results = FanOutResults()
+        self._count('fanouts')
+        self._count('calls', len(calls))
+
+        pool = None if getattr(_worker, 'active', False) or len(calls) < 2 else self._get_pool()
+        if pool is None:
+            self._count('inline', len(calls))
+            for name, call in calls.items():
+                try:
+                    results[name], results.timings[name] = self._timed(call)
+                except Exception as e:
+                    self._fail(results, label, name, e, fallbacks)
+            results.elapsed = time.perf_counter() - started
+            return results
+
+        scope = capture()
+        futures = {name: pool.submit(self._in_worker, scope, call) for name, call in calls.items()}
+        for name, future in futures.items():
+            limit = timeout.get(name, self.timeout) if isinstance(timeout, dict) else (timeout or self.timeout)
+            try:
+                results[name], results.timings[name] = future.result(
+                    timeout=max(0.0, started + limit - time.perf_counter()))
+            except FutureTimeout:
+                # The thread cannot be stopped; its result is simply dropped when it arrives
+                future.cancel()
+                self._count('timeouts')
+                results.timed_out.append(name)
+                results[name] = fallbacks.get(name)
+                print(f"⚠️ WARNING: {label}: '{name}' did not finish within {limit}s, using fallback")
+            except Exception as e:
+                self._fail(results, label, name, e, fallbacks)
+        results.elapsed = time.perf_counter() - started
+        return results
+
+    def _fail(self, results, label, name, error, fallbacks):
+        self._count('failures')
+        results.failed[name] = str(error)
+        results[name] = fallbacks.get(name)
+        print(f"⚠️ WARNING: {label}: '{name}' failed, using fallback: {error}")
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        with self._lock:
+            return {'workers': self.workers, 'timeout_seconds': self.timeout, **self.counters}
@@ -0,0 +1,234 @@
+"""
+Request-scoped identity map for Supabase reads.
+
+``IdentityMapClient`` wraps a Supabase client. Within a Flask request every
+select that goes through it is fingerprinted (table plus the exact chain of
+select/filter/order/limit calls) and its result kept in ``flask.g``; rows
+that carry an id are also indexed by table, column list and primary key,
+so ``select(cols).eq('id', x)`` is answered from any earlier read that
+returned that row. Any insert/update/upsert/delete through the client drops
+what the request holds for that table, including reads that embed it, and
+an rpc() drops everything. Callers always receive copies.
+
+Outside a request (startup, cron scripts, background threads) the client is
+a plain pass-through. ``close_identity_map`` runs at request teardown and
+reports how many round trips the request saved.
+"""
+import copy
+import json
+import re
+import threading
+
+from flask import g, has_request_context
+
+from utils.request_scope import register_request_value, request_value
+
+WRITE_METHODS = {'insert', 'update', 'upsert', 'delete'}
+
+# Large scans are rarely repeated and would cost a deep copy to keep
+MAX_CACHED_ROWS = 500
+
+_EMBEDDED_TABLE = re.compile(r'(\w+)(?:!\w+)?\s*\(')
+
+_totals_lock = threading.Lock()
+_totals = {'requests': 0, 'reads': 0, 'served': 0, 'writes': 0}
+
+
+def _tables_read(table_name, columns):
+    """The table a select reads plus every table it embeds"""
+    return {table_name, *_EMBEDDED_TABLE.findall(columns or '')}
+
+
+def _select_columns(select_args):
+    return ','.join(select_args) if select_args else '*'
+
+
+class IdentityMapResponse:
+    """Stands in for a PostgREST APIResponse served from the map"""
+
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class RequestIdentityMap:
+    """Reads already made by one request, keyed by query fingerprint and by (table, columns, id)"""
+
+    def __init__(self):
+        self._queries = {}  # fingerprint -> (tables, data, count)
+        self._rows = {}     # (table, columns, id) -> row
+        self.reads = 0
+        self.served = 0
+        self.writes = 0
+        self.served_by_table = {}
+        self._lock = threading.Lock()  # fan-out threads share the request's map
+
+    def lookup(self, table_name, fingerprint, columns=None, row_id=None):
+        """A copy of a stored response, or None; counts every read"""
+        with self._lock:
+            self.reads += 1
+            entry = self._queries.get(fingerprint)
+            if entry is not None:
+                data, count = entry[1], entry[2]
+            elif row_id is not None and (table_name, columns, str(row_id)) in self._rows:
+                data = [self._rows[(table_name, columns, str(row_id))]]
+                count = None
+            else:
+                return None
+            self.served += 1
+            self.served_by_table[table_name] = self.served_by_table.get(table_name, 0) + 1
+        return IdentityMapResponse(copy.deepcopy(data), count)
+
+    def store(self, table_name, fingerprint, columns, data, count=None):
+        if isinstance(data, list) and len(data) > MAX_CACHED_ROWS:
+            return
+        data = copy.deepcopy(data)
+        with self._lock:
+            self._queries[fingerprint] = (_tables_read(table_name, columns), data, count)
+            if isinstance(data, list):
+                for row in data:
+                    if isinstance(row, dict) and row.get('id') is not None:
+                        self._rows[(table_name, columns, str(row['id']))] = row
+
+    def invalidate(self, table_name=None):
+        """Forget reads of one table (and reads embedding it), or everything"""
+        with self._lock:
+            self.writes += 1
+            if table_name is None:
+                self._queries.clear()
+                self._rows.clear()
+                return
+            self._queries = {fingerprint: entry for fingerprint, entry in self._queries.items()
+                             if table_name not in entry[0]}
+            self._rows = {key: row for key, row in self._rows.items()
+                          if key[0] != table_name and table_name not in _tables_read(key[0], key[1])}
+
+    def report(self):
+        with self._lock:
+            served_by_table = dict(self.served_by_table)
+        return {
+            'reads': self.reads,
+            'served': self.served,
+            'round_trips': self.reads - self.served,
+            'writes': self.writes,
+            'served_by_table': served_by_table
+        }
+
+
+register_request_value('_identity_map', RequestIdentityMap)
+
+
+def current_identity_map():
+    """This request's identity map, created on first use; None outside a request"""
+    return request_value('_identity_map')
+
+
+def close_identity_map(label=None):
+    """Drop the request's map, add it to the process totals and print a line when reads were saved"""
+    identity_map = g.pop('_identity_map', None) if has_request_context() else None
+    if identity_map is None:
+        return None
+    report = identity_map.report()
+    with _totals_lock:
+        _totals['requests'] += 1
+        _totals['reads'] += report['reads']
+        _totals['served'] += report['served']
+        _totals['writes'] += report['writes']
+    if report['served']:
+        tables = ', '.join(f"{table} {served}" for table, served in sorted(report['served_by_table'].items()))
+        print(f"🗂️ {label or 'request'}: {report['reads']} reads, {report['served']} served from identity map "
+              f"({tables}), {report['round_trips']} round trips")
+    return report
+
+
+def get_identity_map_stats():
+    with _totals_lock:
+        totals = dict(_totals)
+    totals['saved_pct'] = round(totals['served'] / totals['reads'] * 100, 1) if totals['reads'] else 0.0
+    return totals
+
+
+class IdentityMapClient:
+    """Supabase client whose table() queries go through the current request's identity map"""
+
+    def __init__(self, client, enabled=True):
+        self._client = client
+        self.enabled = enabled
+
+    def __getattr__(self, attribute):
+        return getattr(self._client, attribute)
+
+    def table(self, table_name):
+        return MappedQuery(self._client.table(table_name), table_name, [], self.enabled)
+
+    from_ = table
+
+    def rpc(self, *args, **kwargs):
+        # A function can write anything, so the request's reads are no longer trusted
+        identity_map = current_identity_map() if self.enabled else None
+        if identity_map is not None:
+            identity_map.invalidate()
+        return self._client.rpc(*args, **kwargs)
+
+
+class MappedQuery:
+    """Delegates to a PostgREST builder, recording the call chain as the query's fingerprint"""
+
+    def __init__(self, builder, table_name, calls, enabled):
+        self._builder = builder
+        self._table_name = table_name
+        self._calls = calls
+        self._enabled = enabled
+
+    def __getattr__(self, attribute):
+        value = getattr(self._builder, attribute)
+        if not callable(value):
+            return value
+
+        def chained(*args, **kwargs):
+            result = value(*args, **kwargs)
+            if not hasattr(result, 'execute'):
+                return result
+            calls = self._calls + [(attribute, args, kwargs)]
+            if result is self._builder:
+                # Filters mutate the builder in place; keep the fingerprint in step for callers that don't reassign
+                self._calls = calls
+                return self
+            return MappedQuery(result, self._table_name, calls, self._enabled)
+        return chained
+
+    def _fingerprint(self):
+        return json.dumps([self._table_name, self._calls], sort_keys=True, default=str)
+
+    def _primary_key_lookup(self):
+        """(columns, id) for select(cols).eq('id', x)[.limit(n)] without a count, else (None, None)"""
+        calls = [call for call in self._calls if call[0] != 'limit']
+        if (len(calls) == 2 and calls[0][0] == 'select' and not calls[0][2]
+                and calls[1][0] == 'eq' and calls[1][1][:1] == ('id',) and len(calls[1][1]) == 2):
+            return _select_columns(calls[0][1]), calls[1][1][1]
+        return None, None
+
+    def execute(self, *args, **kwargs):
+        identity_map = current_identity_map() if self._enabled else None
+        method = self._calls[0][0] if self._calls else None
+        if identity_map is None or method not in WRITE_METHODS | {'select'}:
+            return self._builder.execute(*args, **kwargs)
+
+        if method in WRITE_METHODS:
+            try:
+                return self._builder.execute(*args, **kwargs)
+            finally:
+                identity_map.invalidate(self._table_name)
+
+        columns = _select_columns(self._calls[0][1])
+        fingerprint = self._fingerprint()
+        lookup_columns, row_id = self._primary_key_lookup()
+        cached = identity_map.lookup(self._table_name, fingerprint, lookup_columns, row_id)
+        if cached is not None:
+            return cached
+        response = self._builder.execute(*args, **kwargs)
+        if response is None:
+            return response
+        identity_map.store(self._table_name, fingerprint, columns, getattr(response, 'data', None),
+                           getattr(response, 'count', None))
+        return response
@@ -0,0 +1,158 @@
+"""
+Buffered, batched log writer.
+
+Activity and audit rows are built on the request path (so user, IP and
+timestamps are captured when the event happens) and queued in a bounded
+in-process buffer. A background thread writes them as multi-row inserts,
+one per table, whenever batch_size rows are waiting or flush_interval has
+passed. The buffer is flushed on shutdown; when it is full the oldest rows
+are dropped and counted rather than blocking the request.
+"""
+import atexit
+import threading
+import time
+from collections import deque
+
+
+def insert_rows_with(get_client):
+    """write_batch for a BufferedLogWriter: one multi-row insert through the client get_client() returns"""
+    def insert_log_rows(table, rows):
+        get_client().table(table).insert(rows, returning='minimal', default_to_null=False).execute()
+    return insert_log_rows
+
+
+class BufferedLogWriter:
+    """Bounded queue of (table, row) pairs drained by a background thread"""
+
+    def __init__(self, write_batch, batch_size=100, max_queue=10000, flush_interval=2.0, enabled=True, name='log-writer'):
+        self.write_batch = write_batch  # write_batch(table, rows) performs one multi-row insert
+        self.batch_size = batch_size
+        self.max_queue = max_queue
+        self.flush_interval = flush_interval
+        self.enabled = enabled
+        self.name = name
+        self._queue = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._atexit_registered = False
+        self.counters = {'enqueued': 0, 'written': 0, 'batches': 0, 'row_fallbacks': 0, 'dropped': 0, 'failed': 0}
+        self.high_water = 0
+        self.last_error = None
+        self.last_flush_ms = None
+
+    def enqueue(self, table, row):
+        """Queue one row; written synchronously when buffering is disabled"""
+        if not self.enabled:
+            self._write(table, [row])
+            return
+        with self._lock:
+            if len(self._queue) >= self.max_queue:
+                dropped_table, _ = self._queue.popleft()
+                self.counters['dropped'] += 1
+                if self.counters['dropped'] == 1 or self.counters['dropped'] % 1000 == 0:
+                    print(f"⚠️ WARNING: {self.name} buffer full ({self.max_queue} rows), "
+                          f"{self.counters['dropped']} row(s) dropped so far (latest from {dropped_table})")
+            self._queue.append((table, row))
+            self.counters['enqueued'] += 1
+            depth = len(self._queue)
+            self.high_water = max(self.high_water, depth)
+        self.start()
+        if depth >= self.batch_size:
+            self._wake.set()
+
+    def has_queued(self, table):
+        """True while rows for table are waiting to be written"""
+        with self._lock:
+            return any(queued_table == table for queued_table, _ in self._queue)
+
+    def flush(self):
+        """Write everything queued so far; returns the number of rows written"""
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    pending = [self._queue.popleft() for _ in range(min(len(self._queue), self.max_queue))]
+                if not pending:
+                    return written
+                started = time.perf_counter()
+                by_table = {}
+                for table, row in pending:
+                    by_table.setdefault(table, []).append(row)
+                for table, rows in by_table.items():
+                    for offset in range(0, len(rows), self.batch_size):
+                        written += self._write(table, rows[offset:offset + self.batch_size])
+                self.last_flush_ms = round((time.perf_counter() - started) * 1000, 2)
+
+    def _write(self, table, rows):
+        """One multi-row insert; if it is rejected, retry row by row so one bad row loses only itself"""
+        try:
+            self.write_batch(table, rows)
+            self.counters['batches'] += 1
+            self.counters['written'] += len(rows)
+            return len(rows)
+        except Exception as e:
+            self.last_error = str(e)
+            if len(rows) == 1:
+                self.counters['failed'] += 1
+                print(f"❌ ERROR: Failed to write {table} log row: {e}")
+                return 0
+            print(f"⚠️ WARNING: Batch insert of {len(rows)} {table} rows failed, retrying individually: {e}")
+        written = 0
+        for row in rows:
+            self.counters['row_fallbacks'] += 1
+            written += self._write(table, [row])
+        return written
+
+    # --- worker ---
+
+    def start(self):
+        """Start the background flusher if it is not already running"""
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+            if not self._atexit_registered:
+                atexit.register(self.stop)
+                self._atexit_registered = True
+
+    def stop(self, timeout=10):
+        """Stop the flusher and write whatever is still queued"""
+        self._stopping.set()
+        self._wake.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self.flush()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"❌ ERROR: {self.name} flush failed: {e}")
+
+    def stats(self):
+        """Queue depth, overflow and write counters"""
+        with self._lock:
+            queued = len(self._queue)
+        return {
+            'enabled': self.enabled,
+            'queued': queued,
+            'max_queue': self.max_queue,
+            'high_water': self.high_water,
+            'batch_size': self.batch_size,
+            'flush_interval': self.flush_interval,
+            'last_flush_ms': self.last_flush_ms,
+            'worker_running': bool(self._thread and self._thread.is_alive()),
+            'last_error': self.last_error,
+            **self.counters
+        }
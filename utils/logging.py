@@ -5,11 +5,30 @@ from datetime import datetime, timezone, timedelta
 # Central Africa Time (CAT) UTC+2
 CAT = timezone(timedelta(hours=2))
 from datetime import datetime, UTC
-from settings.config import SUPABASE_SERVICE_KEY, SUPABASE_URL
-from supabase import create_client
+import os
+from utils.log_buffer import BufferedLogWriter, insert_rows_with
 
-# Initialize Supabase admin client
-supabase_admin = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY) if SUPABASE_SERVICE_KEY else None
+# Set by core to its shared admin client, so activity rows use the same per-thread
+# clients as every other query instead of a client of their own
+_client_source = None
+
+def use_log_client(get_client):
+    """Write activity rows through the client get_client() returns"""
+    global _client_source
+    _client_source = get_client
+
+def _log_client():
+    return _client_source() if _client_source else None
+
+# Activity rows are queued and written in batches off the request path
+activity_log_writer = BufferedLogWriter(
+    insert_rows_with(_log_client),
+    batch_size=int(os.getenv('ACTIVITY_LOG_BATCH_SIZE', '100')),
+    max_queue=int(os.getenv('ACTIVITY_LOG_MAX_QUEUE', '10000')),
+    flush_interval=float(os.getenv('ACTIVITY_LOG_FLUSH_SECONDS', '2')),
+    enabled=os.getenv('ACTIVITY_LOG_BUFFERED', 'True').lower() == 'true',
+    name='activity-log-writer'
+)
 
 def log_user_activity(
     activity_type,
@@ -52,11 +71,12 @@ def log_user_activity(
             'metadata': metadata or {},
             'ip_address': ip_address,
             'user_agent': user_agent,
-            'session_id': session_id
-            # Note: created_at will be auto-generated by database
+            'session_id': session_id,
+            # Stamped here because the buffered insert lands a few seconds later
+            'created_at': datetime.now(UTC).isoformat()
         }
-        if supabase_admin:
-            supabase_admin.table('user_activity_log').insert(log_data).execute()
+        if _log_client() is not None:
+            activity_log_writer.enqueue('user_activity_log', log_data)
     except Exception as e:
         print(f"❌ ERROR: Failed to log user activity: {e}")
 
@@ -75,7 +95,7 @@ def log_authentication_activity(activity_type, email, success=True, additional_i
             'additional_info': additional_info or {}
             # Note: created_at will be auto-generated by database
         }
-        if supabase_admin:
-            supabase_admin.table('auth_activity_log').insert(log_data).execute()
+        if _log_client() is not None:
+            _log_client().table('auth_activity_log').insert(log_data).execute()
     except Exception as e:
         print(f"❌ ERROR: Failed to log authentication activity: {e}") 
\ No newline at end of file
@@ -0,0 +1,99 @@
+"""
+Keyset pagination over PostgREST result sets.
+
+PostgREST caps every response (1000 rows by default), so a bare .execute()
+on a large table silently returns a truncated list. iter_keyset() walks a
+query page by page instead, yielding rows lazily so callers can aggregate or
+write them out without holding the whole table.
+
+Pages are addressed by key rather than offset: each request continues after
+the last row seen, so rows inserted or deleted mid-walk never shift a page
+and every page costs an index range scan. A non-unique key (start_time, say)
+is paired with a unique tie key (id) so rows sharing a key value are neither
+skipped nor repeated.
+
+Pages after the first are tagged with their cursor through the builder's
+optional tag_page() hook, so query instrumentation can tell one long walk
+from the same query repeated once per row (an N+1).
+"""
+
+DEFAULT_PAGE_SIZE = 1000
+
+
+def iter_keyset(build_query, key='id', page_size=DEFAULT_PAGE_SIZE, unique=True, tie_key='id', stats=None):
+    """Yield every row of a query in key order, one page per round-trip.
+
+    build_query() must return a fresh, filtered builder without order() or
+    limit(); the selected columns must include key (and tie_key when the
+    key is not unique). stats, if given, is a dict updated with 'pages' and
+    'rows'.
+    """
+    if unique:
+        pages = _unique_key_pages(build_query, key, page_size)
+    else:
+        pages = _composite_key_pages(build_query, key, tie_key, page_size)
+    for page in pages:
+        if stats is not None:
+            stats['pages'] = stats.get('pages', 0) + 1
+            stats['rows'] = stats.get('rows', 0) + len(page)
+        yield from page
+
+
+def _fetch(query, page_size):
+    return query.limit(page_size).execute().data or []
+
+
+def _continue(query, cursor):
+    """Mark a query as a later page of a walk; plain builders have no tag_page() and pass through"""
+    tag_page = getattr(query, 'tag_page', None)
+    return tag_page(cursor) if tag_page is not None else query
+
+
+def _unique_key_pages(build_query, key, page_size):
+    last = None
+    while True:
+        query = build_query()
+        if last is not None:
+            query = _continue(query.gt(key, last), last)
+        page = _fetch(query.order(key), page_size)
+        yield page
+        if len(page) < page_size:
+            return
+        last = page[-1][key]
+
+
+def _composite_key_pages(build_query, key, tie_key, page_size):
+    """Pages ordered by (key, tie_key); rows tied on the boundary key value are not repeated"""
+    last_key = None
+    seen_at_last_key = set()
+    while True:
+        query = build_query()
+        if last_key is not None:
+            query = _continue(query.gte(key, last_key), last_key)
+        page = _fetch(query.order(key).order(tie_key), page_size)
+        fresh = [row for row in page if not (row[key] == last_key and row[tie_key] in seen_at_last_key)]
+
+        if page and not fresh:
+            # A full page of rows already seen: more than page_size rows share last_key,
+            # so walk that key value by tie_key and then carry on after it
+            last_tie = max(seen_at_last_key)
+            while True:
+                ties = _fetch(_continue(build_query().eq(key, last_key).gt(tie_key, last_tie),
+                                        (last_key, last_tie)).order(tie_key), page_size)
+                if ties:
+                    yield ties
+                    last_tie = ties[-1][tie_key]
+                if len(ties) < page_size:
+                    break
+            after = _fetch(_continue(build_query().gt(key, last_key), last_key).order(key).order(tie_key), page_size)
+            page = fresh = after
+            seen_at_last_key = set()
+
+        yield fresh
+        if len(page) < page_size:
+            return
+        boundary = page[-1][key]
+        if boundary != last_key:
+            seen_at_last_key = set()
+        last_key = boundary
+        seen_at_last_key.update(row[tie_key] for row in page if row[key] == boundary)
@@ -0,0 +1,386 @@
+"""
+ReportLab document builders.
+
+Each builder takes a plain payload (dicts, lists, strings and numbers - no
+database rows or Flask objects) and returns the finished PDF as bytes, so
+documents can be rendered in a worker process and cached by a hash of the
+payload. The *_payload helpers pick out exactly the fields a document
+prints; anything else in the source rows does not affect the cache key.
+
+Bump a document's TEMPLATE_VERSIONS entry whenever its layout changes so
+cached copies rendered from the old layout are no longer served.
+"""
+import importlib.util
+import io
+
+# ReportLab and the shared theme are imported by the builders on the first
+# render, so importing the payload helpers (web workers, cron scripts) stays cheap
+REPORTLAB_AVAILABLE = importlib.util.find_spec('reportlab') is not None
+
+TEMPLATE_VERSIONS = {
+    'quotation': 1,
+    'daily_summary': 1,
+    'weekly_summary': 1,
+    'monthly_summary': 1,
+}
+
+
+# ===============================
+# PAYLOADS
+# ===============================
+
+def daily_summary_payload(daily_data, report_date):
+    return {
+        'report_date': report_date.strftime('%A, %B %d, %Y'),
+        'summary': {key: daily_data['summary'][key] for key in
+                    ('total_events', 'confirmed_events', 'tentative_events', 'total_revenue',
+                     'total_attendees', 'rooms_in_use')},
+        'events_by_room': [
+            [room_name, [{key: event[key] for key in
+                          ('title', 'client_name', 'attendees', 'time_display', 'total_price', 'status_display')}
+                         for event in events]]
+            for room_name, events in daily_data['events_by_room'].items() if events
+        ]
+    }
+
+
+def weekly_summary_payload(weekly_data, start_date, end_date):
+    days = []
+    for day in weekly_data['week_days']:
+        day_events = []
+        for room_name, room_data in weekly_data['room_schedule'].items():
+            for event in room_data['days'].get(day['date'], []):
+                day_events.append([room_name, event['client_name'], event['attendees'],
+                                   event['start_time'], event['total_price']])
+        if day_events:
+            days.append([f"{day['day_name']} - {day['date_display']}", day_events])
+    return {
+        'period': f"{start_date} to {end_date}",
+        'summary': {key: weekly_data['summary'][key] for key in
+                    ('total_events', 'total_revenue', 'total_attendees', 'rooms_with_events',
+                     'average_daily_events')},
+        'days': days
+    }
+
+
+def monthly_summary_payload(monthly_data):
+    def ranked(items):
+        return [[name, {key: data[key] for key in ('events', 'confirmed', 'revenue')}]
+                for name, data in items[:10]]
+
+    return {
+        'month_name': monthly_data['month_name'],
+        'summary': {key: monthly_data['summary'][key] for key in
+                    ('total_events', 'confirmed_events', 'tentative_events', 'total_revenue',
+                     'total_attendees', 'conversion_rate', 'average_event_value')},
+        'top_rooms': ranked(monthly_data['top_rooms']),
+        'top_clients': ranked(monthly_data['top_clients'])
+    }
+
+
+# ===============================
+# BUILDERS
+# ===============================
+
+def _build(story):
+    from reportlab.lib.pagesizes import A4
+    from reportlab.platypus import SimpleDocTemplate
+
+    buffer = io.BytesIO()
+    SimpleDocTemplate(buffer, pagesize=A4).build(story)
+    return buffer.getvalue()
+
+
+def build_quotation_pdf(data):
+    """Quotation/invoice document; data comes from routes.bookings.quotation_payload"""
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Paragraph, Spacer, Table
+    from utils.pdf_theme import THEME
+
+    styles = THEME.styles
+    title_style = styles['CustomTitle']
+    header_style = styles['CustomHeader']
+    story = []
+
+    # Title
+    story.append(Paragraph("RAINBOW TOWERS CONFERENCE BOOKING", title_style))
+    story.append(Paragraph("QUOTATION", styles['Heading1']))
+    story.append(Spacer(1, 20))
+
+    # Quotation details
+    story.append(Paragraph(f"Quotation Number: <b>{data['quotation_number']}</b>", styles['Normal']))
+    story.append(Paragraph(f"Date: <b>{data['issue_date']}</b>", styles['Normal']))
+    story.append(Paragraph(f"Valid Until: <b>{data['valid_until']}</b>", styles['Normal']))
+    story.append(Spacer(1, 20))
+
+    # Client Information
+    story.append(Paragraph("CLIENT INFORMATION", header_style))
+    story.append(Paragraph(f"Client: <b>{data['client_name']}</b>", styles['Normal']))
+    story.append(Paragraph(f"Contact Person: <b>{data['contact_person']}</b>", styles['Normal']))
+    story.append(Spacer(1, 20))
+
+    # Booking Details
+    story.append(Paragraph("BOOKING DETAILS", header_style))
+
+    booking_data = [
+        ['Event Title:', data['title']],
+        ['Room:', data['room_name']],
+        ['Date:', data['date']],
+        ['Time:', data['time']],
+        ['Attendees:', data['attendees']],
+        ['Duration:', data['duration']],
+    ]
+
+    booking_table = Table(booking_data, colWidths=[2*inch, 4*inch])
+    booking_table.setStyle(THEME.table_style('quotation_details'))
+
+    story.append(booking_table)
+    story.append(Spacer(1, 20))
+
+    # Pricing
+    story.append(Paragraph("PRICING", header_style))
+
+    pricing_data = [
+        ['Item', 'Quantity', 'Rate', 'Amount'],
+        ['Room Rental', '1', f"${data['room_price']:.2f}", f"${data['room_price']:.2f}"],
+    ]
+
+    # Add addons if any
+    if data['total_addons_price'] > 0:
+        pricing_data.append(['Add-ons/Services', '1', f"${data['total_addons_price']:.2f}", f"${data['total_addons_price']:.2f}"])
+
+    pricing_data.extend([
+        ['', '', 'Subtotal:', f"${data['subtotal']:.2f}"],
+        ['', '', 'Tax:', f"${data['tax_amount']:.2f}"],
+        ['', '', 'TOTAL:', f"${data['total_price']:.2f}"],
+    ])
+
+    pricing_table = Table(pricing_data, colWidths=[2.5*inch, 1*inch, 1.5*inch, 1.5*inch])
+    pricing_table.setStyle(THEME.table_style('quotation_pricing'))
+
+    story.append(pricing_table)
+    story.append(Spacer(1, 30))
+
+    # Terms and conditions
+    story.append(Paragraph("TERMS & CONDITIONS", header_style))
+    terms = [
+        "1. This quotation is valid for 30 days from the date of issue.",
+        "2. Payment is required to confirm the booking.",
+        "3. Cancellation policy applies as per our standard terms.",
+        "4. All prices are in USD and inclusive of applicable taxes.",
+        "5. Additional services may incur extra charges."
+    ]
+
+    for term in terms:
+        story.append(Paragraph(term, styles['Normal']))
+
+    story.append(Spacer(1, 20))
+    story.append(Paragraph("Thank you for choosing Rainbow Towers Conference Center!", styles['Normal']))
+
+    return _build(story)
+
+
+def build_daily_summary_pdf(data):
+    from reportlab.platypus import Paragraph, Spacer, Table
+    from utils.pdf_theme import THEME
+
+    story = []
+    styles = THEME.styles
+
+    # Title
+    story.append(Paragraph(f"<b>Daily Summary Report</b>", styles['Title']))
+    story.append(Paragraph(f"<b>{data['report_date']}</b>", styles['Heading2']))
+    story.append(Spacer(1, 12))
+
+    # Summary statistics
+    summary = data['summary']
+    story.append(Paragraph("<b>Summary Statistics</b>", styles['Heading2']))
+
+    summary_data = [
+        ['Metric', 'Value'],
+        ['Total Events', str(summary['total_events'])],
+        ['Confirmed Events', str(summary['confirmed_events'])],
+        ['Tentative Events', str(summary['tentative_events'])],
+        ['Total Revenue', f"${summary['total_revenue']:,.2f}"],
+        ['Total Attendees', f"{summary['total_attendees']:,}"],
+        ['Rooms in Use', str(summary['rooms_in_use'])]
+    ]
+
+    summary_table = Table(summary_data)
+    summary_table.setStyle(THEME.table_style('daily_summary'))
+
+    story.append(summary_table)
+    story.append(Spacer(1, 20))
+
+    # Events by room
+    story.append(Paragraph("<b>Events by Room</b>", styles['Heading2']))
+
+    for room_name, events in data['events_by_room']:
+        story.append(Paragraph(f"<b>{room_name}</b>", styles['Heading3']))
+
+        events_data = [['Event', 'Client', 'PAX', 'Time', 'Revenue', 'Status']]
+
+        for event in events:
+            events_data.append([
+                event['title'],
+                event['client_name'],
+                str(event['attendees']),
+                event['time_display'],
+                f"${event['total_price']:,.2f}",
+                event['status_display']
+            ])
+
+        events_table = Table(events_data)
+        events_table.setStyle(THEME.table_style('daily_events'))
+
+        story.append(events_table)
+        story.append(Spacer(1, 12))
+
+    return _build(story)
+
+
+def build_weekly_summary_pdf(data):
+    from reportlab.platypus import Paragraph, Spacer, Table
+    from utils.pdf_theme import THEME
+
+    story = []
+    styles = THEME.styles
+
+    # Title
+    story.append(Paragraph(f"<b>Weekly Summary Report</b>", styles['Title']))
+    story.append(Paragraph(f"<b>{data['period']}</b>", styles['Heading2']))
+    story.append(Spacer(1, 12))
+
+    # Note about table format
+    story.append(Paragraph("<i>Note: This is a simplified view. For the full table format, please use Excel export.</i>", styles['Normal']))
+    story.append(Spacer(1, 12))
+
+    # Summary
+    summary = data['summary']
+    story.append(Paragraph("<b>Weekly Summary</b>", styles['Heading2']))
+
+    summary_data = [
+        ['Metric', 'Value'],
+        ['Total Events', str(summary['total_events'])],
+        ['Total Revenue', f"${summary['total_revenue']:,.2f}"],
+        ['Total Attendees', f"{summary['total_attendees']:,}"],
+        ['Rooms with Events', str(summary['rooms_with_events'])],
+        ['Average Daily Events', str(summary['average_daily_events'])]
+    ]
+
+    summary_table = Table(summary_data)
+    summary_table.setStyle(THEME.table_style('period_summary'))
+
+    story.append(summary_table)
+    story.append(Spacer(1, 20))
+
+    # Events by day
+    for day_label, day_events in data['days']:
+        story.append(Paragraph(f"<b>{day_label}</b>", styles['Heading3']))
+
+        day_data = [['Room', 'Client', 'PAX', 'Time', 'Revenue']]
+
+        for room_name, client_name, attendees, start_time, total_price in day_events:
+            day_data.append([
+                room_name,
+                client_name,
+                str(attendees),
+                start_time,
+                f"${total_price:,.2f}"
+            ])
+
+        day_table = Table(day_data)
+        day_table.setStyle(THEME.table_style('weekly_day'))
+
+        story.append(day_table)
+        story.append(Spacer(1, 12))
+
+    return _build(story)
+
+
+def build_monthly_summary_pdf(data):
+    from reportlab.platypus import Paragraph, Spacer, Table
+    from utils.pdf_theme import THEME
+
+    story = []
+    styles = THEME.styles
+
+    # Title
+    story.append(Paragraph(f"<b>Monthly Summary Report</b>", styles['Title']))
+    story.append(Paragraph(f"<b>{data['month_name']}</b>", styles['Heading2']))
+    story.append(Spacer(1, 12))
+
+    # Overall summary
+    summary = data['summary']
+    story.append(Paragraph("<b>Overall Summary</b>", styles['Heading2']))
+
+    summary_data = [
+        ['Metric', 'Value'],
+        ['Total Events', str(summary['total_events'])],
+        ['Confirmed Events', str(summary['confirmed_events'])],
+        ['Tentative Events', str(summary['tentative_events'])],
+        ['Total Revenue', f"${summary['total_revenue']:,.2f}"],
+        ['Total Attendees', f"{summary['total_attendees']:,}"],
+        ['Conversion Rate', f"{summary['conversion_rate']}%"],
+        ['Average Event Value', f"${summary['average_event_value']:,.2f}"]
+    ]
+
+    summary_table = Table(summary_data)
+    summary_table.setStyle(THEME.table_style('period_summary'))
+
+    story.append(summary_table)
+    story.append(Spacer(1, 20))
+
+    # Top rooms
+    if data['top_rooms']:
+        story.append(Paragraph("<b>Top Performing Rooms</b>", styles['Heading2']))
+
+        rooms_data = [['Room', 'Events', 'Confirmed', 'Revenue']]
+        for room_name, room_data in data['top_rooms']:
+            rooms_data.append([
+                room_name,
+                str(room_data['events']),
+                str(room_data['confirmed']),
+                f"${room_data['revenue']:,.2f}"
+            ])
+
+        rooms_table = Table(rooms_data)
+        rooms_table.setStyle(THEME.table_style('top_rooms'))
+
+        story.append(rooms_table)
+        story.append(Spacer(1, 20))
+
+    # Top clients
+    if data['top_clients']:
+        story.append(Paragraph("<b>Top Clients</b>", styles['Heading2']))
+
+        clients_data = [['Client', 'Events', 'Confirmed', 'Revenue']]
+        for client_name, client_data in data['top_clients']:
+            clients_data.append([
+                client_name,
+                str(client_data['events']),
+                str(client_data['confirmed']),
+                f"${client_data['revenue']:,.2f}"
+            ])
+
+        clients_table = Table(clients_data)
+        clients_table.setStyle(THEME.table_style('top_clients'))
+
+        story.append(clients_table)
+
+    return _build(story)
+
+
+RENDERERS = {
+    'quotation': build_quotation_pdf,
+    'daily_summary': build_daily_summary_pdf,
+    'weekly_summary': build_weekly_summary_pdf,
+    'monthly_summary': build_monthly_summary_pdf,
+}
+
+
+def render_document(kind, payload):
+    """Render one document to PDF bytes (the entry point run in worker processes)"""
+    if not REPORTLAB_AVAILABLE:
+        raise RuntimeError('reportlab is not installed')
+    return RENDERERS[kind](payload)
@@ -0,0 +1,137 @@
+"""
+Shared ReportLab theme for the PDF documents.
+
+The sample stylesheet, the custom paragraph styles and every TableStyle the
+documents use are built once, when this module is first imported (by the
+first render in a process), instead of once per document. ReportLab only
+reads styles while laying out a document, so one instance can serve every
+document and thread. Images are wrapped in ImageReaders on first use and
+kept, so a logo is decoded once per process rather than once per PDF.
+"""
+import os
+import threading
+
+try:
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.utils import ImageReader
+    from reportlab.platypus import TableStyle
+    REPORTLAB_AVAILABLE = True
+except ImportError:
+    REPORTLAB_AVAILABLE = False
+
+LOGO_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                         'static', 'img', 'rainbow-towers-logo.png')
+
+def _summary_header():
+    """Header row commands shared by the summary metric tables"""
+    return [
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ]
+
+
+def _ranking_style(header_colour):
+    return [
+        ('BACKGROUND', (0, 0), (-1, 0), header_colour),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ]
+
+
+class DocumentTheme:
+    """Paragraph styles, table styles and images shared by all PDF builders"""
+
+    def __init__(self):
+        self.styles = getSampleStyleSheet()
+        self.styles.add(ParagraphStyle(
+            'CustomTitle',
+            parent=self.styles['Heading1'],
+            fontSize=24,
+            spaceAfter=30,
+            textColor=colors.HexColor('#2E8B57')
+        ))
+        self.styles.add(ParagraphStyle(
+            'CustomHeader',
+            parent=self.styles['Heading2'],
+            fontSize=16,
+            spaceAfter=12,
+            textColor=colors.HexColor('#1a1a1a')
+        ))
+
+        self.table_styles = {
+            'quotation_details': TableStyle([
+                ('ALIGN', (0,0), (-1,-1), 'LEFT'),
+                ('FONTNAME', (0,0), (0,-1), 'Helvetica-Bold'),
+                ('FONTSIZE', (0,0), (-1,-1), 11),
+                ('ROWBACKGROUNDS', (0,0), (-1,-1), [colors.white, colors.HexColor('#f8f9fa')]),
+                ('GRID', (0,0), (-1,-1), 1, colors.HexColor('#dee2e6')),
+            ]),
+            'quotation_pricing': TableStyle([
+                ('BACKGROUND', (0,0), (-1,0), colors.HexColor('#2E8B57')),
+                ('TEXTCOLOR', (0,0), (-1,0), colors.whitesmoke),
+                ('ALIGN', (0,0), (-1,-1), 'CENTER'),
+                ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
+                ('FONTSIZE', (0,0), (-1,0), 12),
+                ('BOTTOMPADDING', (0,0), (-1,0), 12),
+                ('BACKGROUND', (0,-3), (-1,-1), colors.HexColor('#f8f9fa')),
+                ('FONTNAME', (0,-1), (-1,-1), 'Helvetica-Bold'),
+                ('FONTSIZE', (0,-1), (-1,-1), 12),
+                ('GRID', (0,0), (-1,-1), 1, colors.HexColor('#dee2e6')),
+            ]),
+            'daily_summary': TableStyle(_summary_header() + [
+                ('FONTSIZE', (0, 0), (-1, 0), 10),
+                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ]),
+            'period_summary': TableStyle(_summary_header() + [
+                ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ]),
+            'daily_events': TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.lightblue),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
+                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, 0), 8),
+                ('FONTSIZE', (0, 1), (-1, -1), 7),
+                ('BOTTOMPADDING', (0, 0), (-1, 0), 6),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ]),
+            'weekly_day': TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.lightblue),
+                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, 0), 8),
+                ('FONTSIZE', (0, 1), (-1, -1), 7),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ]),
+            'top_rooms': TableStyle(_ranking_style(colors.lightblue)),
+            'top_clients': TableStyle(_ranking_style(colors.lightgreen)),
+        }
+
+        self._images = {}
+        self._images_lock = threading.Lock()
+
+    def table_style(self, name):
+        return self.table_styles[name]
+
+    def image(self, path):
+        """ImageReader for a file, decoded once per process"""
+        reader = self._images.get(path)
+        if reader is None:
+            with self._images_lock:
+                reader = self._images.get(path)
+                if reader is None:
+                    reader = self._images[path] = ImageReader(path)
+        return reader
+
+    @property
+    def logo(self):
+        return self.image(LOGO_PATH)
+
+
+THEME = DocumentTheme() if REPORTLAB_AVAILABLE else None
@@ -0,0 +1,89 @@
+"""
+Booking price engine.
+
+A RateTable is built once from the cached rooms and addons tables and then
+prices any number of candidate bookings in memory: room hourly, half-day and
+full-day rates plus add-on prices, with the full breakdown the booking form
+and API show. Pricing rules:
+
+- up to 4 hours: hourly rate x duration
+- up to 6 hours: half-day rate
+- longer: full-day rate
+- each selected add-on adds its price once per occurrence in addon_ids
+"""
+from utils.validation import safe_float_conversion
+
+HOURLY_LIMIT_HOURS = 4
+HALF_DAY_LIMIT_HOURS = 6
+
+
+def room_charge(room, duration_hours):
+    """Return (rate_type, amount) for a room over the given number of hours"""
+    if duration_hours <= HOURLY_LIMIT_HOURS:
+        return 'Hourly Rate', room['hourly_rate'] * duration_hours
+    if duration_hours <= HALF_DAY_LIMIT_HOURS:
+        return 'Half-day Rate', room['half_day_rate']
+    return 'Full-day Rate', room['full_day_rate']
+
+
+class RateTable:
+    """In-memory room and add-on rates keyed by id"""
+
+    def __init__(self, rooms, addons):
+        self.rooms = {
+            str(room.get('id')): {
+                'id': room.get('id'),
+                'name': room.get('name'),
+                'hourly_rate': safe_float_conversion(room.get('hourly_rate')),
+                'half_day_rate': safe_float_conversion(room.get('half_day_rate')),
+                'full_day_rate': safe_float_conversion(room.get('full_day_rate'))
+            }
+            for room in rooms
+        }
+        self.addons = {
+            str(addon.get('id')): {
+                'id': addon.get('id'),
+                'name': addon.get('name'),
+                'price': safe_float_conversion(addon.get('price'))
+            }
+            for addon in addons
+        }
+
+    def price(self, room_id, start_time, end_time, addon_ids=None):
+        """Price one booking; returns the breakdown, or None when the room is unknown"""
+        room = self.rooms.get(str(room_id))
+        if not room:
+            return None
+
+        duration_hours = (end_time - start_time).total_seconds() / 3600
+        rate_type, room_rate = room_charge(room, duration_hours)
+
+        addon_items = []
+        missing_addon_ids = []
+        for addon_id in addon_ids or []:
+            addon = self.addons.get(str(addon_id))
+            if addon:
+                addon_items.append({'id': addon['id'], 'name': addon['name'], 'price': addon['price']})
+            else:
+                missing_addon_ids.append(addon_id)
+        addons_total = sum(item['price'] for item in addon_items)
+
+        return {
+            'room_id': room['id'],
+            'room_name': room['name'],
+            'room_rate': round(room_rate, 2),
+            'rate_type': rate_type,
+            'addons_total': round(addons_total, 2),
+            'addon_items': addon_items,
+            'missing_addon_ids': missing_addon_ids,
+            'duration_hours': round(duration_hours, 1),
+            'total': round(max(room_rate + addons_total, 0), 2)
+        }
+
+    def price_many(self, candidates):
+        """Price a list of candidate dicts (room_id, start_time, end_time, addon_ids) in one pass"""
+        return [
+            self.price(candidate.get('room_id'), candidate['start_time'], candidate['end_time'],
+                       candidate.get('addon_ids'))
+            for candidate in candidates
+        ]
@@ -0,0 +1,233 @@
+"""
+Per-request Supabase query instrumentation.
+
+``InstrumentedClient`` wraps a Supabase client so that every ``execute()``
+that reaches PostgREST is recorded in the current request's ``QueryTrace``:
+the table, the query's shape (its select/filter/order chain with the
+values left out), latency and rows returned (and the response's JSON bytes
+when QUERY_TRACE_BYTES is set, since sizing re-serialises every response). A shape that repeats
+more than ``threshold`` times in one request is an N+1 pattern - a query
+issued once per row of an earlier result - and is reported as such. Later
+pages of a keyset walk (tagged by utils.pager) share the first page's shape
+and are left out of that count.
+
+At the end of a request the trace becomes a ``Server-Timing`` header and
+one structured summary line. In tests, ``query_budget`` collects the
+queries made inside a ``with`` block (e.g. one test-client request) and
+fails when an endpoint goes over its budget.
+"""
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from flask import g, has_request_context
+
+from utils.query_shapes import payload_bytes
+from utils.request_scope import register_request_value, register_thread_value, request_value, thread_value
+
+N_PLUS_ONE_THRESHOLD = int(os.getenv('QUERY_N_PLUS_ONE_THRESHOLD', '5'))
+# Debug only: measure response bytes of every traced query
+QUERY_TRACE_BYTES = os.getenv('QUERY_TRACE_BYTES', 'False').lower() == 'true'
+
+# Builder methods whose arguments are values, not part of the query's shape
+_VALUE_METHODS = {'limit', 'range', 'offset', 'insert', 'update', 'upsert', 'single', 'maybe_single'}
+
+def _shape_part(method, args):
+    if method in _VALUE_METHODS or not args or not isinstance(args[0], str):
+        return method
+    if method == 'select':
+        columns = re.sub(r'\s+', ' ', ','.join(arg for arg in args if isinstance(arg, str))).strip()
+        return f"select({columns[:80]})"
+    return f"{method}({args[0]})"
+
+
+class QueryTrace:
+    """The PostgREST calls of one request (or one query_budget block)"""
+
+    def __init__(self, threshold=N_PLUS_ONE_THRESHOLD):
+        self.threshold = threshold
+        self.started = time.perf_counter()
+        self.queries = []  # (table, shape, seconds, rows, bytes or None, page cursor or None)
+        self._lock = threading.Lock()
+
+    def record(self, table_name, shape, seconds, rows, size=None, page=None):
+        with self._lock:
+            self.queries.append((table_name, shape, seconds, rows, size, page))
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def db_seconds(self):
+        return sum(query[2] for query in self.queries)
+
+    @property
+    def rows(self):
+        return sum(query[3] for query in self.queries)
+
+    @property
+    def bytes(self):
+        """Total response bytes, or None unless QUERY_TRACE_BYTES measured them"""
+        sizes = [query[4] for query in self.queries if query[4] is not None]
+        return sum(sizes) if sizes else None
+
+    def repeated(self, threshold=None):
+        """{(table, shape): calls} for shapes issued more than threshold times"""
+        limit = self.threshold if threshold is None else threshold
+        counts = Counter((query[0], query[1]) for query in self.queries if query[5] is None)
+        return {key: calls for key, calls in counts.items() if calls > limit}
+
+    def server_timing(self):
+        """Server-Timing header value: database time and count, plus the whole request"""
+        total_ms = (time.perf_counter() - self.started) * 1000
+        measured = f", {self.bytes} bytes" if self.bytes is not None else ''
+        return (f'db;dur={self.db_seconds * 1000:.1f};desc="{self.count} queries, {self.rows} rows{measured}", '
+                f'app;dur={total_ms:.1f}')
+
+    def summary(self, **fields):
+        by_table = Counter(query[0] for query in self.queries)
+        return {
+            **fields,
+            'queries': self.count,
+            'db_ms': round(self.db_seconds * 1000, 1),
+            'total_ms': round((time.perf_counter() - self.started) * 1000, 1),
+            'rows': self.rows,
+            'bytes': self.bytes,
+            'tables': dict(by_table.most_common()),
+            'n_plus_one': [{'table': table, 'shape': shape, 'calls': calls}
+                           for (table, shape), calls in self.repeated().items()]
+        }
+
+    def describe(self):
+        """Readable per-shape listing for assertion messages"""
+        counts = Counter((query[0], query[1]) for query in self.queries)
+        return '\n'.join(f"  {calls} x {table}: {shape}" for (table, shape), calls in counts.most_common())
+
+
+def start_query_trace():
+    """Begin this request's trace (called from before_request so total time covers the whole request)"""
+    if has_request_context():
+        g._query_trace = QueryTrace()
+
+
+register_request_value('_query_trace', QueryTrace)
+register_thread_value('_query_budgets', list)
+
+
+def current_query_trace():
+    """This request's trace, created on first use; None outside a request"""
+    return request_value('_query_trace')
+
+
+def finish_query_trace(response, **fields):
+    """Add the Server-Timing header, print the summary line and flag N+1 shapes; returns the summary"""
+    trace = g.pop('_query_trace', None) if has_request_context() else None
+    if trace is None or not trace.count:
+        return None
+    summary = trace.summary(**fields)
+    response.headers.add('Server-Timing', trace.server_timing())
+    for pattern in summary['n_plus_one']:
+        print(f"⚠️ WARNING: N+1 query pattern on {fields.get('path', 'request')}: "
+              f"{pattern['calls']} x {pattern['table']} {pattern['shape']}")
+    print(f"📊 QUERY_SUMMARY {json.dumps(summary, sort_keys=True, default=str)}")
+    return summary
+
+
+def _record(table_name, shape, seconds, data, page=None):
+    traces = list(thread_value('_query_budgets'))
+    trace = current_query_trace()
+    if trace is not None:
+        traces.append(trace)
+    if not traces:
+        return
+    rows = len(data) if isinstance(data, list) else (1 if data else 0)
+    size = payload_bytes(data) if QUERY_TRACE_BYTES and data is not None else None
+    for trace in traces:
+        trace.record(table_name, shape, seconds, rows, size, page)
+
+
+@contextmanager
+def query_budget(max_queries, max_repeats=None, label='block'):
+    """Fail with AssertionError if the enclosed code runs more than max_queries PostgREST calls.
+
+    max_repeats additionally caps how often any one shape may repeat (an N+1
+    check). Queries are collected from this thread and the fan-outs it starts.
+    """
+    trace = QueryTrace()
+    stack = thread_value('_query_budgets')
+    stack.append(trace)
+    try:
+        yield trace
+    finally:
+        stack.remove(trace)
+    if trace.count > max_queries:
+        raise AssertionError(f"{label} ran {trace.count} queries, budget is {max_queries}:\n{trace.describe()}")
+    repeated = trace.repeated(max_repeats) if max_repeats is not None else {}
+    if repeated:
+        listing = ', '.join(f"{calls} x {table} {shape}" for (table, shape), calls in repeated.items())
+        raise AssertionError(f"{label} repeats a query shape more than {max_repeats} times: {listing}")
+
+
+class InstrumentedClient:
+    """Supabase client whose queries are timed and counted in the request's QueryTrace"""
+
+    def __init__(self, client):
+        self._client = client
+
+    def __getattr__(self, attribute):
+        return getattr(self._client, attribute)
+
+    def table(self, table_name):
+        return InstrumentedQuery(self._client.table(table_name), table_name, [])
+
+    from_ = table
+
+    def rpc(self, function_name, *args, **kwargs):
+        return InstrumentedQuery(self._client.rpc(function_name, *args, **kwargs), f"rpc:{function_name}", [])
+
+
+class InstrumentedQuery:
+    """Delegates to a PostgREST builder and records execute()"""
+
+    def __init__(self, builder, table_name, parts, page=None):
+        self._builder = builder
+        self._table_name = table_name
+        self._parts = parts
+        self._page = page
+
+    def tag_page(self, cursor):
+        """Called by utils.pager on pages after the first; such pages are not counted as repeats"""
+        self._page = cursor
+        return self
+
+    def __getattr__(self, attribute):
+        value = getattr(self._builder, attribute)
+        if not callable(value):
+            return value
+
+        def chained(*args, **kwargs):
+            result = value(*args, **kwargs)
+            if not hasattr(result, 'execute'):
+                return result
+            parts = self._parts + [_shape_part(attribute, args)]
+            if result is self._builder:
+                self._parts = parts
+                return self
+            return InstrumentedQuery(result, self._table_name, parts, self._page)
+        return chained
+
+    def execute(self, *args, **kwargs):
+        started = time.perf_counter()
+        response = None
+        try:
+            response = self._builder.execute(*args, **kwargs)
+            return response
+        finally:
+            # Failed calls count against the budget too
+            _record(self._table_name, '.'.join(self._parts), time.perf_counter() - started,
+                    getattr(response, 'data', None), self._page)
@@ -0,0 +1,258 @@
+"""
+Registry of named Supabase query shapes.
+
+Each shape names a table and the exact column list (including embedded
+relations) one view needs, so hot paths stop pulling ``*`` rows they mostly
+ignore. ``select_shape`` starts a query for a shape and wraps the PostgREST
+builder so that ``execute()`` records calls, rows and JSON bytes per shape.
+Sizing a response means serialising it again, so bytes are measured on a
+sample of calls and extrapolated from the sampled bytes per row.
+"""
+import json
+import os
+import threading
+import time
+
+QUERY_SHAPES = {
+    # --- Bookings: lists and feeds ---
+    'booking_calendar_event': {
+        'table': 'bookings',
+        'columns': 'id, title, status, start_time, end_time, room_id, client_id, client_name, attendees, '
+                   'total_price, notes, room:rooms(name), client:clients(contact_person, company_name)',
+        'description': 'FullCalendar events',
+    },
+    'booking_calendar_row': {
+        'table': 'bookings',
+        'columns': 'id, title, status, start_time, end_time, room_id, client_id, client_name, attendees, '
+                   'total_price, notes, created_at, updated_at',
+        'description': 'Calendar events API (/api/events) with clients and add-ons looked up separately',
+    },
+    'booking_dashboard_card': {
+        'table': 'bookings',
+        'columns': 'id, title, status, start_time, end_time, created_at, attendees, total_price, room_id, '
+                   'client_id, client_name, client_email, room:rooms(id, name, capacity), '
+                   'client:clients(id, contact_person, company_name, email)',
+        'description': 'Recent, upcoming and today cards on the dashboard',
+    },
+    'booking_revenue_point': {
+        'table': 'bookings',
+        'columns': 'start_time, total_price',
+        'description': 'Monthly revenue trend chart',
+    },
+    'booking_report_row': {
+        'table': 'bookings',
+        'columns': 'id, title, status, start_time, end_time, attendees, total_price, room_rate, addons_total, '
+                   'notes, room_id, client_id, client_name, room:rooms(id, name, capacity), '
+                   'client:clients(id, contact_person, company_name, email, phone)',
+        'description': 'Daily, weekly and monthly summary reports',
+    },
+    'booking_daily_email': {
+        'table': 'bookings',
+        'columns': 'id, title, status, start_time, end_time, client_name, '
+                   'clients(company_name, contact_person), rooms(name)',
+        'description': 'Daily report email',
+    },
+    'client_booking_history': {
+        'table': 'bookings',
+        'columns': 'id, title, status, start_time, end_time, attendees, total_price, notes, room_id, '
+                   'room:rooms(id, name, capacity)',
+        'description': 'Booking history on the client page',
+    },
+    # --- Bookings: detail views read nearly every field ---
+    'booking_detail': {
+        'table': 'bookings',
+        'columns': '*, room:rooms(*), client:clients(*), event_type:event_types(*), '
+                   'custom_addons:booking_custom_addons(*)',
+        'description': 'Booking view, edit and document generation, add-ons embedded (core.load_booking_detail)',
+    },
+    'booking_write_row': {
+        'table': 'bookings',
+        'columns': 'id, title, status, start_time, end_time, room_id, client_id, attendees, total_price',
+        'description': 'Row a status change or delete is compared against (indexes, stats, rollup)',
+    },
+    # --- Bookings: aggregates and indexes ---
+    'booking_conflict': {
+        'table': 'bookings',
+        'columns': 'id, title, status, start_time, end_time',
+        'description': 'Room conflict checks',
+    },
+    'booking_interval': {
+        'table': 'bookings',
+        'columns': 'id, room_id, title, status, start_time, end_time',
+        'description': 'Room conflict interval index load',
+    },
+    'booking_stats_row': {
+        'table': 'bookings',
+        'columns': 'id, room_id, status, total_price, start_time',
+        'description': 'Dashboard stats recompute',
+    },
+    'booking_client_totals': {
+        'table': 'bookings',
+        'columns': 'id, client_id, status, total_price, start_time',
+        'description': 'Client directory aggregates',
+    },
+    'booking_room_totals': {
+        'table': 'bookings',
+        'columns': 'id, room_id, status, total_price',
+        'description': 'Rooms directory booking counts and revenue',
+    },
+    'booking_room_schedule': {
+        'table': 'bookings',
+        'columns': 'id, room_id, title, start_time, end_time',
+        'description': 'Rooms directory utilisation and next booking',
+    },
+    'booking_rollup_row': {
+        'table': 'bookings',
+        'columns': 'id, room_id, status, start_time, end_time, attendees, total_price',
+        'description': 'Daily rollup rebuild and cell refresh',
+    },
+    'booking_client_activity': {
+        'table': 'bookings',
+        'columns': 'id, client_id, status, start_time, attendees, total_price',
+        'description': 'Top clients on the monthly summary',
+    },
+    'booking_utilization_interval': {
+        'table': 'bookings',
+        'columns': 'id, room_id, status, start_time, end_time',
+        'description': 'Room utilization matrices',
+    },
+    'booking_room_busy': {
+        'table': 'bookings',
+        'columns': 'id, room_id, status, start_time, end_time',
+        'description': 'Multi-room availability search',
+    },
+    # --- Other tables ---
+    'reference_rows': {
+        'table': None,
+        'columns': '*',
+        'description': 'Whole reference tables (rooms, addons, categories, event types) for the reference cache',
+    },
+    'client_name_row': {
+        'table': 'clients',
+        'columns': 'id, company_name, contact_person',
+        'description': 'Client names for calendar events',
+    },
+    'client_document_contact': {
+        'table': 'clients',
+        'columns': 'id, contact_person, company_name, email, phone, address',
+        'description': 'Client block on invoices when the booking join came back empty',
+    },
+    'booking_addon_total': {
+        'table': 'booking_custom_addons',
+        'columns': 'booking_id, total_price',
+        'description': 'Add-on totals per booking for calendar events',
+    },
+    'client_search_row': {
+        'table': 'clients',
+        'columns': 'id, contact_person, company_name, email, phone',
+        'description': 'Client autocomplete search index',
+    },
+    'daily_rollup_row': {
+        'table': 'booking_daily_rollup',
+        'columns': 'id, day, room_id, status, event_count, attendees, revenue, booked_hours',
+        'description': 'Pre-aggregated report rows',
+    },
+    'client_stats_view': {
+        'table': 'client_booking_stats',
+        'columns': 'client_id, booking_count, active_booking_count, last_booking_at, total_revenue',
+        'description': 'Client directory aggregates from the database view',
+    },
+}
+
+# Measure bytes on the first call of each shape and every Nth after it (1: every call, 0: never)
+QUERY_BYTES_SAMPLE_EVERY = int(os.getenv('QUERY_BYTES_SAMPLE_EVERY', '20'))
+
+_metrics_lock = threading.Lock()
+_metrics = {}
+
+
+def shape_columns(shape_name):
+    """Column list for a registered shape"""
+    return QUERY_SHAPES[shape_name]['columns']
+
+
+def payload_bytes(data):
+    """Approximate PostgREST payload size of a decoded response"""
+    try:
+        return len(json.dumps(data, separators=(',', ':'), default=str).encode('utf-8'))
+    except (TypeError, ValueError):
+        return 0
+
+
+def record_shape_response(shape_name, data, elapsed_seconds):
+    """Accumulate per-shape call, row and time counters, and bytes for sampled calls"""
+    rows = len(data) if isinstance(data, list) else (1 if data else 0)
+    with _metrics_lock:
+        entry = _metrics.setdefault(shape_name, {'calls': 0, 'rows': 0, 'seconds': 0.0,
+                                                 'sampled_calls': 0, 'sampled_rows': 0, 'sampled_bytes': 0})
+        sampled = QUERY_BYTES_SAMPLE_EVERY > 0 and entry['calls'] % QUERY_BYTES_SAMPLE_EVERY == 0
+        entry['calls'] += 1
+        entry['rows'] += rows
+        entry['seconds'] += elapsed_seconds
+    if not sampled:
+        return
+    payload = payload_bytes(data)
+    with _metrics_lock:
+        entry['sampled_calls'] += 1
+        entry['sampled_rows'] += rows
+        entry['sampled_bytes'] += payload
+
+
+def get_query_shape_metrics():
+    """Per-shape totals with averages, largest byte totals first"""
+    with _metrics_lock:
+        snapshot = {name: dict(values) for name, values in _metrics.items()}
+    report = []
+    for name, values in snapshot.items():
+        calls = values['calls'] or 1
+        bytes_per_row = values['sampled_bytes'] / values['sampled_rows'] if values['sampled_rows'] else 0
+        estimated_bytes = round(bytes_per_row * values['rows'])
+        report.append({
+            'shape': name,
+            'table': QUERY_SHAPES.get(name, {}).get('table'),
+            'calls': values['calls'],
+            'rows': values['rows'],
+            'bytes': estimated_bytes,
+            'bytes_sampled_calls': values['sampled_calls'],
+            'avg_bytes_per_call': round(estimated_bytes / calls),
+            'avg_bytes_per_row': round(bytes_per_row),
+            'avg_ms': round(values['seconds'] / calls * 1000, 1)
+        })
+    report.sort(key=lambda entry: entry['bytes'], reverse=True)
+    return report
+
+
+def reset_query_shape_metrics():
+    with _metrics_lock:
+        _metrics.clear()
+
+
+class ShapedQuery:
+    """Delegates to a PostgREST builder and instruments execute()"""
+
+    def __init__(self, builder, shape_name):
+        self._builder = builder
+        self._shape_name = shape_name
+
+    def __getattr__(self, attribute):
+        value = getattr(self._builder, attribute)
+        if not callable(value):
+            return value
+
+        def chained(*args, **kwargs):
+            result = value(*args, **kwargs)
+            return ShapedQuery(result, self._shape_name) if hasattr(result, 'execute') else result
+        return chained
+
+    def execute(self, *args, **kwargs):
+        started = time.perf_counter()
+        response = self._builder.execute(*args, **kwargs)
+        record_shape_response(self._shape_name, getattr(response, 'data', None), time.perf_counter() - started)
+        return response
+
+
+def select_shape(client, shape_name, table_name=None, **select_kwargs):
+    """Start an instrumented select for a registered shape; table_name overrides it for table-agnostic shapes"""
+    shape = QUERY_SHAPES[shape_name]
+    builder = client.table(table_name or shape['table']).select(shape['columns'], **select_kwargs)
+    return ShapedQuery(builder, shape_name)
@@ -0,0 +1,149 @@
+"""
+Process-wide TTL cache for small, rarely-changing reference tables
+(rooms, addons, addon_categories, event_types).
+
+Each table is loaded whole by a registered loader, kept for a TTL and dropped
+explicitly by the routes that create, edit or delete rows. Callers receive
+copies of the cached rows so request code can decorate them freely.
+
+Loaders run outside the cache lock, one at a time per table: while a table
+reloads, its expired copy keeps being served and other tables are not held
+up. A load that started before an invalidation is returned to its caller but
+not cached.
+"""
+import threading
+import time
+
+
+class ReferenceDataCache:
+    """Thread-safe table cache with TTL, explicit invalidation and hit/miss counters"""
+
+    def __init__(self, ttl_seconds=300):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.RLock()
+        self._loaders = {}
+        self._entries = {}  # table_name -> (loaded_at, rows)
+        self._derived = {}  # name -> (source entries, value)
+        self._load_locks = {}  # table_name -> Lock held while that table loads
+        self._generations = {}  # table_name -> invalidation count, so late loads are not cached
+        self._stats = {}
+
+    def register(self, table_name, loader):
+        """Register the zero-argument function that loads every row of a table"""
+        with self._lock:
+            self._loaders[table_name] = loader
+            self._load_locks.setdefault(table_name, threading.Lock())
+            self._stats.setdefault(table_name, {'hits': 0, 'misses': 0, 'invalidations': 0, 'load_errors': 0})
+
+    def get(self, table_name):
+        """Return copies of all cached rows for a table, loading them if missing or expired"""
+        entry = self._fresh_entry(table_name)
+        with self._lock:
+            return [dict(row) for row in entry[1]] if entry else []
+
+    def _is_fresh(self, entry):
+        return entry is not None and (time.monotonic() - entry[0]) < self.ttl_seconds
+
+    def _fresh_entry(self, table_name):
+        """Return the (loaded_at, rows) entry for a table, reloading it if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(table_name)
+            if self._is_fresh(entry):
+                self._stats[table_name]['hits'] += 1
+                return entry
+            self._stats[table_name]['misses'] += 1
+            load_lock = self._load_locks[table_name]
+
+        # Another thread is already reloading: keep serving the expired copy, or wait if there is none
+        if not load_lock.acquire(blocking=entry is None):
+            return entry
+        try:
+            with self._lock:
+                current = self._entries.get(table_name)
+                if current is not entry and self._is_fresh(current):
+                    return current
+                generation = self._generations.get(table_name, 0)
+                loader = self._loaders[table_name]
+
+            try:
+                rows = list(loader() or [])
+            except Exception as e:
+                with self._lock:
+                    self._stats[table_name]['load_errors'] += 1
+                print(f"❌ ERROR: Failed to load reference table '{table_name}': {e}")
+                # Serve the last good copy rather than nothing while the database is unreachable
+                return entry
+
+            loaded = (time.monotonic(), rows)
+            with self._lock:
+                if self._generations.get(table_name, 0) == generation:
+                    self._entries[table_name] = loaded
+            return loaded
+        finally:
+            load_lock.release()
+
+    def derive(self, name, table_names, build):
+        """Return build(*rows_per_table), rebuilt only when one of the source tables is reloaded.
+
+        The builder receives the cached rows themselves (not copies) and must not modify them;
+        the value it returns is shared between callers.
+        """
+        entries = tuple(self._fresh_entry(table_name) for table_name in table_names)
+        with self._lock:
+            cached = self._derived.get(name)
+            if cached and all(a is b for a, b in zip(cached[0], entries)):
+                return cached[1]
+            value = build(*[entry[1] if entry else [] for entry in entries])
+            self._derived[name] = (entries, value)
+            return value
+
+    def get_by_id(self, table_name, row_id):
+        """Return a copy of a single cached row by primary key, or None"""
+        if row_id is None:
+            return None
+        for row in self.get(table_name):
+            if str(row.get('id')) == str(row_id):
+                return row
+        return None
+
+    def update_row(self, table_name, row_id, changes):
+        """Patch a cached row in place after a write that does not warrant a reload"""
+        with self._lock:
+            entry = self._entries.get(table_name)
+            if not entry:
+                return
+            for row in entry[1]:
+                if str(row.get('id')) == str(row_id):
+                    row.update(changes)
+                    return
+
+    def invalidate(self, *table_names):
+        """Drop cached rows for the given tables (all tables when none are given)"""
+        with self._lock:
+            for table_name in table_names or list(self._loaders.keys()):
+                self._entries.pop(table_name, None)
+                self._generations[table_name] = self._generations.get(table_name, 0) + 1
+                if table_name in self._stats:
+                    self._stats[table_name]['invalidations'] += 1
+
+    def stats(self):
+        """Return hit/miss counters per table plus overall totals"""
+        with self._lock:
+            now = time.monotonic()
+            tables = {}
+            for table_name, counters in self._stats.items():
+                entry = self._entries.get(table_name)
+                tables[table_name] = dict(
+                    counters,
+                    cached_rows=len(entry[1]) if entry else 0,
+                    age_seconds=round(now - entry[0], 1) if entry else None
+                )
+            hits = sum(t['hits'] for t in tables.values())
+            misses = sum(t['misses'] for t in tables.values())
+            return {
+                'ttl_seconds': self.ttl_seconds,
+                'hits': hits,
+                'misses': misses,
+                'hit_rate': round(hits / (hits + misses) * 100, 1) if (hits + misses) else 0,
+                'tables': tables
+            }
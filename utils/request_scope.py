@@ -0,0 +1,102 @@
+"""
+Request-scoped values that follow work onto helper threads.
+
+Per-request state (the identity map, the query trace, the booking memo)
+lives in ``flask.g``, which a worker thread cannot see. Modules register
+such values here; ``capture()`` snapshots them in the request thread and
+``borrowed(scope)`` makes a worker thread resolve them to the same objects,
+so queries a fan-out runs are counted and de-duplicated with the request
+that started them. Values shared this way must be thread-safe.
+
+The request's own contexts are bound in the worker too, so ``request``,
+``session`` and ``g`` (and with it flask_login's ``current_user``) are the
+request's objects. They are bound, not pushed: pushing a copy would run the
+app's teardown_request handlers against the request's ``g`` and close its
+Request when the worker finished, while the request is still running.
+"""
+import threading
+from contextlib import contextmanager
+
+from flask import g, has_request_context
+from flask.globals import _cv_app, _cv_request
+
+REQUEST_CONTEXT = '__request_context__'
+
+_local = threading.local()
+_request_factories = {}  # name -> factory for values kept on flask.g
+_thread_factories = {}   # name -> factory for values kept per thread
+
+
+def register_request_value(name, factory):
+    _request_factories[name] = factory
+
+
+def register_thread_value(name, factory):
+    _thread_factories[name] = factory
+
+
+def request_value(name):
+    """The request's value for name, created on first use; None outside a request"""
+    borrowed_scope = getattr(_local, 'borrowed', None)
+    if borrowed_scope is not None:
+        return borrowed_scope.get(name)
+    if not has_request_context():
+        return None
+    value = getattr(g, name, None)
+    if value is None:
+        value = _request_factories[name]()
+        setattr(g, name, value)
+    return value
+
+
+def thread_value(name):
+    """The calling thread's value for name (or the borrowing thread's owner's)"""
+    borrowed_scope = getattr(_local, 'borrowed', None)
+    if borrowed_scope is not None and name in borrowed_scope:
+        return borrowed_scope[name]
+    values = getattr(_local, 'values', None)
+    if values is None:
+        values = _local.values = {}
+    if name not in values:
+        values[name] = _thread_factories[name]()
+    return values[name]
+
+
+def capture():
+    """Snapshot of every registered value as seen from this thread"""
+    scope = {name: thread_value(name) for name in _thread_factories}
+    for name in _request_factories:
+        value = request_value(name)
+        if value is not None:
+            scope[name] = value
+    if has_request_context():
+        scope[REQUEST_CONTEXT] = (_cv_app.get(), _cv_request.get())
+    return scope
+
+
+@contextmanager
+def _request_context(captured):
+    """Bind a captured app and request context to this thread without pushing them, so no teardown runs"""
+    if captured is None or has_request_context():
+        yield
+        return
+    app_context, request_context = captured
+    app_token = _cv_app.set(app_context)
+    request_token = _cv_request.set(request_context)
+    try:
+        yield
+    finally:
+        _cv_request.reset(request_token)
+        _cv_app.reset(app_token)
+
+
+@contextmanager
+def borrowed(scope):
+    """Resolve registered values to a captured scope for the duration of the block"""
+    previous = getattr(_local, 'borrowed', None)
+    _local.borrowed = scope
+    try:
+        with _request_context(scope.get(REQUEST_CONTEXT)):
+            yield
+    finally:
+        _local.borrowed = previous
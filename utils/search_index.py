@@ -0,0 +1,313 @@
+"""
+In-process client search index for autocomplete.
+
+Each client's contact_person, company_name, email and phone are normalised
+(lower-cased, phone reduced to digits) and indexed three ways:
+
+- a sorted list of whole field values per field, for exact and prefix
+  matches;
+- a sorted list of the words in each field, for word-prefix matches;
+- trigram postings per field (trigram -> client ids) for substring matches
+  of three or more characters.
+
+A match is scored by its kind (exact, prefix, word prefix, substring) times
+the weight of the field it hit, names weighted above email and phone. The
+search walks (kind, field) tiers from the highest score down, each tier in
+order of the matched value, and stops as soon as it has the top N clients -
+so a one-letter query over thousands of clients still only reads N entries
+and a keystroke never touches the database.
+"""
+import bisect
+import re
+import threading
+import time
+
+SEARCH_FIELDS = ('company_name', 'contact_person', 'email', 'phone')
+FIELD_WEIGHTS = {'company_name': 4, 'contact_person': 4, 'email': 2, 'phone': 1}
+MATCH_SCORES = {'exact': 100, 'prefix': 60, 'word_prefix': 40, 'substring': 10}
+MATCH_KINDS = ('exact', 'prefix', 'word_prefix', 'substring')
+
+_TOKEN_SPLIT = re.compile(r'[^0-9a-z]+')
+_PHONE_QUERY = re.compile(r'[\d\s+().-]+')
+
+
+def normalize(value, field=None):
+    text = str(value or '').strip().lower()
+    if field == 'phone':
+        return re.sub(r'\D', '', text)
+    return text
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def words(text):
+    return [word for word in _TOKEN_SPLIT.split(text) if word]
+
+
+def _at_word_start(text, needle):
+    """True if needle occurs in text starting at a word boundary"""
+    position = text.find(needle)
+    while position != -1:
+        if position == 0 or not text[position - 1].isalnum():
+            return True
+        position = text.find(needle, position + 1)
+    return False
+
+
+def _prefix_range(entries, prefix):
+    """Yield (value, id) entries of a sorted list whose value starts with prefix"""
+    position = bisect.bisect_left(entries, (prefix,))
+    while position < len(entries) and entries[position][0].startswith(prefix):
+        yield entries[position]
+        position += 1
+
+
+def _insort_all(entries, new_entries):
+    for entry in new_entries:
+        bisect.insort(entries, entry)
+
+
+def _remove_all(entries, old_entries):
+    for entry in old_entries:
+        position = bisect.bisect_left(entries, entry)
+        if position < len(entries) and entries[position] == entry:
+            del entries[position]
+
+
+class ClientSearchIndex:
+    """Tiered exact / prefix / word-prefix / trigram index over the searchable client columns"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._journal = None  # changes made while a rebuild is loading
+        self._clear()
+        self.built_at = None
+        self.counters = {'searches': 0, 'upserts': 0, 'removals': 0, 'rebuilds': 0}
+
+    def _clear(self):
+        self._clients = {}   # id -> display row (original values)
+        self._fields = {}    # id -> {field: normalised text}
+        self._values = {field: [] for field in SEARCH_FIELDS}  # field -> sorted (text, id)
+        self._words = {field: [] for field in SEARCH_FIELDS}   # field -> sorted (word, id)
+        self._postings = {field: {} for field in SEARCH_FIELDS}  # field -> trigram -> set(ids)
+
+    # --- maintenance ---
+
+    def rebuild(self, clients):
+        """Replace the index contents from an iterable of client rows.
+
+        The iterable is consumed without holding the lock, so searches keep
+        using the old contents meanwhile; upserts and removals made during
+        the load are replayed on top of the new contents.
+        """
+        with self._lock:
+            self._journal = []
+        try:
+            rows = list(clients)
+        except Exception:
+            with self._lock:
+                self._journal = None
+            raise
+        with self._lock:
+            journal, self._journal = self._journal, None
+            self._clear()
+            for client in rows:
+                self._add(client, sort=False)
+            for entries in list(self._values.values()) + list(self._words.values()):
+                entries.sort()
+            for client_id, changes in journal:
+                if changes is None:
+                    self._remove(client_id)
+                else:
+                    self._upsert(client_id, changes)
+            self.built_at = time.time()
+            self.counters['rebuilds'] += 1
+
+    def upsert(self, client_id, changes):
+        """Insert a client or merge changed columns into an indexed one"""
+        if client_id is None:
+            return
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append((client_id, dict(changes or {})))
+            self._upsert(client_id, changes)
+            self.counters['upserts'] += 1
+
+    def remove(self, client_id):
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append((client_id, None))
+            self._remove(client_id)
+            self.counters['removals'] += 1
+
+    def _upsert(self, client_id, changes):
+        current = dict(self._clients.get(client_id) or {'id': client_id})
+        current.update({key: value for key, value in (changes or {}).items() if key in SEARCH_FIELDS})
+        current['id'] = client_id
+        self._remove(client_id)
+        self._add(current, sort=True)
+
+    def _entries(self, client_id, fields):
+        """The (value, id) and (word, id) entries a client contributes per field"""
+        for field, text in fields.items():
+            if not text:
+                continue
+            field_words = words(text) if field != 'phone' else []
+            yield field, (text, client_id), [(word, client_id) for word in set(field_words)]
+
+    def _add(self, client, sort):
+        client_id = client.get('id')
+        row = {'id': client_id}
+        fields = {}
+        for field in SEARCH_FIELDS:
+            row[field] = client.get(field)
+            fields[field] = normalize(client.get(field), field)
+        self._clients[client_id] = row
+        self._fields[client_id] = fields
+
+        for field, text in fields.items():
+            postings = self._postings[field]
+            for gram in trigrams(text):
+                postings.setdefault(gram, set()).add(client_id)
+
+        for field, value_entry, word_entries in self._entries(client_id, fields):
+            if sort:
+                bisect.insort(self._values[field], value_entry)
+                _insort_all(self._words[field], word_entries)
+            else:
+                self._values[field].append(value_entry)
+                self._words[field].extend(word_entries)
+
+    def _remove(self, client_id):
+        fields = self._fields.pop(client_id, None)
+        self._clients.pop(client_id, None)
+        if fields is None:
+            return
+        for field, text in fields.items():
+            postings = self._postings[field]
+            for gram in trigrams(text):
+                ids = postings.get(gram)
+                if ids is not None:
+                    ids.discard(client_id)
+                    if not ids:
+                        del postings[gram]
+        for field, value_entry, word_entries in self._entries(client_id, fields):
+            _remove_all(self._values[field], [value_entry])
+            _remove_all(self._words[field], word_entries)
+
+    # --- queries ---
+
+    def _trigram_candidates(self, field, needle):
+        postings = self._postings[field]
+        grams = sorted(trigrams(needle), key=lambda gram: len(postings.get(gram, ())))
+        if not grams or grams[0] not in postings:
+            return set()
+        candidates = set(postings[grams[0]])
+        for gram in grams[1:]:
+            candidates &= postings.get(gram, set())
+            if not candidates:
+                break
+        return candidates
+
+    def _tier(self, kind, field, needle):
+        """Client ids matching needle in field by kind, in order of the matched value"""
+        if kind == 'exact':
+            for text, client_id in _prefix_range(self._values[field], needle):
+                if text != needle:
+                    return
+                yield client_id
+        elif kind == 'prefix':
+            for _, client_id in _prefix_range(self._values[field], needle):
+                yield client_id
+        elif kind == 'word_prefix':
+            query_words = words(needle)
+            if len(query_words) <= 1:
+                for _, client_id in _prefix_range(self._words[field], needle):
+                    yield client_id
+                return
+            # Multi-word query: every word but the last is complete, so walk the
+            # rarest of them (or the last word's prefix range) and verify the phrase
+            entries = self._words[field]
+            # (words hold only [0-9a-z], so '\0' and '\x7f' bound exact and prefix ranges)
+            ranges = []
+            for word in query_words[:-1]:
+                ranges.append((bisect.bisect_left(entries, (word + '\0',)) - bisect.bisect_left(entries, (word,)),
+                               word, True))
+            last = query_words[-1]
+            ranges.append((bisect.bisect_left(entries, (last + '\x7f',)) - bisect.bisect_left(entries, (last,)),
+                           last, False))
+            _, word, complete = min(ranges, key=lambda item: item[0])
+            matches = set()
+            for token, client_id in _prefix_range(entries, word):
+                if complete and token != word:
+                    break  # exact entries sort before longer words sharing the prefix
+                text = self._fields[client_id][field]
+                if _at_word_start(text, needle):
+                    matches.add(client_id)
+            yield from sorted(matches, key=lambda client_id: (self._fields[client_id][field], client_id))
+        else:
+            candidates = self._trigram_candidates(field, needle)
+            values = self._values[field]
+            if len(candidates) * 8 < len(values):
+                matches = [client_id for client_id in candidates if needle in self._fields[client_id][field]]
+                yield from sorted(matches, key=lambda client_id: (self._fields[client_id][field], client_id))
+            else:
+                # Common substring: walking the sorted values finds the first hits sooner than sorting them all
+                for text, client_id in values:
+                    if client_id in candidates and needle in text:
+                        yield client_id
+
+    def search(self, query, limit=10, fields=SEARCH_FIELDS):
+        """Return up to limit (score, client row) pairs, best first.
+
+        Equal scores are ordered by field (company and contact before email
+        and phone) and then by the matched value.
+        """
+        query = normalize(query)
+        if not query or limit <= 0:
+            return []
+        digits = normalize(query, 'phone') if _PHONE_QUERY.fullmatch(query) else ''
+
+        tiers = []
+        for field in SEARCH_FIELDS:
+            if field not in fields:
+                continue
+            needle = digits if field == 'phone' else query
+            if not needle:
+                continue
+            for kind in MATCH_KINDS:
+                if kind == 'word_prefix' and field == 'phone':
+                    continue  # a phone number is one word; prefix covers it
+                if kind == 'substring' and len(needle) < 3:
+                    continue
+                tiers.append((MATCH_SCORES[kind] * FIELD_WEIGHTS[field], kind, field, needle))
+        tiers.sort(key=lambda tier: -tier[0])
+
+        results = []
+        seen = set()
+        with self._lock:
+            self.counters['searches'] += 1
+            for score, kind, field, needle in tiers:
+                for client_id in self._tier(kind, field, needle):
+                    if client_id in seen:
+                        continue
+                    seen.add(client_id)
+                    results.append((score, dict(self._clients[client_id])))
+                    if len(results) >= limit:
+                        return results
+        return results
+
+    def __len__(self):
+        return len(self._clients)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'clients': len(self._clients),
+                'trigrams': sum(len(postings) for postings in self._postings.values()),
+                'words': sum(len(entries) for entries in self._words.values()),
+                'built_at': self.built_at,
+                **self.counters
+            }
@@ -0,0 +1,91 @@
+"""
+Streaming file exports.
+
+CSV exports are encoded row by row from a generator and sent as a chunked
+response, so the whole file never exists in memory. XLSX exports are written
+by xlsxwriter in constant_memory mode (each row is flushed to a temp file as
+soon as the next one starts) into a temporary .xlsx on disk, which is then
+streamed back in fixed-size chunks and deleted.
+"""
+import csv
+import io
+import os
+import tempfile
+
+from flask import Response, stream_with_context
+
+CHUNK_BYTES = 64 * 1024
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+def _attachment_headers(filename, length=None):
+    headers = {
+        'Content-Disposition': f'attachment; filename="{filename}"',
+        # Let nginx pass chunks through instead of buffering the whole file
+        'X-Accel-Buffering': 'no'
+    }
+    if length is not None:
+        headers['Content-Length'] = str(length)
+    return headers
+
+
+def iter_csv(rows, chunk_bytes=CHUNK_BYTES):
+    """Encode an iterable of row lists as CSV, yielding UTF-8 chunks of roughly chunk_bytes"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= chunk_bytes:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def csv_response(rows, filename):
+    """Chunked text/csv attachment generated lazily from an iterable of row lists"""
+    return Response(stream_with_context(iter_csv(rows)), mimetype='text/csv',
+                    headers=_attachment_headers(filename))
+
+
+def iter_file_chunks(path, chunk_bytes=CHUNK_BYTES, delete=True):
+    """Yield a file in fixed-size chunks, removing it afterwards"""
+    try:
+        with open(path, 'rb') as handle:
+            while True:
+                chunk = handle.read(chunk_bytes)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        if delete:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+
+def xlsx_response(write_workbook, filename):
+    """Build an .xlsx with write_workbook(workbook) in constant_memory mode and stream it.
+
+    Rows must be written in ascending order, as constant_memory requires.
+    The workbook is finished before the response is returned, so errors
+    surface to the caller (which can fall back to CSV) instead of mid-download.
+    """
+    import xlsxwriter
+
+    handle, path = tempfile.mkstemp(suffix='.xlsx', prefix='export_')
+    os.close(handle)
+    try:
+        workbook = xlsxwriter.Workbook(path, {'constant_memory': True, 'tmpdir': tempfile.gettempdir()})
+        try:
+            write_workbook(workbook)
+        finally:
+            workbook.close()
+        length = os.path.getsize(path)
+    except Exception:
+        os.unlink(path)
+        raise
+    return Response(iter_file_chunks(path), mimetype=XLSX_MIMETYPE,
+                    headers=_attachment_headers(filename, length), direct_passthrough=True)
@@ -0,0 +1,99 @@
+"""
+Thread-safe Supabase client provider.
+
+A supabase-py client is not safe to share between concurrent requests: a
+sign-in on it switches its PostgREST Authorization header to that user's
+token, and a shared httpx client has its base URL and headers overwritten
+by every client built on it. ``ClientProvider`` therefore gives each thread
+its own client for one key, built lazily and kept for the thread's life so
+its HTTP connections stay open between requests (gthread workers reuse
+their threads). Auth flows get a private, throwaway client from
+``auth_client()`` whose session never touches a shared client.
+
+The provider stands in for a client: ``provider.table(...)`` and the other
+attributes resolve to the calling thread's client. Clients are dropped
+after a fork so a worker never inherits its parent's connections.
+"""
+import os
+import threading
+from contextlib import contextmanager
+
+
+class ClientProvider:
+    """Per-thread Supabase clients for one URL/key, plus private clients for auth flows"""
+
+    def __init__(self, url, key, factory=None, options_factory=None, name='supabase'):
+        if factory is None:
+            from supabase import create_client as factory
+        if options_factory is None:
+            options_factory = _server_side_options
+        self.url = url
+        self.key = key
+        self.name = name
+        self._factory = factory
+        self._options_factory = options_factory
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.counters = {'clients': 0, 'auth_clients': 0}
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self.reset)
+
+    def _new_client(self):
+        options = self._options_factory()
+        return self._factory(self.url, self.key, options) if options is not None else self._factory(self.url, self.key)
+
+    def get(self):
+        """The calling thread's client, created on first use"""
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self._new_client()
+            with self._lock:
+                self.counters['clients'] += 1
+        return client
+
+    def __getattr__(self, attribute):
+        if attribute.startswith('__'):
+            raise AttributeError(attribute)
+        return getattr(self.get(), attribute)
+
+    @contextmanager
+    def auth_client(self):
+        """A client used for one sign-in/sign-up/sign-out and then discarded"""
+        client = self._new_client()
+        with self._lock:
+            self.counters['auth_clients'] += 1
+        try:
+            yield client
+        finally:
+            _close(client)
+
+    def reset(self):
+        """Forget every thread's client (after a fork, or when the key changes)"""
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def stats(self):
+        with self._lock:
+            return {'name': self.name, **self.counters}
+
+
+def _server_side_options():
+    """Options for a server: no session persistence or background token refresh"""
+    try:
+        from supabase import ClientOptions
+    except ImportError:
+        return None
+    return ClientOptions(persist_session=False, auto_refresh_token=False)
+
+
+def _close(client):
+    """Close the HTTP connections a throwaway client opened"""
+    for attribute in ('_postgrest', 'auth'):
+        component = getattr(client, attribute, None)
+        session = getattr(component, 'session', None) or getattr(component, '_http_client', None)
+        close = getattr(session, 'close', None)
+        if callable(close):
+            try:
+                close()
+            except Exception:
+                pass
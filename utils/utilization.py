@@ -0,0 +1,188 @@
+"""
+Room utilization engine.
+
+Bookings are bucketed per room in a single pass into array-backed start/end
+columns (``array('d')`` of epoch seconds), sorted and merged so overlapping
+bookings of one room are not counted twice, and then clipped to the report
+range and to each day's business hours. A booking that starts before the
+range, ends after it, or runs over several days contributes only the
+business hours it actually occupies inside the range.
+
+The result holds three occupancy views:
+
+- per room: booked hours and utilization over the whole range;
+- per room and day: booked hours for each day of the range;
+- per room and business hour: hours booked in each hour-of-day slot summed
+  over the range (divide by the day count for an occupancy rate).
+
+Work is proportional to the bookings in range plus the days and hour slots
+they actually touch, not to rooms x bookings.
+"""
+from array import array
+from datetime import datetime, timedelta, timezone
+
+from utils.booking_index import to_timestamp
+
+DAY_SECONDS = 86400
+HOUR_SECONDS = 3600
+
+
+class UtilizationMatrix:
+    """Booked business hours per room, per room-day and per room-hour for a date range"""
+
+    def __init__(self, start_date, end_date, open_hour, close_hour, utc_offset_hours):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.open_hour = open_hour
+        self.close_hour = close_hour
+        self.day_count = (end_date - start_date).days + 1
+        self.hours = list(range(open_hour, close_hour))
+        self.hours_per_day = close_hour - open_hour
+        local = timezone(timedelta(hours=utc_offset_hours))
+        self.range_start = datetime.combine(start_date, datetime.min.time()).replace(tzinfo=local).timestamp()
+        self.range_end = self.range_start + self.day_count * DAY_SECONDS
+        self.daily = {}    # room_id -> array('d') of booked hours per day
+        self.hourly = {}   # room_id -> array('d') of booked hours per business-hour slot
+        self.booked = {}   # room_id -> booked hours over the range
+        self.booking_counts = {}  # room_id -> bookings overlapping the range
+
+    @property
+    def days(self):
+        return [self.start_date + timedelta(days=offset) for offset in range(self.day_count)]
+
+    @property
+    def available_hours(self):
+        """Business hours one room offers over the range"""
+        return self.day_count * self.hours_per_day
+
+    def _room(self, room_id):
+        if room_id not in self.daily:
+            self.daily[room_id] = array('d', bytes(8 * self.day_count))
+            self.hourly[room_id] = array('d', bytes(8 * self.hours_per_day))
+            self.booked[room_id] = 0.0
+            self.booking_counts[room_id] = 0
+        return self.daily[room_id], self.hourly[room_id]
+
+    def add_interval(self, room_id, start, end):
+        """Add one merged busy interval (epoch seconds) clipped to the range and business hours"""
+        start = max(start, self.range_start)
+        end = min(end, self.range_end)
+        if end <= start:
+            return
+        daily, hourly = self._room(room_id)
+        open_offset = self.open_hour * HOUR_SECONDS
+        close_offset = self.close_hour * HOUR_SECONDS
+        first_day = int((start - self.range_start) // DAY_SECONDS)
+        last_day = int((end - self.range_start - 1e-9) // DAY_SECONDS)
+        booked = 0.0
+        for day in range(first_day, last_day + 1):
+            day_start = self.range_start + day * DAY_SECONDS
+            window_start = max(start, day_start + open_offset)
+            window_end = min(end, day_start + close_offset)
+            if window_end <= window_start:
+                continue
+            daily[day] += (window_end - window_start) / HOUR_SECONDS
+            booked += window_end - window_start
+            # Only the hour slots this window touches
+            first_slot = int((window_start - day_start - open_offset) // HOUR_SECONDS)
+            last_slot = int((window_end - day_start - open_offset - 1e-9) // HOUR_SECONDS)
+            for slot in range(first_slot, last_slot + 1):
+                slot_start = day_start + open_offset + slot * HOUR_SECONDS
+                overlap = min(window_end, slot_start + HOUR_SECONDS) - max(window_start, slot_start)
+                if overlap > 0:
+                    hourly[slot] += overlap / HOUR_SECONDS
+        self.booked[room_id] += booked / HOUR_SECONDS
+
+    def room_hours(self, room_id):
+        return self.booked.get(room_id, 0.0)
+
+    def room_utilization(self, room_id):
+        """Booked share of the room's business hours, as a percentage"""
+        available = self.available_hours
+        return self.room_hours(room_id) / available * 100 if available else 0.0
+
+    def day_totals(self):
+        """Booked hours per day across all rooms"""
+        totals = array('d', bytes(8 * self.day_count))
+        for daily in self.daily.values():
+            for day, hours in enumerate(daily):
+                totals[day] += hours
+        return totals
+
+    def hour_occupancy(self, room_id):
+        """Share of days each business-hour slot was booked, 0..1"""
+        hourly = self.hourly.get(room_id)
+        if hourly is None or not self.day_count:
+            return [0.0] * self.hours_per_day
+        return [hours / self.day_count for hours in hourly]
+
+    def to_dict(self, room_ids=None):
+        """JSON-friendly matrices; rooms without bookings are included when listed in room_ids"""
+        room_ids = list(room_ids) if room_ids is not None else sorted(self.daily, key=str)
+        empty_days = [0.0] * self.day_count
+        empty_hours = [0.0] * self.hours_per_day
+        return {
+            'start_date': self.start_date.isoformat(),
+            'end_date': self.end_date.isoformat(),
+            'days': [day.isoformat() for day in self.days],
+            'hours': self.hours,
+            'available_hours_per_room': self.available_hours,
+            'rooms': [{
+                'room_id': room_id,
+                'booked_hours': round(self.room_hours(room_id), 2),
+                'utilization_pct': round(self.room_utilization(room_id), 1),
+                'bookings': self.booking_counts.get(room_id, 0),
+                'daily_hours': [round(hours, 2) for hours in self.daily.get(room_id, empty_days)],
+                'hourly_hours': [round(hours, 2) for hours in self.hourly.get(room_id, empty_hours)]
+            } for room_id in room_ids]
+        }
+
+
+def _merged_intervals(starts, ends):
+    """Union of intervals given as parallel start/end arrays"""
+    order = sorted(range(len(starts)), key=starts.__getitem__)
+    merged_start = merged_end = None
+    for index in order:
+        start, end = starts[index], ends[index]
+        if merged_end is not None and start <= merged_end:
+            merged_end = max(merged_end, end)
+            continue
+        if merged_end is not None:
+            yield merged_start, merged_end
+        merged_start, merged_end = start, end
+    if merged_end is not None:
+        yield merged_start, merged_end
+
+
+def compute_utilization(bookings, start_date, end_date, open_hour=8, close_hour=18, utc_offset_hours=0):
+    """Build a UtilizationMatrix for local days start_date..end_date from booking rows.
+
+    Rows need room_id, start_time and end_time; cancelled bookings and rows
+    with missing or inverted times are skipped.
+    """
+    matrix = UtilizationMatrix(start_date, end_date, open_hour, close_hour, utc_offset_hours)
+
+    # One pass: bucket the start/end columns per room
+    columns = {}
+    for booking in bookings:
+        if booking.get('status') == 'cancelled' or booking.get('room_id') is None:
+            continue
+        try:
+            start = to_timestamp(booking.get('start_time'))
+            end = to_timestamp(booking.get('end_time'))
+        except (TypeError, ValueError):
+            continue
+        if start is None or end is None or end <= start:
+            continue
+        if end <= matrix.range_start or start >= matrix.range_end:
+            continue
+        starts, ends = columns.setdefault(booking['room_id'], (array('d'), array('d')))
+        starts.append(start)
+        ends.append(end)
+
+    for room_id, (starts, ends) in columns.items():
+        matrix._room(room_id)
+        matrix.booking_counts[room_id] = len(starts)
+        for start, end in _merged_intervals(starts, ends):
+            matrix.add_interval(room_id, start, end)
+    return matrix